@@ -0,0 +1,132 @@
+"""Controle de admissão das predições dentro de um worker (load shedding).
+
+Com workers síncronos, uma rajada acima da capacidade fica na fila do socket
+do gunicorn (ou do nginx) sem nenhum limite: cada requisição espera todas as
+anteriores, a latência sobe até o timeout e o /health passa a falhar. O
+`AdmissionController` recusa cedo (429 com Retry-After) a requisição que não
+seria atendida dentro de `latency_budget` segundos, e a fila se esvazia no
+ritmo das recusas, que custam microssegundos, e não no das predições.
+
+A estimativa de latência de uma requisição que chega é
+
+    espera na fila + trabalho em andamento no worker + tempo de serviço dela
+
+O tempo de serviço é a média móvel exponencial das requisições admitidas,
+por tipo (`kind`: predição unitária, lote) e por unidade: um lote de N itens
+custa N x o tempo médio por item dos lotes. O trabalho em andamento soma as
+unidades admitidas e ainda não concluídas de cada tipo. A espera na fila vem
+do cabeçalho `X-Request-Start` que o proxy adiciona
+(`proxy_set_header X-Request-Start "t=${msec}"` no nginx.conf); sem ele, só
+o trabalho em andamento no worker (workers gthread) entra na conta. Em
+workers síncronos quase não há trabalho em andamento: espera na fila +
+tempo de serviço decidem.
+
+A única exceção é a requisição que sozinha já passa do orçamento (um modelo
+mais lento, um lote grande): ela é admitida em um worker ocioso enquanto a
+espera na fila couber no orçamento; sem isso seria recusada sempre e a média
+nunca seria atualizada.
+"""
+import math
+import time
+import threading
+
+DEFAULT_LATENCY_BUDGET = 1.0
+DEFAULT_SMOOTHING = 0.2
+DEFAULT_KIND = 'predict'
+
+# Timestamps maiores que estes estão em microssegundos/milissegundos, e não em segundos
+_MICROSECONDS_THRESHOLD = 1e14
+_MILLISECONDS_THRESHOLD = 1e11
+
+
+def queue_seconds(request_start, now=None):
+    """Espera na fila a partir de `X-Request-Start` (`t=<epoch>` em s, ms ou µs); 0.0 se ausente ou inválido"""
+    if not request_start:
+        return 0.0
+    try:
+        started = float(request_start.strip().removeprefix('t='))
+    except ValueError:
+        return 0.0
+    if started > _MICROSECONDS_THRESHOLD:
+        started /= 1e6
+    elif started > _MILLISECONDS_THRESHOLD:
+        started /= 1e3
+    # Relógios de proxy e aplicação levemente fora de sincronia não geram espera negativa
+    return max(0.0, (time.time() if now is None else now) - started)
+
+
+class AdmissionController:
+    """Requisições em andamento e tempo de serviço recente de um worker.
+
+    `admit(queued, kind, units)` devolve None quando a requisição pode ser
+    atendida (e a conta como em andamento) ou `(motivo, retry_after)` quando
+    deve ser recusada; toda requisição admitida chama
+    `release(segundos de serviço, kind, units)` ao terminar. `max_in_flight`
+    (0 = sem limite) limita as requisições simultâneas no worker, seja qual
+    for a estimativa.
+    """
+
+    def __init__(self, latency_budget=DEFAULT_LATENCY_BUDGET, max_in_flight=0, smoothing=DEFAULT_SMOOTHING):
+        self.latency_budget = latency_budget
+        self.max_in_flight = max_in_flight
+        self.smoothing = smoothing
+        self.in_flight = 0
+        # Por tipo: tempo médio de serviço por unidade e unidades em andamento
+        self.service_times = {}
+        self.in_flight_units = {}
+        self._lock = threading.Lock()
+
+    @property
+    def service_time(self):
+        """Tempo médio de serviço de uma predição unitária"""
+        return self.service_times.get(DEFAULT_KIND, 0.0)
+
+    @service_time.setter
+    def service_time(self, seconds):
+        self.service_times[DEFAULT_KIND] = seconds
+
+    def pending(self):
+        """Segundos estimados do trabalho admitido e ainda em andamento no worker"""
+        return sum(units * self.service_times.get(kind, 0.0) for kind, units in self.in_flight_units.items())
+
+    def estimate(self, queued=0.0, kind=DEFAULT_KIND, units=1):
+        """Latência estimada de uma requisição que chega agora, depois de `queued` segundos na fila"""
+        return queued + self.pending() + units * self.service_times.get(kind, 0.0)
+
+    def admit(self, queued=0.0, kind=DEFAULT_KIND, units=1):
+        with self._lock:
+            if self.max_in_flight and self.in_flight >= self.max_in_flight:
+                return 'max_in_flight', self._retry_after(self.pending())
+            estimate = self.estimate(queued, kind, units)
+            # Requisição que sozinha passa do orçamento: só em worker ocioso e sem fila acima do orçamento
+            oversized = units * self.service_times.get(kind, 0.0) > self.latency_budget
+            idle = oversized and self.in_flight == 0 and queued <= self.latency_budget
+            if estimate > self.latency_budget and not idle:
+                return 'latency_budget', self._retry_after(estimate - self.latency_budget)
+            self.in_flight += 1
+            self.in_flight_units[kind] = self.in_flight_units.get(kind, 0) + units
+            return None
+
+    def release(self, service_seconds, kind=DEFAULT_KIND, units=1):
+        with self._lock:
+            self.in_flight -= 1
+            self.in_flight_units[kind] -= units
+            unit_seconds = service_seconds / max(1, units)
+            if self.service_times.get(kind):
+                self.service_times[kind] += self.smoothing * (unit_seconds - self.service_times[kind])
+            else:
+                self.service_times[kind] = unit_seconds
+
+    @staticmethod
+    def _retry_after(seconds):
+        # Retry-After em segundos inteiros, pelo menos 1
+        return max(1, math.ceil(seconds))
+
+    def stats(self):
+        return {
+            'in_flight': self.in_flight,
+            'service_time_ms': self.service_time * 1000,
+            'service_time_per_unit_ms': {kind: seconds * 1000 for kind, seconds in self.service_times.items()},
+            'latency_budget_ms': self.latency_budget * 1000,
+            'max_in_flight': self.max_in_flight
+        }
@@ -1,18 +1,74 @@
+import time
+# Início das importações (fase 'import' das métricas de inicialização)
+IMPORT_STARTED = time.perf_counter()
 import os
 import json
+import heapq
+import hmac
+import hashlib
+import threading
+from functools import wraps
+from collections import OrderedDict
+import numpy as np
 import pandas as pd
 import joblib
 from pathlib import Path
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
 from prometheus_flask_exporter import PrometheusMetrics
-from prometheus_client import Counter, Histogram, Gauge
+from prometheus_flask_exporter.multiprocess import GunicornInternalPrometheusMetrics
+from prometheus_client import Counter, Histogram, Gauge, CollectorRegistry
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.exposition import choose_encoder
+from prometheus_client.multiprocess import MultiProcessCollector
+from admission import AdmissionController, queue_seconds
+from data_store import DataStore, StoreWatcher, APPLICANT_FILTERS
+from features import build_features_for_pairs, compute_features
+from json_codec import CodecJSONProvider, JsonCodec, NDJSON_MIMETYPE
+from inference import NotCompilableError, SklearnEngine, load_engine
+from model_registry import ModelRegistry, ModelVersion, ModelWatcher, validate_predictions
+from micro_batcher import MicroBatcher
+from profiling import StageTimer, StackSampler, collapsed_stacks
+from prediction_cache import PredictionCache, prediction_keys, shared_memory_dir
+from text_vectors import PairTextVectors, check_text_parity, find_text_vectorizer
+from topology import Topology, limit_native_threads
 
 # Configuração da aplicação
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'dev-secret-key-change-in-production'
 
-# Configurar métricas Prometheus
-metrics = PrometheusMetrics(app)
+# Codec JSON de requisições e respostas (orjson se instalado; JSON_CODEC=json força a biblioteca padrão)
+json_codec = JsonCodec(os.environ.get('JSON_CODEC', 'auto'))
+app.json = CodecJSONProvider(app, json_codec)
+
+class AggregatedPrometheusMetrics(GunicornInternalPrometheusMetrics):
+    """/metrics com os arquivos mmap de todos os processos e os coletores de `scrape_registry`.
+
+    O exportador original monta um registry novo a cada scrape e ignora
+    coletores customizados; aqui o registry de coleta é montado uma vez.
+    """
+
+    def __init__(self, app=None, **kwargs):
+        self.scrape_registry = CollectorRegistry()
+        MultiProcessCollector(self.scrape_registry)
+        super().__init__(app, **kwargs)
+
+    def generate_metrics(self, accept_header=None, names=None):
+        registry = self.scrape_registry.restricted_registry(names) if names else self.scrape_registry
+        generate_latest, content_type = choose_encoder(accept_header)
+        return generate_latest(registry).decode('utf-8'), content_type
+
+# Configurar métricas Prometheus. Com PROMETHEUS_MULTIPROC_DIR (definido pelo
+# gunicorn.conf.py), cada processo grava os valores em arquivos mmap nesse
+# diretório e /metrics agrega os de todos os workers, seja qual for o worker
+# que atende o scrape. Nos gauges, `multiprocess_mode` diz como agregar
+# (ignorado em processo único).
+METRICS_MULTIPROCESS = bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+if METRICS_MULTIPROCESS:
+    metrics = AggregatedPrometheusMetrics(app)
+    scrape_registry = metrics.scrape_registry
+else:
+    metrics = PrometheusMetrics(app)
+    scrape_registry = metrics.registry
 metrics.info('app_info', 'Application info', version='2.0.0')
 
 # Métricas específicas para o modelo de candidatos contratados
@@ -28,153 +84,664 @@ quality_scores = Histogram(
     buckets=[0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0]
 )
 
-model_accuracy = Gauge('hired_model_accuracy', 'Acurácia do modelo de candidatos contratados')
-model_samples = Gauge('hired_model_training_samples', 'Número de amostras usadas no treinamento')
+model_accuracy = Gauge('hired_model_accuracy', 'Acurácia do modelo de candidatos contratados',
+                       multiprocess_mode='livemostrecent')
+model_samples = Gauge('hired_model_training_samples', 'Número de amostras usadas no treinamento',
+                      multiprocess_mode='livemostrecent')
+
+batch_sizes = Histogram(
+    'hired_model_batch_size',
+    'Número de itens por requisição de predição em lote',
+    buckets=[1, 5, 10, 25, 50, 100, 250, 500, 1000]
+)
+
+rank_latency = Histogram(
+    'hired_model_rank_duration_seconds',
+    'Tempo para ranquear os candidatos de uma vaga',
+    buckets=[0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+)
+
+batch_item_latency = Histogram(
+    'hired_model_batch_item_latency_seconds',
+    'Latência média por item nas predições em lote',
+    buckets=[0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25]
+)
+
+response_encode_seconds = Histogram(
+    'hired_model_response_encode_seconds_per_row',
+    'Tempo de codificação JSON da resposta por linha de resultado',
+    ['endpoint', 'schema', 'encoding'],
+    buckets=[0.0000005, 0.000001, 0.0000025, 0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.001]
+)
+
+response_row_bytes = Histogram(
+    'hired_model_response_bytes_per_row',
+    'Bytes da resposta por linha de resultado',
+    ['endpoint', 'schema', 'encoding'],
+    buckets=[32, 64, 128, 256, 512, 1024, 2048, 4096]
+)
+
+inference_engine_active = Gauge(
+    'hired_model_inference_engine',
+    'Motor de inferência ativo (workers usando cada motor)',
+    ['engine'],
+    multiprocess_mode='livesum'
+)
+engine_parity_diff = Gauge(
+    'hired_model_engine_parity_max_abs_diff',
+    'Maior diferença de probabilidade entre o motor ativo e o sklearn na verificação de paridade',
+    multiprocess_mode='livemax'
+)
+
+prediction_cache_hits = Counter(
+    'hired_model_prediction_cache_hits_total',
+    'Predições vaga/candidato servidas pelo cache compartilhado'
+)
+prediction_cache_misses = Counter(
+    'hired_model_prediction_cache_misses_total',
+    'Predições vaga/candidato calculadas por não estarem no cache'
+)
+prediction_cache_evictions = Counter(
+    'hired_model_prediction_cache_evictions_total',
+    'Entradas removidas do cache de predições',
+    ['reason']
+)
+
+startup_phase_seconds = Gauge(
+    'hired_model_startup_phase_seconds',
+    'Duração de cada fase da inicialização (import, data, unpickle, engine, validate, warmup)',
+    ['phase'],
+    multiprocess_mode='max'
+)
+
+model_load_duration = Histogram(
+    'hired_model_load_duration_seconds',
+    'Tempo para carregar, validar e aquecer uma versão do modelo',
+    buckets=[0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0]
+)
+model_version_active = Gauge(
+    'hired_model_version_active',
+    'Versão do modelo ativa (workers servindo cada versão)',
+    ['version', 'fingerprint'],
+    multiprocess_mode='livesum'
+)
+model_swaps = Counter(
+    'hired_model_swaps_total',
+    'Trocas da versão ativa do modelo sem reiniciar o processo',
+    ['action']
+)
+model_reload_failures = Counter(
+    'hired_model_reload_failures_total',
+    'Versões do modelo rejeitadas na carga ou na validação'
+)
+
+microbatch_queue_depth = Histogram(
+    'hired_model_microbatch_queue_depth',
+    'Requisições na fila do micro-batching quando um lote é formado',
+    buckets=[1, 2, 4, 8, 16, 32, 64, 128]
+)
+microbatch_size = Histogram(
+    'hired_model_microbatch_size',
+    'Linhas por inferência do micro-batching',
+    buckets=[1, 2, 4, 8, 16, 32, 64, 128]
+)
+microbatch_wait = Histogram(
+    'hired_model_microbatch_wait_seconds',
+    'Espera na fila do micro-batching até o início da inferência',
+    buckets=[0.0001, 0.0005, 0.001, 0.002, 0.003, 0.005, 0.01, 0.025, 0.05, 0.1]
+)
+
+admission_in_flight = Gauge(
+    'hired_model_admission_in_flight',
+    'Predições admitidas em andamento (soma dos workers)',
+    multiprocess_mode='livesum'
+)
+admission_shed = Counter(
+    'hired_model_admission_shed_total',
+    'Predições recusadas com 429 pelo controle de admissão',
+    ['reason']
+)
+admission_queue_seconds = Histogram(
+    'hired_model_admission_queue_seconds',
+    'Espera na fila antes do worker (cabeçalho X-Request-Start do proxy)',
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+)
+
+topology_setting = Gauge(
+    'hired_model_topology',
+    'Topologia de CPU do servidor (cpus, workers, worker_threads, inference_threads, native_threads, '
+    'parallel_min_rows)',
+    ['setting'],
+    multiprocess_mode='max'
+)
+inference_calls = Counter(
+    'hired_model_inference_calls_total',
+    'Chamadas da floresta por modo (single: uma thread; parallel: linhas divididas entre as threads de inferência)',
+    ['mode']
+)
+
+data_refreshes = Counter(
+    'hired_model_data_refreshes_total',
+    'Atualizações dos dados do store sem reinício (incremental: deltas; full: store regerado ou compactado)',
+    ['mode']
+)
+data_refresh_duration = Histogram(
+    'hired_model_data_refresh_seconds',
+    'Tempo para aplicar deltas do store no processo (tabelas, contagens de texto e cache do ranking)',
+    ['mode'],
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+)
+
+stage_duration = Histogram(
+    'hired_model_stage_duration_seconds',
+    'Tempo de cada etapa das predições (parse, cache, features, transform, forest, response...) por caminho',
+    ['path', 'stage'],
+    buckets=[0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5]
+)
+startup_phase_seconds.labels(phase='import').set(time.perf_counter() - IMPORT_STARTED)
 
 # Caminhos dos arquivos
 BASE_DIR = Path(__file__).parent
 
-# Variáveis globais para modelo
-pipeline_model = None
+# Limite de itens por requisição em /api/predict/batch
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', '1000'))
+
+# Respostas em NDJSON (Accept: application/x-ndjson): linhas enviadas a cada bloco pontuado
+STREAM_CHUNK_SIZE = int(os.environ.get('STREAM_CHUNK_SIZE', '256'))
+MAX_STREAM_BATCH_SIZE = int(os.environ.get('MAX_STREAM_BATCH_SIZE', '50000'))
+
+# Esquemas de resposta (?schema=): 'full' com textos formatados, 'compact' só com números
+RESPONSE_SCHEMAS = ('full', 'compact')
+
+# Campos obrigatórios do formato de features diretas (versão anterior da API)
+DIRECT_REQUIRED_FIELDS = ['tech_match_score', 'nivel_profissional', 'areas_atuacao',
+                          'area_de_atuacao', 'academic_match', 'english_match', 'combined_text']
+
+# Ranking de candidatos por vaga
+RANK_CHUNK_SIZE = int(os.environ.get('RANK_CHUNK_SIZE', '4096'))
+MAX_RANK_K = int(os.environ.get('MAX_RANK_K', '100'))
+RANK_CACHE_SIZE = int(os.environ.get('RANK_CACHE_SIZE', '32'))
+
+# Motor de inferência: 'compiled' (árvores achatadas em NumPy) ou 'sklearn'
+INFERENCE_ENGINE = os.environ.get('INFERENCE_ENGINE', 'compiled')
+PARITY_SAMPLE_SIZE = int(os.environ.get('PARITY_SAMPLE_SIZE', '1000'))
+
+# Cache de predições compartilhado entre workers (SQLite em /dev/shm por padrão)
+PREDICTION_CACHE_ENABLED = os.environ.get('PREDICTION_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+PREDICTION_CACHE_PATH = os.environ.get('PREDICTION_CACHE_PATH')
+PREDICTION_CACHE_MAX_BYTES = int(os.environ.get('PREDICTION_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+PREDICTION_CACHE_TTL = float(os.environ.get('PREDICTION_CACHE_TTL', '3600'))
+
+# Modelo e floresta compilada mapeados em memória: páginas compartilhadas entre os workers
+MODEL_MMAP_MODE = os.environ.get('MODEL_MMAP_MODE', 'r') or None
+COMPILED_ARRAYS_DIR = os.environ.get('COMPILED_ARRAYS_DIR', os.path.join(shared_memory_dir(), 'otimizador-compiled'))
+
+# TF-IDF decomposto no ranking: contagens de termos por vaga e por candidato somadas por par
+TEXT_VECTORS = os.environ.get('TEXT_VECTORS', 'true').lower() in ('1', 'true', 'yes')
+
+# Micro-batching de predições simultâneas (opcional; requer GUNICORN_THREADS > 1)
+MICRO_BATCHING = os.environ.get('MICRO_BATCHING', 'false').lower() in ('1', 'true', 'yes')
+MICRO_BATCH_MAX_SIZE = int(os.environ.get('MICRO_BATCH_MAX_SIZE', '32'))
+MICRO_BATCH_MAX_WAIT_MS = float(os.environ.get('MICRO_BATCH_MAX_WAIT_MS', '3'))
+
+# Controle de admissão de /api/predict: 429 quando a latência estimada passaria do orçamento
+ADMISSION_CONTROL = os.environ.get('ADMISSION_CONTROL', 'true').lower() in ('1', 'true', 'yes')
+ADMISSION_LATENCY_BUDGET_MS = float(os.environ.get('ADMISSION_LATENCY_BUDGET_MS', '1000'))
+ADMISSION_MAX_IN_FLIGHT = int(os.environ.get('ADMISSION_MAX_IN_FLIGHT', '0'))
+
+# Topologia de CPU (topology.py): sem gunicorn, um único processo usa todas as CPUs na inferência
+topology = Topology.from_env(default_workers=1)
+native_thread_pools = limit_native_threads(topology.native_threads)
+for setting, value in topology.to_dict().items():
+    if setting != 'cpu_source':
+        topology_setting.labels(setting=setting).set(value)
+
+# Intervalo (s) da verificação de deltas no store (ingest.py apply/compact); 0 desliga
+DATA_WATCH_INTERVAL = float(os.environ.get('DATA_WATCH_INTERVAL', '5'))
+
+# Versões do modelo (models/versions/<versão>, ponteiro models/CURRENT) e troca a quente
+MODELS_DIR = os.environ.get('MODELS_DIR', os.path.join(BASE_DIR, 'models'))
+MODEL_WATCH_INTERVAL = float(os.environ.get('MODEL_WATCH_INTERVAL', '5'))
+
+# Token dos endpoints /admin (sem token, os endpoints ficam desabilitados)
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+# Profiling por amostragem sob demanda (/admin/profile); perfis gravados em diretório compartilhado
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(shared_memory_dir(), 'otimizador-profiles'))
+PROFILE_MAX_SECONDS = float(os.environ.get('PROFILE_MAX_SECONDS', '60'))
+PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', '5'))
+
+# Par usado na predição de aquecimento (passa por todas as etapas do pipeline)
+WARMUP_PAIR = (
+    {'titulo_vaga': 'Desenvolvedor Python', 'competencias_tecnicas_requeridas': 'python sql docker',
+     'nivel_academico': 'Ensino Superior Completo', 'nivel_ingles': 'Avançado', 'nivel_profissional': 'Pleno',
+     'tipo_contratacao': 'CLT Full', 'areas_atuacao': 'TI - Desenvolvimento/Programação'},
+    {'conhecimentos_tecnicos': 'python django sql', 'nivel_academico': 'Ensino Superior Completo',
+     'nivel_ingles': 'Intermediário', 'area_de_atuacao': 'TI - Desenvolvimento/Programação'}
+)
+
+# Lote de validação de novas versões: o par de aquecimento e casos com campos vazios ou desconhecidos
+SMOKE_PAIRS = [
+    WARMUP_PAIR,
+    ({}, {}),
+    ({'titulo_vaga': 'Consultor SAP', 'tipo_contratacao': 'PJ/Autônomo', 'areas_atuacao': 'Área nunca vista'},
+     {'conhecimentos_tecnicos': 'sap abap', 'nivel_ingles': 'Fluente', 'area_de_atuacao': 'Administrativa'})
+]
+
+# Features guardadas no cache (as usadas na resposta detalhada)
+CACHED_FEATURES = ['tech_success_score', 'academic_success_score', 'english_success_score',
+                   'is_clt', 'is_pj', 'is_tech_area']
+
+# Variáveis globais para modelo e dados
+# (cada requisição lê model_registry.active uma única vez e usa essa versão até o fim)
+model_registry = ModelRegistry(MODELS_DIR)
+model_watcher = None
+store_watcher = None
+data_store = DataStore()
+
+# Cargas/trocas de versão serializadas; estado da última para /admin/model
+reload_lock = threading.Lock()
+last_reload = {}
+
+# Scores de todos os candidatos por vaga (LRU) por (versão do modelo, vaga), válidos para os dados atuais.
+# Usado pelas threads de requisição e pelos watchers de modelo e dados: todo acesso passa por rank_cache_lock
+rank_score_cache = OrderedDict()
+rank_cache_lock = threading.Lock()
+
+def rank_cache_get(key):
+    """Varredura em cache (marcada como a mais recente), ou None"""
+    with rank_cache_lock:
+        cached = rank_score_cache.pop(key, None)
+        if cached is not None:
+            rank_score_cache[key] = cached
+        return cached
+
+def rank_cache_put(key, scores, store):
+    """Guarda a varredura feita sobre `store`; descartada se os dados já foram trocados (refresh_data)"""
+    with rank_cache_lock:
+        if store is not data_store:
+            return
+        rank_score_cache.pop(key, None)
+        rank_score_cache[key] = scores
+        while len(rank_score_cache) > RANK_CACHE_SIZE:
+            rank_score_cache.popitem(last=False)
+
+def rank_cache_contains(key):
+    with rank_cache_lock:
+        return key in rank_score_cache
+
+def rank_cache_discard(vagas=None):
+    """Descarta as varreduras das vagas informadas (todas, sem `vagas`)"""
+    with rank_cache_lock:
+        if vagas is None:
+            rank_score_cache.clear()
+            return
+        for key in [key for key in rank_score_cache if key[1] in vagas]:
+            del rank_score_cache[key]
+
+def count_cache_evictions(reason, count):
+    prediction_cache_evictions.labels(reason=reason).inc(count)
+
+prediction_cache = PredictionCache(
+    PREDICTION_CACHE_PATH, PREDICTION_CACHE_MAX_BYTES, PREDICTION_CACHE_TTL, on_evict=count_cache_evictions
+) if PREDICTION_CACHE_ENABLED else None
+
+def record_micro_batch(queue_depth, rows, waits):
+    microbatch_queue_depth.observe(queue_depth)
+    microbatch_size.observe(rows)
+    for wait in waits:
+        microbatch_wait.observe(wait)
+
+micro_batcher = MicroBatcher(
+    MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_WAIT_MS / 1000, on_batch=record_micro_batch
+) if MICRO_BATCHING else None
+
+stack_sampler = StackSampler(PROFILE_DIR)
+
+admission = AdmissionController(
+    ADMISSION_LATENCY_BUDGET_MS / 1000, ADMISSION_MAX_IN_FLIGHT
+) if ADMISSION_CONTROL else None
+
+@app.before_request
+def track_request_thread():
+    # Threads atendendo requisições são as amostradas pelo profiling
+    stack_sampler.track()
+
+@app.teardown_request
+def untrack_request_thread(exc):
+    stack_sampler.untrack()
+
+class PredictionCacheCollector:
+    """Tamanho do cache lido do arquivo compartilhado no momento da coleta.
+
+    O SQLite é o mesmo para todos os workers, então o valor vem do worker que
+    atende o scrape, sem passar pelos arquivos mmap (set_function não existe
+    no modo multiprocesso).
+    """
+
+    def collect(self):
+        if prediction_cache is None:
+            return
+        stats = prediction_cache.stats()
+        yield GaugeMetricFamily('hired_model_prediction_cache_size_bytes',
+                                'Bytes ocupados pelas entradas do cache de predições (todos os workers)',
+                                value=stats['bytes'])
+        yield GaugeMetricFamily('hired_model_prediction_cache_entries',
+                                'Entradas no cache de predições (todos os workers)',
+                                value=stats['entries'])
+
+scrape_registry.register(PredictionCacheCollector())
 
 def prepare_hired_candidates_features(vaga_row, candidate_row):
     """Prepara features baseadas em padrões de candidatos contratados"""
+    return build_features_for_pairs([(vaga_row, candidate_row)])
+
+def prepare_hired_candidates_features_batch(pairs):
+    """Prepara um único DataFrame com N linhas a partir de pares (vaga, candidato)"""
+    return build_features_for_pairs(pairs)
+
+def parity_positions(size=PARITY_SAMPLE_SIZE, n_vagas=10):
+    """Posições das vagas e dos candidatos da amostra de paridade (cada vaga com todos os candidatos)"""
+    n_vagas = min(n_vagas, data_store.vagas.n_rows)
+    per_vaga = max(1, size // n_vagas)
+    vaga_positions = np.linspace(0, data_store.vagas.n_rows - 1, n_vagas).astype(int)
+    applicant_positions = np.linspace(0, data_store.n_applicants - 1, min(per_vaga, data_store.n_applicants)).astype(int)
+    return vaga_positions, applicant_positions
+
+def build_parity_sample(size=PARITY_SAMPLE_SIZE, n_vagas=10):
+    """Pares vaga x candidato do data store para comparar os motores de inferência"""
+    if not data_store.vagas_loaded or not data_store.candidates_loaded or size < 1:
+        return None
     
-    def calculate_tech_success_score(competencias_vaga, conhecimentos_cand):
-        """Calcula compatibilidade técnica baseada em padrões de contratação"""
-        comp_vaga = str(competencias_vaga).lower() if competencias_vaga else ''
-        conhec_cand = str(conhecimentos_cand).lower() if conhecimentos_cand else ''
-        
-        if not comp_vaga or not conhec_cand:
-            return 0.5
-        
-        # Tecnologias mais valorizadas em contratações
-        high_value_techs = ['python', 'java', 'javascript', 'react', 'angular', 'sql', 
-                           'aws', 'docker', 'kubernetes', 'spring', 'django', 'flask']
-        
-        comp_words = set(comp_vaga.split())
-        conhec_words = set(conhec_cand.split())
-        
-        # Score básico de match
-        if len(comp_words) == 0:
-            return 0.5
-        
-        basic_match = len(comp_words.intersection(conhec_words)) / len(comp_words)
-        
-        # Bonus para tecnologias de alto valor
-        high_value_matches = sum(1 for tech in high_value_techs 
-                               if tech in comp_vaga and tech in conhec_cand)
-        tech_bonus = min(0.3, high_value_matches * 0.1)
-        
-        return min(1.0, basic_match + tech_bonus)
+    vaga_positions, applicant_positions = parity_positions(size, n_vagas)
+    applicants = data_store.applicant_columns(applicant_positions)
+    frames = [
+        compute_features(vaga, applicants, len(applicant_positions))
+        for vaga in data_store.vagas.records(vaga_positions)
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+def load_inference_engine(pipeline, fingerprint):
+    """Cria o motor de inferência configurado e registra o resultado da paridade"""
+    arrays_dir = os.path.join(COMPILED_ARRAYS_DIR, fingerprint) if COMPILED_ARRAYS_DIR else None
+    try:
+        engine, report = load_engine(pipeline, INFERENCE_ENGINE, build_parity_sample(), arrays_dir=arrays_dir)
+    except Exception as e:
+        print(f"⚠️ Erro ao criar motor de inferência '{INFERENCE_ENGINE}': {e}")
+        engine = SklearnEngine(pipeline)
+        report = {'requested': INFERENCE_ENGINE, 'engine': 'sklearn', 'parity': None, 'fallback_reason': str(e)}
     
-    def calculate_academic_success_score(nivel_vaga, nivel_cand):
-        """Calcula score acadêmico baseado em padrões de contratação"""
-        nivel_vaga = str(nivel_vaga).lower() if nivel_vaga else ''
-        nivel_cand = str(nivel_cand).lower() if nivel_cand else ''
-        
-        hierarchy = {
-            'fundamental': 1, 'médio': 2, 'técnico': 3,
-            'superior': 4, 'pós': 5, 'mestrado': 6, 'doutorado': 7
-        }
-        
-        vaga_level = max([v for k, v in hierarchy.items() if k in nivel_vaga] or [3])
-        cand_level = max([v for k, v in hierarchy.items() if k in nivel_cand] or [3])
-        
-        if cand_level >= vaga_level:
-            return 1.0
-        elif cand_level >= vaga_level - 1:
-            return 0.8
-        else:
-            return 0.5
+    parity = report.get('parity')
+    print(f"✅ Motor de inferência: {engine.name}")
+    if parity:
+        print(f"   Paridade com sklearn: {parity['rows']:,} linhas, diferença máx. {parity['max_abs_diff']:.2e}, "
+              f"rótulos iguais {parity['label_agreement']:.1%}")
+    if report.get('fallback_reason'):
+        print(f"⚠️ Usando sklearn: {report['fallback_reason']}")
+    return engine, report
+
+def load_text_vectors(pipeline, engine, fingerprint):
+    """Contagens de texto das vagas e candidatos do data store, se o TF-IDF do modelo decompõe"""
+    vectorizer = find_text_vectorizer(pipeline)
+    if not TEXT_VECTORS or engine.name != 'compiled' or vectorizer is None \
+            or not data_store.vagas_loaded or not data_store.candidates_loaded:
+        return None
+    
+    directory = os.path.join(COMPILED_ARRAYS_DIR, f'{fingerprint}-text') if COMPILED_ARRAYS_DIR else None
+    try:
+        vectors = PairTextVectors.shared(vectorizer, data_store.vagas, data_store.applicants, directory) \
+            if directory else PairTextVectors.build(vectorizer, data_store.vagas, data_store.applicants)
+    except NotCompilableError as e:
+        print(f"⚠️ TF-IDF decomposto indisponível: {e}")
+        return None
+    
+    # Mesmos pares da paridade do motor: a matriz decomposta precisa ser idêntica à do vetorizador
+    vaga_positions, applicant_positions = parity_positions()
+    parity = check_text_parity(vectors, vectorizer, np.repeat(vaga_positions, len(applicant_positions)),
+                               np.tile(applicant_positions, len(vaga_positions)),
+                               build_parity_sample()['combined_text'].tolist())
+    if not parity['passed']:
+        print(f"⚠️ TF-IDF decomposto difere do vetorizador (diferença máx. {parity['max_abs_diff']:.2e}); "
+              f"ranking tokeniza o texto combinado")
+        return None
+    print(f"✅ TF-IDF decomposto: {vectors.n_vagas:,} vagas, {vectors.n_applicants:,} candidatos")
+    return vectors
+
+def model_fingerprint(model_path):
+    """Versão do modelo para as chaves de cache: hash do conteúdo do arquivo"""
+    digest = hashlib.sha256()
+    with open(model_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+def load_model_version(version):
+    """Carrega, valida e aquece uma versão sem tocar na versão ativa"""
+    timings = {}
+    model_path = model_registry.model_path(version)
+    
+    start_time = time.perf_counter()
+    # Arrays NumPy do pickle mapeados do arquivo (só vale para dumps sem compressão)
+    pipeline = joblib.load(model_path, mmap_mode=MODEL_MMAP_MODE)
+    fingerprint = model_fingerprint(model_path)
+    timings['unpickle'] = time.perf_counter() - start_time
+    
+    metadata = {}
+    metadata_path = model_registry.metadata_path(version)
+    if metadata_path.exists():
+        with open(metadata_path, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+    
+    start_time = time.perf_counter()
+    engine, report = load_inference_engine(pipeline, fingerprint)
+    timings['engine'] = time.perf_counter() - start_time
+    
+    start_time = time.perf_counter()
+    text_vectors = load_text_vectors(pipeline, engine, fingerprint)
+    timings['text_vectors'] = time.perf_counter() - start_time
     
-    def calculate_english_success_score(nivel_vaga, nivel_cand):
-        """Calcula score de inglês baseado em padrões de contratação"""
-        nivel_vaga = str(nivel_vaga).lower() if nivel_vaga else ''
-        nivel_cand = str(nivel_cand).lower() if nivel_cand else ''
+    # Lote de validação: também serve de aquecimento antes da troca
+    start_time = time.perf_counter()
+    validate_predictions(engine, build_features_for_pairs(SMOKE_PAIRS))
+    timings['validate'] = time.perf_counter() - start_time
+    
+    print(f"✅ Modelo de candidatos contratados carregado! (versão {version})")
+    print(f"   Tipo: {metadata.get('model_type', 'N/A')}")
+    print(f"   Acurácia: {metadata.get('accuracy', 0):.1%}")
+    print(f"   Data de treino: {metadata.get('trained_date', 'N/A')}")
+    print(f"   Hash: {fingerprint}")
+    return ModelVersion(version, model_path, pipeline, fingerprint, metadata, engine, report, timings, text_vectors)
+
+# Labels com valor 1 nos gauges da versão/motor ativos deste processo
+published_model_labels = {}
+
+def publish_active_model_metrics():
+    """Atualiza as métricas que descrevem a versão ativa"""
+    model = model_registry.active
+    model_accuracy.set(model.metadata.get('accuracy', 0))
+    model_samples.set(model.metadata.get('n_samples', 0))
+    for gauge, labels in ((model_version_active, (model.version, model.fingerprint)),
+                          (inference_engine_active, (model.engine.name,))):
+        # Zerar em vez de clear(): no modo multiprocesso a série anterior continuaria no arquivo mmap
+        previous = published_model_labels.get(gauge)
+        if previous is not None and previous != labels:
+            gauge.labels(*previous).set(0)
+        gauge.labels(*labels).set(1)
+        published_model_labels[gauge] = labels
+    parity = model.inference_report.get('parity')
+    engine_parity_diff.set(parity['max_abs_diff'] if parity else 0)
+
+def update_pointer_file(version):
+    """Aponta CURRENT para `version` para os demais workers seguirem a troca"""
+    try:
+        model_registry.set_pointer(version)
+    except OSError as e:
+        print(f"⚠️ Não foi possível atualizar {model_registry.pointer_path}: {e} (troca apenas neste worker)")
+
+def reload_model(version=None, update_pointer=False):
+    """Carrega `version` (padrão: ponteiro CURRENT) enquanto a versão atual segue servindo e troca a referência.
+    
+    Uma versão que falha na carga ou na validação é descartada e a ativa continua.
+    Se a versão pedida já é a ativa (ou a anterior, ainda em memória) com o mesmo
+    conteúdo, nada é recarregado.
+    """
+    with reload_lock:
+        version = version or model_registry.pointer()
+        if version is None:
+            raise FileNotFoundError(f'Nenhuma versão do modelo em {MODELS_DIR}')
         
-        english_levels = {
-            'básico': 1, 'intermediário': 2, 'avançado': 3, 'fluente': 4
-        }
+        last_reload.clear()
+        last_reload.update({'version': version, 'status': 'loading', 'started_at': time.time()})
+        start_time = time.perf_counter()
+        try:
+            fingerprint = model_fingerprint(model_registry.model_path(version))
+            active, previous = model_registry.active, model_registry.previous
+            if active is not None and (active.version, active.fingerprint) == (version, fingerprint):
+                model, action = active, None
+            elif previous is not None and (previous.version, previous.fingerprint) == (version, fingerprint):
+                model, action = model_registry.rollback(), 'rollback'
+            else:
+                model = load_model_version(version)
+                model_load_duration.observe(time.perf_counter() - start_time)
+                action = 'reload' if active is not None else None
+                model_registry.activate(model)
+        except Exception as e:
+            model_reload_failures.inc()
+            last_reload.update({'status': 'failed', 'error': str(e), 'finished_at': time.time()})
+            print(f"❌ Versão {version} rejeitada: {e}")
+            raise
         
-        vaga_level = max([v for k, v in english_levels.items() if k in nivel_vaga] or [1])
-        cand_level = max([v for k, v in english_levels.items() if k in nivel_cand] or [1])
+        last_reload.update({'status': 'ok', 'finished_at': time.time()})
+        if update_pointer:
+            update_pointer_file(version)
+        if action is not None:
+            model_swaps.labels(action=action).inc()
+            rank_cache_discard()
+            print(f"🔄 Versão ativa do modelo: {model.version} ({model.fingerprint})")
+        publish_active_model_metrics()
+        return model
+
+def rollback_model():
+    """Volta instantaneamente para a versão anterior (já em memória) e aponta CURRENT para ela"""
+    with reload_lock:
+        model = model_registry.rollback()
+        if model is None:
+            return None
+        update_pointer_file(model.version)
+        model_swaps.labels(action='rollback').inc()
+        rank_cache_discard()
+        publish_active_model_metrics()
+        print(f"⏪ Rollback para a versão {model.version} ({model.fingerprint})")
+        return model
+
+def start_model_watcher():
+    """Observa o ponteiro CURRENT neste processo (chamado em cada worker, após o fork)"""
+    global model_watcher
+    if MODEL_WATCH_INTERVAL <= 0 or (model_watcher is not None and model_watcher.is_alive()):
+        return model_watcher
+    model_watcher = ModelWatcher(model_registry, reload_model, MODEL_WATCH_INTERVAL)
+    model_watcher.start()
+    return model_watcher
+
+def refresh_data():
+    """Aplica ao processo os deltas do store: tabelas, contagens de texto e cache do ranking.
+
+    Deltas só acrescentam linhas, então as posições existentes continuam
+    válidas: as contagens de texto tokenizam só as linhas novas e as
+    varreduras em cache são mantidas (exceto as das vagas alteradas) e
+    estendidas aos candidatos novos na próxima consulta. Store regerado ou
+    compactado muda as posições e é recarregado por inteiro.
+    """
+    global data_store
+    with reload_lock:
+        start_time = time.perf_counter()
+        store, changes = data_store.refresh()
+        if changes is None:
+            return None
+        models = [model for model in (model_registry.active, model_registry.previous) if model is not None]
+        if changes['incremental']:
+            for model in models:
+                if model.text_vectors is not None and model.text_vectors.covers(data_store.vagas,
+                                                                                data_store.applicants):
+                    model.text_vectors = model.text_vectors.extend(store.vagas, store.applicants)
+            # Troca antes de descartar: varreduras ainda em andamento sobre os dados antigos não entram no cache
+            data_store = store
+            rank_cache_discard(set(changes['vagas']))
+        else:
+            store.applicant_profile()
+            data_store = store
+            rank_cache_discard()
+            for model in models:
+                model.text_vectors = load_text_vectors(model.pipeline, model.engine, model.fingerprint)
         
-        return min(1.0, cand_level / max(vaga_level, 1))
-    
-    # Extrair dados das rows
-    competencias_tecnicas = vaga_row.get('competencias_tecnicas_requeridas', '')
-    conhecimentos_tecnicos = candidate_row.get('conhecimentos_tecnicos', '')
-    nivel_academico_vaga = vaga_row.get('nivel_academico', '')
-    nivel_academico_candidato = candidate_row.get('nivel_academico', '')
-    nivel_ingles_vaga = vaga_row.get('nivel_ingles', '')
-    nivel_ingles_candidato = candidate_row.get('nivel_ingles', '')
-    areas_atuacao = vaga_row.get('areas_atuacao', '')
-    area_atuacao_candidato = candidate_row.get('area_de_atuacao', '')
-    tipo_contratacao = vaga_row.get('tipo_contratacao', '')
-    titulo_vaga = vaga_row.get('titulo_vaga', '')
-    nivel_profissional = vaga_row.get('nivel_profissional', '')
-    
-    # Criar features baseadas em padrões de sucesso
-    features = {
-        'tech_success_score': calculate_tech_success_score(competencias_tecnicas, conhecimentos_tecnicos),
-        'academic_success_score': calculate_academic_success_score(nivel_academico_vaga, nivel_academico_candidato),
-        'english_success_score': calculate_english_success_score(nivel_ingles_vaga, nivel_ingles_candidato),
-        'is_clt': 1 if 'clt' in str(tipo_contratacao).lower() else 0,
-        'is_pj': 1 if 'pj' in str(tipo_contratacao).lower() else 0,
-        'is_tech_area': 1 if any(tech in str(areas_atuacao).lower() or tech in str(area_atuacao_candidato).lower() 
-                                for tech in ['ti', 'tecnologia', 'desenvolvimento']) else 0,
-        'nivel_profissional': str(nivel_profissional) if nivel_profissional else 'não_informado',
-        'areas_atuacao': str(areas_atuacao) if areas_atuacao else 'não_informado',
-        'area_atuacao_candidato': str(area_atuacao_candidato) if area_atuacao_candidato else 'não_informado',
-        'combined_text': (
-            str(titulo_vaga) + ' ' +
-            str(competencias_tecnicas) + ' ' +
-            str(conhecimentos_tecnicos) + ' ' +
-            str(areas_atuacao)
-        ).lower().strip()
-    }
-    
-    # Tratar valores vazios
-    for key, value in features.items():
-        if value == '' or value == 'nan' or str(value) == 'nan':
-            if key in ['tech_success_score', 'academic_success_score', 'english_success_score']:
-                features[key] = 0.5
-            elif key in ['is_clt', 'is_pj', 'is_tech_area']:
-                features[key] = 0
-            else:
-                features[key] = 'não_informado'
+        mode = 'incremental' if changes['incremental'] else 'full'
+        elapsed = time.perf_counter() - start_time
+        data_refreshes.labels(mode=mode).inc()
+        data_refresh_duration.labels(mode=mode).observe(elapsed)
+        if changes['incremental']:
+            print(f"🔄 Deltas aplicados em {elapsed * 1000:.1f} ms: {len(changes['vagas']):,} vagas, "
+                  f"{len(changes['applicants']):,} candidatos")
+        else:
+            print(f"🔄 Store recarregado em {elapsed:.1f}s: {data_store.vagas.n_rows:,} vagas, "
+                  f"{data_store.n_applicants:,} candidatos")
+        return changes
+
+def start_data_watcher():
+    """Observa o manifesto do store neste processo (chamado em cada worker, após o fork).
     
-    return pd.DataFrame([features])
+    Com os dados carregados dos JSON, observa o diretório onde o store seria
+    gerado e o adota quando o manifesto aparece.
+    """
+    global store_watcher
+    store_dir = data_store.store_dir or data_store.pending_store_dir
+    if DATA_WATCH_INTERVAL <= 0 or store_dir is None \
+            or (store_watcher is not None and store_watcher.is_alive()):
+        return store_watcher
+    store_watcher = StoreWatcher(store_dir, refresh_data, DATA_WATCH_INTERVAL)
+    store_watcher.start()
+    return store_watcher
+
+def warm_up():
+    """Predição de aquecimento antes de aceitar tráfego (o gunicorn também chama em cada worker)"""
+    model = model_registry.active
+    if model is None:
+        return None
+    start_time = time.perf_counter()
+    model.engine.predict_proba(build_features_for_pairs([WARMUP_PAIR]))
+    if prediction_cache is not None:
+        prediction_cache.stats()  # abre a conexão deste processo com o cache
+    elapsed = time.perf_counter() - start_time
+    startup_phase_seconds.labels(phase='warmup').set(elapsed)
+    return elapsed
 
 def load_resources():
-    """Carrega modelo ML na inicialização"""
-    global pipeline_model
+    """Carrega modelo ML e dados na inicialização"""
+    global data_store
     
     print("🚀 Carregando recursos...")
     
-    # Carregar modelo ML de candidatos contratados
+    # Carregar vagas e candidatos residentes para o ranking (antes do modelo: amostra de paridade)
+    start_time = time.perf_counter()
     try:
-        model_path = os.path.join(BASE_DIR, 'models', 'pipeline_candidatos_contratados.joblib')
-        pipeline_model = joblib.load(model_path)
-        
-        # Carregar metadata do modelo
-        metadata_path = os.path.join(BASE_DIR, 'models', 'metadata_candidatos_contratados.json')
-        with open(metadata_path, 'r', encoding='utf-8') as f:
-            model_metadata = json.load(f)
-        
-        print("✅ Modelo de candidatos contratados carregado!")
-        print(f"   Tipo: {model_metadata.get('model_type', 'N/A')}")
-        print(f"   Acurácia: {model_metadata.get('accuracy', 0):.1%}")
-        print(f"   Data de treino: {model_metadata.get('trained_date', 'N/A')}")
-        
-        # Atualizar métricas do modelo
-        model_accuracy.set(model_metadata.get('accuracy', 0))
-        model_samples.set(model_metadata.get('n_samples', 0))
-        
+        data_store = DataStore.load()
+        # Antes do fork: os workers herdam o perfil dos candidatos usado no ranking
+        data_store.applicant_profile()
+        print(f"✅ Dados carregados: {data_store.vagas.n_rows:,} vagas, {data_store.n_applicants:,} candidatos")
+    except Exception as e:
+        print(f"❌ Erro ao carregar dados: {e}")
+        data_store = DataStore()
+    startup_phase_seconds.labels(phase='data').set(time.perf_counter() - start_time)
+    
+    # Carregar a versão apontada por CURRENT (ou o arquivo único legado)
+    rank_cache_discard()
+    try:
+        model = reload_model()
+        for phase, seconds in model.timings.items():
+            startup_phase_seconds.labels(phase=phase).set(seconds)
     except Exception as e:
         print(f"❌ Erro ao carregar modelo: {e}")
-        pipeline_model = None
+    
+    warm_up()
 
 # Rotas da aplicação
 @app.route('/')
@@ -190,154 +757,756 @@ def status_page():
 @app.route('/health')
 def health():
     """Health check endpoint"""
+    model = model_registry.active
     status = {
         'status': 'healthy',
         'model_type': 'hired_candidates',
-        'model_loaded': pipeline_model is not None,
-        'vagas_loaded': True,  # JSON sempre carregado
-        'candidates_loaded': True  # JSON sempre carregado
+        'model_loaded': model is not None,
+        'model_version': model.version if model is not None else None,
+        'inference_engine': model.engine.name if model is not None else None,
+        'vagas_loaded': data_store.vagas_loaded,
+        'candidates_loaded': data_store.candidates_loaded,
+        'admission': admission.stats() if admission is not None else None,
+        'topology': {**topology.to_dict(), 'native_pools': native_thread_pools}
     }
     return jsonify(status)
 
 @app.route('/model/info')
 def model_info():
-    """Endpoint com informações detalhadas do modelo"""
-    if pipeline_model is None:
+    """Endpoint com informações detalhadas do modelo ativo"""
+    model = model_registry.active
+    if model is None:
         return jsonify({
             'error': 'Modelo não carregado',
             'model_type': None,
             'metadata': None
         }), 503
     
-    # Tentar carregar metadados
-    metadata = {}
-    try:
-        metadata_path = os.path.join(BASE_DIR, 'models', 'model_metadata_enhanced.json')
-        if os.path.exists(metadata_path):
-            with open(metadata_path, 'r', encoding='utf-8') as f:
-                metadata = json.load(f)
-    except Exception as e:
-        print(f"⚠️ Não foi possível carregar metadados: {e}")
-    
+    previous = model_registry.previous
     return jsonify({
-        'model_type': 'RandomForestClassifier_CandidatosContratados',
+        'model_type': model.metadata.get('model_type', 'RandomForestClassifier_CandidatosContratados'),
         'loaded': True,
-        'metadata': metadata
+        'model_version': model.version,
+        'fingerprint': model.fingerprint,
+        'loaded_at': model.loaded_at,
+        'previous_version': previous.version if previous is not None else None,
+        'inference': model.inference_report,
+        'metadata': model.metadata
     })
 
+def require_admin_token(view):
+    """Exige `Authorization: Bearer <ADMIN_TOKEN>`; sem ADMIN_TOKEN configurado, os endpoints não existem"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not ADMIN_TOKEN:
+            return jsonify({'error': 'Endpoints administrativos desabilitados (defina ADMIN_TOKEN)'}), 404
+        token = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+        if not hmac.compare_digest(token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8')):
+            return jsonify({'error': 'Token administrativo inválido'}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+def batch_units():
+    """Itens de /api/predict/batch, o peso do lote na admissão (1 se a view vai recusar o corpo com 400/413)"""
+    data = request.get_json(silent=True)
+    items = data.get('items') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items or len(items) > max(MAX_BATCH_SIZE, MAX_STREAM_BATCH_SIZE):
+        return 1
+    return len(items)
+
+def admission_controlled(kind, units=None):
+    """Recusa com 429 e Retry-After as requisições que estourariam o orçamento de latência do worker.
+
+    `kind` separa o tempo de serviço médio (predição unitária, lote); `units`
+    (função da requisição) dá o peso dela, em unidades desse tempo.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if admission is None:
+                return view(*args, **kwargs)
+            return admitted_call(view, kind, units() if units is not None else 1, *args, **kwargs)
+        return wrapper
+    return decorator
+
+def admitted_call(view, kind, units, *args, **kwargs):
+    """Admite (ou recusa com 429) e executa a view, liberando a vaga quando a resposta termina"""
+    request_start = request.headers.get('X-Request-Start')
+    queued = queue_seconds(request_start)
+    if request_start:
+        admission_queue_seconds.observe(queued)
+    rejected = admission.admit(queued, kind, units)
+    if rejected is not None:
+        reason, retry_after = rejected
+        admission_shed.labels(reason=reason).inc()
+        response = jsonify({'error': 'Servidor sobrecarregado, tente novamente', 'retry_after': retry_after})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(retry_after)
+        return response
+    
+    admission_in_flight.inc()
+    start_time = time.perf_counter()
+    
+    def release():
+        admission.release(time.perf_counter() - start_time, kind, units)
+        admission_in_flight.dec()
+    
+    try:
+        response = view(*args, **kwargs)
+    except BaseException:
+        release()
+        raise
+    # Resposta em streaming (NDJSON): o serviço só termina quando o último bloco é enviado
+    if isinstance(response, Response) and response.is_streamed:
+        response.call_on_close(release)
+    else:
+        release()
+    return response
+
+def model_registry_status():
+    active, previous = model_registry.active, model_registry.previous
+    return {
+        'pid': os.getpid(),
+        'active': active.info() if active is not None else None,
+        'previous': previous.info() if previous is not None else None,
+        'pointer': model_registry.pointer(),
+        'versions': model_registry.versions(),
+        'last_reload': dict(last_reload)
+    }
+
+@app.route('/admin/model')
+@require_admin_token
+def admin_model_status():
+    """Versões disponíveis, ativa/anterior neste worker e resultado da última troca"""
+    return jsonify(model_registry_status())
+
+@app.route('/admin/model/reload', methods=['POST'])
+@require_admin_token
+def admin_model_reload():
+    """Carrega uma versão em segundo plano, valida, aquece e troca; CURRENT é atualizado para os demais workers"""
+    data = request.get_json(silent=True) or {}
+    version = data.get('version') or model_registry.pointer()
+    if version not in model_registry.versions():
+        return jsonify({'error': f'Versão {version} não encontrada', 'versions': model_registry.versions()}), 404
+    
+    if data.get('wait'):
+        try:
+            reload_model(version, update_pointer=True)
+        except Exception as e:
+            return jsonify({'error': f'Versão {version} rejeitada: {e}', **model_registry_status()}), 422
+        return jsonify(model_registry_status())
+    
+    def run_reload():
+        try:
+            reload_model(version, update_pointer=True)
+        except Exception:
+            pass  # registrado em last_reload e em hired_model_reload_failures_total
+    
+    threading.Thread(target=run_reload, name='model-reload', daemon=True).start()
+    return jsonify({'status': 'loading', 'version': version}), 202
+
+@app.route('/admin/model/rollback', methods=['POST'])
+@require_admin_token
+def admin_model_rollback():
+    """Volta para a versão anterior, mantida em memória (troca imediata)"""
+    if rollback_model() is None:
+        return jsonify({'error': 'Nenhuma versão anterior carregada neste worker'}), 409
+    return jsonify(model_registry_status())
+
+def profile_response(profile):
+    """Perfil em JSON ou, com ?format=collapsed, em pilhas colapsadas para flame graphs"""
+    if request.args.get('format') == 'collapsed':
+        return Response(collapsed_stacks(profile), mimetype='text/plain')
+    return jsonify(profile)
+
+@app.route('/admin/profile', methods=['POST'])
+@require_admin_token
+def admin_profile_start():
+    """Liga o profiling por amostragem neste worker por N segundos"""
+    data = request.get_json(silent=True) or {}
+    try:
+        seconds = float(data.get('seconds', 10))
+        interval_ms = float(data.get('interval_ms', PROFILE_INTERVAL_MS))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'seconds e interval_ms devem ser números'}), 400
+    if not 0 < seconds <= PROFILE_MAX_SECONDS:
+        return jsonify({'error': f'seconds deve estar entre 0 e {PROFILE_MAX_SECONDS:g}'}), 400
+    if not 1 <= interval_ms <= 1000:
+        return jsonify({'error': 'interval_ms deve estar entre 1 e 1000'}), 400
+    if stack_sampler.running is not None:
+        return jsonify({'error': 'Profiling já em andamento neste worker', 'running': stack_sampler.running}), 409
+    
+    if data.get('wait'):
+        # Bloqueia esta requisição: só enxerga as demais com workers gthread (GUNICORN_THREADS > 1)
+        try:
+            return profile_response(stack_sampler.run(seconds, interval_ms / 1000))
+        except RuntimeError as e:
+            return jsonify({'error': str(e)}), 409
+    
+    def run_profile():
+        try:
+            stack_sampler.run(seconds, interval_ms / 1000)
+        except RuntimeError as e:
+            print(f"⚠️ {e}")
+    
+    threading.Thread(target=run_profile, name='stack-sampler', daemon=True).start()
+    return jsonify({'status': 'profiling', 'pid': os.getpid(), 'seconds': seconds}), 202
+
+@app.route('/admin/profile')
+@require_admin_token
+def admin_profile_list():
+    """Perfis gravados (de qualquer worker) e o profiling em andamento neste worker"""
+    return jsonify({'pid': os.getpid(), 'running': stack_sampler.running, 'profiles': stack_sampler.saved()})
+
+@app.route('/admin/profile/<profile_id>')
+@require_admin_token
+def admin_profile_get(profile_id):
+    """Um perfil agregado: funções por amostras próprias/totais e pilhas colapsadas"""
+    profile = stack_sampler.load(profile_id)
+    if profile is None:
+        return jsonify({'error': f'Perfil {profile_id} não encontrado', 'profiles': stack_sampler.saved()}), 404
+    return profile_response(profile)
+
+def record_prediction_metrics(prediction_type, prediction, probability):
+    """Atualiza as métricas Prometheus de uma predição"""
+    quality_level = 'high' if prediction == 1 else 'low'
+    hired_model_predictions.labels(
+        prediction_type=prediction_type,
+        quality_level=quality_level
+    ).inc()
+    
+    quality_score = float(probability[1]) if len(probability) > 1 else 0.5
+    quality_scores.observe(quality_score)
+
+def build_unified_result(prediction, probability, features):
+    """Monta a resposta detalhada do formato vaga/candidato"""
+    return {
+        'prediction': int(prediction),
+        'prediction_text': 'ALTA QUALIDADE' if prediction == 1 else 'BAIXA QUALIDADE',
+        'probability': {
+            'low_quality': float(probability[0]),
+            'high_quality': float(probability[1]) if len(probability) > 1 else 0.0
+        },
+        'quality_score': float(probability[1] * 100) if len(probability) > 1 else 50.0,
+        'percentage': f"{probability[1] * 100:.1f}%" if len(probability) > 1 else "50.0%",
+        'model_type': 'hired_candidates_unified',
+        'match_score': float(probability[1] * 100) if len(probability) > 1 else 50.0,
+        'explanation': {
+            'tech_compatibility': f"{features['tech_success_score']*100:.1f}%",
+            'academic_compatibility': f"{features['academic_success_score']*100:.1f}%",
+            'english_compatibility': f"{features['english_success_score']*100:.1f}%"
+        },
+        'analysis': {
+            'tech_compatibility': f"{features['tech_success_score']*100:.1f}%",
+            'academic_compatibility': f"{features['academic_success_score']*100:.1f}%", 
+            'english_compatibility': f"{features['english_success_score']*100:.1f}%",
+            'area_match': 'Área de TI' if features['is_tech_area'] else 'Outra área',
+            'contract_type': 'CLT' if features['is_clt'] else ('PJ' if features['is_pj'] else 'Outros')
+        }
+    }
+
+def build_direct_result(prediction, probability, data):
+    """Monta a resposta do formato de features diretas"""
+    # Extrair features se usou prepare_hired_candidates_features
+    tech_score = data.get('tech_match_score', 0.5)
+    academic_score = 0.5  # Não disponível no formato antigo
+    english_score = 0.5   # Não disponível no formato antigo
+    
+    return {
+        'prediction': int(prediction),
+        'prediction_text': 'CONTRATADO' if prediction == 1 else 'NÃO CONTRATADO',
+        'probability': {
+            'not_hired': float(probability[0]),
+            'hired': float(probability[1]) if len(probability) > 1 else 0.0
+        },
+        'match_score': float(probability[1] * 100) if len(probability) > 1 else 50.0,
+        'model_type': 'hired_candidates',
+        'explanation': {
+            'tech_compatibility': f"{tech_score*100:.1f}%",
+            'academic_compatibility': f"{academic_score*100:.1f}%",
+            'english_compatibility': f"{english_score*100:.1f}%"
+        }
+    }
+
+def build_compact_result(prediction, probability, features=None):
+    """Resposta compacta (?schema=compact): só números, sem textos formatados"""
+    result = {
+        'prediction': int(prediction),
+        'probability': float(probability[1]) if len(probability) > 1 else 0.0
+    }
+    if features is not None:
+        for name in ('tech_success_score', 'academic_success_score', 'english_success_score'):
+            result[name] = float(features[name])
+    return result
+
+def response_schema():
+    """Esquema pedido em ?schema= (padrão 'full'); None se inválido"""
+    schema = request.args.get('schema', 'full')
+    return schema if schema in RESPONSE_SCHEMAS else None
+
+def invalid_schema_response():
+    return jsonify({'error': f'Parâmetro schema deve ser um de: {", ".join(RESPONSE_SCHEMAS)}'}), 400
+
+def wants_ndjson():
+    """Cliente pediu linhas NDJSON (Accept: application/x-ndjson)"""
+    return request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+def record_encoding(endpoint, schema, encoding, rows, size, seconds):
+    """Tempo de codificação e bytes por linha de resultado"""
+    rows = max(rows, 1)
+    response_encode_seconds.labels(endpoint=endpoint, schema=schema, encoding=encoding).observe(seconds / rows)
+    response_row_bytes.labels(endpoint=endpoint, schema=schema, encoding=encoding).observe(size / rows)
+
+def encoded_response(payload, endpoint, schema, rows=1):
+    """Resposta JSON codificada com o json_codec, medindo o custo por linha"""
+    start_time = time.perf_counter()
+    body = json_codec.dumps(payload)
+    record_encoding(endpoint, schema, 'json', rows, len(body), time.perf_counter() - start_time)
+    return Response(body, mimetype='application/json')
+
+def infer_proba(model, features_data, timer, text=None):
+    """predict_proba com o pré-processamento e a floresta medidos como etapas separadas"""
+    with timer.stage('transform'):
+        transformed = model.engine.transform(features_data, text) if text is not None \
+            else model.engine.transform(features_data)
+    # Lotes grandes dividem a floresta entre as threads de inferência; poucas linhas ficam em uma thread
+    threads = topology.threads_for(len(transformed))
+    inference_calls.labels(mode='parallel' if threads > 1 else 'single').inc()
+    with timer.stage('forest'):
+        return model.engine.predict_proba_transformed(transformed, threads)
+
+def predict_frame(model, features_data, timer=None):
+    """Executa uma única passada de predict_proba e deriva os rótulos"""
+    timer = timer or StageTimer()
+    if micro_batcher is not None and len(features_data) < micro_batcher.max_batch_size:
+        # Poucas linhas: inferidas junto com as de outras requisições simultâneas (espera + inferência)
+        with timer.stage('microbatch'):
+            probabilities = micro_batcher.predict_proba(model, features_data)
+    else:
+        probabilities = infer_proba(model, features_data, timer)
+    predictions = model.engine.classes_[probabilities.argmax(axis=1)]
+    return predictions, probabilities
+
+def score_pairs(model, pairs, timer=None):
+    """(predição, probabilidades, features) de cada par vaga/candidato.
+    
+    As features são calculadas para todos os pares e a chave do cache é a linha
+    de features (entrada normalizada); pares já pontuados com a mesma versão do
+    modelo vêm do cache compartilhado e só os demais passam pelo modelo, em uma
+    única passada, e são gravados no cache.
+    """
+    timer = timer or StageTimer()
+    with timer.stage('features'):
+        features_data = prepare_hired_candidates_features_batch(pairs)
+    with timer.stage('cache'):
+        keys = prediction_keys(features_data, model.fingerprint) if prediction_cache is not None else []
+        cached = prediction_cache.get_many(keys) if keys else {}
+        missing = [index for index in range(len(pairs)) if not keys or keys[index] not in cached]
+    
+    scored = {}
+    if missing:
+        if len(missing) < len(pairs):
+            features_data = features_data.iloc[missing].reset_index(drop=True)
+        predictions, probabilities = predict_frame(model, features_data, timer)
+        with timer.stage('response'):
+            features_rows = features_data[CACHED_FEATURES].to_dict('records')
+            for index, prediction, probability, features in zip(missing, predictions, probabilities, features_rows):
+                scored[index] = {'prediction': int(prediction), 'probability': probability.tolist(),
+                                 'features': features}
+    
+    if prediction_cache is not None:
+        prediction_cache_hits.inc(len(pairs) - len(missing))
+        prediction_cache_misses.inc(len(missing))
+        with timer.stage('cache'):
+            prediction_cache.set_many([(keys[index], entry) for index, entry in scored.items()])
+    
+    entries = [scored[index] if index in scored else cached[keys[index]] for index in range(len(pairs))]
+    return [(entry['prediction'], entry['probability'], entry['features']) for entry in entries]
+
 @app.route('/api/predict', methods=['POST'])
+@admission_controlled('predict')
 def predict():
     """Endpoint para predições via API usando modelo de candidatos contratados"""
     try:
-        if pipeline_model is None:
+        model = model_registry.active
+        if model is None:
             return jsonify({'error': 'Modelo não carregado'}), 500
         
-        data = request.get_json()
+        schema = response_schema()
+        if schema is None:
+            return invalid_schema_response()
+        
+        # Tempo por etapa; o caminho (unified/direct) é definido depois do parse
+        timer = StageTimer(stage_duration)
+        with timer.stage('parse'):
+            data = request.get_json()
         
         # Verificar se os dados estão no formato vaga/candidato ou se são features diretas
         if 'vaga' in data and 'candidato' in data:
             # Formato vaga/candidato - usar prepare_hired_candidates_features
+            timer.path = 'unified'
             vaga_data = data.get('vaga', {})
             candidato_data = data.get('candidato', {})
             
-            if not vaga_data or not candidato_data:
-                return jsonify({'error': 'Dados da vaga e candidato são obrigatórios'}), 400
-            
-            # Preparar features automaticamente
-            features_data = prepare_hired_candidates_features(vaga_data, candidato_data)
+            error = pair_error(vaga_data, candidato_data)
+            if error:
+                return jsonify({'error': error}), 400
             
-            # Fazer predição
-            prediction = pipeline_model.predict(features_data)[0]
-            probability = pipeline_model.predict_proba(features_data)[0]
+            # Preparar features e fazer predição (ou reaproveitar do cache compartilhado)
+            prediction, probability, features = score_pairs(model, [(vaga_data, candidato_data)], timer)[0]
             
-            # Extrair features calculadas
-            features = features_data.iloc[0].to_dict()
-            
-            # Métricas de monitoramento
-            quality_level = 'high' if prediction == 1 else 'low'
-            hired_model_predictions.labels(
-                prediction_type='unified_interface',
-                quality_level=quality_level
-            ).inc()
-            
-            quality_score = float(probability[1]) if len(probability) > 1 else 0.5
-            quality_scores.observe(quality_score)
-            
-            # Resposta detalhada para interface web
-            result = {
-                'prediction': int(prediction),
-                'prediction_text': 'ALTA QUALIDADE' if prediction == 1 else 'BAIXA QUALIDADE',
-                'probability': {
-                    'low_quality': float(probability[0]),
-                    'high_quality': float(probability[1]) if len(probability) > 1 else 0.0
-                },
-                'quality_score': float(probability[1] * 100) if len(probability) > 1 else 50.0,
-                'percentage': f"{probability[1] * 100:.1f}%" if len(probability) > 1 else "50.0%",
-                'model_type': 'hired_candidates_unified',
-                'match_score': float(probability[1] * 100) if len(probability) > 1 else 50.0,
-                'explanation': {
-                    'tech_compatibility': f"{features['tech_success_score']*100:.1f}%",
-                    'academic_compatibility': f"{features['academic_success_score']*100:.1f}%",
-                    'english_compatibility': f"{features['english_success_score']*100:.1f}%"
-                },
-                'analysis': {
-                    'tech_compatibility': f"{features['tech_success_score']*100:.1f}%",
-                    'academic_compatibility': f"{features['academic_success_score']*100:.1f}%", 
-                    'english_compatibility': f"{features['english_success_score']*100:.1f}%",
-                    'area_match': 'Área de TI' if features['is_tech_area'] else 'Outra área',
-                    'contract_type': 'CLT' if features['is_clt'] else ('PJ' if features['is_pj'] else 'Outros')
-                }
-            }
+            with timer.stage('response'):
+                # Métricas de monitoramento
+                record_prediction_metrics('unified_interface', prediction, probability)
+                
+                # Resposta detalhada para interface web (ou só os números, no esquema compacto)
+                result = build_compact_result(prediction, probability, features) if schema == 'compact' \
+                    else build_unified_result(prediction, probability, features)
+                response = encoded_response(result, 'predict', schema)
             
         else:
             # Formato de features diretas (compatibilidade com versão anterior)
-            required_fields = ['tech_match_score', 'nivel_profissional', 'areas_atuacao', 
-                             'area_de_atuacao', 'academic_match', 'english_match', 'combined_text']
-            
+            timer.path = 'direct'
             # Verificar se tem os campos necessários
-            missing_fields = [field for field in required_fields if field not in data]
+            missing_fields = missing_direct_fields(model, data)
             if missing_fields:
                 return jsonify({'error': f'Campos obrigatórios: {missing_fields}'}), 400
             
             # Preparar dados para predição
-            features_data = pd.DataFrame([data])
+            with timer.stage('features'):
+                features_data = pd.DataFrame([data])
             
-            # Fazer predição
-            prediction = pipeline_model.predict(features_data)[0]
-            probability = pipeline_model.predict_proba(features_data)[0]
+            # Fazer predição (rótulo derivado da mesma passada de probabilidades)
+            predictions, probabilities = predict_frame(model, features_data, timer)
+            prediction, probability = predictions[0], probabilities[0]
             
-            # Métricas de monitoramento
-            quality_level = 'high' if prediction == 1 else 'low'
-            hired_model_predictions.labels(
-                prediction_type='api_direct',
-                quality_level=quality_level
-            ).inc()
-            
-            quality_score = float(probability[1]) if len(probability) > 1 else 0.5
-            quality_scores.observe(quality_score)
-            
-            # Extrair features se usou prepare_hired_candidates_features
-            tech_score = data.get('tech_match_score', 0.5)
-            academic_score = 0.5  # Não disponível no formato antigo
-            english_score = 0.5   # Não disponível no formato antigo
-            
-            result = {
-                'prediction': int(prediction),
-                'prediction_text': 'CONTRATADO' if prediction == 1 else 'NÃO CONTRATADO',
-                'probability': {
-                    'not_hired': float(probability[0]),
-                    'hired': float(probability[1]) if len(probability) > 1 else 0.0
-                },
-                'match_score': float(probability[1] * 100) if len(probability) > 1 else 50.0,
-                'model_type': 'hired_candidates',
-                'explanation': {
-                    'tech_compatibility': f"{tech_score*100:.1f}%",
-                    'academic_compatibility': f"{academic_score*100:.1f}%",
-                    'english_compatibility': f"{english_score*100:.1f}%"
-                }
-            }
+            with timer.stage('response'):
+                # Métricas de monitoramento
+                record_prediction_metrics('api_direct', prediction, probability)
+                
+                result = build_compact_result(prediction, probability) if schema == 'compact' \
+                    else build_direct_result(prediction, probability, data)
+                response = encoded_response(result, 'predict', schema)
+        
+        timer.observe()
+        return response
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def missing_direct_fields(model, row):
+    """Campos obrigatórios e colunas de entrada do modelo ausentes em uma linha de features diretas"""
+    required = DIRECT_REQUIRED_FIELDS + [column for column in model.engine.input_columns or []
+                                         if column not in DIRECT_REQUIRED_FIELDS]
+    return [field for field in required if field not in row]
+
+def pair_error(vaga_data, candidato_data):
+    """Erro de validação de um par vaga/candidato, ou None"""
+    if not vaga_data or not candidato_data:
+        return 'Dados da vaga e candidato são obrigatórios'
+    if not isinstance(vaga_data, dict) or not isinstance(candidato_data, dict):
+        return 'Dados da vaga e candidato devem ser objetos JSON'
+    return None
+
+def score_isolated(score, values):
+    """Pontua `values` em uma passada; se ela falhar, item a item, com a exceção no lugar dos que falham"""
+    try:
+        return score(values)
+    except Exception:
+        results = []
+        for value in values:
+            try:
+                results.extend(score([value]))
+            except Exception as e:
+                results.append(e)
+        return results
+
+def score_batch_items(model, items, timer, schema, offset=0):
+    """Resultados dos itens de um lote, na ordem recebida (índices a partir de `offset`).
+    
+    Uma única passada do pipeline por formato (vaga/candidato e features diretas).
+    Itens inválidos, ou que fazem a passada falhar, recebem o próprio erro sem
+    derrubar os demais.
+    """
+    results = [None] * len(items)
+    unified_indexes, unified_pairs = [], []
+    direct_indexes, direct_rows = [], []
+    
+    # Validar cada item e separar por formato, preservando a posição original
+    with timer.stage('parse'):
+        for position, item in enumerate(items):
+            index = offset + position
+            if not isinstance(item, dict):
+                results[position] = {'index': index, 'error': 'Item deve ser um objeto JSON'}
+            elif 'vaga' in item and 'candidato' in item:
+                error = pair_error(item['vaga'], item['candidato'])
+                if error:
+                    results[position] = {'index': index, 'error': error}
+                else:
+                    unified_indexes.append(position)
+                    unified_pairs.append((item['vaga'], item['candidato']))
+            else:
+                missing_fields = missing_direct_fields(model, item)
+                if missing_fields:
+                    results[position] = {'index': index, 'error': f'Campos obrigatórios: {missing_fields}'}
+                else:
+                    direct_indexes.append(position)
+                    direct_rows.append(item)
+    
+    if unified_pairs:
+        scored = score_isolated(lambda pairs: score_pairs(model, pairs, timer), unified_pairs)
+        with timer.stage('response'):
+            for position, entry in zip(unified_indexes, scored):
+                if isinstance(entry, Exception):
+                    results[position] = {'index': offset + position, 'error': str(entry)}
+                    continue
+                prediction, probability, features = entry
+                record_prediction_metrics('batch_unified', prediction, probability)
+                result = build_compact_result(prediction, probability, features) if schema == 'compact' \
+                    else build_unified_result(prediction, probability, features)
+                results[position] = {'index': offset + position, **result}
+    
+    if direct_rows:
+        def score_rows(rows):
+            with timer.stage('features'):
+                features_data = pd.DataFrame(rows)
+            return list(zip(*predict_frame(model, features_data, timer)))
+        
+        scored = score_isolated(score_rows, direct_rows)
+        with timer.stage('response'):
+            for position, entry, row in zip(direct_indexes, scored, direct_rows):
+                if isinstance(entry, Exception):
+                    results[position] = {'index': offset + position, 'error': str(entry)}
+                    continue
+                prediction, probability = entry
+                record_prediction_metrics('batch_direct', prediction, probability)
+                result = build_compact_result(prediction, probability) if schema == 'compact' \
+                    else build_direct_result(prediction, probability, row)
+                results[position] = {'index': offset + position, **result}
+    return results
+
+def stream_batch(model, items, timer, schema):
+    """Linhas NDJSON de um lote, enviadas a cada STREAM_CHUNK_SIZE itens pontuados"""
+    start_time = time.perf_counter()
+    try:
+        for offset in range(0, len(items), STREAM_CHUNK_SIZE):
+            results = score_batch_items(model, items[offset:offset + STREAM_CHUNK_SIZE], timer, schema, offset)
+            with timer.stage('response'):
+                encode_started = time.perf_counter()
+                body = json_codec.dumps_lines(results)
+                record_encoding('batch', schema, 'ndjson', len(results), len(body),
+                                time.perf_counter() - encode_started)
+            yield body
+    except Exception as e:
+        # O status 200 já foi enviado: o erro vai como última linha
+        yield json_codec.dumps_lines([{'error': str(e)}])
+        return
+    
+    batch_sizes.observe(len(items))
+    batch_item_latency.observe((time.perf_counter() - start_time) / len(items))
+    timer.observe()
+
+@app.route('/api/predict/batch', methods=['POST'])
+@admission_controlled('batch', batch_units)
+def predict_batch():
+    """Endpoint para predições em lote (N pares vaga/candidato ou features diretas).
+    
+    Com `Accept: application/x-ndjson` a resposta é uma linha JSON por item,
+    enviada assim que o bloco do item é pontuado.
+    """
+    try:
+        model = model_registry.active
+        if model is None:
+            return jsonify({'error': 'Modelo não carregado'}), 500
+        
+        schema = response_schema()
+        if schema is None:
+            return invalid_schema_response()
+        streaming = wants_ndjson()
+        
+        timer = StageTimer(stage_duration, 'batch')
+        with timer.stage('parse'):
+            data = request.get_json()
+        items = data.get('items') if isinstance(data, dict) else data
+        
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'Lista "items" com pelo menos um item é obrigatória'}), 400
+        
+        max_items = MAX_STREAM_BATCH_SIZE if streaming else MAX_BATCH_SIZE
+        if len(items) > max_items:
+            return jsonify({
+                'error': f'Lote excede o limite de {max_items} itens',
+                'max_batch_size': max_items
+            }), 413
+        
+        if streaming:
+            return Response(stream_with_context(stream_batch(model, items, timer, schema)),
+                            mimetype=NDJSON_MIMETYPE)
+        
+        start_time = time.perf_counter()
+        results = score_batch_items(model, items, timer, schema)
+        
+        # Métricas de lote
+        batch_sizes.observe(len(items))
+        batch_item_latency.observe((time.perf_counter() - start_time) / len(items))
+        
+        with timer.stage('response'):
+            errors = sum(1 for result in results if 'error' in result)
+            response = encoded_response({
+                'count': len(items),
+                'errors': errors,
+                'results': results
+            }, 'batch', schema, len(items))
+        timer.observe()
+        return response
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def score_applicant_chunks(model, store, codigo, vaga, positions, timer):
+    """Gera (posições, scores) da vaga contra os candidatos em chunks de RANK_CHUNK_SIZE"""
+    # Com o TF-IDF decomposto, o texto combinado não é montado nem tokenizado por par
+    text_vectors = model.text_vectors
+    if text_vectors is not None and not text_vectors.covers(store.vagas, store.applicants):
+        text_vectors = None
+    vaga_position = store.vagas.position_of(codigo) if text_vectors is not None else None
+    # Lado do candidato calculado uma vez por versão do store; por consulta, só o que depende da vaga
+    profile = store.applicant_profile()
+    for start in range(0, len(positions), RANK_CHUNK_SIZE):
+        chunk = positions[start:start + RANK_CHUNK_SIZE]
+        # Campos da vaga são escalares, repetidos para todos os candidatos do chunk
+        with timer.stage('features'):
+            features_data = profile.features(vaga, chunk, combined_text=vaga_position is None)
+            text = text_vectors.transform(np.full(len(chunk), vaga_position), chunk) \
+                if vaga_position is not None else None
+        scores = infer_proba(model, features_data, timer, text)[:, 1]
+        
+        high_count = int((scores >= 0.5).sum())
+        hired_model_predictions.labels(prediction_type='rank', quality_level='high').inc(high_count)
+        hired_model_predictions.labels(prediction_type='rank', quality_level='low').inc(len(scores) - high_count)
+        yield chunk, scores
+
+def iter_applicant_scores(model, codigo, vaga, positions, timer=None, store=None):
+    """Gera (posições, scores) em chunks; varreduras completas ficam em cache por vaga.
+    
+    O cache guarda um score por posição do store; candidatos acrescentados por
+    deltas depois da varredura são pontuados (só eles) na consulta seguinte.
+    """
+    timer = timer or StageTimer()
+    store = store or data_store
+    cache_key = (model.fingerprint, codigo)
+    cached = rank_cache_get(cache_key)
+    if cached is not None:
+        if len(cached) < store.n_applicants:
+            new_positions = np.arange(len(cached), store.n_applicants)
+            cached = np.concatenate([cached] + [scores for _, scores in score_applicant_chunks(
+                model, store, codigo, vaga, new_positions, timer)])
+            rank_cache_put(cache_key, cached, store)
+        yield positions, cached[positions]
+        return
+    
+    # Sem filtros, as posições são todas as linhas vigentes (substituídas por deltas ficam de fora)
+    full_scan = len(positions) == store.n_live_applicants
+    collected = []
+    for chunk, scores in score_applicant_chunks(model, store, codigo, vaga, positions, timer):
+        if full_scan:
+            collected.append(scores)
+        yield chunk, scores
+    
+    if full_scan and collected:
+        all_scores = np.zeros(store.n_applicants)
+        all_scores[positions] = np.concatenate(collected)
+        rank_cache_put(cache_key, all_scores, store)
+
+def rank_applicants(model, codigo, vaga, positions, k, timer=None, store=None):
+    """Retorna os K melhores candidatos como (score, posição) usando heap limitado"""
+    timer = timer or StageTimer()
+    heap = []  # min-heap com os K maiores scores; desempate pela menor posição
+    for chunk, scores in iter_applicant_scores(model, codigo, vaga, positions, timer, store):
+        with timer.stage('select'):
+            # Apenas os K melhores do chunk podem entrar no heap
+            candidates = np.argpartition(-scores, k - 1)[:k] if len(scores) > k else range(len(scores))
+            for i in candidates:
+                item = (float(scores[i]), -int(chunk[i]))
+                if len(heap) < k:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+    
+    return [(score, -negative_position) for score, negative_position in sorted(heap, reverse=True)]
+
+@app.route('/api/vagas/<codigo>/rank')
+def rank_vaga(codigo):
+    """Endpoint que retorna os K candidatos mais compatíveis com uma vaga"""
+    try:
+        model = model_registry.active
+        if model is None:
+            return jsonify({'error': 'Modelo não carregado'}), 500
         
-        return jsonify(result)
+        # Mesma versão dos dados do início ao fim (deltas trocam o data_store)
+        store = data_store
+        if not store.vagas_loaded or not store.candidates_loaded:
+            return jsonify({'error': 'Dados de vagas e candidatos não carregados'}), 503
+        
+        codigo = str(codigo)
+        vaga = store.get_vaga(codigo)
+        if vaga is None:
+            return jsonify({'error': f'Vaga {codigo} não encontrada'}), 404
+        
+        try:
+            k = int(request.args.get('k', 10))
+        except ValueError:
+            return jsonify({'error': 'Parâmetro k deve ser um inteiro'}), 400
+        if k < 1 or k > MAX_RANK_K:
+            return jsonify({'error': f'Parâmetro k deve estar entre 1 e {MAX_RANK_K}'}), 400
+        
+        schema = response_schema()
+        if schema is None:
+            return invalid_schema_response()
+        
+        # Filtros aplicados antes do scoring
+        filters = {name: request.args.get(name) for name in APPLICANT_FILTERS if request.args.get(name)}
+        
+        start_time = time.perf_counter()
+        timer = StageTimer(stage_duration, 'rank')
+        cached = rank_cache_contains((model.fingerprint, codigo))
+        with timer.stage('filter'):
+            positions = store.filter_applicants(filters)
+        ranking = rank_applicants(model, codigo, vaga, positions, k, timer, store) if len(positions) else []
+        rank_latency.observe(time.perf_counter() - start_time)
+        
+        with timer.stage('response'):
+            top_positions = [position for _, position in ranking]
+            codigos = store.applicant_codes(top_positions)
+            if schema == 'compact':
+                results = [
+                    {'rank': rank, 'codigo': codigo_candidato, 'probability': score}
+                    for rank, ((score, _), codigo_candidato) in enumerate(zip(ranking, codigos), start=1)
+                ]
+            else:
+                records = store.applicant_records(top_positions)
+                results = [
+                    {
+                        'rank': rank,
+                        'codigo': codigo_candidato,
+                        'nome': record['nome'],
+                        'quality_score': score * 100,
+                        'probability': score
+                    }
+                    for rank, ((score, _), codigo_candidato, record) in enumerate(zip(ranking, codigos, records),
+                                                                                   start=1)
+                ]
+            
+            response = encoded_response({
+                'vaga': {'codigo': codigo, 'titulo_vaga': vaga.get('titulo_vaga', '')},
+                'k': k,
+                'filters': filters,
+                'candidates_scored': int(len(positions)),
+                'cached': cached,
+                'results': results
+            }, 'rank', schema, len(results))
+        timer.observe()
+        return response
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -351,4 +1520,6 @@ except Exception as e:
 
 if __name__ == '__main__':
     print("🚀 Iniciando servidor Flask...")
+    start_model_watcher()
+    start_data_watcher()
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,622 @@
+import os
+import re
+import json
+import threading
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from features import CANDIDATO_INPUTS, ApplicantProfile
+
+BASE_DIR = Path(__file__).parent
+
+# Campos de vaga e candidato usados por prepare_hired_candidates_features
+VAGA_FIELDS = [
+    'titulo_vaga', 'competencias_tecnicas_requeridas', 'nivel_academico',
+    'nivel_ingles', 'nivel_profissional', 'tipo_contratacao', 'areas_atuacao'
+]
+APPLICANT_FIELDS = ['nome', 'conhecimentos_tecnicos', 'nivel_academico', 'nivel_ingles', 'area_de_atuacao']
+PROSPECT_FIELDS = ['codigo_vaga', 'codigo_candidato', 'situacao_candidado']
+
+# Filtros aceitos no ranking -> coluna do candidato
+APPLICANT_FILTERS = {
+    'area': 'area_de_atuacao',
+    'nivel_ingles': 'nivel_ingles',
+    'nivel_academico': 'nivel_academico'
+}
+
+LFS_POINTER_PREFIX = b'version https://git-lfs'
+STORE_MANIFEST = 'manifest.json'
+STORE_FORMAT_VERSION = 1
+# Posições de uma tabela (ou segmento de delta) ordenadas pelo código, para buscas sem carregar a chave
+KEY_INDEX = '_index.npy'
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def resolve_data_dir():
+    """Resolve o diretório de dados (Docker monta em /app/data, local usa ../data)"""
+    if os.environ.get('DATA_DIR'):
+        return Path(os.environ['DATA_DIR'])
+    for candidate in (BASE_DIR / 'data', BASE_DIR.parent / 'data'):
+        if candidate.is_dir():
+            return candidate
+    return BASE_DIR.parent / 'data'
+
+
+def resolve_store_dir():
+    """Resolve o diretório do armazenamento colunar gerado por ingest.py"""
+    if os.environ.get('STORE_DIR'):
+        return Path(os.environ['STORE_DIR'])
+    return resolve_data_dir() / 'store'
+
+
+def is_lfs_pointer(path):
+    """Verifica se o arquivo é apenas um ponteiro Git LFS (dados não baixados)"""
+    with open(path, 'rb') as f:
+        return f.read(len(LFS_POINTER_PREFIX)) == LFS_POINTER_PREFIX
+
+
+def normalize_vaga(vaga):
+    """Converte uma vaga do vagas.json para o formato esperado pelas features"""
+    info_basicas = vaga.get('informacoes_basicas', {})
+    perfil_vaga = vaga.get('perfil_vaga', {})
+    return {
+        'titulo_vaga': info_basicas.get('titulo_vaga', ''),
+        'competencias_tecnicas_requeridas': perfil_vaga.get('competencia_tecnicas_e_comportamentais', ''),
+        'nivel_academico': perfil_vaga.get('nivel_academico', ''),
+        'nivel_ingles': perfil_vaga.get('nivel_ingles', ''),
+        'nivel_profissional': perfil_vaga.get('nivel_profissional', ''),
+        'tipo_contratacao': info_basicas.get('tipo_contratacao', ''),
+        'areas_atuacao': perfil_vaga.get('areas_atuacao', '')
+    }
+
+
+def normalize_applicant(applicant):
+    """Converte um candidato do applicants.json para o formato esperado pelas features"""
+    info_basicas = applicant.get('infos_basicas', {})
+    info_profissionais = applicant.get('informacoes_profissionais', {})
+    formacao_idiomas = applicant.get('formacao_e_idiomas', {})
+    return {
+        'nome': info_basicas.get('nome', ''),
+        'conhecimentos_tecnicos': info_profissionais.get('conhecimentos_tecnicos', ''),
+        'nivel_academico': formacao_idiomas.get('nivel_academico', ''),
+        'nivel_ingles': formacao_idiomas.get('nivel_ingles', ''),
+        'area_de_atuacao': info_profissionais.get('area_atuacao', '')
+    }
+
+
+def normalize_prospects(codigo_vaga, vaga_prospects):
+    """Achata as prospecções de uma vaga do prospects.json em linhas"""
+    return [
+        {
+            'codigo_vaga': codigo_vaga,
+            'codigo_candidato': prospect.get('codigo', ''),
+            'situacao_candidado': prospect.get('situacao_candidado', '')
+        }
+        for prospect in vaga_prospects.get('prospects', [])
+    ]
+
+
+def iter_json_object_items(path, read_size=1 << 20):
+    """Itera (chave, valor) do objeto JSON de nível superior lendo o arquivo em blocos.
+
+    Apenas um registro por vez é decodificado, então o pico de memória fica
+    limitado ao tamanho do bloco mais o maior registro, não ao arquivo inteiro.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer, position, eof = '', 0, False
+
+        def read_more():
+            nonlocal buffer, position, eof
+            chunk = f.read(read_size)
+            if not chunk:
+                eof = True
+                return False
+            buffer = buffer[position:] + chunk
+            position = 0
+            return True
+
+        def skip_whitespace():
+            nonlocal position
+            while True:
+                position = _WHITESPACE.match(buffer, position).end()
+                if position < len(buffer) or not read_more():
+                    return
+
+        def expect(char):
+            nonlocal position
+            skip_whitespace()
+            if position >= len(buffer) or buffer[position] != char:
+                found = buffer[position] if position < len(buffer) else 'EOF'
+                raise ValueError(f"JSON inválido em {path}: esperado {char!r}, encontrado {found!r}")
+            position += 1
+
+        def decode_value():
+            nonlocal position
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, position)
+                    # Um valor que termina no fim do buffer pode estar truncado (ex.: número)
+                    if end < len(buffer) or eof:
+                        position = end
+                        return value
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                read_more()
+
+        expect('{')
+        skip_whitespace()
+        if buffer[position:position + 1] == '}':
+            return
+        while True:
+            skip_whitespace()
+            key = decode_value()
+            expect(':')
+            skip_whitespace()
+            yield key, decode_value()
+            skip_whitespace()
+            if buffer[position:position + 1] == ',':
+                position += 1
+                continue
+            expect('}')
+            return
+
+
+def _to_text(value):
+    return '' if value is None else str(value)
+
+
+class StringColumn:
+    """Coluna de strings UTF-8 contíguas (offsets int64 + bytes), compatível com memmap"""
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    @classmethod
+    def from_strings(cls, values):
+        encoded = [_to_text(value).encode('utf-8') for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(item) for item in encoded], out=offsets[1:])
+        data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        return cls(offsets, data)
+
+    @classmethod
+    def open(cls, prefix, mmap_mode='r'):
+        offsets = np.load(f'{prefix}.offsets.npy', mmap_mode=mmap_mode)
+        data_path = f'{prefix}.data.npy'
+        # Arrays vazios não podem ser mapeados em memória
+        data = np.load(data_path, mmap_mode=mmap_mode if offsets[-1] > 0 else None)
+        return cls(offsets, data)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, position):
+        return self.data[self.offsets[position]:self.offsets[position + 1]].tobytes().decode('utf-8')
+
+    def take(self, positions):
+        positions = np.asarray(positions, dtype=np.int64)
+        starts = self.offsets[positions].tolist()
+        ends = self.offsets[positions + 1].tolist()
+        data = self.data
+        return [data[start:end].tobytes().decode('utf-8') for start, end in zip(starts, ends)]
+
+    def to_list(self):
+        # Uma única cópia dos bytes e fatiamento em Python evita o custo de indexação NumPy por item
+        raw = self.data.tobytes()
+        offsets = self.offsets.tolist()
+        return [raw[start:end].decode('utf-8') for start, end in zip(offsets[:-1], offsets[1:])]
+
+    @property
+    def segments(self):
+        return [self]
+
+    def extend(self, columns):
+        return SegmentedColumn([self, *columns]) if columns else self
+
+
+class SegmentedColumn:
+    """Coluna da base seguida das colunas dos deltas aplicados (posições contínuas entre segmentos)"""
+
+    def __init__(self, segments):
+        self.segments = segments
+        self.starts = np.zeros(len(segments) + 1, dtype=np.int64)
+        np.cumsum([len(segment) for segment in segments], out=self.starts[1:])
+
+    def __len__(self):
+        return int(self.starts[-1])
+
+    def _segment(self, position):
+        return int(np.searchsorted(self.starts, position, side='right')) - 1
+
+    def __getitem__(self, position):
+        index = self._segment(position)
+        return self.segments[index][position - int(self.starts[index])]
+
+    def take(self, positions):
+        positions = np.asarray(positions, dtype=np.int64)
+        if not len(positions):
+            return []
+        indexes = np.searchsorted(self.starts, positions, side='right') - 1
+        first = int(indexes[0])
+        # Caso comum: todas as posições no mesmo segmento (em geral, a base)
+        if (indexes == first).all():
+            return self.segments[first].take(positions - self.starts[first])
+        values = [None] * len(positions)
+        for index in np.unique(indexes).tolist():
+            selected = np.flatnonzero(indexes == index)
+            taken = self.segments[index].take(positions[selected] - self.starts[index])
+            for position, value in zip(selected.tolist(), taken):
+                values[position] = value
+        return values
+
+    def to_list(self):
+        return [value for segment in self.segments for value in segment.to_list()]
+
+    def extend(self, columns):
+        return SegmentedColumn([*self.segments, *columns]) if columns else self
+
+
+class ColumnarTable:
+    """Tabela de colunas de strings com acesso por posição e por código.
+
+    Com deltas aplicados (ingest.py apply), cada coluna é a da base seguida
+    das dos segmentos, e `superseded` traz as posições substituídas por uma
+    versão mais nova do mesmo código: continuam endereçáveis, mas ficam fora
+    de `live_positions` e `to_frame`, e `position_of` devolve a mais nova.
+
+    O índice por código é o da base (construído sob demanda e compartilhado
+    por todas as versões estendidas da tabela) mais um dict por segmento de
+    delta, consultados do mais novo para o mais antigo: aplicar um delta só
+    indexa as linhas dele.
+    """
+
+    def __init__(self, columns, key='codigo', superseded=None):
+        self.columns = columns
+        self.key = key
+        self.superseded = np.zeros(0, dtype=np.int64) if superseded is None else superseded
+        # Índice da base em uma lista de um item: quem construir primeiro serve as demais versões
+        self._base_positions = [None]
+        self._segment_positions = ()
+        self._live = None
+
+    @classmethod
+    def from_records(cls, codes, records, fields, key='codigo'):
+        columns = {key: StringColumn.from_strings(codes)}
+        for field in fields:
+            columns[field] = StringColumn.from_strings([record.get(field, '') for record in records])
+        return cls(columns, key)
+
+    @classmethod
+    def open(cls, directory, mmap_mode='r', segments=()):
+        """Abre a tabela base e os segmentos de delta (`{'segment', 'replaces'}`), em ordem"""
+        directory = Path(directory)
+        with open(directory / STORE_MANIFEST, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        columns = {
+            name: StringColumn.open(directory / name, mmap_mode=mmap_mode)
+            for name in manifest['columns']
+        }
+        return cls(columns, manifest.get('key', 'codigo')).extend(directory, segments, mmap_mode)
+
+    def extend(self, directory, segments, mmap_mode='r'):
+        """Nova tabela com os segmentos de delta seguintes; as colunas já abertas são reaproveitadas"""
+        if not segments:
+            return self
+        directory = Path(directory)
+        opened = [{name: StringColumn.open(directory / segment['segment'] / name, mmap_mode=mmap_mode)
+                   for name in self.columns} for segment in segments]
+        columns = {name: column.extend([segment[name] for segment in opened]) for name, column in self.columns.items()}
+        replaced = [np.asarray(segment['replaces'], dtype=np.int64) for segment in segments]
+        table = ColumnarTable(columns, self.key, np.union1d(self.superseded, np.concatenate(replaced)))
+        # Índice da base compartilhado; só as linhas dos segmentos novos são indexadas
+        table._base_positions = self._base_positions
+        start = self.n_rows
+        overlays = []
+        for segment in opened:
+            codes = segment[self.key].to_list()
+            overlays.append({code: start + offset for offset, code in enumerate(codes)})
+            start += len(codes)
+        table._segment_positions = self._segment_positions + tuple(overlays)
+        return table
+
+    @property
+    def n_rows(self):
+        return len(self.columns[self.key])
+
+    @property
+    def n_live(self):
+        return self.n_rows - len(self.superseded)
+
+    def live_positions(self):
+        """Posições das linhas não substituídas por deltas (calculadas no primeiro uso; somente leitura)"""
+        if self._live is None:
+            mask = np.ones(self.n_rows, dtype=bool)
+            mask[self.superseded] = False
+            live = np.flatnonzero(mask)
+            live.flags.writeable = False
+            self._live = live
+        return self._live
+
+    @property
+    def fields(self):
+        return [name for name in self.columns if name != self.key]
+
+    def column(self, name):
+        return self.columns[name]
+
+    def position_of(self, code):
+        """Posição da linha mais recente com o código informado (índice da base construído sob demanda)"""
+        code = str(code)
+        for positions in reversed(self._segment_positions):
+            position = positions.get(code)
+            if position is not None:
+                return position
+        if self._base_positions[0] is None:
+            base = self.columns[self.key].segments[0]
+            self._base_positions[0] = {code: i for i, code in enumerate(base.to_list())}
+        return self._base_positions[0].get(code)
+
+    def codes(self, positions):
+        return self.columns[self.key].take(positions)
+
+    def records(self, positions, fields=None):
+        fields = fields or self.fields
+        values = [self.columns[field].take(positions) for field in fields]
+        return [dict(zip(fields, row)) for row in zip(*values)]
+
+    def to_frame(self, fields=None):
+        """Materializa a tabela (ou parte das colunas) como DataFrame pandas, sem as linhas substituídas"""
+        fields = fields or list(self.columns)
+        frame = pd.DataFrame({field: self.columns[field].to_list() for field in fields})
+        if len(self.superseded):
+            frame = frame.drop(index=self.superseded).reset_index(drop=True)
+        return frame
+
+
+def read_store_manifest(store_dir):
+    """Manifesto do store (None se ainda não foi gerado)"""
+    manifest_path = Path(store_dir) / STORE_MANIFEST
+    if not manifest_path.exists():
+        return None
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def store_base_dir(store_dir, manifest):
+    """Diretório da base apontada pelo manifesto (`base-<id>`; stores antigos têm as tabelas na raiz)"""
+    base = manifest.get('base')
+    return Path(store_dir) / base if base else Path(store_dir)
+
+
+def store_version(manifest):
+    """Versão dos dados do store: base e deltas aplicados, em ordem (muda a cada build, apply e compact)"""
+    return {'base_id': manifest.get('base_id'), 'deltas': [delta['id'] for delta in manifest.get('deltas', [])]}
+
+
+def table_segments(manifest, name, deltas=None):
+    """Segmentos de delta de uma tabela, na ordem de aplicação"""
+    deltas = manifest.get('deltas', []) if deltas is None else deltas
+    return [{'segment': delta['segment'], 'replaces': delta['tables'][name]['replaces']}
+            for delta in deltas if name in delta['tables']]
+
+
+def open_store(store_dir=None, mmap_mode='r', manifest=None):
+    """Abre o armazenamento colunar, com os deltas aplicados; retorna None se ainda não foi gerado.
+
+    `manifest` (já lido pelo chamador) fixa a versão aberta.
+    """
+    store_dir = Path(store_dir) if store_dir else resolve_store_dir()
+    manifest = manifest or read_store_manifest(store_dir)
+    if manifest is None:
+        return None
+    base_dir = store_base_dir(store_dir, manifest)
+    return {
+        name: ColumnarTable.open(base_dir / name, mmap_mode=mmap_mode, segments=table_segments(manifest, name))
+        for name in manifest['tables']
+    }
+
+
+class DataStore:
+    """Vagas e candidatos residentes para ranking no servidor"""
+
+    def __init__(self, vagas=None, applicants=None):
+        self.vagas = vagas or ColumnarTable.from_records([], [], VAGA_FIELDS)
+        self.applicants = applicants or ColumnarTable.from_records([], [], APPLICANT_FIELDS)
+        self._filter_columns = {}
+        self._applicant_profile = None
+        # Origem no armazenamento colunar (base e deltas já aplicados), para `refresh`
+        self.store_dir = None
+        # Carregado dos JSON: onde o manifesto é esperado, para adotar o store quando for gerado
+        self.pending_store_dir = None
+        self.base_id = None
+        self.n_deltas = 0
+
+    @property
+    def vagas_loaded(self):
+        return self.vagas.n_rows > 0
+
+    @property
+    def candidates_loaded(self):
+        return self.applicants.n_rows > 0
+
+    @property
+    def n_applicants(self):
+        return self.applicants.n_rows
+
+    @property
+    def n_live_applicants(self):
+        return self.applicants.n_live
+
+    @classmethod
+    def from_raw(cls, vagas_data, applicants_data):
+        """Cria o store a partir dos dicionários no formato dos arquivos JSON"""
+        return cls.from_items(vagas_data.items(), applicants_data.items())
+
+    @classmethod
+    def from_items(cls, vagas_items, applicants_items):
+        """Cria o store a partir de iteráveis (código, registro bruto)"""
+        vaga_codes, vagas = [], []
+        for codigo, vaga in vagas_items:
+            vaga_codes.append(str(codigo))
+            vagas.append(normalize_vaga(vaga))
+        applicant_codes, applicants = [], []
+        for codigo, applicant in applicants_items:
+            applicant_codes.append(str(codigo))
+            applicants.append(normalize_applicant(applicant))
+        return cls(
+            ColumnarTable.from_records(vaga_codes, vagas, VAGA_FIELDS),
+            ColumnarTable.from_records(applicant_codes, applicants, APPLICANT_FIELDS)
+        )
+
+    @classmethod
+    def load(cls, data_dir=None, store_dir=None):
+        """Abre o armazenamento colunar (memmap) ou, na falta dele, lê os arquivos JSON"""
+        store_dir = Path(store_dir) if store_dir else resolve_store_dir()
+        manifest = read_store_manifest(store_dir)
+        if manifest is not None:
+            tables = open_store(store_dir, manifest=manifest)
+            store = cls(tables['vagas'], tables['applicants'])
+            store.store_dir = store_dir
+            store.base_id = manifest.get('base_id')
+            store.n_deltas = len(manifest.get('deltas', []))
+            return store
+
+        data_dir = Path(data_dir) if data_dir else resolve_data_dir()
+        items = {}
+        for name in ('vagas', 'applicants'):
+            path = data_dir / f'{name}.json'
+            if not path.exists() or is_lfs_pointer(path):
+                print(f"⚠️ {path} indisponível (ausente ou ponteiro Git LFS)")
+                items[name] = []
+                continue
+            items[name] = iter_json_object_items(path)
+        store = cls.from_items(items['vagas'], items['applicants'])
+        store.pending_store_dir = store_dir
+        return store
+
+    def refresh(self):
+        """Store com os deltas aplicados depois da carga, e os códigos alterados.
+
+        Devolve (store, alterações): o próprio store e None se nada mudou; um
+        store estendido só com os segmentos novos e `{'incremental': True,
+        'vagas': [...], 'applicants': [...]}`; ou, se a base foi regerada ou
+        compactada (posições mudam), o store reaberto e `{'incremental': False}`.
+        Carregado dos JSON, passa ao store colunar assim que o manifesto aparece.
+        """
+        if self.store_dir is None:
+            if self.pending_store_dir is None or read_store_manifest(self.pending_store_dir) is None:
+                return self, None
+            return DataStore.load(store_dir=self.pending_store_dir), {'incremental': False}
+        manifest = read_store_manifest(self.store_dir)
+        if manifest is None:
+            return self, None
+        deltas = manifest.get('deltas', [])
+        if manifest.get('base_id') != self.base_id or len(deltas) < self.n_deltas:
+            return DataStore.load(store_dir=self.store_dir), {'incremental': False}
+        if len(deltas) == self.n_deltas:
+            return self, None
+
+        new_deltas = deltas[self.n_deltas:]
+        base_dir = store_base_dir(self.store_dir, manifest)
+        vagas = self.vagas.extend(base_dir / 'vagas', table_segments(manifest, 'vagas', new_deltas))
+        applicants = self.applicants.extend(base_dir / 'applicants',
+                                            table_segments(manifest, 'applicants', new_deltas))
+        store = DataStore(vagas, applicants)
+        store.store_dir, store.base_id, store.n_deltas = self.store_dir, self.base_id, len(deltas)
+        new_applicants = np.arange(self.applicants.n_rows, applicants.n_rows)
+        for name, values in self._filter_columns.items():
+            store._filter_columns[name] = values + [text.lower() for text in applicants.column(name).take(new_applicants)]
+        if self._applicant_profile is not None:
+            store._applicant_profile = self._applicant_profile.extend(
+                store.applicant_columns(new_applicants, CANDIDATO_INPUTS), len(new_applicants))
+        return store, {
+            'incremental': True,
+            'vagas': vagas.codes(np.arange(self.vagas.n_rows, vagas.n_rows)),
+            'applicants': applicants.codes(new_applicants)
+        }
+
+    def get_vaga(self, codigo):
+        position = self.vagas.position_of(codigo)
+        if position is None:
+            return None
+        return self.vagas.records([position])[0]
+
+    def filter_applicants(self, filters=None):
+        """Retorna as posições dos candidatos que atendem aos filtros (substring, sem caixa)"""
+        mask = np.ones(self.n_applicants, dtype=bool)
+        mask[self.applicants.superseded] = False
+        for name, value in (filters or {}).items():
+            if not value:
+                continue
+            column = self._filter_column(APPLICANT_FILTERS[name])
+            needle = str(value).lower()
+            mask &= np.fromiter((needle in text for text in column), dtype=bool, count=len(column))
+        return np.flatnonzero(mask)
+
+    def _filter_column(self, name):
+        # Versões em minúsculas das colunas filtráveis, calculadas no primeiro uso
+        if name not in self._filter_columns:
+            self._filter_columns[name] = [text.lower() for text in self.applicants.column(name).to_list()]
+        return self._filter_columns[name]
+
+    def applicant_profile(self):
+        """Entradas dos candidatos pré-calculadas para o ranking (features.ApplicantProfile), uma vez por versão"""
+        if self._applicant_profile is None:
+            self._applicant_profile = ApplicantProfile(
+                self.applicant_columns(np.arange(self.n_applicants), CANDIDATO_INPUTS), self.n_applicants)
+        return self._applicant_profile
+
+    def applicant_records(self, positions):
+        """Registros de candidatos (dicts) para as posições informadas"""
+        return self.applicants.records(positions)
+
+    def applicant_columns(self, positions, fields=None):
+        """Colunas (campo -> lista de valores) dos candidatos nas posições informadas"""
+        return {field: self.applicants.column(field).take(positions) for field in fields or self.applicants.fields}
+
+    def applicant_codes(self, positions):
+        return self.applicants.codes(positions)
+
+
+class StoreWatcher(threading.Thread):
+    """Verifica periodicamente o manifesto do store (deltas e compactações) e chama `on_change`"""
+
+    def __init__(self, store_dir, on_change, interval):
+        super().__init__(name='store-watcher', daemon=True)
+        self.store_dir = Path(store_dir)
+        self.on_change = on_change
+        self.interval = interval
+        # A primeira verificação confere o store herdado do master (on_change ignora o que já foi carregado)
+        self.last_signature = None
+        self._stopped = threading.Event()
+
+    def signature(self):
+        try:
+            stat = (self.store_dir / STORE_MANIFEST).stat()
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def check(self):
+        signature = self.signature()
+        if signature is None or signature == self.last_signature:
+            return False
+        self.last_signature = signature
+        try:
+            self.on_change()
+        except Exception as e:
+            print(f"⚠️ Falha ao atualizar os dados do store: {e}")
+        return True
+
+    def run(self):
+        self.check()
+        while not self._stopped.wait(self.interval):
+            self.check()
+
+    def stop(self):
+        self._stopped.set()
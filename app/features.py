@@ -0,0 +1,521 @@
+"""Engenharia de features compartilhada entre serviço (app.py) e treinamento (notebook).
+
+As features são calculadas por coluna sobre todos os pares de uma vez: cada
+coluna é fatorada em valores únicos, a normalização, a tokenização e os
+matchers pré-compilados de palavras-chave rodam só nos únicos (com cache entre
+chamadas), e a interseção de tokens é feita uma vez por par único.
+`compute_feature_row` mantém a versão linha a linha original como referência
+para os testes de equivalência.
+"""
+import numpy as np
+import pandas as pd
+from functools import lru_cache
+
+# Colunas produzidas, na ordem usada pelo pipeline
+FEATURE_COLUMNS = [
+    'tech_success_score', 'academic_success_score', 'english_success_score',
+    'is_clt', 'is_pj', 'is_tech_area', 'nivel_profissional',
+    'areas_atuacao', 'area_atuacao_candidato', 'combined_text'
+]
+NUMERIC_FEATURES = ['tech_success_score', 'academic_success_score', 'english_success_score']
+CATEGORICAL_FEATURES = ['nivel_profissional', 'areas_atuacao', 'area_atuacao_candidato']
+BINARY_FEATURES = ['is_clt', 'is_pj', 'is_tech_area']
+TEXT_FEATURES = ['combined_text']
+
+# Tecnologias mais valorizadas em contratações
+HIGH_VALUE_TECHS = ['python', 'java', 'javascript', 'react', 'angular', 'sql',
+                    'aws', 'docker', 'kubernetes', 'spring', 'django', 'flask']
+
+ACADEMIC_HIERARCHY = {
+    'fundamental': 1, 'médio': 2, 'técnico': 3,
+    'superior': 4, 'pós': 5, 'mestrado': 6, 'doutorado': 7
+}
+ACADEMIC_DEFAULT_LEVEL = 3
+
+ENGLISH_LEVELS = {
+    'básico': 1, 'intermediário': 2, 'avançado': 3, 'fluente': 4
+}
+ENGLISH_DEFAULT_LEVEL = 1
+
+TECH_AREA_KEYWORDS = ['ti', 'tecnologia', 'desenvolvimento']
+NOT_INFORMED = 'não_informado'
+
+# Entradas em cache de normalização/tokenização/matchers: os mesmos candidatos
+# são pontuados contra muitas vagas (ranking, scoring em massa)
+CACHE_SIZE = 1 << 17
+
+# Campos de entrada: chave no dict da vaga/candidato
+VAGA_INPUTS = [
+    'titulo_vaga', 'competencias_tecnicas_requeridas', 'nivel_academico', 'nivel_ingles',
+    'nivel_profissional', 'tipo_contratacao', 'areas_atuacao'
+]
+CANDIDATO_INPUTS = ['conhecimentos_tecnicos', 'nivel_academico', 'nivel_ingles', 'area_de_atuacao']
+
+# Colunas do DataFrame de treinamento (notebook) -> (origem, campo)
+TRAINING_INPUTS = {
+    'titulo_vaga': ('vaga', 'titulo_vaga'),
+    'competencias_tecnicas': ('vaga', 'competencias_tecnicas_requeridas'),
+    'nivel_academico_vaga': ('vaga', 'nivel_academico'),
+    'nivel_ingles_vaga': ('vaga', 'nivel_ingles'),
+    'nivel_profissional': ('vaga', 'nivel_profissional'),
+    'tipo_contratacao': ('vaga', 'tipo_contratacao'),
+    'areas_atuacao': ('vaga', 'areas_atuacao'),
+    'conhecimentos_tecnicos': ('candidato', 'conhecimentos_tecnicos'),
+    'nivel_academico_candidato': ('candidato', 'nivel_academico'),
+    'nivel_ingles_candidato': ('candidato', 'nivel_ingles'),
+    'area_atuacao_candidato': ('candidato', 'area_de_atuacao')
+}
+
+
+class _KeywordMatcher:
+    """Matcher de várias palavras-chave (substring) com resultado `text -> bitmask`.
+
+    Os pares (palavra-chave, bit) são calculados uma vez e a função fica em
+    cache por texto, então textos repetidos não refazem os testes `in`.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = tuple(keywords)
+        bits = tuple((keyword, 1 << bit) for bit, keyword in enumerate(self.keywords))
+
+        def match(text):
+            mask = 0
+            for keyword, bit in bits:
+                if keyword in text:
+                    mask |= bit
+            return mask
+
+        self.match = lru_cache(maxsize=CACHE_SIZE)(match)
+
+    def masks(self, texts):
+        return np.array([self.match(text) for text in texts], dtype=np.int64)
+
+
+class _LevelMatcher(_KeywordMatcher):
+    """Maior nível cujo nome aparece no texto, com tabela bitmask -> nível"""
+
+    def __init__(self, levels, default):
+        super().__init__(levels)
+        values = np.array(list(levels.values()), dtype=np.int64)
+        self.table = np.array([
+            max((values[bit] for bit in range(len(values)) if mask >> bit & 1), default=default)
+            for mask in range(1 << len(values))
+        ], dtype=np.int64)
+
+    def levels(self, texts):
+        return self.table[self.masks(texts)]
+
+
+HIGH_VALUE_MATCHER = _KeywordMatcher(HIGH_VALUE_TECHS)
+ACADEMIC_MATCHER = _LevelMatcher(ACADEMIC_HIERARCHY, ACADEMIC_DEFAULT_LEVEL)
+ENGLISH_MATCHER = _LevelMatcher(ENGLISH_LEVELS, ENGLISH_DEFAULT_LEVEL)
+TECH_AREA_MATCHER = _KeywordMatcher(TECH_AREA_KEYWORDS)
+CLT_MATCHER = _KeywordMatcher(['clt'])
+PJ_MATCHER = _KeywordMatcher(['pj'])
+
+# Contagem de bits para as máscaras de tecnologias (12 bits)
+_POPCOUNT = np.array([bin(i).count('1') for i in range(1 << len(HIGH_VALUE_TECHS))], dtype=np.int64)
+
+
+class _Value:
+    """Representa um valor não-string pelo que as features usam dele: str(x) e bool(x).
+
+    Evita que a fatoração junte valores distintos para as features (1 e True,
+    None e NaN) e permite agrupar valores não hasheáveis (listas/dicts do JSON).
+    """
+    __slots__ = ('text', 'truthy')
+
+    def __init__(self, value):
+        self.text = str(value)
+        self.truthy = bool(value)
+
+    def __eq__(self, other):
+        return isinstance(other, _Value) and (self.text, self.truthy) == (other.text, other.truthy)
+
+    def __hash__(self):
+        return hash((self.text, self.truthy))
+
+    def __str__(self):
+        return self.text
+
+    def __bool__(self):
+        return self.truthy
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _normalize(value):
+    """str(x).lower() de um valor único, reaproveitado entre chamadas"""
+    return str(value).lower()
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _tokenize(text):
+    """Tokens distintos (split por espaço) de um texto já normalizado"""
+    return frozenset(text.split())
+
+
+class _Column:
+    """Coluna de entrada fatorada: códigos por linha + valores únicos"""
+
+    def __init__(self, values, n_rows):
+        if isinstance(values, (list, tuple, np.ndarray, pd.Series, pd.Index)):
+            # Series evita que listas aninhadas virem um array 2D
+            values = pd.Series(values, dtype=object).to_numpy() if isinstance(values, (list, tuple)) \
+                else np.asarray(values, dtype=object)
+            if pd.api.types.infer_dtype(values, skipna=False) != 'string':
+                values = np.array([v if isinstance(v, str) else _Value(v) for v in values], dtype=object)
+            self.codes, uniques = pd.factorize(values)
+            self.uniques = uniques.tolist()
+        else:
+            # Escalar (ex.: a mesma vaga para todos os candidatos)
+            self.codes = np.zeros(n_rows, dtype=np.intp)
+            self.uniques = [values if isinstance(values, str) else _Value(values)]
+
+    def take(self, unique_values):
+        return np.asarray(unique_values)[self.codes]
+
+
+def _as_text(uniques):
+    """str(x).lower() nos valores únicos"""
+    return [_normalize(value) for value in uniques]
+
+
+def _as_lower_or_empty(uniques):
+    """`str(x).lower() if x else ''` nos valores únicos"""
+    return [_normalize(value) if value else '' for value in uniques]
+
+
+def _as_category(uniques):
+    """`str(x) if x else 'não_informado'` + tratamento de '' e 'nan'"""
+    texts = (str(value) if value else NOT_INFORMED for value in uniques)
+    return np.array([NOT_INFORMED if text in ('', 'nan') else text for text in texts], dtype=object)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _tech_profile(value):
+    """(tokens, nº de tokens, bitmask de tecnologias, preenchido) de um texto técnico"""
+    text = _normalize(value) if value else ''
+    tokens = _tokenize(text)
+    return tokens, len(tokens), HIGH_VALUE_MATCHER.match(text), text != ''
+
+
+def _tech_profiles(column):
+    """Perfis técnicos dos valores únicos, transpostos em (tokens, contagens, máscaras, preenchidos)"""
+    profiles = [_tech_profile(value) for value in column.uniques]
+    tokens, counts, masks, filled = zip(*profiles) if profiles else ((), (), (), ())
+    return (tokens, column.take(np.array(counts, dtype=np.int64)),
+            column.take(np.array(masks, dtype=np.int64)), column.take(np.array(filled, dtype=bool)))
+
+
+def _tech_success_score(competencias, conhecimentos):
+    comp_tokens, comp_words, comp_mask, comp_filled = _tech_profiles(competencias)
+    conhec_tokens, _, conhec_mask, conhec_filled = _tech_profiles(conhecimentos)
+
+    # Interseção de tokens calculada uma vez por par único (vaga, candidato)
+    n_conhec = len(conhec_tokens)
+    pair_codes, pair_inverse = np.unique(
+        competencias.codes.astype(np.int64) * n_conhec + conhecimentos.codes, return_inverse=True)
+    comp_of_pair, conhec_of_pair = np.divmod(pair_codes, max(n_conhec, 1))
+    common_words = np.array([
+        len(comp_tokens[i] & conhec_tokens[j]) for i, j in zip(comp_of_pair.tolist(), conhec_of_pair.tolist())
+    ], dtype=np.int64)[pair_inverse.ravel()]
+
+    # Bonus para tecnologias de alto valor presentes nos dois textos
+    high_value_matches = _POPCOUNT[comp_mask & conhec_mask]
+    tech_bonus = np.minimum(0.3, high_value_matches * 0.1)
+
+    valid = comp_filled & conhec_filled & (comp_words > 0)
+    basic_match = np.divide(common_words, comp_words, out=np.zeros(len(comp_words)), where=comp_words > 0)
+    return np.where(valid, np.minimum(1.0, basic_match + tech_bonus), 0.5)
+
+
+def _academic_success_score(nivel_vaga, nivel_candidato):
+    vaga_level = nivel_vaga.take(ACADEMIC_MATCHER.levels(_as_lower_or_empty(nivel_vaga.uniques)))
+    cand_level = nivel_candidato.take(ACADEMIC_MATCHER.levels(_as_lower_or_empty(nivel_candidato.uniques)))
+    return np.select([cand_level >= vaga_level, cand_level >= vaga_level - 1], [1.0, 0.8], 0.5)
+
+
+def _english_success_score(nivel_vaga, nivel_candidato):
+    vaga_level = nivel_vaga.take(ENGLISH_MATCHER.levels(_as_lower_or_empty(nivel_vaga.uniques)))
+    cand_level = nivel_candidato.take(ENGLISH_MATCHER.levels(_as_lower_or_empty(nivel_candidato.uniques)))
+    return np.minimum(1.0, cand_level / np.maximum(vaga_level, 1))
+
+
+def _contains_any(column, matcher):
+    return column.take(matcher.masks(_as_text(column.uniques)) > 0)
+
+
+def _combined_text(parts, n_rows):
+    """Texto combinado (título, competências, conhecimentos, área), montado uma vez por combinação única"""
+    combination = np.zeros(n_rows, dtype=np.int64)
+    for part in parts:
+        _, combination = np.unique(combination * len(part.uniques) + part.codes, return_inverse=True)
+        combination = combination.ravel()
+    # Uma linha representante por combinação
+    representative = np.empty(combination.max() + 1 if n_rows else 0, dtype=np.int64)
+    representative[combination] = np.arange(n_rows)
+
+    titulo, competencias, conhecimentos, areas = (
+        np.array(_as_text(part.uniques), dtype=object)[part.codes[representative]].tolist() for part in parts
+    )
+    combined = [f'{a} {b} {c} {d}'.strip() for a, b, c, d in zip(titulo, competencias, conhecimentos, areas)]
+    combined = np.array([NOT_INFORMED if text in ('', 'nan') else text for text in combined], dtype=object)
+    return combined[combination]
+
+
+def compute_features(vaga, candidato, n_rows, combined_text=True):
+    """Calcula as features de N pares a partir de colunas de entrada.
+
+    `vaga` e `candidato` mapeiam cada campo de VAGA_INPUTS/CANDIDATO_INPUTS para
+    uma sequência de N valores ou para um escalar repetido em todas as linhas.
+    Com `combined_text=False` a coluna de texto fica vazia (None): o TF-IDF do
+    par vem pronto de text_vectors.
+    """
+    columns = {
+        ('vaga', field): _Column(vaga.get(field, ''), n_rows) for field in VAGA_INPUTS
+    }
+    columns.update({
+        ('candidato', field): _Column(candidato.get(field, ''), n_rows) for field in CANDIDATO_INPUTS
+    })
+
+    def column(source, field):
+        return columns[(source, field)]
+
+    areas_vaga = column('vaga', 'areas_atuacao')
+    area_candidato = column('candidato', 'area_de_atuacao')
+
+    combined = _combined_text([
+        column('vaga', 'titulo_vaga'), column('vaga', 'competencias_tecnicas_requeridas'),
+        column('candidato', 'conhecimentos_tecnicos'), areas_vaga
+    ], n_rows) if combined_text else np.full(n_rows, None, dtype=object)
+
+    return pd.DataFrame({
+        'tech_success_score': _tech_success_score(
+            column('vaga', 'competencias_tecnicas_requeridas'), column('candidato', 'conhecimentos_tecnicos')),
+        'academic_success_score': _academic_success_score(
+            column('vaga', 'nivel_academico'), column('candidato', 'nivel_academico')),
+        'english_success_score': _english_success_score(
+            column('vaga', 'nivel_ingles'), column('candidato', 'nivel_ingles')),
+        'is_clt': _contains_any(column('vaga', 'tipo_contratacao'), CLT_MATCHER).astype(np.int64),
+        'is_pj': _contains_any(column('vaga', 'tipo_contratacao'), PJ_MATCHER).astype(np.int64),
+        'is_tech_area': (
+            _contains_any(areas_vaga, TECH_AREA_MATCHER) | _contains_any(area_candidato, TECH_AREA_MATCHER)
+        ).astype(np.int64),
+        'nivel_profissional': column('vaga', 'nivel_profissional').take(
+            _as_category(column('vaga', 'nivel_profissional').uniques)),
+        'areas_atuacao': areas_vaga.take(_as_category(areas_vaga.uniques)),
+        'area_atuacao_candidato': area_candidato.take(_as_category(area_candidato.uniques)),
+        'combined_text': combined
+    }, columns=FEATURE_COLUMNS)
+
+
+class ApplicantProfile:
+    """Entradas do lado do candidato pré-calculadas para o ranking de uma vaga contra muitos candidatos.
+
+    Níveis acadêmico e de inglês, área (flag de TI e categoria), tokens e
+    máscara de tecnologias dos conhecimentos são calculados uma vez por versão
+    do store; `features` só calcula o que depende da vaga. Os tokens ficam em
+    um índice invertido (token -> valores únicos que o contêm), então as
+    palavras em comum com a vaga saem de um `bincount`, sem interseção por
+    candidato.
+    """
+
+    def __init__(self, candidato, n_rows):
+        conhecimentos = _Column(candidato.get('conhecimentos_tecnicos', ''), n_rows)
+        tokens, counts, masks, filled = zip(*[_tech_profile(value) for value in conhecimentos.uniques]) \
+            if conhecimentos.uniques else ((), (), (), ())
+        self.n_rows = n_rows
+        self.conhec_codes = conhecimentos.codes
+        self.n_conhec = len(conhecimentos.uniques)
+        self.conhec_mask = conhecimentos.take(np.array(masks, dtype=np.int64))
+        self.conhec_filled = conhecimentos.take(np.array(filled, dtype=bool))
+        self.conhec_text = _as_text(conhecimentos.uniques)
+        postings = {}
+        for unique, unique_tokens in enumerate(tokens):
+            for token in unique_tokens:
+                postings.setdefault(token, []).append(unique)
+        self.token_index = {token: np.array(ids, dtype=np.int64) for token, ids in postings.items()}
+
+        nivel_academico = _Column(candidato.get('nivel_academico', ''), n_rows)
+        self.academic_level = nivel_academico.take(
+            ACADEMIC_MATCHER.levels(_as_lower_or_empty(nivel_academico.uniques)))
+        nivel_ingles = _Column(candidato.get('nivel_ingles', ''), n_rows)
+        self.english_level = nivel_ingles.take(ENGLISH_MATCHER.levels(_as_lower_or_empty(nivel_ingles.uniques)))
+        area = _Column(candidato.get('area_de_atuacao', ''), n_rows)
+        self.tech_area = _contains_any(area, TECH_AREA_MATCHER)
+        self.area_category = area.take(_as_category(area.uniques))
+
+    def extend(self, candidato, n_rows):
+        """Perfil com `n_rows` candidatos acrescentados (deltas); os arrays existentes são só concatenados"""
+        new = ApplicantProfile(candidato, n_rows)
+        profile = ApplicantProfile.__new__(ApplicantProfile)
+        profile.n_rows = self.n_rows + n_rows
+        profile.conhec_codes = np.concatenate([self.conhec_codes, new.conhec_codes + self.n_conhec])
+        profile.n_conhec = self.n_conhec + new.n_conhec
+        profile.conhec_text = self.conhec_text + new.conhec_text
+        profile.token_index = dict(self.token_index)
+        for token, ids in new.token_index.items():
+            previous = profile.token_index.get(token)
+            ids = ids + self.n_conhec
+            profile.token_index[token] = ids if previous is None else np.concatenate([previous, ids])
+        for name in ('conhec_mask', 'conhec_filled', 'academic_level', 'english_level', 'tech_area', 'area_category'):
+            setattr(profile, name, np.concatenate([getattr(self, name), getattr(new, name)]))
+        return profile
+
+    def features(self, vaga, positions, combined_text=True):
+        """Features da vaga contra os candidatos em `positions` (mesmo resultado de `compute_features`)"""
+        positions = np.asarray(positions, dtype=np.int64)
+        n_rows = len(positions)
+        # Campos da vaga como o escalar de `_Column`
+        value = {field: vaga.get(field, '') for field in VAGA_INPUTS}
+        value = {field: v if isinstance(v, str) else _Value(v) for field, v in value.items()}
+
+        # Palavras em comum por valor único de conhecimentos, somando as listas de cada token da vaga
+        comp_tokens, comp_words, comp_mask, comp_filled = _tech_profile(value['competencias_tecnicas_requeridas'])
+        matched = [self.token_index[token] for token in comp_tokens if token in self.token_index]
+        common_by_unique = np.bincount(np.concatenate(matched), minlength=self.n_conhec) if matched \
+            else np.zeros(self.n_conhec, dtype=np.int64)
+        codes = self.conhec_codes[positions]
+        common_words = common_by_unique[codes]
+        tech_bonus = np.minimum(0.3, _POPCOUNT[comp_mask & self.conhec_mask[positions]] * 0.1)
+        valid = comp_filled & self.conhec_filled[positions] & (comp_words > 0)
+        basic_match = common_words / comp_words if comp_words > 0 else np.zeros(n_rows)
+        tech_score = np.where(valid, np.minimum(1.0, basic_match + tech_bonus), 0.5)
+
+        vaga_academic = ACADEMIC_MATCHER.levels(_as_lower_or_empty([value['nivel_academico']]))[0]
+        academic_level = self.academic_level[positions]
+        vaga_english = ENGLISH_MATCHER.levels(_as_lower_or_empty([value['nivel_ingles']]))[0]
+        tipo_contratacao = _as_text([value['tipo_contratacao']])
+        areas_vaga = value['areas_atuacao']
+
+        if combined_text:
+            prefix = ' '.join(_as_text([value['titulo_vaga'], value['competencias_tecnicas_requeridas']]))
+            suffix = _normalize(areas_vaga)
+            texts = (f'{prefix} {text} {suffix}'.strip() for text in self.conhec_text)
+            combined = np.array([NOT_INFORMED if text in ('', 'nan') else text for text in texts], dtype=object)
+            combined = combined[codes]
+        else:
+            combined = np.full(n_rows, None, dtype=object)
+
+        return pd.DataFrame({
+            'tech_success_score': tech_score,
+            'academic_success_score': np.select(
+                [academic_level >= vaga_academic, academic_level >= vaga_academic - 1], [1.0, 0.8], 0.5),
+            'english_success_score': np.minimum(1.0, self.english_level[positions] / max(vaga_english, 1)),
+            'is_clt': np.full(n_rows, int(CLT_MATCHER.masks(tipo_contratacao)[0] > 0), dtype=np.int64),
+            'is_pj': np.full(n_rows, int(PJ_MATCHER.masks(tipo_contratacao)[0] > 0), dtype=np.int64),
+            'is_tech_area': (
+                bool(TECH_AREA_MATCHER.masks(_as_text([areas_vaga]))[0]) | self.tech_area[positions]
+            ).astype(np.int64),
+            'nivel_profissional': np.full(n_rows, _as_category([value['nivel_profissional']])[0], dtype=object),
+            'areas_atuacao': np.full(n_rows, _as_category([areas_vaga])[0], dtype=object),
+            'area_atuacao_candidato': self.area_category[positions],
+            'combined_text': combined
+        }, columns=FEATURE_COLUMNS)
+
+
+def build_features_for_pairs(pairs):
+    """Features de uma sequência de pares (vaga, candidato) no formato da API"""
+    pairs = list(pairs)
+    vaga = {field: [v.get(field, '') for v, _ in pairs] for field in VAGA_INPUTS}
+    candidato = {field: [c.get(field, '') for _, c in pairs] for field in CANDIDATO_INPUTS}
+    return compute_features(vaga, candidato, len(pairs))
+
+
+def build_training_features(df):
+    """Features a partir do DataFrame de treinamento (colunas do notebook)"""
+    inputs = {'vaga': {}, 'candidato': {}}
+    for column, (source, field) in TRAINING_INPUTS.items():
+        if column in df.columns:
+            inputs[source][field] = df[column].to_numpy(dtype=object)
+    features = compute_features(inputs['vaga'], inputs['candidato'], len(df))
+    features.index = df.index
+    return features
+
+
+def compute_feature_row(vaga_row, candidate_row):
+    """Implementação de referência, linha a linha, das features de um par vaga/candidato"""
+
+    def calculate_tech_success_score(competencias_vaga, conhecimentos_cand):
+        comp_vaga = str(competencias_vaga).lower() if competencias_vaga else ''
+        conhec_cand = str(conhecimentos_cand).lower() if conhecimentos_cand else ''
+
+        if not comp_vaga or not conhec_cand:
+            return 0.5
+
+        comp_words = set(comp_vaga.split())
+        conhec_words = set(conhec_cand.split())
+
+        if len(comp_words) == 0:
+            return 0.5
+
+        basic_match = len(comp_words.intersection(conhec_words)) / len(comp_words)
+        high_value_matches = sum(1 for tech in HIGH_VALUE_TECHS
+                                 if tech in comp_vaga and tech in conhec_cand)
+        tech_bonus = min(0.3, high_value_matches * 0.1)
+
+        return min(1.0, basic_match + tech_bonus)
+
+    def calculate_academic_success_score(nivel_vaga, nivel_cand):
+        nivel_vaga = str(nivel_vaga).lower() if nivel_vaga else ''
+        nivel_cand = str(nivel_cand).lower() if nivel_cand else ''
+
+        vaga_level = max([v for k, v in ACADEMIC_HIERARCHY.items() if k in nivel_vaga] or [ACADEMIC_DEFAULT_LEVEL])
+        cand_level = max([v for k, v in ACADEMIC_HIERARCHY.items() if k in nivel_cand] or [ACADEMIC_DEFAULT_LEVEL])
+
+        if cand_level >= vaga_level:
+            return 1.0
+        elif cand_level >= vaga_level - 1:
+            return 0.8
+        else:
+            return 0.5
+
+    def calculate_english_success_score(nivel_vaga, nivel_cand):
+        nivel_vaga = str(nivel_vaga).lower() if nivel_vaga else ''
+        nivel_cand = str(nivel_cand).lower() if nivel_cand else ''
+
+        vaga_level = max([v for k, v in ENGLISH_LEVELS.items() if k in nivel_vaga] or [ENGLISH_DEFAULT_LEVEL])
+        cand_level = max([v for k, v in ENGLISH_LEVELS.items() if k in nivel_cand] or [ENGLISH_DEFAULT_LEVEL])
+
+        return min(1.0, cand_level / max(vaga_level, 1))
+
+    competencias_tecnicas = vaga_row.get('competencias_tecnicas_requeridas', '')
+    conhecimentos_tecnicos = candidate_row.get('conhecimentos_tecnicos', '')
+    areas_atuacao = vaga_row.get('areas_atuacao', '')
+    area_atuacao_candidato = candidate_row.get('area_de_atuacao', '')
+    tipo_contratacao = vaga_row.get('tipo_contratacao', '')
+    titulo_vaga = vaga_row.get('titulo_vaga', '')
+    nivel_profissional = vaga_row.get('nivel_profissional', '')
+
+    features = {
+        'tech_success_score': calculate_tech_success_score(competencias_tecnicas, conhecimentos_tecnicos),
+        'academic_success_score': calculate_academic_success_score(
+            vaga_row.get('nivel_academico', ''), candidate_row.get('nivel_academico', '')),
+        'english_success_score': calculate_english_success_score(
+            vaga_row.get('nivel_ingles', ''), candidate_row.get('nivel_ingles', '')),
+        'is_clt': 1 if 'clt' in str(tipo_contratacao).lower() else 0,
+        'is_pj': 1 if 'pj' in str(tipo_contratacao).lower() else 0,
+        'is_tech_area': 1 if any(tech in str(areas_atuacao).lower() or tech in str(area_atuacao_candidato).lower()
+                                 for tech in TECH_AREA_KEYWORDS) else 0,
+        'nivel_profissional': str(nivel_profissional) if nivel_profissional else NOT_INFORMED,
+        'areas_atuacao': str(areas_atuacao) if areas_atuacao else NOT_INFORMED,
+        'area_atuacao_candidato': str(area_atuacao_candidato) if area_atuacao_candidato else NOT_INFORMED,
+        'combined_text': (
+            str(titulo_vaga) + ' ' +
+            str(competencias_tecnicas) + ' ' +
+            str(conhecimentos_tecnicos) + ' ' +
+            str(areas_atuacao)
+        ).lower().strip()
+    }
+
+    # Tratar valores vazios
+    for key, value in features.items():
+        if value == '' or value == 'nan' or str(value) == 'nan':
+            if key in NUMERIC_FEATURES:
+                features[key] = 0.5
+            elif key in BINARY_FEATURES:
+                features[key] = 0
+            else:
+                features[key] = NOT_INFORMED
+
+    return features
@@ -0,0 +1,116 @@
+"""Configuração do gunicorn com o modelo compartilhado entre os workers.
+
+Com `preload_app`, o master importa app.py uma única vez (pandas, sklearn,
+modelo, data store e motor compilado) e os workers são forks que herdam essas
+páginas por copy-on-write. `gc.freeze()` antes de cada fork tira os objetos já
+carregados das varreduras do coletor, que de outra forma tocariam (e
+copiariam) as páginas herdadas. Cada worker roda uma predição de aquecimento
+antes de aceitar conexões e inicia o watcher das versões do modelo.
+
+As métricas Prometheus ficam no modo multiprocesso: PROMETHEUS_MULTIPROC_DIR é
+definido aqui, antes de o app importar o prometheus_client, e cada processo
+grava seus valores em arquivos mmap nesse diretório; /metrics soma os de todos
+os workers. Quando um worker sai, `child_exit` remove os gauges 'live*' dele
+(contadores e histogramas continuam somando o que ele registrou).
+
+O número de workers e as threads de inferência de cada um saem juntos das
+CPUs disponíveis (topology.py, ciente da cota do cgroup no Docker): sem
+GUNICORN_WORKERS, um worker a cada 2 CPUs, cada um com 2 threads de
+inferência para dividir lotes grandes. GUNICORN_WORKERS igual ao número de
+CPUs volta a uma thread por worker (mais requisições pequenas simultâneas);
+INFERENCE_THREADS define as threads diretamente. Os limites
+dos pools nativos (OMP_NUM_THREADS etc.) são definidos aqui, antes de o app
+importar NumPy e sklearn, e herdados pelos workers.
+
+Variáveis de ambiente: GUNICORN_BIND, GUNICORN_WORKERS, GUNICORN_THREADS,
+GUNICORN_TIMEOUT, GUNICORN_PRELOAD (true/false, para comparar os dois modos),
+PROMETHEUS_MULTIPROC_DIR (diretório das métricas), GUNICORN_METRICS_MULTIPROC
+(false volta às métricas por worker) e, em topology.py, INFERENCE_THREADS,
+NATIVE_THREADS e PARALLEL_MIN_ROWS.
+"""
+import os
+import gc
+import glob
+import shutil
+import tempfile
+
+from topology import Topology
+
+topology = Topology.from_env()
+# O app (importado depois, no master) lê a mesma topologia do ambiente
+os.environ['GUNICORN_WORKERS'] = str(topology.workers)
+os.environ['INFERENCE_THREADS'] = str(topology.inference_threads)
+for name, value in topology.native_env().items():
+    os.environ.setdefault(name, value)
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = topology.workers
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
+# Mais de uma thread por worker (gthread) para o micro-batching (MICRO_BATCHING=true)
+threads = topology.worker_threads
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'yes')
+
+METRICS_MULTIPROC = os.environ.get('GUNICORN_METRICS_MULTIPROC', 'true').lower() in ('1', 'true', 'yes')
+
+
+def default_metrics_dir():
+    # Um diretório por master: duas instâncias na mesma máquina não se misturam
+    shm = '/dev/shm' if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK) else tempfile.gettempdir()
+    return os.path.join(shm, f'otimizador-metrics-{os.getpid()}')
+
+
+def setup_metrics_dir():
+    metrics_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', default_metrics_dir())
+    os.makedirs(metrics_dir, exist_ok=True)
+    # Arquivos de uma execução anterior somariam contadores antigos aos novos
+    for stale in glob.glob(os.path.join(metrics_dir, '*.db')):
+        os.remove(stale)
+
+
+# O config é relido a cada SIGHUP; o diretório só é preparado na primeira carga
+if METRICS_MULTIPROC and os.environ.get('OTIMIZADOR_METRICS_MASTER') != str(os.getpid()):
+    setup_metrics_dir()
+    os.environ['OTIMIZADOR_METRICS_MASTER'] = str(os.getpid())
+
+
+def when_ready(server):
+    server.log.info("Topologia: %s", topology.to_dict())
+    if topology.inference_threads == 1 and topology.cpus > 1:
+        server.log.info("Uma thread de inferência por worker (%d workers em %d CPUs); lotes grandes só são "
+                        "divididos com menos workers (GUNICORN_WORKERS) ou INFERENCE_THREADS",
+                        topology.workers, topology.cpus)
+    # Lixo da inicialização coletado uma vez, antes de congelar o heap do master
+    gc.collect()
+    if METRICS_MULTIPROC and preload_app:
+        # O master não atende requisições: fora das somas 'live*' (ex.: workers por versão do modelo)
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def pre_fork(server, worker):
+    gc.freeze()
+
+
+def child_exit(server, worker):
+    if METRICS_MULTIPROC:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    # Só o diretório padrão é removido; um PROMETHEUS_MULTIPROC_DIR informado fica
+    if METRICS_MULTIPROC and os.environ.get('PROMETHEUS_MULTIPROC_DIR') == default_metrics_dir():
+        shutil.rmtree(default_metrics_dir(), ignore_errors=True)
+
+
+def post_worker_init(worker):
+    import app
+
+    elapsed = app.warm_up()
+    if elapsed is not None:
+        worker.log.info("Worker %s aquecido em %.1f ms", worker.pid, elapsed * 1000)
+    if app.model_registry.active is not None:
+        app.publish_active_model_metrics()
+    # Threads não sobrevivem ao fork: os watchers do ponteiro CURRENT e dos deltas do store começam em cada worker
+    app.start_model_watcher()
+    app.start_data_watcher()
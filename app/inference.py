@@ -0,0 +1,409 @@
+"""Motores de inferência do pipeline de candidatos contratados.
+
+`SklearnEngine` delega ao Pipeline original. `CompiledPipeline` lê os
+parâmetros já ajustados (StandardScaler, OneHotEncoder, TfidfVectorizer e as
+árvores do RandomForest) e executa a mesma conta sem a validação por chamada
+do sklearn: o pré-processamento vira lookups em dicionários e aritmética
+NumPy, e as árvores são achatadas em arrays contíguos (feature, threshold,
+filhos, valor) percorridos nível a nível para todas as linhas e árvores ao
+mesmo tempo.
+
+Os arrays da floresta podem ser exportados em .npy e mapeados em memória
+(`arrays_dir`): todos os workers leem as mesmas páginas do page cache em vez
+de manter cópias privadas.
+
+`predict_proba_transformed(X, n_threads)` divide as linhas da floresta entre
+`n_threads` threads (o NumPy solta o GIL na indexação e no `where`); no
+sklearn, as árvores são repartidas pelo backend de threads do joblib. Com o
+padrão `n_threads=1` nenhum pool é usado.
+"""
+import os
+import copy
+import json
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from joblib import parallel_config
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+ENGINES = ('compiled', 'sklearn')
+
+# Diferença máxima de probabilidade aceita entre os motores
+PARITY_TOLERANCE = 1e-9
+
+# Arrays da floresta compilada exportados por _CompiledForest.save
+FOREST_ARRAYS = ('feature', 'threshold', 'left', 'right', 'value', 'roots')
+FOREST_MANIFEST = 'forest.json'
+
+
+class NotCompilableError(ValueError):
+    """O pipeline usa algum componente/parâmetro que o motor compilado não reproduz"""
+
+
+_thread_pool = {'pid': None, 'size': 0, 'executor': None}
+_thread_pool_lock = threading.Lock()
+
+
+def inference_pool(n_threads):
+    """Pool de threads de inferência do processo, criado no primeiro uso (threads não sobrevivem ao fork)"""
+    with _thread_pool_lock:
+        if _thread_pool['pid'] != os.getpid() or _thread_pool['size'] < n_threads:
+            # O pool menor deste processo termina o que já recebeu e libera as threads
+            if _thread_pool['pid'] == os.getpid():
+                _thread_pool['executor'].shutdown(wait=False)
+            _thread_pool.update(pid=os.getpid(), size=n_threads,
+                                executor=ThreadPoolExecutor(max_workers=n_threads, thread_name_prefix='inference'))
+        return _thread_pool['executor']
+
+
+def input_columns(pipeline):
+    """Colunas do DataFrame lidas pelo pré-processador, na ordem dos transformadores (None se não forem nomes)"""
+    preprocessor = pipeline.steps[0][1] if isinstance(pipeline, Pipeline) else None
+    if not isinstance(preprocessor, ColumnTransformer):
+        return None
+    columns = []
+    for _, transformer, selected in preprocessor.transformers_:
+        if transformer == 'drop':
+            continue
+        selected = [selected] if isinstance(selected, str) else selected
+        if not all(isinstance(column, str) for column in selected):
+            return None
+        columns.extend(column for column in selected if column not in columns)
+    return columns
+
+
+def _column_names(columns, kind):
+    if kind == 'text':
+        if not isinstance(columns, str):
+            raise NotCompilableError('TfidfVectorizer precisa de uma única coluna (nome)')
+        return columns
+    if isinstance(columns, str):
+        return [columns]
+    if not all(isinstance(column, str) for column in columns):
+        raise NotCompilableError(f'Seleção de colunas não suportada: {columns!r}')
+    return list(columns)
+
+
+class _ScalerStep:
+    """StandardScaler: (x - mean) / scale"""
+
+    def __init__(self, scaler, columns, output):
+        self.columns = _column_names(columns, 'num')
+        self.output = output
+        n_columns = len(self.columns)
+        self.mean = scaler.mean_ if scaler.with_mean else np.zeros(n_columns)
+        self.scale = scaler.scale_ if scaler.with_std else np.ones(n_columns)
+
+    def fill(self, table, out):
+        values = np.column_stack([table[column] for column in self.columns]).astype(np.float64)
+        out[:, self.output] = (values - self.mean) / self.scale
+
+
+class _OneHotStep:
+    """OneHotEncoder: um dicionário categoria -> coluna de saída por coluna de entrada"""
+
+    def __init__(self, encoder, columns, output):
+        if encoder.drop_idx_ is not None or getattr(encoder, '_infrequent_enabled', False):
+            raise NotCompilableError('OneHotEncoder com drop/categorias infrequentes não é suportado')
+        self.columns = _column_names(columns, 'cat')
+        self.handle_unknown = encoder.handle_unknown
+        self.lookups = []
+        position = output.start
+        for categories in encoder.categories_:
+            self.lookups.append({value: position + i for i, value in enumerate(categories.tolist())})
+            position += len(categories)
+
+    def fill(self, table, out):
+        for column, lookup in zip(self.columns, self.lookups):
+            for row, value in enumerate(table[column].tolist()):
+                index = lookup.get(value)
+                if index is not None:
+                    out[row, index] = 1.0
+                elif self.handle_unknown == 'error':
+                    raise ValueError(f"Found unknown categories [{value!r}] in column '{column}' during transform")
+
+
+class _TfidfStep:
+    """TfidfVectorizer: contagem via analyzer do próprio vetorizador, tf-idf e normalização"""
+
+    def __init__(self, vectorizer, column, output):
+        if vectorizer.norm not in ('l2', 'l1', None):
+            raise NotCompilableError(f'Normalização TF-IDF não suportada: {vectorizer.norm!r}')
+        self.column = _column_names(column, 'text')
+        self.offset = output.start
+        self.analyzer = vectorizer.build_analyzer()
+        self.vocabulary = vectorizer.vocabulary_
+        self.binary = vectorizer.binary
+        self.sublinear_tf = vectorizer.sublinear_tf
+        self.idf = vectorizer.idf_ if vectorizer.use_idf else None
+        self.norm = vectorizer.norm
+
+    def fill(self, table, out):
+        vocabulary = self.vocabulary
+        for row, document in enumerate(table[self.column].tolist()):
+            counts = {}
+            for term in self.analyzer(document):
+                index = vocabulary.get(term)
+                if index is not None:
+                    counts[index] = counts.get(index, 0) + 1
+            if not counts:
+                continue
+
+            # Mesma ordem de operações do TfidfTransformer (índices ordenados, soma sequencial)
+            indices = np.array(sorted(counts), dtype=np.intp)
+            values = np.ones(len(indices)) if self.binary else np.array([counts[i] for i in indices.tolist()], dtype=np.float64)
+            if self.sublinear_tf:
+                values = np.log(values) + 1
+            if self.idf is not None:
+                values *= self.idf[indices]
+            if self.norm is not None:
+                total = 0.0
+                for value in values.tolist():
+                    total += value * value if self.norm == 'l2' else abs(value)
+                if total:
+                    values /= np.sqrt(total) if self.norm == 'l2' else total
+            out[row, self.offset + indices] = values
+
+    def fill_vectors(self, matrix, out):
+        """Matriz TF-IDF já calculada (text_vectors.PairTextVectors) no lugar da tokenização"""
+        out[:, self.offset:self.offset + matrix.shape[1]] = matrix.toarray()
+
+
+class _CompiledForest:
+    """Árvores do ensemble achatadas em arrays contíguos com índices globais de nó.
+
+    Folhas apontam para si mesmas (threshold = +inf), então todas as linhas
+    avançam o mesmo número de níveis sem desvio por folha.
+    """
+
+    def __init__(self, forest):
+        if forest.n_outputs_ != 1:
+            raise NotCompilableError('Apenas classificadores de uma saída são suportados')
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            leaf = tree.children_left == -1
+            roots.append(offset)
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(np.where(leaf, np.inf, tree.threshold))
+            lefts.append(np.where(leaf, nodes, tree.children_left) + offset)
+            rights.append(np.where(leaf, nodes, tree.children_right) + offset)
+            value = tree.value[:, 0, :]
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0] = 1
+            values.append(value / normalizer)
+            offset += tree.node_count
+
+        self.feature = np.concatenate(features).astype(np.intp)
+        self.threshold = np.concatenate(thresholds).astype(np.float64)
+        self.left = np.concatenate(lefts).astype(np.intp)
+        self.right = np.concatenate(rights).astype(np.intp)
+        self.value = np.ascontiguousarray(np.concatenate(values))
+        self.roots = np.array(roots, dtype=np.intp)
+        self.depth = max(estimator.tree_.max_depth for estimator in forest.estimators_)
+        self.n_nodes = offset
+
+    def save(self, directory):
+        """Exporta os arrays em .npy; o diretório só aparece completo (renomeado no fim)"""
+        directory = Path(directory)
+        directory.parent.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=f'.{directory.name}-', dir=directory.parent))
+        try:
+            for name in FOREST_ARRAYS:
+                np.save(staging / f'{name}.npy', getattr(self, name))
+            with open(staging / FOREST_MANIFEST, 'w', encoding='utf-8') as f:
+                json.dump({'depth': int(self.depth), 'n_nodes': int(self.n_nodes)}, f)
+            os.rename(staging, directory)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            # Outro processo exportou o mesmo modelo antes
+            if not (directory / FOREST_MANIFEST).exists():
+                raise
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """Floresta a partir dos arrays exportados, mapeados em memória"""
+        directory = Path(directory)
+        with open(directory / FOREST_MANIFEST, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        forest = cls.__new__(cls)
+        for name in FOREST_ARRAYS:
+            setattr(forest, name, np.asarray(np.load(directory / f'{name}.npy', mmap_mode=mmap_mode)))
+        forest.depth = manifest['depth']
+        forest.n_nodes = manifest['n_nodes']
+        return forest
+
+    @classmethod
+    def shared(cls, classifier, directory):
+        """Carrega os arrays exportados de `directory`, exportando-os antes se preciso.
+
+        Falhas de escrita (volume somente leitura) mantêm a floresta em memória privada.
+        """
+        n_nodes = sum(estimator.tree_.node_count for estimator in classifier.estimators_)
+        manifest = Path(directory) / FOREST_MANIFEST
+        if not manifest.exists():
+            try:
+                cls(classifier).save(directory)
+            except OSError as e:
+                print(f"⚠️ Não foi possível exportar a floresta compilada para {directory}: {e}")
+                return cls(classifier)
+        forest = cls.load(directory)
+        if forest.n_nodes != n_nodes:
+            raise NotCompilableError(f'Arrays em {directory} não correspondem ao modelo carregado')
+        return forest
+
+    def predict_proba(self, X, n_threads=1):
+        if n_threads > 1 and len(X) > 1:
+            blocks = np.array_split(X, min(n_threads, len(X)))
+            return np.concatenate(list(inference_pool(n_threads).map(self._predict_block, blocks)))
+        return self._predict_block(X)
+
+    def _predict_block(self, X):
+        rows = np.arange(len(X))[:, None]
+        nodes = np.repeat(self.roots[None, :], len(X), axis=0)
+        for _ in range(self.depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        # Média das probabilidades das folhas sobre as árvores, como no RandomForest
+        return self.value[nodes].mean(axis=1)
+
+
+class CompiledPipeline:
+    """Pipeline (ColumnTransformer + floresta) executado sem o sklearn no caminho de predição"""
+    name = 'compiled'
+
+    def __init__(self, pipeline, arrays_dir=None):
+        if not isinstance(pipeline, Pipeline) or len(pipeline.steps) != 2:
+            raise NotCompilableError('Esperado Pipeline com pré-processador e classificador')
+        preprocessor, classifier = pipeline.steps[0][1], pipeline.steps[-1][1]
+        if not isinstance(preprocessor, ColumnTransformer):
+            raise NotCompilableError('Pré-processador precisa ser um ColumnTransformer')
+        if not isinstance(classifier, (RandomForestClassifier, ExtraTreesClassifier)):
+            raise NotCompilableError('Classificador precisa ser uma floresta (RandomForest/ExtraTrees)')
+
+        step_types = [(StandardScaler, _ScalerStep), (OneHotEncoder, _OneHotStep), (TfidfVectorizer, _TfidfStep)]
+        self.steps = []
+        for name, transformer, columns in preprocessor.transformers_:
+            output = preprocessor.output_indices_[name]
+            if transformer == 'drop' or output.stop == output.start:
+                continue
+            step = next((step for kind, step in step_types if type(transformer) is kind), None)
+            if step is None:
+                raise NotCompilableError(f'Transformador não suportado: {transformer!r}')
+            self.steps.append(step(transformer, columns, output))
+
+        self.n_features = max(output.stop for output in preprocessor.output_indices_.values())
+        if self.n_features != classifier.n_features_in_:
+            raise NotCompilableError('Número de features do pré-processador difere do classificador')
+        self.forest = _CompiledForest.shared(classifier, arrays_dir) if arrays_dir else _CompiledForest(classifier)
+        self.classes_ = classifier.classes_
+        self.input_columns = input_columns(pipeline)
+
+    def transform(self, frame, text=None):
+        """Matriz densa float32 (a mesma entrada que o sklearn passa às árvores).
+
+        `text` é a matriz TF-IDF do combined_text já calculada por par; com ela,
+        a coluna de texto do DataFrame não é lida.
+        """
+        # Uma conversão do DataFrame inteiro; indexar colunas no pandas custa mais que a predição
+        table = dict(zip(frame.columns, frame.to_numpy(dtype=object).T))
+        out = np.zeros((len(frame), self.n_features), dtype=np.float64)
+        for step in self.steps:
+            if text is not None and isinstance(step, _TfidfStep):
+                step.fill_vectors(text, out)
+            else:
+                step.fill(table, out)
+        return out.astype(np.float32)
+
+    def predict_proba(self, frame, text=None):
+        return self.forest.predict_proba(self.transform(frame, text))
+
+    def predict_proba_transformed(self, X, n_threads=1):
+        """Probabilidades a partir da saída de `transform` (etapas medidas separadamente)"""
+        return self.forest.predict_proba(X, n_threads)
+
+    def predict(self, frame):
+        return self.classes_[self.predict_proba(frame).argmax(axis=1)]
+
+
+class SklearnEngine:
+    """Pipeline sklearn original"""
+    name = 'sklearn'
+
+    def __init__(self, pipeline):
+        # O n_jobs do treino (-1) abriria um pool com todos os núcleos em cada worker;
+        # sem ele, o paralelismo de cada chamada vem de `n_threads`. Cópias rasas (as
+        # árvores são as mesmas) em vez de alterar o pipeline carregado, que é compartilhado
+        classifier = pipeline[-1]
+        if getattr(classifier, 'n_jobs', None) is not None:
+            classifier = copy.copy(classifier)
+            classifier.n_jobs = None
+            pipeline = copy.copy(pipeline)
+            pipeline.steps = [*pipeline.steps[:-1], (pipeline.steps[-1][0], classifier)]
+        self.pipeline = pipeline
+        self.classes_ = pipeline.classes_
+        self.input_columns = input_columns(pipeline)
+        self._preprocessor, self._classifier = pipeline[:-1], classifier
+
+    def predict_proba(self, frame):
+        return self.pipeline.predict_proba(frame)
+
+    def transform(self, frame):
+        return self._preprocessor.transform(frame)
+
+    def predict_proba_transformed(self, X, n_threads=1):
+        with parallel_config(backend='threading', n_jobs=n_threads):
+            return self._classifier.predict_proba(X)
+
+    def predict(self, frame):
+        return self.pipeline.predict(frame)
+
+
+def check_parity(engine, pipeline, frame, tolerance=PARITY_TOLERANCE):
+    """Compara probabilidades e rótulos de um motor com o Pipeline sklearn"""
+    expected = pipeline.predict_proba(frame)
+    actual = engine.predict_proba(frame)
+    max_abs_diff = float(np.abs(expected - actual).max()) if len(frame) else 0.0
+    label_agreement = float((expected.argmax(axis=1) == actual.argmax(axis=1)).mean()) if len(frame) else 1.0
+    return {
+        'rows': len(frame),
+        'max_abs_diff': max_abs_diff,
+        'label_agreement': label_agreement,
+        'passed': max_abs_diff <= tolerance and label_agreement == 1.0
+    }
+
+
+def load_engine(pipeline, engine_name='compiled', parity_sample=None, arrays_dir=None):
+    """Cria o motor pedido; volta ao sklearn se o pipeline não compilar ou a paridade falhar.
+
+    `arrays_dir` (um diretório por versão de modelo) mapeia a floresta compilada
+    em memória. Retorna (motor, relatório) com o motivo de eventual fallback.
+    """
+    if engine_name not in ENGINES:
+        raise ValueError(f'Motor de inferência desconhecido: {engine_name!r} (opções: {", ".join(ENGINES)})')
+
+    report = {'requested': engine_name, 'parity': None, 'fallback_reason': None}
+    engine = SklearnEngine(pipeline)
+    if engine_name == 'compiled':
+        try:
+            compiled = CompiledPipeline(pipeline, arrays_dir)
+            if parity_sample is not None:
+                report['parity'] = check_parity(compiled, pipeline, parity_sample)
+            if report['parity'] is None or report['parity']['passed']:
+                engine = compiled
+            else:
+                report['fallback_reason'] = 'paridade com o sklearn falhou'
+        except NotCompilableError as e:
+            report['fallback_reason'] = str(e)
+    report['engine'] = engine.name
+    return engine, report
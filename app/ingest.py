@@ -0,0 +1,413 @@
+"""Ingestão dos dumps JSON (vagas, applicants, prospects) em armazenamento colunar.
+
+Os arquivos são lidos em streaming e cada campo usado pelas features é gravado
+como um par de arrays NumPy (offsets + bytes UTF-8), que a aplicação e o
+notebook abrem com memmap, sem custo de parse na inicialização.
+
+Deltas: `apply` grava lotes pequenos de upserts (vagas e candidatos por
+código, prospecções por código da vaga) como um segmento novo de cada tabela,
+sem reescrever a base. Cada tabela e segmento tem um índice das posições
+ordenadas pelo código (`_index.npy`), então achar as linhas substituídas é uma
+busca binária por segmento, e o custo do apply depende do tamanho do delta, não
+do dataset. O manifesto do store é o ponto de commit (troca atômica): quem o
+lê vê o delta inteiro ou nada. `compact` (automático acima de `--max-deltas`)
+reescreve base + segmentos sem as linhas substituídas.
+
+Cada base (build ou compact) é gravada em um diretório versionado novo
+(`base-<id>`) e entra em uso pela mesma troca atômica do manifesto; o store
+nunca fica sem manifesto, e uma falha no meio do processo deixa a versão
+anterior intacta. A base anterior é mantida para leitores que acabaram de
+ler o manifesto antigo; as mais antigas são removidas.
+
+Uso:
+    python app/ingest.py build --data-dir data --store-dir data/store
+    python app/ingest.py apply data/deltas/2025-07-21.ndjson --store-dir data/store
+    python app/ingest.py compact --store-dir data/store
+"""
+import os
+import sys
+import json
+import time
+import fcntl
+import bisect
+import shutil
+import secrets
+import argparse
+import numpy as np
+from array import array
+from pathlib import Path
+from contextlib import contextmanager
+
+from data_store import (
+    VAGA_FIELDS, APPLICANT_FIELDS, PROSPECT_FIELDS, STORE_MANIFEST, STORE_FORMAT_VERSION, KEY_INDEX,
+    StringColumn, iter_json_object_items, normalize_vaga, normalize_applicant, normalize_prospects,
+    open_store, read_store_manifest, resolve_data_dir, resolve_store_dir, store_base_dir, is_lfs_pointer
+)
+
+COPY_BLOCK_SIZE = 1 << 24
+
+# Segmentos de delta acumulados antes da compactação automática
+DEFAULT_MAX_DELTAS = 32
+# Linhas por bloco lido na compactação
+COMPACT_BLOCK_ROWS = 50000
+
+
+class StringColumnWriter:
+    """Grava uma coluna de strings incrementalmente, sem manter os valores em memória"""
+
+    def __init__(self, prefix):
+        self.prefix = Path(prefix)
+        self._tmp_path = Path(f'{prefix}.data.tmp')
+        self._tmp = open(self._tmp_path, 'wb')
+        self._offsets = array('q', [0])
+
+    def append(self, value):
+        encoded = ('' if value is None else str(value)).encode('utf-8')
+        self._tmp.write(encoded)
+        self._offsets.append(self._offsets[-1] + len(encoded))
+
+    def close(self):
+        self._tmp.close()
+        size = self._offsets[-1]
+        np.save(f'{self.prefix}.offsets.npy', np.frombuffer(self._offsets, dtype=np.int64))
+        data_path = f'{self.prefix}.data.npy'
+        if size == 0:
+            np.save(data_path, np.zeros(0, dtype=np.uint8))
+        else:
+            # Copia em blocos para um .npy mapeado, mantendo o pico de memória constante
+            target = np.lib.format.open_memmap(data_path, mode='w+', dtype=np.uint8, shape=(size,))
+            with open(self._tmp_path, 'rb') as f:
+                position = 0
+                while True:
+                    block = f.read(COPY_BLOCK_SIZE)
+                    if not block:
+                        break
+                    target[position:position + len(block)] = np.frombuffer(block, dtype=np.uint8)
+                    position += len(block)
+            target.flush()
+            del target
+        self._tmp_path.unlink()
+
+
+class TableWriter:
+    """Grava uma tabela colunar (chave + campos) em um diretório"""
+
+    def __init__(self, directory, fields, key='codigo'):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.key = key
+        self.columns = [key] + [field for field in fields if field != key]
+        self._writers = {name: StringColumnWriter(self.directory / name) for name in self.columns}
+        self.n_rows = 0
+
+    def append(self, record):
+        for name, writer in self._writers.items():
+            writer.append(record.get(name, ''))
+        self.n_rows += 1
+
+    def close(self):
+        for writer in self._writers.values():
+            writer.close()
+        write_key_index(self.directory, self.key)
+        manifest = {'key': self.key, 'columns': self.columns, 'n_rows': self.n_rows}
+        with open(self.directory / STORE_MANIFEST, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+
+
+def write_key_index(directory, key):
+    """Grava as posições da tabela ordenadas pelo código (busca binária no apply dos deltas)"""
+    codes = StringColumn.open(Path(directory) / key).to_list()
+    order = sorted(range(len(codes)), key=codes.__getitem__)
+    np.save(Path(directory) / KEY_INDEX, np.array(order, dtype=np.int64))
+
+
+class KeyLookup:
+    """Busca das posições de um código em um segmento (base ou delta) pelo índice ordenado"""
+
+    def __init__(self, directory, key, start):
+        directory = Path(directory)
+        if not (directory / KEY_INDEX).exists():
+            # Store gerado antes dos deltas: o índice da base é criado uma vez
+            write_key_index(directory, key)
+        self.codes = StringColumn.open(directory / key)
+        self.order = np.load(directory / KEY_INDEX, mmap_mode='r') if len(self.codes) else np.zeros(0, np.int64)
+        self.start = start
+
+    def find(self, code):
+        low = bisect.bisect_left(self.order, code, key=self.codes.__getitem__)
+        high = bisect.bisect_right(self.order, code, lo=low, key=self.codes.__getitem__)
+        return [self.start + int(position) for position in self.order[low:high]]
+
+
+def normalize_items(name, items):
+    """Registros normalizados de itens (código, registro bruto) de uma tabela"""
+    for codigo, raw in items:
+        if name == 'vagas':
+            yield {'codigo': codigo, **normalize_vaga(raw)}
+        elif name == 'applicants':
+            yield {'codigo': codigo, **normalize_applicant(raw)}
+        else:
+            yield from normalize_prospects(codigo, raw)
+
+
+def iter_table_records(name, path):
+    """Gera os registros normalizados de cada arquivo fonte"""
+    yield from normalize_items(name, iter_json_object_items(path))
+
+
+TABLES = {
+    'vagas': ('vagas.json', VAGA_FIELDS, 'codigo'),
+    'applicants': ('applicants.json', APPLICANT_FIELDS, 'codigo'),
+    'prospects': ('prospects.json', PROSPECT_FIELDS, 'codigo_vaga')
+}
+
+
+def build_store(data_dir=None, store_dir=None):
+    """Converte os JSONs do diretório de dados no armazenamento colunar"""
+    data_dir = Path(data_dir) if data_dir else resolve_data_dir()
+    store_dir = Path(store_dir) if store_dir else resolve_store_dir()
+
+    # Grava em uma base nova, que só passa a valer quando o manifesto apontar para ela
+    base_id = secrets.token_hex(6)
+    base_dir = store_dir / f'base-{base_id}'
+    base_dir.mkdir(parents=True)
+
+    sources = {}
+    for name, (filename, fields, key) in TABLES.items():
+        path = data_dir / filename
+        if not path.exists() or is_lfs_pointer(path):
+            raise FileNotFoundError(f"{path} indisponível (ausente ou ponteiro Git LFS)")
+
+        start_time = time.perf_counter()
+        writer = TableWriter(base_dir / name, fields, key)
+        for record in iter_table_records(name, path):
+            writer.append(record)
+        writer.close()
+
+        stat = path.stat()
+        sources[name] = {
+            'file': filename,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'rows': writer.n_rows,
+            'seconds': round(time.perf_counter() - start_time, 3)
+        }
+        print(f"✅ {name}: {writer.n_rows:,} linhas em {sources[name]['seconds']:.1f}s")
+
+    manifest = {
+        'format_version': STORE_FORMAT_VERSION,
+        'tables': list(TABLES),
+        'sources': sources,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'base_id': base_id,
+        'base': base_dir.name,
+        'deltas': []
+    }
+    with store_lock(store_dir):
+        publish_base(store_dir, manifest)
+    return manifest
+
+
+@contextmanager
+def store_lock(store_dir):
+    """Serializa build, apply e compact de um mesmo store (arquivo de lock ao lado do diretório)"""
+    lock_path = Path(store_dir).with_name(Path(store_dir).name + '.lock')
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def write_store_manifest(store_dir, manifest):
+    """Troca atômica do manifesto: leitores veem a versão anterior ou a nova inteira"""
+    tmp_path = Path(store_dir) / f'{STORE_MANIFEST}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, Path(store_dir) / STORE_MANIFEST)
+
+
+def publish_base(store_dir, manifest):
+    """Passa a usar a base de `manifest` (troca atômica do manifesto) e remove as bases antigas.
+
+    Deve ser chamada com `store_lock`. A base anterior fica até a próxima
+    troca: um leitor pode ter lido o manifesto antigo e ainda estar abrindo
+    os arquivos dela. Processos com bases removidas abertas (memmap) continuam
+    lendo os arquivos até recarregarem.
+    """
+    store_dir = Path(store_dir)
+    previous = read_store_manifest(store_dir)
+    write_store_manifest(store_dir, manifest)
+
+    keep = {manifest['base'], (previous or {}).get('base')}
+    # Store do layout sem versão: as tabelas da base anterior ficam na raiz
+    keep_root_tables = previous is not None and not previous.get('base')
+    for path in store_dir.iterdir():
+        if not path.is_dir():
+            continue
+        # Bases antigas (ou de builds interrompidos) e tabelas do layout sem versão
+        if (path.name.startswith('base-') and path.name not in keep) or \
+                (path.name in TABLES and not keep_root_tables):
+            shutil.rmtree(path)
+    # Diretório temporário do layout anterior, que gravava o store inteiro ao lado
+    tmp_dir = store_dir.with_name(store_dir.name + '.tmp')
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+
+
+def read_delta(path):
+    """Itens (código -> registro bruto) de cada tabela em um arquivo de delta.
+
+    `.ndjson`/`.jsonl`: uma linha por entidade, `{"table": "applicants",
+    "codigo": "123", "data": {...}}`. Outras extensões: objeto JSON com as
+    tabelas no formato dos dumps, `{"vagas": {"<código>": {...}}, ...}`. Em
+    prospects, o código é o da vaga e `data` traz a lista completa dela
+    (`{"prospects": [...]}`). Um código repetido no mesmo delta vale pela
+    última ocorrência.
+    """
+    path = Path(path)
+    items = {name: {} for name in TABLES}
+    if path.suffix in ('.ndjson', '.jsonl'):
+        with open(path, 'r', encoding='utf-8') as f:
+            for number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if entry.get('table') not in TABLES or 'codigo' not in entry or not isinstance(entry.get('data'), dict):
+                    raise ValueError(f'{path}:{number}: esperado {{"table": <{"|".join(TABLES)}>, '
+                                     f'"codigo": ..., "data": {{...}}}}')
+                items[entry['table']][str(entry['codigo'])] = entry['data']
+    else:
+        for name, entities in iter_json_object_items(path):
+            if name not in TABLES or not isinstance(entities, dict):
+                raise ValueError(f'{path}: tabela desconhecida {name!r} (esperado {", ".join(TABLES)})')
+            items[name].update((str(codigo), raw) for codigo, raw in entities.items())
+    return items
+
+
+def apply_delta(store_dir, path, max_deltas=DEFAULT_MAX_DELTAS):
+    """Grava um delta de upserts como novos segmentos das tabelas e o registra no manifesto.
+
+    As linhas com os mesmos códigos em segmentos anteriores passam a ser
+    substituídas (`replaces`). Devolve o registro do delta no manifesto.
+    """
+    store_dir = Path(store_dir)
+    path = Path(path)
+    start_time = time.perf_counter()
+    items = read_delta(path)
+
+    with store_lock(store_dir):
+        manifest = read_store_manifest(store_dir)
+        if manifest is None:
+            raise FileNotFoundError(f'{store_dir} não tem armazenamento colunar (gere com "ingest.py build")')
+        deltas = manifest.setdefault('deltas', [])
+        delta_id = deltas[-1]['id'] + 1 if deltas else 1
+        segment = f'delta-{delta_id:06d}'
+        delta = {'id': delta_id, 'segment': segment, 'source': path.name, 'tables': {}}
+
+        for name, (_, fields, key) in TABLES.items():
+            entities = items[name]
+            if not entities:
+                continue
+            table_dir = store_base_dir(store_dir, manifest) / name
+            with open(table_dir / STORE_MANIFEST, 'r', encoding='utf-8') as f:
+                start = json.load(f)['n_rows']
+            lookups = [KeyLookup(table_dir, key, 0)]
+            superseded = set()
+            for previous in deltas:
+                if name in previous['tables']:
+                    lookups.append(KeyLookup(table_dir / previous['segment'], key, start))
+                    start += previous['tables'][name]['rows']
+                    superseded.update(previous['tables'][name]['replaces'])
+            replaces = sorted({position for code in entities for lookup in lookups for position in lookup.find(code)}
+                              - superseded)
+
+            # Segmento de uma tentativa anterior interrompida (nunca registrado no manifesto)
+            if (table_dir / segment).exists():
+                shutil.rmtree(table_dir / segment)
+            writer = TableWriter(table_dir / segment, fields, key)
+            for record in normalize_items(name, entities.items()):
+                writer.append(record)
+            writer.close()
+            delta['tables'][name] = {'rows': writer.n_rows, 'replaces': replaces}
+
+        delta['applied_at'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+        delta['seconds'] = round(time.perf_counter() - start_time, 3)
+        deltas.append(delta)
+        write_store_manifest(store_dir, manifest)
+    for name, table in delta['tables'].items():
+        print(f"✅ {name}: {table['rows']:,} linhas ({len(table['replaces']):,} substituídas)")
+
+    if max_deltas and len(deltas) > max_deltas:
+        compact_store(store_dir)
+    return delta
+
+
+def compact_store(store_dir):
+    """Reescreve base + segmentos de delta como uma nova base, sem as linhas substituídas"""
+    store_dir = Path(store_dir)
+    with store_lock(store_dir):
+        manifest = read_store_manifest(store_dir)
+        if manifest is None:
+            raise FileNotFoundError(f'{store_dir} não tem armazenamento colunar (gere com "ingest.py build")')
+        start_time = time.perf_counter()
+        tables = open_store(store_dir, manifest=manifest)
+        base_id = secrets.token_hex(6)
+        base_dir = store_dir / f'base-{base_id}'
+        base_dir.mkdir()
+
+        for name, (_, fields, key) in TABLES.items():
+            table = tables[name]
+            writer = TableWriter(base_dir / name, fields, key)
+            live = table.live_positions()
+            for block_start in range(0, len(live), COMPACT_BLOCK_ROWS):
+                for record in table.records(live[block_start:block_start + COMPACT_BLOCK_ROWS], writer.columns):
+                    writer.append(record)
+            writer.close()
+            print(f"✅ {name}: {writer.n_rows:,} linhas ({table.n_rows - writer.n_rows:,} substituídas removidas)")
+
+        compacted = dict(manifest, base_id=base_id, base=base_dir.name, deltas=[],
+                         compacted_at=time.strftime('%Y-%m-%dT%H:%M:%S'),
+                         compacted_deltas=manifest.get('compacted_deltas', 0) + len(manifest.get('deltas', [])))
+        publish_base(store_dir, compacted)
+    print(f"✅ Store compactado em {time.perf_counter() - start_time:.1f}s")
+    return compacted
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Ingestão dos dados JSON em armazenamento colunar')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help='Gera o armazenamento colunar a partir dos JSONs')
+    build.add_argument('--data-dir', help='Diretório com vagas.json, applicants.json e prospects.json')
+    build.add_argument('--store-dir', help='Diretório de saída (padrão: <data-dir>/store)')
+
+    apply = subparsers.add_parser('apply', help='Aplica deltas (JSON/NDJSON de upserts) ao armazenamento colunar')
+    apply.add_argument('paths', nargs='+', help='Arquivos de delta, aplicados na ordem informada')
+    apply.add_argument('--store-dir', help='Armazenamento colunar (padrão: STORE_DIR ou data/store)')
+    apply.add_argument('--max-deltas', type=int, default=DEFAULT_MAX_DELTAS,
+                       help='Compacta quando houver mais segmentos de delta que isso (0 desliga)')
+
+    compact = subparsers.add_parser('compact', help='Reescreve base + deltas sem as linhas substituídas')
+    compact.add_argument('--store-dir', help='Armazenamento colunar (padrão: STORE_DIR ou data/store)')
+
+    args = parser.parse_args(argv)
+    if args.command == 'build':
+        store_dir = args.store_dir or (Path(args.data_dir) / 'store' if args.data_dir else None)
+        print("📥 Gerando armazenamento colunar...")
+        build_store(args.data_dir, store_dir)
+        print("✅ Armazenamento colunar gerado!")
+    elif args.command == 'apply':
+        store_dir = Path(args.store_dir) if args.store_dir else resolve_store_dir()
+        for path in args.paths:
+            print(f"📥 Aplicando {path}...")
+            delta = apply_delta(store_dir, path, args.max_deltas)
+            print(f"✅ Delta {delta['id']} aplicado em {delta['seconds']:.3f}s")
+    else:
+        store_dir = Path(args.store_dir) if args.store_dir else resolve_store_dir()
+        print("🗜️ Compactando armazenamento colunar...")
+        compact_store(store_dir)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""Codec JSON das requisições e respostas da API (orjson, se instalado).
+
+`JSON_CODEC=auto` (padrão) usa o orjson quando o pacote está disponível e o
+módulo `json` da biblioteca padrão caso contrário; `orjson`/`json` fixam o
+backend. `CodecJSONProvider` liga o codec ao Flask: `request.get_json()` e
+`jsonify` passam a usá-lo, e as respostas são montadas direto dos bytes
+codificados.
+
+Tipos NumPy (escalares e arrays) são serializados como os valores Python
+equivalentes nos dois backends.
+"""
+import json
+
+import numpy as np
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKENDS = ('auto', 'orjson', 'json')
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def _default(value):
+    """Tipos que nenhum dos backends serializa sozinho"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f'Objeto do tipo {type(value).__name__} não é serializável em JSON')
+
+
+class JsonCodec:
+    """dumps (bytes UTF-8, chaves ordenadas com `sort_keys=True`) e loads com o backend escolhido"""
+
+    def __init__(self, backend='auto'):
+        if backend not in BACKENDS:
+            raise ValueError(f'Codec JSON desconhecido: {backend!r} (opções: {", ".join(BACKENDS)})')
+        if backend == 'orjson' and orjson is None:
+            raise RuntimeError('JSON_CODEC=orjson requer o pacote orjson (pip install orjson)')
+        self.name = 'orjson' if backend != 'json' and orjson is not None else 'json'
+        if self.name == 'orjson':
+            options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            sorted_options = options | orjson.OPT_SORT_KEYS
+            self.dumps = lambda obj, sort_keys=False: orjson.dumps(
+                obj, default=_default, option=sorted_options if sort_keys else options)
+            self.loads = orjson.loads
+        else:
+            encoders = {
+                sort_keys: json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=_default,
+                                            sort_keys=sort_keys)
+                for sort_keys in (False, True)
+            }
+            self.dumps = lambda obj, sort_keys=False: encoders[sort_keys].encode(obj).encode('utf-8')
+            self.loads = json.loads
+
+    def dumps_lines(self, rows):
+        """Linhas NDJSON (um objeto por linha, terminadas em \\n) de uma sequência de objetos"""
+        dumps = self.dumps
+        return b''.join([dumps(row) + b'\n' for row in rows])
+
+
+class CodecJSONProvider(JSONProvider):
+    """Provider JSON do Flask com o JsonCodec.
+
+    `sort_keys` (`app.json.sort_keys`, ou o argumento de `dumps`) ordena as
+    chaves; desligado por padrão, as respostas mantêm a ordem de montagem.
+    """
+
+    mimetype = 'application/json'
+    sort_keys = False
+
+    def __init__(self, app, codec=None):
+        super().__init__(app)
+        self.codec = codec or JsonCodec()
+
+    def dumps(self, obj, **kwargs):
+        return self.codec.dumps(obj, bool(kwargs.get('sort_keys', self.sort_keys))).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return self.codec.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.codec.dumps(obj, self.sort_keys), mimetype=self.mimetype)
@@ -0,0 +1,134 @@
+"""Micro-batching de predições concorrentes dentro de um worker.
+
+Requisições de um par vaga/candidato geram DataFrames de uma linha; cada uma
+chamando predict_proba sozinha paga o custo fixo da chamada (validação do
+sklearn, percurso das árvores) por linha. Com `MicroBatcher`, os handlers
+enfileiram as features já preparadas e esperam; uma thread junta o que chegou
+até `max_batch_size` linhas ou `max_wait` segundos depois do primeiro item,
+roda uma única inferência por versão do modelo e devolve a fatia de cada
+requisição.
+
+Cada DataFrame é conferido contra as colunas de entrada do motor
+(`engine.input_columns`) antes de entrar na fila: faltando alguma, a
+requisição falha sozinha, em vez de receber NaN da concatenação com as
+outras. Se a inferência do lote falhar, os itens são refeitos um a um, e só
+a requisição que causa o erro o recebe.
+
+Só faz sentido com mais de uma requisição simultânea por processo (workers
+gthread do gunicorn, GUNICORN_THREADS > 1).
+"""
+import os
+import time
+import queue
+import threading
+from concurrent.futures import Future
+
+import pandas as pd
+
+DEFAULT_MAX_BATCH_SIZE = 32
+DEFAULT_MAX_WAIT_SECONDS = 0.003
+
+# Tempo máximo que um handler espera o resultado (inferência travada não prende a requisição)
+RESULT_TIMEOUT_SECONDS = 30
+
+
+class _Pending:
+    """Features de uma requisição aguardando a inferência"""
+    __slots__ = ('model', 'frame', 'future', 'enqueued')
+
+    def __init__(self, model, frame):
+        self.model = model
+        self.frame = frame
+        self.future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class MicroBatcher:
+    """Fila de predições agrupadas por tamanho máximo ou tempo máximo de espera.
+
+    `on_batch(queue_depth, rows, waits)` recebe, a cada lote, as requisições na fila
+    quando ele foi formado, o número de linhas e a espera de cada requisição.
+    """
+
+    def __init__(self, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait=DEFAULT_MAX_WAIT_SECONDS, on_batch=None):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.on_batch = on_batch
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_thread(self):
+        # A thread é criada no primeiro uso em cada processo (threads não sobrevivem ao fork)
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._queue = queue.SimpleQueue()
+                self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+                self._pid = os.getpid()
+                self._thread.start()
+
+    def predict_proba(self, model, frame):
+        """Probabilidades de `frame` com o motor de `model`, inferidas junto com outras requisições"""
+        columns = getattr(model.engine, 'input_columns', None)
+        if columns:
+            missing = [column for column in columns if column not in frame.columns]
+            if missing:
+                raise KeyError(f'Colunas de entrada ausentes: {missing}')
+            frame = frame[columns]
+        self._ensure_thread()
+        pending = _Pending(model, frame)
+        self._queue.put(pending)
+        return pending.future.result(RESULT_TIMEOUT_SECONDS)
+
+    def _collect(self):
+        """Bloqueia até o primeiro item e junta os seguintes até o limite de linhas ou de tempo"""
+        first = self._queue.get()
+        batch, rows = [first], len(first.frame)
+        deadline = first.enqueued + self.max_wait
+        while rows < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                item = self._queue.get_nowait() if timeout <= 0 else self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            batch.append(item)
+            rows += len(item.frame)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            if self.on_batch is not None:
+                try:
+                    self.on_batch(len(batch) + self._queue.qsize(), sum(len(item.frame) for item in batch),
+                                  [started - item.enqueued for item in batch])
+                except Exception as e:
+                    print(f"⚠️ Erro ao registrar métricas do micro-batching: {e}")
+            # Uma inferência por versão do modelo (uma troca pode acontecer no meio da fila)
+            # e por conjunto de colunas (motores sem input_columns)
+            groups = {}
+            for item in batch:
+                groups.setdefault((id(item.model), tuple(item.frame.columns)), []).append(item)
+            for items in groups.values():
+                self._infer(items)
+
+    def _infer(self, items):
+        try:
+            frame = items[0].frame if len(items) == 1 else pd.concat([item.frame for item in items], ignore_index=True)
+            probabilities = items[0].model.engine.predict_proba(frame)
+        except Exception as e:
+            if len(items) == 1:
+                items[0].future.set_exception(e)
+            else:
+                # Um item inválido não derruba os outros: cada um é refeito sozinho
+                for item in items:
+                    self._infer([item])
+            return
+        offset = 0
+        for item in items:
+            item.future.set_result(probabilities[offset:offset + len(item.frame)])
+            offset += len(item.frame)
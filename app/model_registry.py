@@ -0,0 +1,268 @@
+"""Versões do modelo em diretórios e troca a quente da versão ativa.
+
+Layout do diretório de modelos:
+
+    models/
+        versions/<versão>/pipeline_candidatos_contratados.joblib
+        versions/<versão>/metadata_candidatos_contratados.json
+        CURRENT                     # nome da versão que os workers devem servir
+
+Sem `versions/`, o arquivo único models/pipeline_candidatos_contratados.joblib
+continua funcionando como a versão 'legacy' (substituir o arquivo dispara o
+recarregamento, mas não há rollback entre processos).
+
+O registro guarda a versão ativa e a anterior já carregadas: a troca e o
+rollback são uma atribuição de referência sob lock, e requisições em andamento
+terminam com o modelo que obtiveram no início. Cada worker observa o ponteiro
+CURRENT (`ModelWatcher`), então uma troca feita em um worker chega aos demais.
+
+Uso:
+    python app/model_registry.py publish modelo.joblib --metadata metadata.json --activate
+    python app/model_registry.py list
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).parent
+
+MODEL_FILENAME = 'pipeline_candidatos_contratados.joblib'
+METADATA_FILENAME = 'metadata_candidatos_contratados.json'
+VERSIONS_DIR = 'versions'
+CURRENT_POINTER = 'CURRENT'
+LEGACY_VERSION = 'legacy'
+
+
+class ModelValidationError(ValueError):
+    """A versão carregada não passou no lote de validação"""
+
+
+class ModelVersion:
+    """Uma versão carregada: pipeline, motor de inferência e metadados"""
+
+    def __init__(self, version, path, pipeline, fingerprint, metadata, engine, inference_report, timings,
+                 text_vectors=None):
+        self.version = version
+        self.path = str(path)
+        self.pipeline = pipeline
+        self.fingerprint = fingerprint
+        self.metadata = metadata
+        self.engine = engine
+        self.inference_report = inference_report
+        self.timings = timings
+        # Contagens de texto por vaga/candidato do data store (text_vectors.PairTextVectors), se disponíveis
+        self.text_vectors = text_vectors
+        self.loaded_at = time.time()
+
+    def info(self):
+        return {
+            'version': self.version,
+            'fingerprint': self.fingerprint,
+            'path': self.path,
+            'loaded_at': self.loaded_at,
+            'load_seconds': self.timings
+        }
+
+
+def validate_predictions(engine, frame):
+    """Lote de validação: probabilidades finitas em [0, 1] somando 1, para classes 0/1"""
+    if list(engine.classes_) != [0, 1]:
+        raise ModelValidationError(f'Classes inesperadas: {list(engine.classes_)}')
+    probabilities = np.asarray(engine.predict_proba(frame))
+    if probabilities.shape != (len(frame), 2):
+        raise ModelValidationError(f'Formato de saída inesperado: {probabilities.shape}')
+    if not np.isfinite(probabilities).all() or (probabilities < 0).any() or (probabilities > 1).any():
+        raise ModelValidationError('Probabilidades fora de [0, 1]')
+    if not np.allclose(probabilities.sum(axis=1), 1.0):
+        raise ModelValidationError('Probabilidades não somam 1')
+    return probabilities
+
+
+def write_pointer(path, version):
+    """Grava o ponteiro de forma atômica (arquivo temporário + rename)"""
+    path = Path(path)
+    handle, staging = tempfile.mkstemp(prefix=f'.{path.name}-', dir=path.parent)
+    with os.fdopen(handle, 'w', encoding='utf-8') as f:
+        f.write(f'{version}\n')
+    os.replace(staging, path)
+
+
+class ModelRegistry:
+    """Diretórios de versões, ponteiro CURRENT e as versões ativa/anterior em memória"""
+
+    def __init__(self, models_dir):
+        self.models_dir = Path(models_dir)
+        self.active = None
+        self.previous = None
+        self._lock = threading.Lock()
+
+    @property
+    def versions_dir(self):
+        return self.models_dir / VERSIONS_DIR
+
+    @property
+    def pointer_path(self):
+        return self.models_dir / CURRENT_POINTER
+
+    @property
+    def versioned(self):
+        return self.versions_dir.is_dir()
+
+    def versions(self):
+        """Versões publicadas (ordem lexicográfica; use nomes como 2025-07-20 ou v3)"""
+        if not self.versioned:
+            return [LEGACY_VERSION] if self.model_path(LEGACY_VERSION).exists() else []
+        return sorted(entry.name for entry in self.versions_dir.iterdir()
+                      if (entry / MODEL_FILENAME).exists())
+
+    def model_path(self, version):
+        if version == LEGACY_VERSION and not self.versioned:
+            return self.models_dir / MODEL_FILENAME
+        return self.versions_dir / version / MODEL_FILENAME
+
+    def metadata_path(self, version):
+        return self.model_path(version).parent / METADATA_FILENAME
+
+    def pointer(self):
+        """Versão indicada por CURRENT; sem ponteiro, a versão mais recente"""
+        if self.versioned and self.pointer_path.exists():
+            version = self.pointer_path.read_text(encoding='utf-8').strip()
+            if version:
+                return version
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def set_pointer(self, version):
+        """Aponta CURRENT para `version` (todos os workers passam a servi-la)"""
+        if not self.versioned:
+            return False
+        if version not in self.versions():
+            raise KeyError(version)
+        write_pointer(self.pointer_path, version)
+        return True
+
+    def signature(self):
+        """Muda quando o ponteiro ou o arquivo da versão apontada muda (usado pelo watcher)"""
+        version = self.pointer()
+        if version is None:
+            return None
+        try:
+            stat = self.model_path(version).stat()
+        except OSError:
+            return (version, None)
+        return (version, stat.st_mtime_ns, stat.st_size)
+
+    def activate(self, model):
+        """Troca atômica: a versão ativa passa a ser a anterior"""
+        with self._lock:
+            if self.active is not None and self.active is not model:
+                self.previous = self.active
+            self.active = model
+            return self.previous
+
+    def rollback(self):
+        """Volta para a versão anterior, já carregada em memória"""
+        with self._lock:
+            if self.previous is None:
+                return None
+            self.active, self.previous = self.previous, self.active
+            return self.active
+
+
+class ModelWatcher(threading.Thread):
+    """Verifica periodicamente o ponteiro/arquivo do modelo e chama `on_change`"""
+
+    def __init__(self, registry, on_change, interval):
+        super().__init__(name='model-watcher', daemon=True)
+        self.registry = registry
+        self.on_change = on_change
+        self.interval = interval
+        # A primeira verificação confere a versão herdada do master (on_change ignora a versão já ativa)
+        self.last_signature = None
+        self._stopped = threading.Event()
+
+    def check(self):
+        signature = self.registry.signature()
+        if signature is None or signature == self.last_signature:
+            return False
+        self.last_signature = signature
+        try:
+            self.on_change(signature[0])
+        except Exception as e:
+            print(f"⚠️ Falha ao trocar para a versão {signature[0]}: {e}")
+        return True
+
+    def run(self):
+        self.check()
+        while not self._stopped.wait(self.interval):
+            self.check()
+
+    def stop(self):
+        self._stopped.set()
+
+
+def publish(models_dir, model_path, metadata_path=None, version=None, activate=False):
+    """Copia um .joblib (e metadados) para versions/<versão>/ sem expor cópia parcial"""
+    registry = ModelRegistry(models_dir)
+    version = version or time.strftime('%Y%m%d-%H%M%S')
+    target = registry.versions_dir / version
+    if target.exists():
+        raise FileExistsError(f'Versão {version} já existe em {target}')
+    registry.versions_dir.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=f'.{version}-', dir=registry.versions_dir))
+    try:
+        shutil.copyfile(model_path, staging / MODEL_FILENAME)
+        if metadata_path:
+            shutil.copyfile(metadata_path, staging / METADATA_FILENAME)
+        os.rename(staging, target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    if activate:
+        registry.set_pointer(version)
+    return version
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Versões do modelo de candidatos contratados')
+    parser.add_argument('--models-dir', default=str(BASE_DIR / 'models'))
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    publish_parser = subparsers.add_parser('publish', help='Publica um .joblib como nova versão')
+    publish_parser.add_argument('model', help='Arquivo .joblib do pipeline treinado')
+    publish_parser.add_argument('--metadata', help='JSON de metadados (acurácia, data de treino...)')
+    publish_parser.add_argument('--version', help='Nome da versão (padrão: data e hora atuais)')
+    publish_parser.add_argument('--activate', action='store_true', help='Aponta CURRENT para a nova versão')
+
+    activate_parser = subparsers.add_parser('activate', help='Aponta CURRENT para uma versão publicada')
+    activate_parser.add_argument('version')
+
+    subparsers.add_parser('list', help='Lista as versões publicadas')
+
+    args = parser.parse_args(argv)
+    registry = ModelRegistry(args.models_dir)
+    if args.command == 'publish':
+        version = publish(args.models_dir, args.model, args.metadata, args.version, args.activate)
+        print(f"✅ Versão {version} publicada{' e ativada' if args.activate else ''}")
+    elif args.command == 'activate':
+        if not registry.set_pointer(args.version):
+            print("❌ Diretório sem versions/: publique uma versão primeiro")
+            return 1
+        print(f"✅ CURRENT -> {args.version}")
+    else:
+        current = registry.pointer()
+        for version in registry.versions():
+            print(f"{'*' if version == current else ' '} {version}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
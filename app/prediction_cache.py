@@ -0,0 +1,202 @@
+"""Cache de predições compartilhado entre os workers do gunicorn.
+
+As entradas ficam em um SQLite local (por padrão em /dev/shm, ou seja, em
+memória compartilhada), acessado por todos os processos em modo WAL. A chave é
+o hash da linha de features do par (a entrada do modelo, já normalizada) mais
+a versão do modelo: payloads que diferem só em caixa, campos extras ou
+ausente vs '' compartilham a entrada, e uma troca de modelo nunca reaproveita
+resultados antigos. A remoção combina
+TTL e LRU dentro de um orçamento de bytes; totais de bytes e entradas são
+mantidos por triggers para não varrer a tabela a cada escrita.
+"""
+import os
+import json
+import math
+import time
+import sqlite3
+import hashlib
+import tempfile
+import threading
+
+from features import FEATURE_COLUMNS
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 3600
+
+# Ao estourar o orçamento, remove até esta fração dele (evita remoções a cada escrita)
+LOW_WATER_MARK = 0.9
+
+QUERY_CHUNK_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed);
+CREATE TABLE IF NOT EXISTS stats (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    entries INTEGER NOT NULL,
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO stats VALUES (0, 0, 0);
+CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+    UPDATE stats SET entries = entries + 1, bytes = bytes + NEW.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size ON entries BEGIN
+    UPDATE stats SET bytes = bytes + NEW.size - OLD.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+    UPDATE stats SET entries = entries - 1, bytes = bytes - OLD.size WHERE id = 0;
+END;
+"""
+
+
+def shared_memory_dir():
+    """/dev/shm (tmpfs compartilhado) quando disponível, senão o diretório temporário"""
+    return '/dev/shm' if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK) else tempfile.gettempdir()
+
+
+def default_cache_path():
+    return os.path.join(shared_memory_dir(), 'otimizador-prediction-cache.sqlite3')
+
+
+def prediction_key(features, model_version):
+    """Hash canônico da linha de features de um par (coluna de FEATURE_COLUMNS -> valor)"""
+    canonical = json.dumps([model_version] + [features[column] for column in FEATURE_COLUMNS],
+                           ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def prediction_keys(frame, model_version):
+    """Chaves de todas as linhas de um DataFrame de features (features.compute_features)"""
+    # Listas por coluna convertem os escalares NumPy para Python uma vez
+    columns = [frame[column].tolist() for column in FEATURE_COLUMNS]
+    return [prediction_key(dict(zip(FEATURE_COLUMNS, row)), model_version) for row in zip(*columns)]
+
+
+class PredictionCache:
+    """Cache chave -> JSON com TTL, LRU e orçamento de bytes, seguro entre processos.
+
+    Erros do SQLite (arquivo bloqueado, disco cheio) são tratados como miss: o
+    cache nunca impede uma predição.
+    """
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES, ttl_seconds=DEFAULT_TTL_SECONDS, on_evict=None):
+        self.path = str(path or default_cache_path())
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.on_evict = on_evict
+        self._local = threading.local()
+
+    def _connection(self):
+        # Uma conexão por processo e thread (workers do gunicorn são forks)
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=OFF')
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _evicted(self, reason, count):
+        if count and self.on_evict is not None:
+            self.on_evict(reason, count)
+
+    def get_many(self, keys):
+        """Valores encontrados (chave -> objeto); expirados são removidos"""
+        if not keys:
+            return {}
+        try:
+            connection = self._connection()
+            now = time.time()
+            keys = list(keys)
+            rows = []
+            # Em blocos para respeitar o limite de parâmetros por consulta do SQLite
+            for start in range(0, len(keys), QUERY_CHUNK_SIZE):
+                chunk = keys[start:start + QUERY_CHUNK_SIZE]
+                placeholders = ','.join('?' * len(chunk))
+                rows.extend(connection.execute(
+                    f'SELECT key, value, created FROM entries WHERE key IN ({placeholders})', chunk).fetchall())
+            found = {key: value for key, value, created in rows if now - created <= self.ttl_seconds}
+            expired = [key for key, _, created in rows if now - created > self.ttl_seconds]
+            if expired:
+                connection.executemany('DELETE FROM entries WHERE key = ?', [(key,) for key in expired])
+                self._evicted('ttl', len(expired))
+            if found:
+                connection.executemany('UPDATE entries SET accessed = ? WHERE key = ?', [(now, key) for key in found])
+            return {key: json.loads(value) for key, value in found.items()}
+        except sqlite3.Error as e:
+            print(f"⚠️ Cache de predições indisponível (leitura): {e}")
+            return {}
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def set_many(self, items):
+        """Grava pares (chave, objeto) e aplica o orçamento de bytes"""
+        if not items:
+            return
+        now = time.time()
+        rows = []
+        for key, value in items:
+            text = json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+            rows.append((key, text, len(key) + len(text.encode('utf-8')), now, now))
+        try:
+            connection = self._connection()
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                connection.executemany(
+                    'INSERT INTO entries (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?) '
+                    'ON CONFLICT(key) DO UPDATE SET value = excluded.value, size = excluded.size, '
+                    'created = excluded.created, accessed = excluded.accessed', rows)
+                self._enforce_budget(connection, now)
+                connection.execute('COMMIT')
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+        except sqlite3.Error as e:
+            print(f"⚠️ Cache de predições indisponível (escrita): {e}")
+
+    def set(self, key, value):
+        self.set_many([(key, value)])
+
+    def _enforce_budget(self, connection, now):
+        entries, total = self._totals(connection)
+        if total <= self.max_bytes:
+            return
+        # Primeiro as expiradas, depois as menos usadas recentemente
+        expired = connection.execute('DELETE FROM entries WHERE created < ?', (now - self.ttl_seconds,)).rowcount
+        self._evicted('ttl', expired)
+        target = self.max_bytes * LOW_WATER_MARK
+        entries, total = self._totals(connection)
+        while entries and total > target:
+            # Quantidade estimada pelo tamanho médio das entradas
+            count = max(1, math.ceil((total - target) * entries / total))
+            removed = connection.execute(
+                'DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY accessed LIMIT ?)',
+                (count,)).rowcount
+            self._evicted('lru', removed)
+            entries, total = self._totals(connection)
+
+    def _totals(self, connection):
+        return connection.execute('SELECT entries, bytes FROM stats WHERE id = 0').fetchone()
+
+    def stats(self):
+        """{'entries': N, 'bytes': B} compartilhados por todos os workers"""
+        try:
+            entries, size = self._totals(self._connection())
+            return {'entries': entries, 'bytes': size}
+        except sqlite3.Error:
+            return {'entries': 0, 'bytes': 0}
+
+    def clear(self):
+        try:
+            self._connection().execute('DELETE FROM entries')
+        except sqlite3.Error as e:
+            print(f"⚠️ Não foi possível limpar o cache de predições: {e}")
@@ -0,0 +1,197 @@
+"""Tempo por etapa das predições e profiling por amostragem sob demanda.
+
+`StageTimer` acumula, durante uma requisição, o tempo de cada etapa (parse do
+JSON, features, transform, floresta, resposta...) e observa os totais em um
+Histogram com labels (path, stage) ao final; o custo por etapa é um par de
+perf_counter e os filhos do Histogram ficam em cache.
+
+`StackSampler` amostra, a cada `interval` segundos, a pilha das threads que
+estão atendendo requisições (registradas por `track`/`untrack` nos hooks do
+Flask) via sys._current_frames. Ao contrário do cProfile, que só enxerga a
+thread em que foi ligado, funciona com workers gthread e não instrumenta
+cada chamada: o custo fica no amostrador, só enquanto ele roda.
+"""
+import os
+import sys
+import json
+import time
+import threading
+from pathlib import Path
+from collections import Counter
+
+DEFAULT_INTERVAL_SECONDS = 0.005
+MAX_STACK_DEPTH = 128
+
+# Funções e pilhas listadas no perfil agregado
+TOP_FUNCTIONS = 50
+TOP_STACKS = 200
+
+
+class StageTimer:
+    """Tempo acumulado por etapa de uma requisição.
+
+    Uso: `with timer.stage('features'): ...` e `timer.observe()` no final.
+    Sem histograma (`StageTimer()`), só mede; serve de padrão para funções
+    chamadas fora de uma requisição.
+    """
+    __slots__ = ('histogram', 'path', 'durations', '_stage', '_started')
+
+    _children = {}
+
+    def __init__(self, histogram=None, path=None):
+        self.histogram = histogram
+        self.path = path
+        self.durations = {}
+        self._stage = None
+        self._started = 0.0
+
+    def stage(self, name):
+        # Etapas não se aninham: cada `with` mede uma etapa por vez
+        self._stage = name
+        return self
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.add(self._stage, time.perf_counter() - self._started)
+        return False
+
+    def add(self, stage, seconds):
+        self.durations[stage] = self.durations.get(stage, 0.0) + seconds
+
+    def observe(self):
+        if self.histogram is None:
+            return
+        for stage, seconds in self.durations.items():
+            key = (id(self.histogram), self.path, stage)
+            child = StageTimer._children.get(key)
+            if child is None:
+                child = StageTimer._children[key] = self.histogram.labels(path=self.path, stage=stage)
+            child.observe(seconds)
+        self.durations = {}
+
+
+def _frame_label(code):
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+class StackSampler:
+    """Perfil por amostragem das threads que atendem requisições neste processo"""
+
+    def __init__(self, profiles_dir=None, keep=10):
+        self.profiles_dir = Path(profiles_dir) if profiles_dir else None
+        self.keep = keep
+        self._request_threads = set()
+        self._lock = threading.Lock()
+        self.running = None
+
+    def track(self):
+        self._request_threads.add(threading.get_ident())
+
+    def untrack(self):
+        self._request_threads.discard(threading.get_ident())
+
+    def run(self, seconds, interval=DEFAULT_INTERVAL_SECONDS):
+        """Amostra por `seconds` segundos e devolve o perfil agregado (um perfil por vez)"""
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError('Já existe um profiling em andamento neste processo')
+        try:
+            started_at = time.time()
+            self.running = {'started_at': started_at, 'seconds': seconds}
+            stacks, samples, ticks = self._sample(seconds, interval)
+            profile = self._aggregate(stacks, samples)
+            profile.update({
+                'id': f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(started_at))}-{os.getpid()}",
+                'pid': os.getpid(),
+                'started_at': started_at,
+                'seconds': seconds,
+                'interval_ms': interval * 1000,
+                'ticks': ticks
+            })
+            self._save(profile)
+            return profile
+        finally:
+            self.running = None
+            self._lock.release()
+
+    def _sample(self, seconds, interval):
+        own_thread = threading.get_ident()
+        stacks = Counter()
+        samples = ticks = 0
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            frames = sys._current_frames()
+            for ident in list(self._request_threads):
+                frame = frames.get(ident)
+                if ident == own_thread or frame is None:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                stacks[tuple(reversed(stack))] += 1
+                samples += 1
+            del frames
+            ticks += 1
+            time.sleep(interval)
+        return stacks, samples, ticks
+
+    @staticmethod
+    def _aggregate(stacks, samples):
+        """Amostras próprias (no topo da pilha) e totais (em qualquer nível) por função"""
+        denominator = max(samples, 1)
+        own, total, collapsed = Counter(), Counter(), Counter()
+        for codes, count in stacks.items():
+            labels = [_frame_label(code) for code in codes]
+            own[labels[-1]] += count
+            for label in set(labels):
+                total[label] += count
+            collapsed[';'.join(labels)] += count
+        return {
+            'samples': samples,
+            'functions': [
+                {
+                    'function': label,
+                    'self': own[label],
+                    'total': count,
+                    'self_percent': 100.0 * own[label] / denominator,
+                    'total_percent': 100.0 * count / denominator
+                }
+                for label, count in total.most_common(TOP_FUNCTIONS)
+            ],
+            'stacks': dict(collapsed.most_common(TOP_STACKS))
+        }
+
+    def _save(self, profile):
+        """Grava o perfil no diretório compartilhado (qualquer worker o serve depois)"""
+        if self.profiles_dir is None:
+            return
+        try:
+            self.profiles_dir.mkdir(parents=True, exist_ok=True)
+            staging = self.profiles_dir / f"{profile['id']}.json.tmp"
+            with open(staging, 'w', encoding='utf-8') as f:
+                json.dump(profile, f)
+            os.replace(staging, self.profiles_dir / f"{profile['id']}.json")
+            for old in self.saved()[:-self.keep]:
+                (self.profiles_dir / f'{old}.json').unlink(missing_ok=True)
+        except OSError as e:
+            print(f"⚠️ Erro ao gravar o perfil {profile['id']}: {e}")
+
+    def saved(self):
+        """Perfis gravados, do mais antigo ao mais recente"""
+        if self.profiles_dir is None or not self.profiles_dir.is_dir():
+            return []
+        return sorted(path.stem for path in self.profiles_dir.glob('*.json'))
+
+    def load(self, profile_id):
+        if profile_id not in self.saved():
+            return None
+        with open(self.profiles_dir / f'{profile_id}.json', 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+
+def collapsed_stacks(profile):
+    """Formato 'a;b;c contagem' (flamegraph.pl, speedscope)"""
+    return ''.join(f'{stack} {count}\n' for stack, count in profile['stacks'].items())
@@ -0,0 +1,323 @@
+"""Pontuação em massa de todos os pares (vaga, prospect) do armazenamento colunar.
+
+Usa o modelo servido (versão apontada por CURRENT, ou `--model`) e o mesmo
+código de features e motor de inferência da API. Os pares vêm da tabela de
+prospecções do store, com os deltas aplicados (ingest.py apply), e são lidos
+em blocos de tamanho fixo (`--chunk-rows`); um pool de
+processos pontua cada bloco (vagas e candidatos abertos via memmap; floresta
+compilada e contagens do TF-IDF decomposto mapeadas do mesmo diretório em
+todos os processos) e grava o resultado em um arquivo próprio, `part-NNNNN.csv` ou `.parquet`. O pai só
+mantém `2 x --n-jobs` blocos em andamento, então a memória não cresce com o
+dataset.
+
+`_progress.json` registra os blocos concluídos: uma execução interrompida,
+repetida com os mesmos argumentos e a mesma versão do store (base e deltas),
+continua do primeiro bloco não concluído.
+
+Uso:
+    python app/score.py --data-dir data --output-dir data/scores --n-jobs -1
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import joblib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from data_store import BASE_DIR, open_store, resolve_data_dir, store_version
+from features import VAGA_INPUTS, CANDIDATO_INPUTS, compute_features
+from inference import NotCompilableError, load_engine
+from ingest import TABLES
+from model_registry import ModelRegistry
+from prediction_cache import shared_memory_dir
+from text_vectors import PairTextVectors, check_text_parity, find_text_vectorizer
+from train import check_sources, ensure_store, file_digest, open_worker_tables
+
+DEFAULT_CHUNK_ROWS = 20000
+PROGRESS_FILE = '_progress.json'
+FORMATS = ['csv', 'parquet']
+
+# Linhas do primeiro bloco usadas na verificação de paridade do motor compilado
+PARITY_ROWS = 2000
+
+# Motor e store de cada processo do pool
+_worker = {}
+
+
+def resolve_model_path(models_dir, model=None):
+    """Arquivo do modelo: `--model` ou a versão servida (CURRENT/legacy)"""
+    if model:
+        return Path(model)
+    registry = ModelRegistry(models_dir)
+    version = registry.pointer()
+    if version is None:
+        raise FileNotFoundError(f'Nenhum modelo em {models_dir}')
+    return registry.model_path(version)
+
+
+def check_format(output_format):
+    if output_format == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise RuntimeError('Saída parquet requer o pacote pyarrow (pip install pyarrow)')
+
+
+def iter_pair_chunks(prospects, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Blocos de (codigo_vaga, codigo_candidato, situacao) de tamanho fixo, das prospecções vivas do store"""
+    live = prospects.live_positions()
+    for start in range(0, len(live), chunk_rows):
+        positions = live[start:start + chunk_rows]
+        yield list(zip(prospects.codes(positions), prospects.column('codigo_candidato').take(positions),
+                       prospects.column('situacao_candidado').take(positions)))
+
+
+def load_pipeline(model_path):
+    pipeline = joblib.load(model_path, mmap_mode='r')
+    # Um núcleo por processo: o paralelismo vem do pool
+    pipeline[-1].n_jobs = 1
+    return pipeline
+
+
+def load_text_vectors(pipeline, engine, store_dir, manifest, arrays_dir):
+    """Contagens de texto das vagas e candidatos do store (só com o motor compilado), ou None"""
+    vectorizer = find_text_vectorizer(pipeline)
+    if engine.name != 'compiled' or vectorizer is None:
+        return None
+    vagas, applicants = open_worker_tables(store_dir, manifest)
+    try:
+        return PairTextVectors.shared(vectorizer, vagas, applicants, f'{arrays_dir}-text')
+    except NotCompilableError as e:
+        print(f"⚠️ TF-IDF decomposto indisponível: {e}")
+        return None
+
+
+def init_worker(model_path, engine_name, arrays_dir, store_dir, manifest, text_vectors):
+    """Carrega o modelo e abre o store (na versão do processo principal) uma vez por processo"""
+    pipeline = load_pipeline(model_path)
+    engine, _ = load_engine(pipeline, engine_name, arrays_dir=arrays_dir)
+    open_worker_tables(store_dir, manifest)
+    _worker.update(engine=engine, store_dir=store_dir, manifest=manifest,
+                   text_vectors=load_text_vectors(pipeline, engine, store_dir, manifest, arrays_dir)
+                   if text_vectors else None)
+
+
+def chunk_features(rows, combined_text=True):
+    """Join com vagas e candidatos (pares sem um dos lados ficam de fora) e as features.
+
+    Devolve (pares mantidos, posições das vagas, posições dos candidatos, features).
+    """
+    vagas, applicants = open_worker_tables(_worker['store_dir'], _worker['manifest'])
+    kept, vaga_positions, candidate_positions = [], [], []
+    for row in rows:
+        vaga_position = vagas.position_of(row[0])
+        candidate_position = applicants.position_of(row[1])
+        if vaga_position is not None and candidate_position is not None:
+            kept.append(row)
+            vaga_positions.append(vaga_position)
+            candidate_positions.append(candidate_position)
+    vaga_inputs = {field: vagas.column(field).take(vaga_positions) for field in VAGA_INPUTS}
+    candidate_inputs = {field: applicants.column(field).take(candidate_positions) for field in CANDIDATO_INPUTS}
+    features = compute_features(vaga_inputs, candidate_inputs, len(kept), combined_text)
+    return kept, vaga_positions, candidate_positions, features
+
+
+def part_path(output_dir, index, output_format):
+    return Path(output_dir) / f'part-{index:05d}.{output_format}'
+
+
+def score_chunk(index, rows, output_dir, output_format):
+    """Pontua um bloco e grava o arquivo dele; devolve (índice, linhas gravadas, pares sem join)"""
+    text_vectors = _worker.get('text_vectors')
+    kept, vaga_positions, candidate_positions, features = chunk_features(rows, combined_text=text_vectors is None)
+    engine = _worker['engine']
+    if kept:
+        # TF-IDF do par somando as contagens da vaga e do candidato, sem tokenizar o texto combinado
+        probabilities = engine.predict_proba(features, text_vectors.transform(vaga_positions, candidate_positions)) \
+            if text_vectors is not None else engine.predict_proba(features)
+        predictions = engine.classes_[probabilities.argmax(axis=1)]
+        high_quality = probabilities[:, list(engine.classes_).index(1)] if 1 in engine.classes_ \
+            else probabilities[:, -1]
+    else:
+        predictions = high_quality = np.zeros(0)
+    codes = list(zip(*kept)) if kept else ([], [], [])
+    result = pd.DataFrame({
+        'codigo_vaga': codes[0],
+        'codigo_candidato': codes[1],
+        'situacao_candidado': codes[2],
+        'prediction': np.asarray(predictions, dtype=np.int64),
+        'probability_high_quality': np.asarray(high_quality, dtype=np.float64),
+        'tech_success_score': features['tech_success_score'].to_numpy(),
+        'academic_success_score': features['academic_success_score'].to_numpy(),
+        'english_success_score': features['english_success_score'].to_numpy()
+    })
+
+    # Gravado com outro nome e renomeado: um bloco interrompido nunca parece concluído
+    target = part_path(output_dir, index, output_format)
+    staging = target.with_name(f'.{target.name}.tmp')
+    if output_format == 'parquet':
+        result.to_parquet(staging, index=False)
+    else:
+        result.to_csv(staging, index=False)
+    os.replace(staging, target)
+    return index, len(result), len(rows) - len(kept)
+
+
+def input_signature(data_dir, manifest):
+    """Tamanho e mtime dos JSONs e versão do store (base e deltas): uma retomada só vale para as mesmas entradas"""
+    signature = {}
+    for name, (filename, _, _) in TABLES.items():
+        stat = (Path(data_dir) / filename).stat()
+        signature[name] = {'size': stat.st_size, 'mtime': stat.st_mtime}
+    signature['store'] = store_version(manifest)
+    return signature
+
+
+def load_progress(output_dir, run, restart=False):
+    """Blocos já concluídos de uma execução anterior com os mesmos parâmetros"""
+    output_dir = Path(output_dir)
+    progress_path = output_dir / PROGRESS_FILE
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if restart:
+        # Só os arquivos desta ferramenta: --output-dir pode conter outras coisas
+        for path in [progress_path, *output_dir.glob('part-*.*')]:
+            path.unlink()
+    if not progress_path.exists():
+        return {**run, 'completed': {}, 'skipped': 0}
+    with open(progress_path, 'r', encoding='utf-8') as f:
+        progress = json.load(f)
+    changed = [key for key, value in run.items() if progress.get(key) != value]
+    if changed:
+        raise ValueError(f"{output_dir} tem uma execução com outros parâmetros ({', '.join(changed)}); "
+                         f"use --restart para recomeçar")
+    return progress
+
+
+def save_progress(output_dir, progress):
+    progress_path = Path(output_dir) / PROGRESS_FILE
+    staging = progress_path.with_name(progress_path.name + '.tmp')
+    with open(staging, 'w', encoding='utf-8') as f:
+        json.dump(progress, f, indent=2)
+    os.replace(staging, progress_path)
+
+
+def score_all(data_dir=None, output_dir=None, models_dir=None, model=None, store_dir=None, n_jobs=-1,
+              chunk_rows=DEFAULT_CHUNK_ROWS, output_format='csv', engine_name='compiled', restart=False):
+    """Pontua todos os pares das prospecções do store; devolve o progresso final"""
+    data_dir = Path(data_dir) if data_dir else resolve_data_dir()
+    output_dir = Path(output_dir) if output_dir else data_dir / 'scores'
+    models_dir = Path(models_dir) if models_dir else BASE_DIR / 'models'
+    store_dir = Path(store_dir) if store_dir else data_dir / 'store'
+    n_jobs = os.cpu_count() if n_jobs is None or n_jobs < 1 else n_jobs
+    check_format(output_format)
+    check_sources(data_dir)
+    # Versão do store fixada para toda a execução (processo principal e pool)
+    manifest = ensure_store(data_dir, store_dir)
+    prospects = open_store(store_dir, manifest=manifest)['prospects']
+
+    model_path = resolve_model_path(models_dir, model)
+    fingerprint = file_digest(model_path)[:16]
+    run = {
+        'model_fingerprint': fingerprint,
+        'chunk_rows': chunk_rows,
+        'format': output_format,
+        'inputs': input_signature(data_dir, manifest)
+    }
+    progress = load_progress(output_dir, run, restart)
+    completed = progress['completed']
+    if completed:
+        print(f"♻️ Retomando: {len(completed)} blocos já concluídos em {output_dir}")
+
+    # Motor escolhido uma vez no processo principal (com a paridade no primeiro bloco);
+    # os processos do pool mapeiam a mesma floresta compilada
+    arrays_dir = os.path.join(shared_memory_dir(), 'otimizador-compiled', fingerprint)
+    _worker.update(store_dir=str(store_dir), manifest=manifest)
+    _, vaga_positions, candidate_positions, parity_sample = chunk_features(
+        next(iter_pair_chunks(prospects, PARITY_ROWS), []))
+    pipeline = load_pipeline(model_path)
+    _worker['engine'], report = load_engine(pipeline, engine_name, parity_sample if len(parity_sample) else None,
+                                            arrays_dir)
+    engine_name = report['engine']
+    if report.get('fallback_reason'):
+        print(f"⚠️ Usando sklearn: {report['fallback_reason']}")
+    text_vectors = load_text_vectors(pipeline, _worker['engine'], str(store_dir), manifest, arrays_dir)
+    if text_vectors is not None and len(parity_sample):
+        parity = check_text_parity(text_vectors, find_text_vectorizer(pipeline), vaga_positions,
+                                   candidate_positions, parity_sample['combined_text'].tolist())
+        if not parity['passed']:
+            print(f"⚠️ TF-IDF decomposto difere do vetorizador (diferença máx. {parity['max_abs_diff']:.2e})")
+            text_vectors = None
+    _worker['text_vectors'] = text_vectors
+    print(f"🤖 Modelo {model_path} ({fingerprint}), motor {engine_name}"
+          f"{' com TF-IDF decomposto' if text_vectors is not None else ''}, {n_jobs} processo(s), "
+          f"{chunk_rows:,} pares por bloco")
+
+    started = time.perf_counter()
+    rows_done = 0
+
+    def record(result):
+        nonlocal rows_done
+        index, rows, skipped = result
+        completed[str(index)] = rows
+        progress['skipped'] = progress.get('skipped', 0) + skipped
+        rows_done += rows
+        save_progress(output_dir, progress)
+        elapsed = time.perf_counter() - started
+        print(f"⏱️ Bloco {index}: {rows:,} linhas | {rows_done:,} nesta execução, {rows_done / elapsed:,.0f} linhas/s")
+
+    pending_chunks = (
+        (index, rows) for index, rows in enumerate(iter_pair_chunks(prospects, chunk_rows))
+        if str(index) not in completed
+    )
+    if n_jobs == 1:
+        for index, rows in pending_chunks:
+            record(score_chunk(index, rows, output_dir, output_format))
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=init_worker,
+                                 initargs=(str(model_path), engine_name, arrays_dir, str(store_dir), manifest,
+                                           text_vectors is not None)) as pool:
+            running = set()
+            for index, rows in pending_chunks:
+                running.add(pool.submit(score_chunk, index, rows, output_dir, output_format))
+                if len(running) >= 2 * n_jobs:
+                    done, running = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        record(future.result())
+            for future in wait(running).done:
+                record(future.result())
+
+    elapsed = time.perf_counter() - started
+    progress['rows'] = sum(completed.values())
+    progress['rows_per_second'] = rows_done / elapsed if elapsed > 0 else 0.0
+    save_progress(output_dir, progress)
+    print(f"✅ {progress['rows']:,} pares pontuados em {output_dir} ({progress['skipped']:,} sem vaga ou candidato); "
+          f"{progress['rows_per_second']:,.0f} linhas/s nesta execução")
+    return progress
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pontua todos os pares vaga/prospect das prospecções do store')
+    parser.add_argument('--data-dir', help='Diretório com vagas.json, applicants.json e prospects.json')
+    parser.add_argument('--output-dir', help='Diretório dos resultados (padrão: <data-dir>/scores)')
+    parser.add_argument('--models-dir', default=str(BASE_DIR / 'models'))
+    parser.add_argument('--model', help='Arquivo .joblib (padrão: a versão servida em --models-dir)')
+    parser.add_argument('--store-dir', help='Armazenamento colunar (padrão: <data-dir>/store)')
+    parser.add_argument('--n-jobs', type=int, default=-1, help='Processos de pontuação (-1: todos os núcleos)')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS, help='Pares por bloco')
+    parser.add_argument('--format', default='csv', choices=FORMATS)
+    parser.add_argument('--engine', default=os.environ.get('INFERENCE_ENGINE', 'compiled'),
+                        choices=['compiled', 'sklearn'])
+    parser.add_argument('--restart', action='store_true', help='Descarta resultados anteriores em --output-dir')
+    args = parser.parse_args(argv)
+
+    score_all(args.data_dir, args.output_dir, args.models_dir, args.model, args.store_dir, args.n_jobs,
+              args.chunk_rows, args.format, args.engine, args.restart)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,362 @@
+"""TF-IDF decomposto: contagens de termos por vaga e por candidato, somadas por par.
+
+`combined_text` é `titulo competencias conhecimentos areas` (features.py). A
+parte da vaga antes dos conhecimentos (título + competências), a parte do
+candidato (conhecimentos) e a parte final da vaga (área) são tokenizadas uma
+única vez cada, pelo mesmo preprocessor/tokenizer do TfidfVectorizer do
+modelo, em matrizes CSR de contagens sobre o vocabulário ajustado.
+
+A contagem de um par é a soma das linhas das três partes mais os bigramas que
+cruzam as fronteiras entre elas (último token de uma parte + primeiro token da
+seguinte). IDF e normalização seguem o TfidfTransformer (mesmas operações, na
+mesma ordem), então a matriz é idêntica à do pipeline sobre o texto
+concatenado.
+
+As matrizes de um store são exportadas em .npy (um diretório por modelo e
+conteúdo do store) e mapeadas em memória por todos os processos, como a
+floresta compilada.
+"""
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+from features import NOT_INFORMED, TEXT_FEATURES
+from inference import NotCompilableError
+
+# Padrão de tokens cujas correspondências nunca atravessam um espaço
+DEFAULT_TOKEN_PATTERN = r'(?u)\b\w\w+\b'
+
+# Partes do texto combinado: campos de origem de cada uma, em ordem no texto
+VAGA_PREFIX_FIELDS = ('titulo_vaga', 'competencias_tecnicas_requeridas')
+APPLICANT_FIELD = 'conhecimentos_tecnicos'
+VAGA_SUFFIX_FIELD = 'areas_atuacao'
+
+# Tipo de cada parte após strip(): decide se o par vira NOT_INFORMED ('' ou 'nan')
+EMPTY, NAN, TEXT = 0, 1, 2
+
+# Primeiro/último token: posição na tabela de metades de bigramas do vocabulário,
+# OTHER_TOKEN para tokens que não formam bigrama do vocabulário e NO_TOKENS se a parte não tem tokens
+OTHER_TOKEN, NO_TOKENS = -1, -2
+
+PART_ARRAYS = ('data', 'indices', 'indptr', 'first', 'last', 'kind')
+PARTS = ('prefix', 'middle', 'suffix')
+TEXT_MANIFEST = 'text.json'
+
+
+def find_text_vectorizer(pipeline):
+    """TfidfVectorizer do combined_text no ColumnTransformer do pipeline (ou None)"""
+    preprocessor = pipeline.steps[0][1] if hasattr(pipeline, 'steps') else None
+    for _, transformer, columns in getattr(preprocessor, 'transformers_', []):
+        if type(transformer) is TfidfVectorizer and columns == TEXT_FEATURES[0]:
+            return transformer
+    return None
+
+
+def _load_array(path, mmap_mode):
+    # Arrays vazios não podem ser mapeados em memória
+    try:
+        return np.load(path, mmap_mode=mmap_mode)
+    except ValueError:
+        return np.load(path)
+
+
+class PartCounts:
+    """Contagens (CSR) de uma parte do texto combinado, com primeiro/último token e tipo por linha"""
+
+    def __init__(self, counts, first, last, kind):
+        self.counts = counts
+        self.first = first
+        self.last = last
+        self.kind = kind
+
+    @property
+    def n_rows(self):
+        return self.counts.shape[0]
+
+    def save(self, directory):
+        directory.mkdir(parents=True, exist_ok=True)
+        arrays = {'data': self.counts.data, 'indices': self.counts.indices, 'indptr': self.counts.indptr,
+                  'first': self.first, 'last': self.last, 'kind': self.kind}
+        for name in PART_ARRAYS:
+            np.save(directory / f'{name}.npy', arrays[name])
+
+    def extend(self, other):
+        """Linhas de `other` acrescentadas ao final (cópia em memória das matrizes mapeadas)"""
+        return PartCounts(sp.vstack([self.counts, other.counts], format='csr'),
+                          np.concatenate([self.first, other.first]), np.concatenate([self.last, other.last]),
+                          np.concatenate([self.kind, other.kind]))
+
+    @classmethod
+    def load(cls, directory, n_terms, mmap_mode='r'):
+        arrays = {name: _load_array(directory / f'{name}.npy', mmap_mode) for name in PART_ARRAYS}
+        counts = sp.csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']),
+                               shape=(len(arrays['indptr']) - 1, n_terms), copy=False)
+        return cls(counts, arrays['first'], arrays['last'], arrays['kind'])
+
+
+class DecomposedTfidf:
+    """Contagens por parte e TF-IDF de pares de um TfidfVectorizer ajustado"""
+
+    def __init__(self, vectorizer):
+        if vectorizer.analyzer != 'word' or vectorizer.tokenizer is not None or vectorizer.preprocessor is not None:
+            raise NotCompilableError('TF-IDF decomposto requer analyzer="word" sem tokenizer/preprocessor próprios')
+        if vectorizer.token_pattern != DEFAULT_TOKEN_PATTERN or vectorizer.input != 'content':
+            raise NotCompilableError(f'token_pattern não suportado: {vectorizer.token_pattern!r}')
+        self.min_n, self.max_n = vectorizer.ngram_range
+        if self.max_n > 2:
+            raise NotCompilableError('TF-IDF decomposto suporta n-gramas de até 2 tokens')
+        if vectorizer.norm not in ('l2', 'l1', None):
+            raise NotCompilableError(f'Normalização TF-IDF não suportada: {vectorizer.norm!r}')
+
+        self.vocabulary = vectorizer.vocabulary_
+        self.n_terms = len(vectorizer.vocabulary_)
+        self.preprocess = vectorizer.build_preprocessor()
+        self.tokenize = vectorizer.build_tokenizer()
+        self.stop_words = vectorizer.get_stop_words()
+        self.dtype = vectorizer.dtype
+        self.binary = vectorizer.binary
+        self.sublinear_tf = vectorizer.sublinear_tf
+        self.idf = vectorizer.idf_ if vectorizer.use_idf else None
+        self.norm = vectorizer.norm
+
+        # Bigramas do vocabulário como chaves (id do 1º token, id do 2º) ordenadas -> coluna
+        bigrams = [(term.split(' '), column) for term, column in self.vocabulary.items() if ' ' in term] \
+            if self.max_n == 2 else []
+        halves = sorted({half for (words, _) in bigrams for half in words})
+        self.token_ids = {token: i for i, token in enumerate(halves)}
+        keys = np.array([self.token_ids[a] * len(halves) + self.token_ids[b] for (a, b), _ in bigrams], dtype=np.int64)
+        order = np.argsort(keys)
+        self.bigram_keys = keys[order]
+        self.bigram_columns = np.array([column for _, column in bigrams], dtype=np.int64)[order]
+        self.n_halves = len(halves)
+        self.not_informed = self.count_parts([NOT_INFORMED]).counts
+
+    def tokens(self, text):
+        tokens = self.tokenize(self.preprocess(text))
+        if self.stop_words:
+            tokens = [token for token in tokens if token not in self.stop_words]
+        return tokens
+
+    def _count(self, text):
+        """(colunas, contagens, primeiro token, último token, tipo) de um texto"""
+        tokens = self.tokens(text)
+        grams = tokens if self.min_n == 1 else []
+        if self.max_n == 2:
+            grams = grams + [f'{a} {b}' for a, b in zip(tokens, tokens[1:])]
+        counts = {}
+        for gram in grams:
+            column = self.vocabulary.get(gram)
+            if column is not None:
+                counts[column] = counts.get(column, 0) + 1
+        columns = sorted(counts)
+        edges = (self.token_ids.get(tokens[0], OTHER_TOKEN), self.token_ids.get(tokens[-1], OTHER_TOKEN)) \
+            if tokens else (NO_TOKENS, NO_TOKENS)
+        stripped = text.strip()
+        kind = EMPTY if not stripped else NAN if stripped == 'nan' else TEXT
+        return columns, [counts[column] for column in columns], edges[0], edges[1], kind
+
+    def count_parts(self, texts):
+        """PartCounts de uma sequência de textos já normalizados (cada texto distinto é tokenizado uma vez)"""
+        codes, uniques = pd.factorize(pd.Series(list(texts), dtype=object))
+        indptr, indices, data, first, last, kind = [0], [], [], [], [], []
+        for text in uniques.tolist():
+            columns, counts, first_token, last_token, text_kind = self._count(text)
+            indices.extend(columns)
+            data.extend(counts)
+            indptr.append(len(indices))
+            first.append(first_token)
+            last.append(last_token)
+            kind.append(text_kind)
+        counts = sp.csr_matrix((np.array(data, dtype=self.dtype), np.array(indices, dtype=np.int32),
+                                np.array(indptr, dtype=np.int32)), shape=(len(uniques), self.n_terms))
+        return PartCounts(counts[codes], np.array(first, dtype=np.int64)[codes],
+                          np.array(last, dtype=np.int64)[codes], np.array(kind, dtype=np.int8)[codes])
+
+    def _boundary(self, left, right):
+        """Coluna do bigrama (último token da parte anterior, primeiro da seguinte) ou -1"""
+        columns = np.full(len(left), -1, dtype=np.int64)
+        if not len(self.bigram_keys):
+            return columns
+        known = (left >= 0) & (right >= 0)
+        keys = left[known] * self.n_halves + right[known]
+        found = np.minimum(np.searchsorted(self.bigram_keys, keys), len(self.bigram_keys) - 1)
+        columns[known] = np.where(self.bigram_keys[found] == keys, self.bigram_columns[found], -1)
+        return columns
+
+    def pair_counts(self, prefix, middle, suffix, vaga_rows, applicant_rows):
+        """Contagens dos textos combinados dos pares (linha da vaga, linha do candidato)"""
+        vaga_rows = np.asarray(vaga_rows, dtype=np.int64)
+        applicant_rows = np.asarray(applicant_rows, dtype=np.int64)
+        n_rows = len(vaga_rows)
+        counts = prefix.counts[vaga_rows] + middle.counts[applicant_rows] + suffix.counts[vaga_rows]
+
+        if self.max_n == 2:
+            prefix_last, suffix_first = prefix.last[vaga_rows], suffix.first[vaga_rows]
+            middle_first, middle_last = middle.first[applicant_rows], middle.last[applicant_rows]
+            # Sem tokens no candidato, a fronteira é entre o prefixo e o sufixo da vaga
+            before_suffix = np.where(middle_last != NO_TOKENS, middle_last, prefix_last)
+            rows = np.arange(n_rows)
+            columns = np.concatenate([self._boundary(prefix_last, middle_first),
+                                      self._boundary(before_suffix, suffix_first)])
+            rows = np.concatenate([rows, rows])[columns >= 0]
+            columns = columns[columns >= 0]
+            counts = counts + sp.csr_matrix((np.ones(len(rows), dtype=self.dtype), (rows, columns)),
+                                            shape=(n_rows, self.n_terms))
+
+        # Texto combinado vazio ou 'nan' vira NOT_INFORMED (como em features._combined_text)
+        kinds = np.stack([prefix.kind[vaga_rows], middle.kind[applicant_rows], suffix.kind[vaga_rows]])
+        replaced = ((kinds == TEXT).sum(axis=0) == 0) & ((kinds == NAN).sum(axis=0) <= 1)
+        if replaced.any():
+            counts = sp.diags((~replaced).astype(self.dtype)) @ counts
+            counts = counts + sp.csr_matrix(replaced[:, None].astype(self.dtype)) @ self.not_informed
+
+        counts = sp.csr_matrix(counts)
+        counts.eliminate_zeros()
+        counts.sum_duplicates()
+        return counts
+
+    def tfidf(self, counts):
+        """Mesma sequência de operações do CountVectorizer(binary) + TfidfTransformer.transform"""
+        if self.binary:
+            counts.data.fill(1)
+        if self.sublinear_tf:
+            np.log(counts.data, counts.data)
+            counts.data += 1.0
+        if self.idf is not None:
+            counts.data *= self.idf[counts.indices]
+        if self.norm is not None:
+            counts = normalize(counts, norm=self.norm, copy=False)
+        return counts
+
+
+def vaga_parts(vagas, positions=None):
+    """Textos (prefixo, sufixo) das vagas como aparecem em combined_text"""
+    columns = {field: vagas.column(field).to_list() if positions is None else vagas.column(field).take(positions)
+               for field in (*VAGA_PREFIX_FIELDS, VAGA_SUFFIX_FIELD)}
+    titulos, competencias = (columns[field] for field in VAGA_PREFIX_FIELDS)
+    prefixes = [f'{titulo.lower()} {competencia.lower()}' for titulo, competencia in zip(titulos, competencias)]
+    return prefixes, [area.lower() for area in columns[VAGA_SUFFIX_FIELD]]
+
+
+def table_digest(vagas, applicants):
+    """Hash do conteúdo das colunas de texto usadas: identifica o store no diretório exportado"""
+    digest = hashlib.sha256()
+    for table, fields in ((vagas, (*VAGA_PREFIX_FIELDS, VAGA_SUFFIX_FIELD)), (applicants, (APPLICANT_FIELD,))):
+        for field in fields:
+            for segment in table.column(field).segments:
+                digest.update(np.ascontiguousarray(segment.offsets).tobytes())
+                digest.update(np.asarray(segment.data).tobytes())
+    return digest.hexdigest()[:16]
+
+
+class PairTextVectors:
+    """Contagens das vagas e candidatos de um store; TF-IDF de pares por posição"""
+
+    def __init__(self, tfidf, parts, tables=None):
+        self.tfidf = tfidf
+        self.parts = parts
+        # Tabelas (vagas, candidatos) cujas posições as contagens seguem
+        self.tables = tables
+
+    def covers(self, vagas, applicants):
+        """As posições valem para estas tabelas (as mesmas de quando as contagens foram abertas)"""
+        return self.tables is not None and self.tables[0] is vagas and self.tables[1] is applicants
+
+    @property
+    def n_vagas(self):
+        return self.parts['prefix'].n_rows
+
+    @property
+    def n_applicants(self):
+        return self.parts['middle'].n_rows
+
+    @classmethod
+    def build(cls, vectorizer, vagas, applicants):
+        tfidf = DecomposedTfidf(vectorizer)
+        prefixes, suffixes = vaga_parts(vagas)
+        conhecimentos = [text.lower() for text in applicants.column(APPLICANT_FIELD).to_list()]
+        return cls(tfidf, {'prefix': tfidf.count_parts(prefixes), 'middle': tfidf.count_parts(conhecimentos),
+                           'suffix': tfidf.count_parts(suffixes)}, (vagas, applicants))
+
+    def save(self, directory):
+        """Exporta as contagens em .npy; o diretório só aparece completo (renomeado no fim)"""
+        directory = Path(directory)
+        directory.parent.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=f'.{directory.name}-', dir=directory.parent))
+        try:
+            for name in PARTS:
+                self.parts[name].save(staging / name)
+            with open(staging / TEXT_MANIFEST, 'w', encoding='utf-8') as f:
+                json.dump({'n_terms': self.tfidf.n_terms, 'n_vagas': self.n_vagas,
+                           'n_applicants': self.n_applicants}, f)
+            os.rename(staging, directory)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            # Outro processo exportou as mesmas contagens antes
+            if not (directory / TEXT_MANIFEST).exists():
+                raise
+
+    @classmethod
+    def load(cls, vectorizer, directory, mmap_mode='r'):
+        directory = Path(directory)
+        with open(directory / TEXT_MANIFEST, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        tfidf = DecomposedTfidf(vectorizer)
+        if manifest['n_terms'] != tfidf.n_terms:
+            raise NotCompilableError(f'Contagens em {directory} não correspondem ao vocabulário do modelo')
+        return cls(tfidf, {name: PartCounts.load(directory / name, tfidf.n_terms, mmap_mode) for name in PARTS})
+
+    @classmethod
+    def shared(cls, vectorizer, vagas, applicants, directory):
+        """Carrega as contagens exportadas para este store em `directory`, exportando-as antes se preciso.
+
+        Falhas de escrita (volume somente leitura) mantêm as contagens em memória privada.
+        """
+        directory = Path(directory) / table_digest(vagas, applicants)
+        if not (directory / TEXT_MANIFEST).exists():
+            vectors = cls.build(vectorizer, vagas, applicants)
+            try:
+                vectors.save(directory)
+            except OSError as e:
+                print(f"⚠️ Não foi possível exportar as contagens de texto para {directory}: {e}")
+                return vectors
+        vectors = cls.load(vectorizer, directory)
+        vectors.tables = (vagas, applicants)
+        return vectors
+
+    def extend(self, vagas, applicants):
+        """Contagens para as tabelas estendidas por deltas: só as linhas novas são tokenizadas"""
+        parts = dict(self.parts)
+        new_vagas = np.arange(self.n_vagas, vagas.n_rows)
+        if len(new_vagas):
+            prefixes, suffixes = vaga_parts(vagas, new_vagas)
+            parts['prefix'] = parts['prefix'].extend(self.tfidf.count_parts(prefixes))
+            parts['suffix'] = parts['suffix'].extend(self.tfidf.count_parts(suffixes))
+        new_applicants = np.arange(self.n_applicants, applicants.n_rows)
+        if len(new_applicants):
+            conhecimentos = [text.lower() for text in applicants.column(APPLICANT_FIELD).take(new_applicants)]
+            parts['middle'] = parts['middle'].extend(self.tfidf.count_parts(conhecimentos))
+        return PairTextVectors(self.tfidf, parts, (vagas, applicants))
+
+    def transform(self, vaga_positions, applicant_positions):
+        """Matriz TF-IDF (CSR) do combined_text dos pares (posição da vaga, posição do candidato)"""
+        counts = self.tfidf.pair_counts(self.parts['prefix'], self.parts['middle'], self.parts['suffix'],
+                                        vaga_positions, applicant_positions)
+        return self.tfidf.tfidf(counts)
+
+
+def check_text_parity(vectors, vectorizer, vaga_positions, applicant_positions, combined_text):
+    """Compara a matriz decomposta com a do vetorizador sobre os textos combinados"""
+    expected = vectorizer.transform(combined_text).toarray()
+    actual = vectors.transform(vaga_positions, applicant_positions).toarray()
+    max_abs_diff = float(np.abs(expected - actual).max()) if len(expected) else 0.0
+    return {'rows': len(expected), 'max_abs_diff': max_abs_diff, 'passed': max_abs_diff == 0.0}
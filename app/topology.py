@@ -0,0 +1,150 @@
+"""Topologia de CPU do servidor: workers, threads de inferência e pools nativos.
+
+Sem coordenação, cada camada escolhe o próprio paralelismo: o gunicorn sobe
+um número fixo de workers, o RandomForest treinado com `n_jobs=-1` abre um
+pool com todos os núcleos em cada worker e o BLAS/OpenMP do NumPy faz o
+mesmo. Em uma máquina com muitos núcleos isso deixa CPUs ociosas em lotes
+grandes ou, com todos os workers ocupados, põe workers x núcleos threads
+disputando os mesmos núcleos.
+
+`detect_cpus` conta as CPUs que o processo pode de fato usar: a afinidade
+(cpuset) e, no Docker, a cota do cgroup (`cpu.max` no v2,
+`cpu.cfs_quota_us`/`cpu.cfs_period_us` no v1), que `os.cpu_count()` ignora.
+`Topology` escolhe workers e threads juntos: por padrão um worker síncrono a
+cada `DEFAULT_THREADS_PER_WORKER` CPUs, e as CPUs de cada requisição em
+andamento viram `inference_threads`, usadas só por lotes com pelo menos
+`parallel_min_rows` linhas; predições de uma linha ficam em uma thread. Os
+pools nativos (BLAS/OpenMP) ficam em `native_threads` (padrão 1), já que o
+paralelismo dentro da requisição vem das threads de inferência.
+
+Com workers == CPUs (GUNICORN_WORKERS explícito) não sobra CPU por requisição
+e `inference_threads` é 1. No padrão, lotes grandes (batch, chunks do
+ranking) dividem a floresta entre as threads do worker; quantas rodam ao
+mesmo tempo é limitado pelo pool de inferência do processo (um só, do
+tamanho de `inference_threads`) e, antes dele, pelo controle de admissão,
+que recusa lotes quando a fila do worker passa do limite.
+"""
+import os
+import math
+
+# Variáveis lidas pelos pools nativos quando a biblioteca é carregada
+NATIVE_THREAD_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+                      'BLIS_NUM_THREADS', 'VECLIB_MAXIMUM_THREADS', 'NUMEXPR_NUM_THREADS')
+
+DEFAULT_PARALLEL_MIN_ROWS = 256
+# CPUs por worker no padrão: cada worker divide lotes grandes entre 2 threads de inferência
+DEFAULT_THREADS_PER_WORKER = 2
+
+CGROUP_V2_CPU_MAX = '/sys/fs/cgroup/cpu.max'
+CGROUP_V1_QUOTA = '/sys/fs/cgroup/cpu/cpu.cfs_quota_us'
+CGROUP_V1_PERIOD = '/sys/fs/cgroup/cpu/cpu.cfs_period_us'
+
+
+def _read(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _quota_cpus(quota_us, period_us):
+    # Valores fora do formato esperado contam como sem cota (vale a afinidade), em vez de derrubar a inicialização
+    try:
+        quota_us, period_us = int(quota_us), int(period_us)
+    except (TypeError, ValueError):
+        return None
+    if quota_us <= 0 or period_us <= 0:
+        return None
+    return max(1, math.ceil(quota_us / period_us))
+
+
+def cgroup_cpu_limit(cpu_max=CGROUP_V2_CPU_MAX, quota=CGROUP_V1_QUOTA, period=CGROUP_V1_PERIOD):
+    """CPUs permitidas pela cota do cgroup (arredondada para cima), ou None sem cota ou com arquivo ilegível"""
+    content = _read(cpu_max)
+    if content is not None:
+        parts = content.split()
+        if len(parts) < 2 or parts[0] == 'max':
+            return None
+        return _quota_cpus(parts[0], parts[1])
+    return _quota_cpus(_read(quota), _read(period))
+
+
+def detect_cpus():
+    """(CPUs disponíveis, origem): a menor entre afinidade e cota do cgroup"""
+    try:
+        cpus, source = len(os.sched_getaffinity(0)), 'affinity'
+    except AttributeError:
+        # Sem sched_getaffinity (macOS)
+        cpus, source = os.cpu_count() or 1, 'cpu_count'
+    limit = cgroup_cpu_limit()
+    if limit is not None and limit < cpus:
+        cpus, source = limit, 'cgroup'
+    return cpus, source
+
+
+class Topology:
+    """Workers, threads por worker e threads de inferência para `cpus` CPUs.
+
+    `workers`, `inference_threads` e `native_threads` explícitos (variáveis
+    de ambiente) têm precedência; os demais são derivados das CPUs.
+    """
+
+    def __init__(self, cpus, cpu_source='affinity', workers=None, worker_threads=1, inference_threads=None,
+                 native_threads=None, parallel_min_rows=DEFAULT_PARALLEL_MIN_ROWS):
+        self.cpus = cpus
+        self.cpu_source = cpu_source
+        # Workers síncronos e threads de inferência escolhidos juntos: um worker a cada
+        # DEFAULT_THREADS_PER_WORKER CPUs, para lotes grandes não ficarem presos a uma thread
+        self.workers = workers or max(1, cpus // DEFAULT_THREADS_PER_WORKER)
+        self.worker_threads = max(1, worker_threads)
+        # CPUs de cada requisição quando todos os workers (e threads gthread) estão ocupados
+        self.inference_threads = inference_threads or max(1, cpus // (self.workers * self.worker_threads))
+        self.native_threads = native_threads or 1
+        self.parallel_min_rows = parallel_min_rows
+
+    @classmethod
+    def from_env(cls, environ=None, default_workers=None):
+        """Topologia a partir de GUNICORN_WORKERS, GUNICORN_THREADS, INFERENCE_THREADS, NATIVE_THREADS
+        e PARALLEL_MIN_ROWS (0 ou ausente = automático; sem GUNICORN_WORKERS, `default_workers` ou o padrão)"""
+        environ = os.environ if environ is None else environ
+        cpus, source = detect_cpus()
+
+        def setting(name, default=0):
+            return int(environ.get(name, default) or 0)
+
+        return cls(cpus, source, workers=setting('GUNICORN_WORKERS') or default_workers,
+                   worker_threads=setting('GUNICORN_THREADS', 1),
+                   inference_threads=setting('INFERENCE_THREADS') or None,
+                   native_threads=setting('NATIVE_THREADS') or None,
+                   parallel_min_rows=setting('PARALLEL_MIN_ROWS') or DEFAULT_PARALLEL_MIN_ROWS)
+
+    def threads_for(self, n_rows):
+        """Threads de inferência de uma chamada com `n_rows` linhas"""
+        return self.inference_threads if n_rows >= self.parallel_min_rows else 1
+
+    def native_env(self):
+        """Variáveis dos pools nativos, a definir antes de importar NumPy/sklearn"""
+        return {name: str(self.native_threads) for name in NATIVE_THREAD_VARS}
+
+    def to_dict(self):
+        return {
+            'cpus': self.cpus,
+            'cpu_source': self.cpu_source,
+            'workers': self.workers,
+            'worker_threads': self.worker_threads,
+            'inference_threads': self.inference_threads,
+            'native_threads': self.native_threads,
+            'parallel_min_rows': self.parallel_min_rows
+        }
+
+
+def limit_native_threads(n_threads):
+    """Limita os pools BLAS/OpenMP já carregados; devolve os pools encontrados (vazio sem threadpoolctl)"""
+    try:
+        from threadpoolctl import threadpool_info, threadpool_limits
+    except ImportError:
+        return []
+    threadpool_limits(n_threads)
+    return [{'api': pool['user_api'], 'library': pool['internal_api'], 'threads': pool['num_threads']}
+            for pool in threadpool_info()]
@@ -0,0 +1,352 @@
+"""Treinamento offline do modelo de candidatos contratados (o pipeline do notebook, em script).
+
+Etapas, com o tempo de cada uma nos metadados:
+
+1. store: abre o armazenamento colunar, regerando-o (ingest.py) se estiver
+   ausente ou desatualizado em relação aos JSONs; um store com deltas não é
+   regerado aqui, já que o build os descartaria
+2. hash: SHA-256 dos três JSONs, da versão do store (base e deltas aplicados)
+   e do código das features; é a chave do cache
+3. features: as prospecções do store (com os deltas) são divididas em blocos
+   de vagas e um pool de processos filtra os contratados, faz o join com vagas
+   e candidatos (abertos via memmap em cada processo) e calcula as features de
+   cada bloco. A tabela resultante fica em cache no disco; com as mesmas
+   entradas, esta etapa só lê o cache e o treino vai direto para o fit
+4. fit: RandomForest com todos os núcleos (`--n-jobs`)
+5. evaluate / save: acurácia no treino, .joblib e metadata_candidatos_contratados.json
+
+Uso:
+    python app/train.py --data-dir data --models-dir app/models --n-jobs -1
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import pandas as pd
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics import accuracy_score
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from data_store import BASE_DIR, open_store, read_store_manifest, store_version, resolve_data_dir, is_lfs_pointer
+from features import (FEATURE_COLUMNS, NUMERIC_FEATURES, CATEGORICAL_FEATURES, BINARY_FEATURES, TEXT_FEATURES,
+                      VAGA_INPUTS, CANDIDATO_INPUTS, compute_features)
+from ingest import TABLES, build_store
+from model_registry import MODEL_FILENAME, METADATA_FILENAME, publish
+
+# Regra do notebook para identificar candidatos contratados
+HIRED_KEYWORDS = ['contrat', 'aprovado', 'aceito', 'hunting']
+
+# Vagas por tarefa do pool
+DEFAULT_CHUNK_VAGAS = 500
+# Códigos de vaga lidos por vez ao dividir as prospecções em blocos
+PROSPECT_BLOCK_ROWS = 50000
+
+# Muda quando o formato da tabela em cache muda
+CACHE_FORMAT_VERSION = 1
+HASH_BLOCK_SIZE = 1 << 20
+
+# Pesos do score de qualidade usado como alvo (acima da mediana = contratação de alta qualidade)
+QUALITY_WEIGHTS = {
+    'tech_success_score': 0.4,
+    'academic_success_score': 0.3,
+    'english_success_score': 0.2,
+    'is_tech_area': 0.1
+}
+
+# Tabelas abertas uma vez por processo do pool
+_worker_tables = {}
+
+
+def is_hired(situacao):
+    situacao = (situacao or '').lower()
+    return any(keyword in situacao for keyword in HIRED_KEYWORDS)
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def input_hash(data_dir, manifest):
+    """Chave do cache: conteúdo dos JSONs, versão do store (base e deltas), código das features e formato da tabela"""
+    digest = hashlib.sha256(f'train-cache-v{CACHE_FORMAT_VERSION}'.encode())
+    for filename, _, _ in TABLES.values():
+        digest.update(file_digest(Path(data_dir) / filename).encode())
+    digest.update(json.dumps(store_version(manifest), sort_keys=True).encode())
+    for module in ('features.py', 'data_store.py'):
+        digest.update(file_digest(BASE_DIR / module).encode())
+    return digest.hexdigest()
+
+
+def check_sources(data_dir):
+    for filename, _, _ in TABLES.values():
+        path = Path(data_dir) / filename
+        if not path.exists() or is_lfs_pointer(path):
+            raise FileNotFoundError(f"{path} indisponível (ausente ou ponteiro Git LFS)")
+
+
+def store_is_current(data_dir, manifest):
+    """O store do manifesto foi gerado a partir dos JSONs atuais (mesmo tamanho e mtime)?"""
+    if manifest is None:
+        return False
+    sources = manifest.get('sources', {})
+    for name, (filename, _, _) in TABLES.items():
+        stat = (Path(data_dir) / filename).stat()
+        source = sources.get(name, {})
+        if source.get('size') != stat.st_size or source.get('mtime') != stat.st_mtime:
+            return False
+    return True
+
+
+def ensure_store(data_dir, store_dir):
+    """Gera o armazenamento colunar se estiver ausente ou desatualizado; devolve o manifesto em uso.
+
+    Um store com deltas (aplicados ou já compactados) não é regerado: o build
+    descartaria os deltas, então precisa ser pedido com `ingest.py build`.
+    """
+    manifest = read_store_manifest(store_dir)
+    if store_is_current(data_dir, manifest):
+        return manifest
+    if manifest is not None and (manifest.get('deltas') or manifest.get('compacted_deltas')):
+        raise RuntimeError(f'Os JSONs de {data_dir} mudaram, mas {store_dir} tem deltas aplicados que um novo build '
+                           f'descartaria; gere o store com "ingest.py build" para usar os JSONs novos')
+    print("📥 Armazenamento colunar ausente ou desatualizado, gerando...")
+    return build_store(data_dir, store_dir)
+
+
+def iter_prospect_chunks(prospects, chunk_vagas=DEFAULT_CHUNK_VAGAS):
+    """Blocos de posições das prospecções vivas do store (com os deltas), com até `chunk_vagas` vagas cada.
+
+    As linhas de uma vaga ficam juntas: na base ou no segmento do delta que
+    substituiu a lista dela.
+    """
+    live = prospects.live_positions()
+    codes = prospects.column(prospects.key)
+    chunk_start, n_vagas, last_code = 0, 0, None
+    for block_start in range(0, len(live), PROSPECT_BLOCK_ROWS):
+        for offset, code in enumerate(codes.take(live[block_start:block_start + PROSPECT_BLOCK_ROWS])):
+            if code == last_code:
+                continue
+            last_code = code
+            if n_vagas == chunk_vagas:
+                yield live[chunk_start:block_start + offset]
+                chunk_start, n_vagas = block_start + offset, 0
+            n_vagas += 1
+    if chunk_start < len(live):
+        yield live[chunk_start:]
+
+
+def open_worker_tables(store_dir, manifest=None):
+    """Tabelas do store, abertas uma vez por processo e por versão (base e deltas do manifesto).
+
+    Sem `manifest`, usa o manifesto atual: depois de um apply ou compact, a
+    próxima chamada reabre o store em vez de continuar nos arquivos antigos.
+    """
+    manifest = manifest or read_store_manifest(store_dir)
+    if manifest is None:
+        raise FileNotFoundError(f'{store_dir} não tem armazenamento colunar (gere com "ingest.py build")')
+    version = (str(store_dir), json.dumps(store_version(manifest), sort_keys=True))
+    if _worker_tables.get('version') != version:
+        _worker_tables.clear()
+        _worker_tables.update(open_store(store_dir, manifest=manifest), version=version)
+    return _worker_tables['vagas'], _worker_tables['applicants']
+
+
+def build_chunk_features(store_dir, manifest, positions):
+    """Contratados de um bloco de prospecções (posições no store), com vaga e candidato (join interno) e as features"""
+    vagas, applicants = open_worker_tables(store_dir, manifest)
+    prospects = _worker_tables['prospects']
+    vaga_codes, candidate_codes, vaga_positions, candidate_positions = [], [], [], []
+    for codigo_vaga, codigo_candidato, situacao in zip(prospects.codes(positions),
+                                                       prospects.column('codigo_candidato').take(positions),
+                                                       prospects.column('situacao_candidado').take(positions)):
+        if not is_hired(situacao):
+            continue
+        vaga_position = vagas.position_of(codigo_vaga)
+        candidate_position = applicants.position_of(codigo_candidato)
+        if vaga_position is None or candidate_position is None:
+            continue
+        vaga_codes.append(codigo_vaga)
+        candidate_codes.append(codigo_candidato)
+        vaga_positions.append(vaga_position)
+        candidate_positions.append(candidate_position)
+
+    if not vaga_codes:
+        return pd.DataFrame(columns=['id_vaga', 'codigo_candidato'] + FEATURE_COLUMNS)
+    vaga_inputs = {field: vagas.column(field).take(vaga_positions) for field in VAGA_INPUTS}
+    candidate_inputs = {field: applicants.column(field).take(candidate_positions) for field in CANDIDATO_INPUTS}
+    features = compute_features(vaga_inputs, candidate_inputs, len(vaga_codes))
+    features.insert(0, 'id_vaga', vaga_codes)
+    features.insert(1, 'codigo_candidato', candidate_codes)
+    return features
+
+
+def build_training_table(store_dir, n_jobs=-1, chunk_vagas=DEFAULT_CHUNK_VAGAS, manifest=None):
+    """Tabela de treino (ids + features), na ordem das prospecções do store, com `n_jobs` processos.
+
+    Todos os processos abrem a versão do store de `manifest` (padrão: a atual).
+    """
+    n_jobs = os.cpu_count() if n_jobs is None or n_jobs < 1 else n_jobs
+    store_dir = str(store_dir)
+    manifest = manifest or read_store_manifest(store_dir)
+    open_worker_tables(store_dir, manifest)
+    chunks = iter_prospect_chunks(_worker_tables['prospects'], chunk_vagas)
+    if n_jobs == 1:
+        parts = [build_chunk_features(store_dir, manifest, chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            futures = [pool.submit(build_chunk_features, store_dir, manifest, chunk) for chunk in chunks]
+            parts = [future.result() for future in futures]
+    parts = [part for part in parts if len(part)]
+    if not parts:
+        return pd.DataFrame(columns=['id_vaga', 'codigo_candidato'] + FEATURE_COLUMNS)
+    return pd.concat(parts, ignore_index=True)
+
+
+def load_cached_table(cache_path):
+    return pd.read_pickle(cache_path) if cache_path.exists() else None
+
+
+def save_cached_table(cache_path, table):
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    staging = cache_path.with_name(cache_path.name + '.tmp')
+    table.to_pickle(staging)
+    os.replace(staging, cache_path)
+
+
+def quality_target(table):
+    """Alvo do notebook: score de qualidade ponderado acima/abaixo da mediana"""
+    quality_score = sum(table[column].astype(float) * weight for column, weight in QUALITY_WEIGHTS.items())
+    return (quality_score >= quality_score.median()).astype(int)
+
+
+def build_pipeline(n_estimators=100, n_jobs=-1, random_state=42):
+    """Mesmo pipeline do notebook (ColumnTransformer + RandomForest)"""
+    preprocessor = ColumnTransformer(transformers=[
+        ('num', StandardScaler(), NUMERIC_FEATURES),
+        ('cat', OneHotEncoder(handle_unknown='ignore', sparse_output=False), CATEGORICAL_FEATURES + BINARY_FEATURES),
+        ('text', TfidfVectorizer(max_features=100, stop_words=None, ngram_range=(1, 2), min_df=1), TEXT_FEATURES[0])
+    ])
+    return Pipeline([
+        ('preprocessor', preprocessor),
+        ('classifier', RandomForestClassifier(
+            n_estimators=n_estimators,
+            max_depth=10,
+            min_samples_split=5,
+            min_samples_leaf=2,
+            random_state=random_state,
+            n_jobs=n_jobs
+        ))
+    ])
+
+
+def train(data_dir=None, models_dir=None, store_dir=None, cache_dir=None, n_jobs=-1,
+          chunk_vagas=DEFAULT_CHUNK_VAGAS, n_estimators=100):
+    """Treina e grava o modelo e os metadados; devolve os metadados"""
+    data_dir = Path(data_dir) if data_dir else resolve_data_dir()
+    models_dir = Path(models_dir) if models_dir else BASE_DIR / 'models'
+    store_dir = Path(store_dir) if store_dir else data_dir / 'store'
+    cache_dir = Path(cache_dir) if cache_dir else data_dir / 'train_cache'
+    check_sources(data_dir)
+
+    timings = {}
+    started = time.perf_counter()
+    manifest = ensure_store(data_dir, store_dir)
+    timings['store'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    key = input_hash(data_dir, manifest)
+    timings['hash'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    cache_path = cache_dir / f'{key}.pkl'
+    table = load_cached_table(cache_path)
+    cache_hit = table is not None
+    if cache_hit:
+        print(f"♻️ Tabela de treino em cache ({cache_path.name[:16]}), pulando a extração")
+    else:
+        print(f"🔗 Extraindo contratados e calculando features (n_jobs={n_jobs}, {chunk_vagas} vagas por bloco)...")
+        table = build_training_table(store_dir, n_jobs, chunk_vagas, manifest)
+        save_cached_table(cache_path, table)
+    timings['features'] = time.perf_counter() - started
+    if len(table) < 2:
+        raise ValueError(f'Apenas {len(table)} contratados com vaga e candidato encontrados; nada para treinar')
+    print(f"📊 {len(table):,} contratados na tabela de treino")
+
+    all_features = NUMERIC_FEATURES + CATEGORICAL_FEATURES + BINARY_FEATURES + TEXT_FEATURES
+    X, y = table[all_features], quality_target(table)
+
+    started = time.perf_counter()
+    pipeline = build_pipeline(n_estimators, n_jobs)
+    pipeline.fit(X, y)
+    timings['fit'] = time.perf_counter() - started
+    print(f"🚀 Modelo treinado em {timings['fit']:.1f}s")
+
+    started = time.perf_counter()
+    accuracy = accuracy_score(y, pipeline.predict(X))
+    timings['evaluate'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    models_dir.mkdir(parents=True, exist_ok=True)
+    model_path = models_dir / MODEL_FILENAME
+    joblib.dump(pipeline, model_path)
+    timings['save'] = time.perf_counter() - started
+
+    metadata = {
+        'model_type': 'RandomForestClassifier_CandidatosContratados',
+        'target': 'high_quality_hire',
+        'features': all_features,
+        'accuracy': accuracy,
+        'n_samples': len(X),
+        'trained_date': pd.Timestamp.now().isoformat(),
+        'description': 'Modelo treinado apenas com candidatos contratados para identificar padrões de sucesso',
+        'input_hash': key,
+        'feature_cache': 'hit' if cache_hit else 'miss',
+        'n_jobs': n_jobs,
+        'timings': {phase: round(seconds, 3) for phase, seconds in timings.items()}
+    }
+    with open(models_dir / METADATA_FILENAME, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2, ensure_ascii=False)
+    print(f"✅ Modelo salvo em {model_path} (acurácia {accuracy:.3f})")
+    print("⏱️ " + ', '.join(f"{phase}: {seconds:.2f}s" for phase, seconds in timings.items()))
+    return metadata
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Treina o modelo de candidatos contratados')
+    parser.add_argument('--data-dir', help='Diretório com vagas.json, applicants.json e prospects.json')
+    parser.add_argument('--models-dir', default=str(BASE_DIR / 'models'))
+    parser.add_argument('--store-dir', help='Armazenamento colunar (padrão: <data-dir>/store)')
+    parser.add_argument('--cache-dir', help='Cache das tabelas de treino (padrão: <data-dir>/train_cache)')
+    parser.add_argument('--n-jobs', type=int, default=-1, help='Processos da extração e núcleos do fit (-1: todos)')
+    parser.add_argument('--chunk-vagas', type=int, default=DEFAULT_CHUNK_VAGAS, help='Vagas por bloco do pool')
+    parser.add_argument('--n-estimators', type=int, default=100)
+    parser.add_argument('--publish', action='store_true', help='Publica o modelo como nova versão (model_registry)')
+    parser.add_argument('--activate', action='store_true', help='Com --publish, aponta CURRENT para a nova versão')
+    args = parser.parse_args(argv)
+
+    print("🤖 Treinando modelo de candidatos contratados...")
+    train(args.data_dir, args.models_dir, args.store_dir, args.cache_dir, args.n_jobs, args.chunk_vagas,
+          args.n_estimators)
+    if args.publish:
+        models_dir = Path(args.models_dir)
+        version = publish(models_dir, models_dir / MODEL_FILENAME, models_dir / METADATA_FILENAME,
+                          activate=args.activate)
+        print(f"📦 Versão {version} publicada{' e ativada' if args.activate else ''}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
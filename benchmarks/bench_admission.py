@@ -0,0 +1,162 @@
+"""Latência de /api/predict sob sobrecarga, com e sem controle de admissão.
+
+Sobe o gunicorn (app/gunicorn.conf.py, workers síncronos), mede a capacidade
+com um cliente sequencial e depois dispara predições em malha aberta a
+`--overload` vezes essa taxa durante `--duration` segundos, como chegariam
+do nginx: cada requisição leva `X-Request-Start` com o instante da chegada,
+e a latência é medida a partir dele. Um cliente à parte consulta /health a
+cada 250 ms.
+
+Para cada modo (ADMISSION_CONTROL=false/true) mostra p50/p99 das respostas
+200, o p99 da primeira e da segunda metade do teste (estável = sem
+crescimento), quantas foram recusadas com 429 e o p99 do /health.
+
+Uso:
+    python benchmarks/bench_admission.py --workers 1 --overload 2 --duration 10 --output admission.json
+"""
+import sys
+import json
+import time
+import argparse
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from bench_worker_memory import start_gunicorn, stop_gunicorn
+from synthetic_data import make_api_pairs
+
+HEALTH_INTERVAL = 0.25
+
+
+def send(url, payload=None, request_start=None, timeout=60):
+    """Status HTTP de uma requisição (599 para falhas de conexão ou timeout)"""
+    data = json.dumps(payload).encode('utf-8') if payload is not None else None
+    headers = {'Content-Type': 'application/json'} if data else {}
+    if request_start is not None:
+        headers['X-Request-Start'] = f't={request_start:.3f}'
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data, headers=headers), timeout=timeout) as r:
+            r.read()
+            return r.status
+    except urllib.error.HTTPError as e:
+        e.read()
+        return e.code
+    except OSError:
+        return 599
+
+
+def measure_capacity(base_url, payloads, seconds):
+    """Predições por segundo de um cliente sequencial"""
+    count, started = 0, time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        send(f'{base_url}/api/predict', payloads[count % len(payloads)])
+        count += 1
+    return count / (time.perf_counter() - started)
+
+
+def percentile_ms(values, q):
+    return float(np.percentile(np.array(values) * 1000, q)) if values else 0.0
+
+
+def run_overload(base_url, payloads, rate, duration, max_clients):
+    """Chegadas em intervalos fixos de 1/rate segundos; latência a partir da chegada"""
+    results = []
+    health = []
+    stop = threading.Event()
+
+    def arrival(payload, arrived, wall_clock):
+        status = send(f'{base_url}/api/predict', payload, request_start=wall_clock)
+        results.append((arrived, status, time.perf_counter() - arrived))
+
+    def probe_health():
+        while not stop.is_set():
+            start_time = time.perf_counter()
+            status = send(f'{base_url}/health')
+            health.append((status, time.perf_counter() - start_time))
+            stop.wait(HEALTH_INTERVAL)
+
+    prober = threading.Thread(target=probe_health, daemon=True)
+    prober.start()
+    started = time.perf_counter()
+    n_requests = int(rate * duration)
+    with ThreadPoolExecutor(max_workers=max_clients) as pool:
+        for index in range(n_requests):
+            arrived = started + index / rate
+            delay = arrived - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            # Instante da chegada no relógio de parede, como o nginx registraria
+            wall_clock = time.time() - (time.perf_counter() - arrived)
+            pool.submit(arrival, payloads[index % len(payloads)], arrived, wall_clock)
+    stop.set()
+    prober.join()
+
+    ok = [(arrived, latency) for arrived, status, latency in results if status == 200]
+    half = started + duration / 2
+    first = [latency for arrived, latency in ok if arrived < half]
+    second = [latency for arrived, latency in ok if arrived >= half]
+    latencies = [latency for _, latency in ok]
+    return {
+        'requests': len(results),
+        'ok': len(ok),
+        'shed_429': sum(1 for _, status, _ in results if status == 429),
+        'errors': sum(1 for _, status, _ in results if status not in (200, 429)),
+        'p50_ms': percentile_ms(latencies, 50),
+        'p99_ms': percentile_ms(latencies, 99),
+        'p99_first_half_ms': percentile_ms(first, 99),
+        'p99_second_half_ms': percentile_ms(second, 99),
+        'goodput_rps': len(ok) / duration,
+        'health_p99_ms': percentile_ms([latency for _, latency in health], 99),
+        'health_failures': sum(1 for status, _ in health if status != 200)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Sobrecarga em /api/predict com e sem controle de admissão')
+    parser.add_argument('--workers', type=int, default=1, help='Workers do gunicorn')
+    parser.add_argument('--overload', type=float, default=2.0, help='Taxa de chegada como múltiplo da capacidade')
+    parser.add_argument('--duration', type=float, default=10.0, help='Segundos de sobrecarga')
+    parser.add_argument('--budget-ms', type=float, default=250.0, help='ADMISSION_LATENCY_BUDGET_MS')
+    parser.add_argument('--capacity-seconds', type=float, default=3.0, help='Duração da medida de capacidade')
+    parser.add_argument('--max-clients', type=int, default=256, help='Conexões simultâneas do gerador de carga')
+    parser.add_argument('--timeout', type=float, default=300, help='Tempo limite de inicialização do gunicorn (s)')
+    parser.add_argument('--output', help='Arquivo JSON com os resultados')
+    args = parser.parse_args(argv)
+
+    payloads = [{'vaga': vaga, 'candidato': candidato} for vaga, candidato in make_api_pairs(2000, 200, 2000)]
+    # Sem cache de predições: toda requisição passa pelo modelo
+    env = {'PREDICTION_CACHE_ENABLED': 'false', 'MODEL_WATCH_INTERVAL': '3600',
+           'ADMISSION_LATENCY_BUDGET_MS': str(args.budget_ms)}
+
+    capacity = None
+    results = {}
+    for mode in ('false', 'true'):
+        master, base_url, _ = start_gunicorn(args.workers, args.timeout, ADMISSION_CONTROL=mode, **env)
+        try:
+            if capacity is None:
+                capacity = measure_capacity(base_url, payloads, args.capacity_seconds) * args.workers
+                print(f"capacidade: {capacity:.0f} req/s; carga: {capacity * args.overload:.0f} req/s "
+                      f"por {args.duration:.0f} s")
+            result = run_overload(base_url, payloads, capacity * args.overload, args.duration, args.max_clients)
+        finally:
+            stop_gunicorn(master)
+        name = 'admission' if mode == 'true' else 'no_admission'
+        results[name] = result
+        print(f"{name:<13} 200: {result['ok']:5d}  429: {result['shed_429']:5d}  erros: {result['errors']:4d}  "
+              f"p50 {result['p50_ms']:8.1f} ms  p99 {result['p99_ms']:8.1f} ms "
+              f"(1ª metade {result['p99_first_half_ms']:8.1f}, 2ª {result['p99_second_half_ms']:8.1f})  "
+              f"/health p99 {result['health_p99_ms']:8.1f} ms")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'admission', 'workers': args.workers, 'overload': args.overload,
+                       'duration': args.duration, 'budget_ms': args.budget_ms, 'capacity_rps': capacity,
+                       'results': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Tempo de aplicação de deltas em função do tamanho do delta e do dataset.
+
+Para cada número de candidatos em `--applicants`, gera os dumps sintéticos,
+gera o store (`ingest.py build`, o custo de reprocessar tudo) e aplica
+deltas NDJSON de `--delta-sizes` upserts de candidatos (metade códigos
+existentes, metade novos). Mede o `apply` e o `refresh` de um DataStore já
+carregado (o que o servidor faz ao ver o manifesto novo). Com o custo
+proporcional ao delta, o tempo de um mesmo tamanho de delta fica estável
+quando o dataset cresce, enquanto o rebuild cresce com ele.
+
+Uso:
+    python benchmarks/bench_delta.py --applicants 5000 50000 --delta-sizes 10 100 1000 --output delta.json
+"""
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent / 'app'
+sys.path.insert(0, str(APP_DIR))
+
+from data_store import DataStore
+from ingest import build_store, apply_delta, compact_store
+from synthetic_data import generate, iter_applicants
+
+
+def write_delta(path, n_applicants, size, seed):
+    """Delta NDJSON com `size` candidatos: metade substitui códigos existentes, metade é nova"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for index, (_, raw) in enumerate(iter_applicants(size, seed=seed, cv_words=50)):
+            codigo = str(index * (n_applicants // size) if index % 2 == 0 else n_applicants + seed * size + index)
+            f.write(json.dumps({'table': 'applicants', 'codigo': codigo, 'data': raw}, ensure_ascii=False) + '\n')
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark da aplicação de deltas no armazenamento colunar')
+    parser.add_argument('--applicants', type=int, nargs='+', default=[5000, 50000], help='Candidatos no dataset')
+    parser.add_argument('--vagas', type=int, default=1000, help='Vagas no dataset')
+    parser.add_argument('--delta-sizes', type=int, nargs='+', default=[10, 100, 1000], help='Upserts por delta')
+    parser.add_argument('--output', help='Arquivo JSON com os resultados')
+    args = parser.parse_args(argv)
+
+    results = []
+    for n_applicants in args.applicants:
+        work_dir = Path(tempfile.mkdtemp(prefix='bench_delta_'))
+        try:
+            generate(work_dir, n_vagas=args.vagas, n_applicants=n_applicants, cv_words=50)
+            start_time = time.perf_counter()
+            build_store(work_dir, work_dir / 'store')
+            rebuild_seconds = time.perf_counter() - start_time
+            store = DataStore.load(store_dir=work_dir / 'store')
+            store.applicants.position_of('0')
+            for seed, size in enumerate(args.delta_sizes, start=1):
+                path = write_delta(work_dir / f'delta-{size}.ndjson', n_applicants, size, seed)
+                start_time = time.perf_counter()
+                apply_delta(work_dir / 'store', path, max_deltas=0)
+                apply_seconds = time.perf_counter() - start_time
+                start_time = time.perf_counter()
+                store, _ = store.refresh()
+                refresh_seconds = time.perf_counter() - start_time
+                results.append({'applicants': n_applicants, 'delta_size': size, 'apply_seconds': apply_seconds,
+                                'refresh_seconds': refresh_seconds, 'rebuild_seconds': rebuild_seconds})
+            start_time = time.perf_counter()
+            compact_store(work_dir / 'store')
+            compact_seconds = time.perf_counter() - start_time
+            for result in results[-len(args.delta_sizes):]:
+                result['compact_seconds'] = compact_seconds
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"\n{'candidatos':>10} {'delta':>6} {'apply':>10} {'refresh':>10} {'rebuild':>10} {'compact':>10}")
+    for result in results:
+        print(f"{result['applicants']:>10,} {result['delta_size']:>6,} {result['apply_seconds'] * 1000:>7.1f} ms "
+              f"{result['refresh_seconds'] * 1000:>7.1f} ms {result['rebuild_seconds']:>8.2f} s "
+              f"{result['compact_seconds']:>8.2f} s")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'delta', 'vagas': args.vagas, 'results': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
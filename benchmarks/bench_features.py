@@ -0,0 +1,104 @@
+"""Compara o motor de features vetorizado com a implementação linha a linha.
+
+Duas referências: `original` reproduz o caminho antigo de
+prepare_hired_candidates_features (um DataFrame por par + concat) e
+`linha_a_linha` usa a mesma lógica montando um único DataFrame no final.
+
+Uso:
+    python benchmarks/bench_features.py --pairs 10000 20000 --output bench_features.json
+"""
+import sys
+import json
+import time
+import random
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+APP_DIR = Path(__file__).resolve().parent.parent / 'app'
+sys.path.insert(0, str(APP_DIR))
+
+from features import FEATURE_COLUMNS, build_features_for_pairs, compute_feature_row
+
+TECHS = ['python', 'java', 'javascript', 'react', 'angular', 'sql', 'aws', 'docker',
+         'sap', 'abap', 'excel', 'linux', 'spring', 'django', 'flask', 'node', 'scrum', 'oracle']
+ACADEMICO = ['Ensino Médio Completo', 'Ensino Técnico', 'Ensino Superior Completo',
+             'Ensino Superior Incompleto', 'Pós Graduação', 'Mestrado', '']
+INGLES = ['Nenhum', 'Básico', 'Intermediário', 'Avançado', 'Fluente', '']
+AREAS = ['TI - Desenvolvimento/Programação', 'TI - SAP', 'TI - Projetos', 'Administrativa', 'Financeira/Controladoria']
+
+
+def make_pairs(n_pairs, n_vagas=200, seed=0):
+    """Pares sintéticos: poucas vagas, muitos candidatos (como no ranking e no scoring em massa)"""
+    rnd = random.Random(seed)
+    vagas = [{
+        'titulo_vaga': f'Desenvolvedor {rnd.choice(TECHS).title()}',
+        'competencias_tecnicas_requeridas': ', '.join(rnd.sample(TECHS, rnd.randint(3, 8))),
+        'nivel_academico': rnd.choice(ACADEMICO),
+        'nivel_ingles': rnd.choice(INGLES),
+        'nivel_profissional': rnd.choice(['Júnior', 'Pleno', 'Sênior', 'Especialista']),
+        'tipo_contratacao': rnd.choice(['CLT Full', 'PJ/Autônomo', 'Cooperado', 'CLT Full, PJ/Autônomo']),
+        'areas_atuacao': rnd.choice(AREAS)
+    } for _ in range(n_vagas)]
+    pairs = []
+    for _ in range(n_pairs):
+        candidato = {
+            'conhecimentos_tecnicos': ' '.join(rnd.sample(TECHS, rnd.randint(0, 10))),
+            'nivel_academico': rnd.choice(ACADEMICO),
+            'nivel_ingles': rnd.choice(INGLES),
+            'area_de_atuacao': rnd.choice(AREAS)
+        }
+        pairs.append((rnd.choice(vagas), candidato))
+    return pairs
+
+
+def best_of(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start_time)
+    return min(timings), result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark do motor de features')
+    parser.add_argument('--pairs', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='Arquivo JSON com os resultados')
+    args = parser.parse_args(argv)
+
+    results = []
+    for n_pairs in args.pairs:
+        pairs = make_pairs(n_pairs)
+        original_seconds, _ = best_of(
+            lambda: pd.concat([pd.DataFrame([compute_feature_row(v, c)]) for v, c in pairs], ignore_index=True),
+            1)
+        rowwise_seconds, reference = best_of(
+            lambda: pd.DataFrame([compute_feature_row(v, c) for v, c in pairs], columns=FEATURE_COLUMNS),
+            args.repeat)
+        vectorized_seconds, vectorized = best_of(lambda: build_features_for_pairs(pairs), args.repeat)
+        pd.testing.assert_frame_equal(vectorized, reference)
+
+        result = {
+            'pairs': n_pairs,
+            'original_seconds': original_seconds,
+            'rowwise_seconds': rowwise_seconds,
+            'vectorized_seconds': vectorized_seconds,
+            'speedup_vs_original': original_seconds / vectorized_seconds,
+            'speedup_vs_rowwise': rowwise_seconds / vectorized_seconds
+        }
+        results.append(result)
+        print(f"{n_pairs:>8,} pares  original {original_seconds:8.3f}s  linha a linha {rowwise_seconds:8.3f}s  "
+              f"vetorizado {vectorized_seconds:8.3f}s  speedup {result['speedup_vs_original']:6.1f}x "
+              f"({result['speedup_vs_rowwise']:.1f}x sobre linha a linha)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'features', 'results': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""Latência por linha dos motores de inferência (sklearn vs compilado).
+
+Gera pares vaga/candidato sintéticos que o modelo nunca viu, verifica a
+paridade do motor compilado com o Pipeline sklearn nesse conjunto e mede
+p50/p99 de predições de uma linha. `sklearn_two_pass` reproduz o caminho
+antigo de /api/predict (predict + predict_proba).
+
+Uso:
+    python benchmarks/bench_inference.py --samples 1000 --output bench_inference.json
+"""
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+APP_DIR = Path(__file__).resolve().parent.parent / 'app'
+sys.path.insert(0, str(APP_DIR))
+
+from features import build_features_for_pairs
+from inference import CompiledPipeline, SklearnEngine, check_parity
+from bench_features import make_pairs
+
+
+def latency_percentiles(function, rows):
+    timings = []
+    for row in rows:
+        start_time = time.perf_counter()
+        function(row)
+        timings.append(time.perf_counter() - start_time)
+    timings = np.array(timings) * 1e6
+    return {
+        'p50_us': float(np.percentile(timings, 50)),
+        'p99_us': float(np.percentile(timings, 99)),
+        'mean_us': float(timings.mean())
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark dos motores de inferência')
+    parser.add_argument('--model', default=str(APP_DIR / 'models' / 'pipeline_candidatos_contratados.joblib'))
+    parser.add_argument('--holdout', type=int, default=5000, help='Linhas do conjunto de paridade')
+    parser.add_argument('--samples', type=int, default=1000, help='Predições de uma linha por motor')
+    parser.add_argument('--output', help='Arquivo JSON com os resultados')
+    args = parser.parse_args(argv)
+
+    pipeline = joblib.load(args.model)
+    compiled = CompiledPipeline(pipeline)
+    holdout = build_features_for_pairs(make_pairs(args.holdout, seed=12345))
+
+    parity = check_parity(compiled, pipeline, holdout)
+    print(f"Paridade ({parity['rows']:,} linhas): diferença máx. {parity['max_abs_diff']:.2e}, "
+          f"rótulos iguais {parity['label_agreement']:.2%}")
+
+    rows = [holdout.iloc[[i % len(holdout)]] for i in range(args.samples)]
+    engines = {
+        'sklearn_two_pass': lambda row: (pipeline.predict(row), pipeline.predict_proba(row)),
+        'sklearn': SklearnEngine(pipeline).predict_proba,
+        'compiled': compiled.predict_proba
+    }
+
+    results = {}
+    for name, function in engines.items():
+        function(rows[0])  # aquecimento
+        results[name] = latency_percentiles(function, rows)
+        print(f"{name:<17} p50 {results[name]['p50_us']:9.1f} µs  p99 {results[name]['p99_us']:9.1f} µs")
+    print(f"speedup p50 compilado vs sklearn: {results['sklearn']['p50_us'] / results['compiled']['p50_us']:.1f}x")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'inference', 'parity': parity, 'results': results}, f, indent=2)
+    return 0 if parity['passed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""Compara json.load dos dumps com a abertura do armazenamento colunar.
+
+Cada medição roda em um subprocesso isolado para que o pico de RSS
+(ru_maxrss) reflita apenas o carregamento medido.
+
+Uso:
+    python app/ingest.py build --data-dir data
+    python benchmarks/bench_ingest.py --data-dir data --output bench_ingest.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent / 'app'
+sys.path.insert(0, str(APP_DIR))
+
+TABLE_FILES = {'vagas': 'vagas.json', 'applicants': 'applicants.json', 'prospects': 'prospects.json'}
+
+
+def peak_rss_mb():
+    # ru_maxrss é reportado em KB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_child(mode, table, data_dir, store_dir):
+    """Executa uma medição no processo atual e imprime o resultado em JSON"""
+    import numpy  # noqa: F401 - importado antes para não contar no tempo medido
+    from data_store import open_store
+
+    baseline_rss = peak_rss_mb()
+    start_time = time.perf_counter()
+    if mode == 'json_load':
+        with open(Path(data_dir) / TABLE_FILES[table], 'r', encoding='utf-8') as f:
+            rows = len(json.load(f))
+    elif mode == 'store_open':
+        # Abertura lazy: apenas mapeia os arquivos e lê o primeiro registro
+        tables = open_store(store_dir)
+        rows = tables[table].n_rows
+        tables[table].records([0])
+    else:
+        # Varredura completa: decodifica todas as colunas da tabela
+        tables = open_store(store_dir)
+        rows = len(tables[table].to_frame())
+    elapsed = time.perf_counter() - start_time
+
+    print(json.dumps({
+        'mode': mode,
+        'table': table,
+        'rows': rows,
+        'seconds': elapsed,
+        'peak_rss_mb': peak_rss_mb(),
+        'delta_rss_mb': peak_rss_mb() - baseline_rss
+    }))
+
+
+def measure(mode, table, data_dir, store_dir):
+    command = [sys.executable, __file__, '--child', mode, '--table', table,
+               '--data-dir', str(data_dir), '--store-dir', str(store_dir)]
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark de carregamento: json.load vs armazenamento colunar')
+    parser.add_argument('--data-dir', default=str(APP_DIR.parent / 'data'))
+    parser.add_argument('--store-dir', help='Padrão: <data-dir>/store')
+    parser.add_argument('--output', help='Arquivo JSON com os resultados')
+    parser.add_argument('--child', choices=['json_load', 'store_open', 'store_scan'], help=argparse.SUPPRESS)
+    parser.add_argument('--table', choices=list(TABLE_FILES), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    store_dir = args.store_dir or os.path.join(args.data_dir, 'store')
+    if args.child:
+        run_child(args.child, args.table, args.data_dir, store_dir)
+        return 0
+
+    results = []
+    for table in TABLE_FILES:
+        for mode in ('json_load', 'store_open', 'store_scan'):
+            result = measure(mode, table, args.data_dir, store_dir)
+            results.append(result)
+            print(f"{table:<11} {mode:<11} {result['seconds']:>8.3f}s  "
+                  f"pico RSS {result['peak_rss_mb']:>8.1f} MB  (+{result['delta_rss_mb']:.1f} MB)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'ingest', 'results': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""Codificação das respostas de /api/predict/batch: codec, esquema e NDJSON.
+
+Envia um lote de `--items` pares vaga/candidato pelo test client do Flask e
+mede, para cada combinação de codec (`json` da biblioteca padrão e `orjson`,
+se instalado), esquema (`full`/`compact`) e formato (`json`/`ndjson`):
+
+- tempo total da requisição e tempo até o primeiro bloco da resposta
+- custo de codificação por linha (só o dumps dos resultados já pontuados)
+- bytes por linha
+
+Uso:
+    python benchmarks/bench_json.py --items 5000 --output json.json
+"""
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent / 'app'
+sys.path.insert(0, str(APP_DIR))
+
+import json_codec
+from json_codec import JsonCodec, NDJSON_MIMETYPE
+from bench_features import best_of, make_pairs
+
+
+def use_codec(app_module, codec):
+    """Troca o codec da aplicação (respostas montadas pelo app e pelo provider do Flask)"""
+    app_module.json_codec = codec
+    app_module.app.json.codec = codec
+
+
+def run_request(client, payload, schema, encoding):
+    """Tempo total, tempo até o primeiro bloco e corpo da resposta"""
+    headers = {'Accept': NDJSON_MIMETYPE} if encoding == 'ndjson' else {}
+    start_time = time.perf_counter()
+    response = client.post(f'/api/predict/batch?schema={schema}', json=payload, headers=headers, buffered=False)
+    chunks = iter(response.response)
+    body = next(chunks)
+    first_chunk = time.perf_counter() - start_time
+    body += b''.join(chunks)
+    response.close()
+    return time.perf_counter() - start_time, first_chunk, body
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark da codificação JSON/NDJSON de /api/predict/batch')
+    parser.add_argument('--items', type=int, default=5000, help='Pares vaga/candidato no lote')
+    parser.add_argument('--chunk-size', type=int, default=256, help='STREAM_CHUNK_SIZE do modo NDJSON')
+    parser.add_argument('--repeat', type=int, default=3, help='Repetições (melhor tempo)')
+    parser.add_argument('--output', help='Arquivo JSON com os resultados')
+    args = parser.parse_args(argv)
+
+    import app as app_module
+    if app_module.model_registry.active is None:
+        print("❌ Modelo não carregado")
+        return 1
+    app_module.MAX_BATCH_SIZE = app_module.MAX_STREAM_BATCH_SIZE = args.items
+    app_module.STREAM_CHUNK_SIZE = args.chunk_size
+    client = app_module.app.test_client()
+
+    payload = {'items': [{'vaga': vaga, 'candidato': candidato} for vaga, candidato in make_pairs(args.items)]}
+    backends = ['json'] + (['orjson'] if json_codec.orjson is not None else [])
+    print(f"{args.items:,} itens; codecs: {', '.join(backends)}")
+
+    results = []
+    for backend in backends:
+        codec = JsonCodec(backend)
+        use_codec(app_module, codec)
+        for schema in app_module.RESPONSE_SCHEMAS:
+            rows = client.post(f'/api/predict/batch?schema={schema}', json=payload).get_json()['results']
+            encode_seconds, _ = best_of(lambda: codec.dumps({'results': rows}), args.repeat)
+            for encoding in ('json', 'ndjson'):
+                best = None
+                for _ in range(args.repeat):
+                    timing = run_request(client, payload, schema, encoding)
+                    if best is None or timing[0] < best[0]:
+                        best = timing
+                seconds, first_chunk, body = best
+                result = {
+                    'codec': backend, 'schema': schema, 'encoding': encoding,
+                    'seconds': seconds, 'first_chunk_seconds': first_chunk,
+                    'encode_us_per_row': encode_seconds / args.items * 1e6,
+                    'bytes_per_row': len(body) / args.items
+                }
+                results.append(result)
+                print(f"{backend:<7} {schema:<8} {encoding:<7} total {seconds * 1000:8.1f} ms  "
+                      f"1º bloco {first_chunk * 1000:8.1f} ms  dumps {result['encode_us_per_row']:6.2f} µs/linha  "
+                      f"{result['bytes_per_row']:6.0f} B/linha")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'json', 'items': args.items, 'chunk_size': args.chunk_size,
+                       'results': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,186 @@
+"""Custo das atualizações de métricas por requisição, em processo único e no modo multiprocesso.
+
+Reproduz as atualizações que uma predição de /api/predict faz (contador e
+histograma HTTP do exportador, contador de predições, histograma de scores,
+falta no cache e as seis etapas do StageTimer) e mede, em um subprocesso por
+modo:
+
+- ns por operação de Counter.inc, Gauge.set e Histogram.observe
+- µs por requisição (todas as atualizações acima) com 1 e `--threads` threads
+- tempo do scrape: generate_latest do registry padrão (single) ou da agregação
+  dos arquivos mmap de `--workers` processos (multiprocess)
+
+Uso:
+    python benchmarks/bench_metrics.py --workers 4 --threads 4 --output metrics.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent / 'app'
+sys.path.insert(0, str(APP_DIR))
+
+MODES = ['single', 'multiprocess']
+STAGES = ['parse', 'cache', 'features', 'transform', 'forest', 'response']
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+
+def build_metrics():
+    """Métricas com os mesmos nomes, labels e buckets das de app.py (importadas só depois do modo definido)"""
+    from prometheus_client import Counter, Gauge, Histogram
+    return {
+        'http_duration': Histogram('flask_http_request_duration_seconds', 'Duração HTTP',
+                                   ['method', 'path', 'status'], buckets=HTTP_BUCKETS),
+        'http_total': Counter('flask_http_request_total', 'Requisições HTTP', ['method', 'status']),
+        'predictions': Counter('hired_model_predictions_total', 'Predições', ['prediction_type', 'quality_level']),
+        'quality': Histogram('hired_model_quality_scores', 'Scores',
+                             buckets=[0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0]),
+        'cache_misses': Counter('hired_model_prediction_cache_misses_total', 'Faltas no cache'),
+        'stages': Histogram('hired_model_stage_duration_seconds', 'Etapas', ['path', 'stage'],
+                            buckets=[0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                                     0.1, 0.25, 0.5, 1.0, 2.5]),
+        'accuracy': Gauge('hired_model_accuracy', 'Acurácia', multiprocess_mode='livemostrecent')
+    }
+
+
+def make_request_updates(metrics):
+    """Função com as atualizações de métricas de uma predição (como no handler e no exportador)"""
+    from profiling import StageTimer
+
+    def record(index):
+        timer = StageTimer(metrics['stages'], 'unified')
+        for stage in STAGES:
+            timer.add(stage, 0.0001 * (index % 7 + 1))
+        metrics['cache_misses'].inc()
+        metrics['predictions'].labels(prediction_type='unified_interface', quality_level='high').inc()
+        metrics['quality'].observe((index % 100) / 100)
+        timer.observe()
+        metrics['http_duration'].labels(method='POST', path='/api/predict', status=200).observe(0.004)
+        metrics['http_total'].labels(method='POST', status=200).inc()
+
+    return record
+
+
+def per_call_ns(function, iterations):
+    started = time.perf_counter()
+    for index in range(iterations):
+        function(index)
+    return (time.perf_counter() - started) / iterations * 1e9
+
+
+def threaded_us(record, iterations, threads):
+    """µs por requisição com `threads` threads atualizando ao mesmo tempo (workers gthread)"""
+    per_thread = max(1, iterations // threads)
+
+    def loop():
+        for index in range(per_thread):
+            record(index)
+
+    workers = [threading.Thread(target=loop) for _ in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return (time.perf_counter() - started) / (per_thread * threads) * 1e6
+
+
+def scrape_ms(registry, repeat=20):
+    from prometheus_client import generate_latest
+    started = time.perf_counter()
+    for _ in range(repeat):
+        size = len(generate_latest(registry))
+    return (time.perf_counter() - started) / repeat * 1000, size
+
+
+def run_mode(mode, config):
+    metrics = build_metrics()
+    record = make_request_updates(metrics)
+    iterations = config['iterations']
+    counter = metrics['cache_misses']
+    child = metrics['predictions'].labels(prediction_type='unified_interface', quality_level='high')
+
+    record(0)  # aquecimento: arquivos mmap e filhos dos labels criados
+    result = {
+        'counter_inc_ns': per_call_ns(lambda index: counter.inc(), iterations),
+        'labeled_counter_inc_ns': per_call_ns(lambda index: child.inc(), iterations),
+        'gauge_set_ns': per_call_ns(lambda index: metrics['accuracy'].set(index), iterations),
+        'histogram_observe_ns': per_call_ns(lambda index: metrics['quality'].observe(0.5), iterations),
+        'request_updates_us': per_call_ns(record, iterations // 10) / 1000,
+        f"request_updates_{config['threads']}_threads_us": threaded_us(record, iterations // 10, config['threads'])
+    }
+
+    if mode == 'single':
+        from prometheus_client import REGISTRY
+        registry = REGISTRY
+    else:
+        from prometheus_client import CollectorRegistry
+        from prometheus_client.multiprocess import MultiProcessCollector
+        # Demais workers: processos que gravam as mesmas métricas nos próprios arquivos
+        for _ in range(config['workers'] - 1):
+            pid = os.fork()
+            if pid == 0:
+                for index in range(1000):
+                    record(index)
+                os._exit(0)
+            os.waitpid(pid, 0)
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+        result['metric_files'] = len(os.listdir(os.environ['PROMETHEUS_MULTIPROC_DIR']))
+    result['scrape_ms'], result['scrape_bytes'] = scrape_ms(registry)
+    return result
+
+
+def run_child(mode, config):
+    """Executa o modo em um subprocesso (o modo do prometheus_client é fixado no import)"""
+    metrics_dir = tempfile.mkdtemp(prefix='bench-metrics-')
+    try:
+        env = dict(os.environ)
+        env.pop('PROMETHEUS_MULTIPROC_DIR', None)
+        if mode == 'multiprocess':
+            env['PROMETHEUS_MULTIPROC_DIR'] = metrics_dir
+        command = [sys.executable, __file__, '--child', mode, '--config', json.dumps(config)]
+        output = subprocess.run(command, check=True, capture_output=True, text=True, env=env).stdout
+        return json.loads(output.strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark das atualizações de métricas Prometheus')
+    parser.add_argument('--modes', nargs='+', default=MODES, choices=MODES)
+    parser.add_argument('--iterations', type=int, default=200000, help='Operações por microbenchmark')
+    parser.add_argument('--threads', type=int, default=4, help='Threads atualizando ao mesmo tempo')
+    parser.add_argument('--workers', type=int, default=4, help='Processos com arquivos de métricas no scrape')
+    parser.add_argument('--output', help='Arquivo JSON com os resultados')
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--config', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_mode(args.child, json.loads(args.config))))
+        return 0
+
+    config = {'iterations': args.iterations, 'threads': args.threads, 'workers': args.workers}
+    results = {}
+    for mode in args.modes:
+        results[mode] = run_child(mode, config)
+        print(f"{mode}:")
+        for key, value in results[mode].items():
+            print(f"   {key:<32} {value:12.2f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'metrics', 'config': config, 'results': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""Vazão e latência de predições de um par com e sem micro-batching.
+
+Simula um worker gthread: `--concurrency` threads disparam predições de uma
+linha (features já preparadas, como no handler de /api/predict) durante
+`--duration` segundos. `direct` chama o motor em cada requisição; `batched`
+passa pelo MicroBatcher com os limites informados.
+
+Uso:
+    python benchmarks/bench_microbatch.py --engine sklearn --concurrency 16 --max-wait-ms 3
+"""
+import sys
+import json
+import time
+import argparse
+import threading
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+APP_DIR = Path(__file__).resolve().parent.parent / 'app'
+sys.path.insert(0, str(APP_DIR))
+
+from features import build_features_for_pairs
+from inference import load_engine
+from micro_batcher import MicroBatcher
+from bench_features import make_pairs
+
+
+class _Model:
+    """Mesma interface de model_registry.ModelVersion usada pelo MicroBatcher"""
+
+    def __init__(self, engine):
+        self.engine = engine
+
+
+def run_load(predict, rows, concurrency, duration):
+    latencies = [[] for _ in range(concurrency)]
+    stop = time.perf_counter() + duration
+
+    def client(index):
+        position = index
+        while time.perf_counter() < stop:
+            start_time = time.perf_counter()
+            predict(rows[position % len(rows)])
+            latencies[index].append(time.perf_counter() - start_time)
+            position += concurrency
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    timings = np.concatenate([np.array(values) for values in latencies]) * 1000
+    return {
+        'requests': int(len(timings)),
+        'throughput_rps': float(len(timings) / elapsed),
+        'p50_ms': float(np.percentile(timings, 50)),
+        'p99_ms': float(np.percentile(timings, 99))
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark do micro-batching de predições')
+    parser.add_argument('--model', default=str(APP_DIR / 'models' / 'pipeline_candidatos_contratados.joblib'))
+    parser.add_argument('--engine', default='sklearn', choices=['sklearn', 'compiled'])
+    parser.add_argument('--concurrency', type=int, default=16, help='Requisições simultâneas')
+    parser.add_argument('--duration', type=float, default=5.0, help='Segundos por modo')
+    parser.add_argument('--max-batch-size', type=int, default=32)
+    parser.add_argument('--max-wait-ms', type=float, default=3.0)
+    parser.add_argument('--output', help='Arquivo JSON com os resultados')
+    args = parser.parse_args(argv)
+
+    engine, _ = load_engine(joblib.load(args.model), args.engine)
+    model = _Model(engine)
+    features = build_features_for_pairs(make_pairs(2000, seed=7))
+    rows = [features.iloc[[i]] for i in range(len(features))]
+
+    sizes = []
+    batcher = MicroBatcher(args.max_batch_size, args.max_wait_ms / 1000,
+                           on_batch=lambda depth, batch_rows, waits: sizes.append(batch_rows))
+    modes = {
+        'direct': lambda row: engine.predict_proba(row),
+        'batched': lambda row: batcher.predict_proba(model, row)
+    }
+
+    results = {}
+    for name, predict in modes.items():
+        predict(rows[0])  # aquecimento
+        results[name] = run_load(predict, rows, args.concurrency, args.duration)
+        print(f"{name:<8} {results[name]['throughput_rps']:8.0f} req/s  p50 {results[name]['p50_ms']:7.2f} ms  "
+              f"p99 {results[name]['p99_ms']:7.2f} ms")
+    results['batched']['mean_batch_size'] = float(np.mean(sizes)) if sizes else 0.0
+    print(f"lote médio: {results['batched']['mean_batch_size']:.1f} linhas; vazão "
+          f"{results['batched']['throughput_rps'] / results['direct']['throughput_rps']:.1f}x")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'microbatch', 'engine': args.engine, 'concurrency': args.concurrency,
+                       'max_batch_size': args.max_batch_size, 'max_wait_ms': args.max_wait_ms,
+                       'results': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
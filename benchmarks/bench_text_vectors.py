@@ -0,0 +1,120 @@
+"""TF-IDF do combined_text no ranking de uma vaga contra todos os candidatos.
+
+Compara, para `--vagas` vagas do store sintético (cada uma contra todos os
+candidatos):
+
+- tokenized: texto combinado montado por par e tokenizado pelo vetorizador
+  (sklearn) ou pelo motor compilado, como no caminho original
+- decomposed: contagens por vaga e por candidato (text_vectors), somadas por
+  par, com IDF e normalização
+
+Mede só o TF-IDF e o caminho completo do ranking (features + transform do
+motor compilado), e confere que as matrizes são idênticas.
+
+Uso:
+    python benchmarks/bench_text_vectors.py --scale 0.2 --vagas 5 --output text_vectors.json
+"""
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+APP_DIR = Path(__file__).resolve().parent.parent / 'app'
+sys.path.insert(0, str(APP_DIR))
+
+from data_store import STORE_MANIFEST, DataStore
+from features import compute_features
+from inference import CompiledPipeline
+from ingest import build_store
+from text_vectors import PairTextVectors, find_text_vectorizer
+from bench_features import best_of
+from synthetic_data import generate
+
+
+def prepare_store(data_dir, scale, seed, cv_words):
+    store_dir = Path(data_dir) / 'store'
+    if not (store_dir / STORE_MANIFEST).exists():
+        generate(data_dir, scale=scale, seed=seed, cv_words=cv_words)
+        build_store(data_dir, store_dir)
+    return DataStore.load(store_dir=store_dir)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark do TF-IDF decomposto (uma vaga x todos os candidatos)')
+    parser.add_argument('--model', default=str(APP_DIR / 'models' / 'pipeline_candidatos_contratados.joblib'))
+    parser.add_argument('--data-dir', help='Dataset sintético existente (padrão: gerado em um diretório temporário)')
+    parser.add_argument('--scale', type=float, default=0.2, help='Escala do dataset gerado')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--vagas', type=int, default=5, help='Vagas ranqueadas contra todos os candidatos')
+    parser.add_argument('--repeat', type=int, default=3, help='Repetições (melhor tempo)')
+    parser.add_argument('--output', help='Arquivo JSON com os resultados')
+    args = parser.parse_args(argv)
+
+    work_dir = None if args.data_dir else tempfile.mkdtemp(prefix='bench-text-')
+    try:
+        store = prepare_store(args.data_dir or work_dir, args.scale, args.seed, cv_words=20)
+        pipeline = joblib.load(args.model)
+        vectorizer = find_text_vectorizer(pipeline)
+        compiled = CompiledPipeline(pipeline)
+
+        start_time = time.perf_counter()
+        vectors = PairTextVectors.build(vectorizer, store.vagas, store.applicants)
+        build_seconds = time.perf_counter() - start_time
+
+        n_applicants = store.n_applicants
+        applicant_positions = np.arange(n_applicants)
+        applicants = store.applicant_columns(applicant_positions)
+        vaga_positions = np.linspace(0, store.vagas.n_rows - 1, min(args.vagas, store.vagas.n_rows)).astype(int)
+        print(f"{store.vagas.n_rows:,} vagas, {n_applicants:,} candidatos; contagens em {build_seconds * 1000:.1f} ms")
+
+        totals = {'tfidf_tokenized': 0.0, 'tfidf_decomposed': 0.0, 'rank_tokenized': 0.0, 'rank_decomposed': 0.0}
+        identical = True
+        for vaga_position in vaga_positions.tolist():
+            vaga = store.vagas.records([vaga_position])[0]
+            rows = np.full(n_applicants, vaga_position)
+            texts = compute_features(vaga, applicants, n_applicants)['combined_text'].tolist()
+
+            seconds, expected = best_of(lambda: vectorizer.transform(texts), args.repeat)
+            totals['tfidf_tokenized'] += seconds
+            seconds, actual = best_of(lambda: vectors.transform(rows, applicant_positions), args.repeat)
+            totals['tfidf_decomposed'] += seconds
+            identical &= bool(np.array_equal(expected.toarray(), actual.toarray()))
+
+            seconds, expected = best_of(
+                lambda: compiled.transform(compute_features(vaga, applicants, n_applicants)), args.repeat)
+            totals['rank_tokenized'] += seconds
+            seconds, actual = best_of(lambda: compiled.transform(
+                compute_features(vaga, applicants, n_applicants, combined_text=False),
+                vectors.transform(rows, applicant_positions)), args.repeat)
+            totals['rank_decomposed'] += seconds
+            identical &= bool(np.array_equal(expected, actual))
+
+        pairs = n_applicants * len(vaga_positions)
+        results = {name: {'seconds': seconds, 'pairs_per_second': pairs / seconds if seconds else 0.0}
+                   for name, seconds in totals.items()}
+        for name, result in results.items():
+            print(f"{name:<17} {result['seconds'] * 1000:9.1f} ms  {result['pairs_per_second']:12,.0f} pares/s")
+        for case in ('tfidf', 'rank'):
+            speedup = totals[f'{case}_tokenized'] / totals[f'{case}_decomposed']
+            results[f'{case}_speedup'] = speedup
+            print(f"speedup {case}: {speedup:.1f}x")
+        print(f"matrizes idênticas: {identical}")
+
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump({'benchmark': 'text_vectors', 'vagas': len(vaga_positions), 'applicants': n_applicants,
+                           'build_seconds': build_seconds, 'identical': identical, 'results': results}, f, indent=2)
+        return 0 if identical else 1
+    finally:
+        if work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""Latência da floresta por tamanho de lote e threads de inferência.
+
+Mostra a topologia detectada (topology.py: afinidade e cota do cgroup) e mede
+`predict_proba_transformed(X, n_threads)` dos motores compilado e sklearn
+para lotes de `--rows` linhas com cada valor de `--threads`. Com mais CPUs
+do que workers ocupados, os lotes grandes ganham com as threads; lotes de
+uma linha ficam em uma thread (`PARALLEL_MIN_ROWS`), onde o pool só
+acrescentaria custo fixo.
+
+Uso:
+    python benchmarks/bench_topology.py --rows 1 256 4096 --threads 1 2 4 --output topology.json
+"""
+import sys
+import json
+import argparse
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent / 'app'
+sys.path.insert(0, str(APP_DIR))
+
+from inference import SklearnEngine
+from topology import Topology, detect_cpus
+from bench_features import best_of, make_pairs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark das threads de inferência por tamanho de lote')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1, 256, 4096], help='Linhas por lote')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4], help='Threads de inferência')
+    parser.add_argument('--repeat', type=int, default=5, help='Repetições (melhor tempo)')
+    parser.add_argument('--output', help='Arquivo JSON com os resultados')
+    args = parser.parse_args(argv)
+
+    import app as app_module
+    model = app_module.model_registry.active
+    if model is None:
+        print("❌ Modelo não carregado")
+        return 1
+    cpus, source = detect_cpus()
+    plan = Topology.from_env()
+    print(f"CPUs: {cpus} ({source}); topologia padrão: {plan.to_dict()}")
+
+    engines = {model.engine.name: model.engine}
+    if model.engine.name != 'sklearn':
+        engines['sklearn'] = SklearnEngine(model.pipeline)
+    features = app_module.prepare_hired_candidates_features_batch(make_pairs(max(args.rows)))
+
+    results = []
+    for name, engine in engines.items():
+        for rows in args.rows:
+            X = engine.transform(features.iloc[:rows])
+            baseline = None
+            for threads in args.threads:
+                seconds, _ = best_of(lambda: engine.predict_proba_transformed(X, threads), args.repeat)
+                baseline = baseline or seconds
+                results.append({'engine': name, 'rows': rows, 'threads': threads, 'seconds': seconds,
+                                'speedup': baseline / seconds})
+                print(f"{name:<9} {rows:>6,} linhas  {threads} thread(s)  {seconds * 1000:9.2f} ms  "
+                      f"{baseline / seconds:5.2f}x")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'topology', 'cpus': cpus, 'cpu_source': source, 'topology': plan.to_dict(),
+                       'results': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""Memória por worker do gunicorn com e sem preload do modelo (Linux).
+
+Sobe o gunicorn com app/gunicorn.conf.py em cada modo (GUNICORN_PRELOAD=false
+reproduz o comportamento anterior: cada worker importa tudo e carrega sua
+própria cópia do modelo), espera /health responder, envia predições para
+aquecer os workers e lê /proc/<pid>/smaps_rollup de cada worker:
+
+- rss: páginas residentes, contando as compartilhadas
+- pss: rss com as páginas compartilhadas divididas entre os processos
+- private: páginas exclusivas do processo (o custo real de cada worker extra)
+
+Uso:
+    STORE_DIR=data/store python benchmarks/bench_worker_memory.py --workers 4 --output bench_worker_memory.json
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import subprocess
+import urllib.request
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent / 'app'
+
+PREDICT_PAYLOAD = {
+    'vaga': {'titulo_vaga': 'Desenvolvedor Python', 'competencias_tecnicas_requeridas': 'python sql docker',
+             'nivel_ingles': 'Avançado', 'areas_atuacao': 'TI - Desenvolvimento/Programação'},
+    'candidato': {'conhecimentos_tecnicos': 'python django', 'nivel_ingles': 'Intermediário',
+                  'area_de_atuacao': 'TI - Desenvolvimento/Programação'}
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def memory_kb(pid):
+    """rss, pss e private (kB) de /proc/<pid>/smaps_rollup"""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup', 'r') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return {
+        'rss': fields.get('Rss', 0),
+        'pss': fields.get('Pss', 0),
+        'private': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    }
+
+
+def child_pids(parent):
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'r') as f:
+                # O nome do processo (2º campo) pode ter espaços; o ppid vem depois do ')'
+                if int(f.read().rsplit(')', 1)[1].split()[1]) == parent:
+                    children.append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+    return sorted(children)
+
+
+def request(url, payload=None, timeout=5):
+    data = json.dumps(payload).encode('utf-8') if payload is not None else None
+    headers = {'Content-Type': 'application/json'} if data else {}
+    with urllib.request.urlopen(urllib.request.Request(url, data=data, headers=headers), timeout=timeout) as response:
+        return response.read()
+
+
+def startup_phases(base_url):
+    phases = {}
+    for line in request(f'{base_url}/metrics').decode('utf-8').splitlines():
+        if line.startswith('hired_model_startup_phase_seconds{'):
+            name = line.split('phase="', 1)[1].split('"', 1)[0]
+            phases[name] = float(line.rsplit(' ', 1)[1])
+    return phases
+
+
+def start_gunicorn(workers, timeout, **env_overrides):
+    """Sobe o gunicorn com app/gunicorn.conf.py e espera todos os workers e /health.
+
+    Devolve (processo master, URL base, segundos até ficar pronto).
+    """
+    port = free_port()
+    base_url = f'http://127.0.0.1:{port}'
+    env = dict(os.environ, GUNICORN_WORKERS=str(workers), GUNICORN_BIND=f'127.0.0.1:{port}', **env_overrides)
+    start_time = time.perf_counter()
+    master = subprocess.Popen([sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py', 'app:app'],
+                              cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        # Pronto quando todos os workers existem e /health responde
+        while True:
+            if master.poll() is not None:
+                raise RuntimeError('gunicorn encerrou durante a inicialização')
+            if time.perf_counter() - start_time > timeout:
+                raise RuntimeError('tempo limite de inicialização excedido')
+            try:
+                if len(child_pids(master.pid)) == workers:
+                    request(f'{base_url}/health')
+                    break
+            except OSError:
+                pass
+            time.sleep(0.05)
+    except BaseException:
+        stop_gunicorn(master)
+        raise
+    return master, base_url, time.perf_counter() - start_time
+
+
+def stop_gunicorn(master):
+    master.terminate()
+    master.wait(30)
+
+
+def measure(preload, workers, requests_per_worker, timeout):
+    master, base_url, ready_seconds = start_gunicorn(workers, timeout, GUNICORN_PRELOAD=str(preload).lower())
+    try:
+        for _ in range(requests_per_worker * workers):
+            request(f'{base_url}/api/predict', PREDICT_PAYLOAD)
+        phases = startup_phases(base_url)
+
+        worker_memory = [memory_kb(pid) for pid in child_pids(master.pid)]
+        return {
+            'preload': preload,
+            'ready_seconds': ready_seconds,
+            'startup_phases': phases,
+            'master_kb': memory_kb(master.pid),
+            'workers_kb': worker_memory,
+            'mean_worker_kb': {key: sum(w[key] for w in worker_memory) / len(worker_memory)
+                               for key in ('rss', 'pss', 'private')},
+            'total_pss_kb': memory_kb(master.pid)['pss'] + sum(w['pss'] for w in worker_memory)
+        }
+    finally:
+        stop_gunicorn(master)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Memória por worker do gunicorn com e sem preload')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=50, help='Predições por worker antes da medição')
+    parser.add_argument('--timeout', type=float, default=300, help='Tempo limite de inicialização (s)')
+    parser.add_argument('--output', help='Arquivo JSON com os resultados')
+    args = parser.parse_args(argv)
+
+    results = {}
+    for mode, preload in (('no_preload', False), ('preload', True)):
+        results[mode] = result = measure(preload, args.workers, args.requests, args.timeout)
+        mean = result['mean_worker_kb']
+        print(f"{mode:<11} pronto em {result['ready_seconds']:6.2f} s  por worker: rss {mean['rss'] / 1024:7.1f} MB  "
+              f"pss {mean['pss'] / 1024:7.1f} MB  privada {mean['private'] / 1024:7.1f} MB  "
+              f"pss total {result['total_pss_kb'] / 1024:7.1f} MB")
+        print(f"{'':<11} fases: " + ', '.join(f"{name} {seconds * 1000:.0f} ms"
+                                             for name, seconds in result['startup_phases'].items()))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'worker_memory', 'workers': args.workers, 'results': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,369 @@
+"""Suíte reproduzível de benchmarks sobre dados sintéticos, com relatório comparável entre commits.
+
+Gera (ou reaproveita) um dataset sintético com synthetic_data.py e roda cada
+seção em um subprocesso próprio, para o RSS refletir só a seção medida:
+
+- micro: prepare_hired_candidates_features (1 par e lote), transform do
+  pré-processador e predict_proba da floresta (sklearn e motor compilado)
+- http: driver de carga contra a aplicação Flask no mesmo processo (test client)
+- gunicorn: o mesmo driver por HTTP contra o gunicorn com app/gunicorn.conf.py
+
+Os cenários HTTP usam pares distintos (sem acertos no cache de predições) e
+vagas distintas no ranking (varredura completa). O relatório JSON traz
+p50/p95/p99, req/s e RSS por caso; `--compare` confronta com um relatório
+anterior e sai com código 1 se alguma métrica piorou mais que `--threshold`.
+
+Uso:
+    python benchmarks/run_suite.py --scale 0.05 --output suite_main.json
+    python benchmarks/run_suite.py --scale 0.05 --output suite.json --compare suite_main.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+import urllib.error
+from pathlib import Path
+
+import numpy as np
+
+BENCH_DIR = Path(__file__).resolve().parent
+APP_DIR = BENCH_DIR.parent / 'app'
+sys.path.insert(0, str(APP_DIR))
+
+from bench_ingest import peak_rss_mb
+from bench_worker_memory import memory_kb, child_pids, request, start_gunicorn, stop_gunicorn
+from synthetic_data import generate, make_api_pairs
+from data_store import STORE_MANIFEST
+
+SECTIONS = ['micro', 'http', 'gunicorn']
+
+# Métricas comparadas e o sentido em que pioram
+LOWER_IS_BETTER = ['p50_ms', 'p95_ms', 'p99_ms', 'rss_mb', 'peak_rss_mb', 'pss_mb']
+HIGHER_IS_BETTER = ['throughput_rps', 'rows_per_second']
+
+
+def current_rss_mb():
+    with open('/proc/self/status', 'r') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def summarize(timings, elapsed, rows_per_call=1):
+    """Percentis de latência (ms) e vazão de uma lista de durações em segundos"""
+    timings = np.array(timings) * 1000
+    result = {
+        'requests': int(len(timings)),
+        'p50_ms': float(np.percentile(timings, 50)),
+        'p95_ms': float(np.percentile(timings, 95)),
+        'p99_ms': float(np.percentile(timings, 99)),
+        'throughput_rps': float(len(timings) / elapsed)
+    }
+    if rows_per_call > 1:
+        result['rows_per_second'] = float(len(timings) * rows_per_call / elapsed)
+    return result
+
+
+def time_calls(function, inputs, rows_per_call=1):
+    timings = []
+    started = time.perf_counter()
+    for value in inputs:
+        start_time = time.perf_counter()
+        function(value)
+        timings.append(time.perf_counter() - start_time)
+    return summarize(timings, time.perf_counter() - started, rows_per_call)
+
+
+def run_load(send, requests, concurrency):
+    """Dispara `requests` (método, caminho, corpo) com `concurrency` clientes; `send` devolve o status HTTP"""
+    latencies = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+
+    def client(index):
+        for method, path, payload in requests[index::concurrency]:
+            start_time = time.perf_counter()
+            status = send(method, path, payload)
+            latencies[index].append(time.perf_counter() - start_time)
+            if status >= 400:
+                errors[index] += 1
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    result = summarize([value for values in latencies for value in values], time.perf_counter() - started)
+    result['errors'] = sum(errors)
+    return result
+
+
+def load_scenarios(config):
+    """Requisições de cada cenário HTTP, derivadas só da configuração (iguais entre commits)"""
+    n_requests, batch_size = config['requests'], config['batch_size']
+    n_batches = max(1, n_requests // 10)
+    pairs = make_api_pairs(n_requests + n_batches * batch_size, config['vagas'], config['applicants'], config['seed'])
+    single, batched = pairs[:n_requests], pairs[n_requests:]
+    return {
+        'predict': [('POST', '/api/predict', {'vaga': vaga, 'candidato': candidato}) for vaga, candidato in single],
+        'predict_batch': [
+            ('POST', '/api/predict/batch', {'items': [{'vaga': vaga, 'candidato': candidato}
+                                                      for vaga, candidato in batched[start:start + batch_size]]})
+            for start in range(0, len(batched), batch_size)
+        ],
+        'rank': [('GET', f'/api/vagas/{codigo}/rank?k=10', None)
+                 for codigo in range(min(n_batches, config['vagas']))]
+    }
+
+
+def run_micro(config):
+    import joblib
+    from features import build_features_for_pairs
+    from inference import CompiledPipeline
+    from model_registry import ModelRegistry
+
+    registry = ModelRegistry(config['models_dir'])
+    pipeline = joblib.load(registry.model_path(registry.pointer()))
+    preprocessor, classifier = pipeline[:-1], pipeline[-1]
+    compiled = CompiledPipeline(pipeline)
+
+    samples, batch_rows = config['samples'], config['batch_rows']
+    pairs = make_api_pairs(samples + batch_rows, config['vagas'], config['applicants'], config['seed'])
+    single_pairs, batch_pairs = pairs[:samples], pairs[samples:]
+    batch = build_features_for_pairs(batch_pairs)
+    single = build_features_for_pairs(single_pairs)
+    rows = [single.iloc[[i]] for i in range(samples)]
+    transformed_batch = preprocessor.transform(batch)
+    transformed_rows = [preprocessor.transform(row) for row in rows]
+    repeats = range(config['repeat'])
+
+    # prepare_hired_candidates_features em app.py delega para build_features_for_pairs
+    cases = {
+        'prepare_features_single': time_calls(lambda pair: build_features_for_pairs([pair]), single_pairs),
+        'prepare_features_batch': time_calls(lambda _: build_features_for_pairs(batch_pairs), repeats, batch_rows),
+        'transform_single': time_calls(preprocessor.transform, rows),
+        'transform_batch': time_calls(lambda _: preprocessor.transform(batch), repeats, batch_rows),
+        'forest_predict_single': time_calls(classifier.predict_proba, transformed_rows),
+        'forest_predict_batch': time_calls(lambda _: classifier.predict_proba(transformed_batch), repeats, batch_rows),
+        'compiled_predict_single': time_calls(compiled.predict_proba, rows),
+        'compiled_predict_batch': time_calls(lambda _: compiled.predict_proba(batch), repeats, batch_rows)
+    }
+    cases['memory'] = {'rss_mb': current_rss_mb(), 'peak_rss_mb': peak_rss_mb()}
+    return cases
+
+
+def app_environment(config, work_dir):
+    """Variáveis da aplicação: dados sintéticos, cache e floresta compilada em diretório próprio"""
+    return {
+        'STORE_DIR': str(Path(config['data_dir']) / 'store'),
+        'MODELS_DIR': config['models_dir'],
+        'PREDICTION_CACHE_PATH': str(Path(work_dir) / 'cache.sqlite3'),
+        'COMPILED_ARRAYS_DIR': str(Path(work_dir) / 'compiled'),
+        'MODEL_WATCH_INTERVAL': '3600'
+    }
+
+
+def run_http(config):
+    # As variáveis da aplicação já vêm do processo pai
+    import app as app_module
+
+    local = threading.local()
+
+    def send(method, path, payload):
+        if not hasattr(local, 'client'):
+            local.client = app_module.app.test_client()
+        return local.client.open(path, method=method, json=payload).status_code
+
+    cases = {name: run_load(send, requests, config['concurrency'])
+             for name, requests in load_scenarios(config).items()}
+    cases['memory'] = {'rss_mb': current_rss_mb(), 'peak_rss_mb': peak_rss_mb()}
+    return cases
+
+
+def run_gunicorn(config, work_dir):
+    master, base_url, ready_seconds = start_gunicorn(config['workers'], config['timeout'],
+                                                     **app_environment(config, work_dir))
+
+    def send(method, path, payload):
+        try:
+            request(f'{base_url}{path}', payload, timeout=60)
+            return 200
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    try:
+        cases = {name: run_load(send, requests, config['concurrency'])
+                 for name, requests in load_scenarios(config).items()}
+        processes = [memory_kb(pid) for pid in [master.pid] + child_pids(master.pid)]
+        cases['memory'] = {
+            'rss_mb': sum(process['rss'] for process in processes) / 1024,
+            'pss_mb': sum(process['pss'] for process in processes) / 1024
+        }
+        cases['startup'] = {'ready_seconds': ready_seconds}
+        return cases
+    finally:
+        stop_gunicorn(master)
+
+
+def run_section(section, config):
+    """Executa a seção em um subprocesso e devolve o resultado impresso por ele"""
+    work_dir = tempfile.mkdtemp(prefix=f'suite-{section}-')
+    try:
+        env = dict(os.environ, **app_environment(config, work_dir))
+        command = [sys.executable, __file__, '--child', section, '--config', json.dumps(config)]
+        output = subprocess.run(command, check=True, capture_output=True, text=True, env=env).stdout
+        return json.loads(output.strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def flatten(results):
+    """{seção.caso.métrica: valor} das métricas comparáveis"""
+    return {
+        f'{section}.{case}.{metric}': value
+        for section, cases in results.items()
+        for case, metrics in cases.items()
+        for metric, value in metrics.items()
+        if metric in LOWER_IS_BETTER or metric in HIGHER_IS_BETTER
+    }
+
+
+def compare(baseline, current, threshold):
+    """Variação relativa de cada métrica presente nos dois relatórios; lista as regressões"""
+    before, after = flatten(baseline['results']), flatten(current['results'])
+    rows, regressions = [], []
+    for key in sorted(before.keys() & after.keys()):
+        if not before[key]:
+            continue
+        change = (after[key] - before[key]) / before[key]
+        worse = change if key.rsplit('.', 1)[1] in LOWER_IS_BETTER else -change
+        rows.append((key, before[key], after[key], change))
+        if worse > threshold:
+            regressions.append(key)
+    return rows, regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def prepare_data(data_dir, scale, seed, cv_words):
+    """Gera o dataset sintético e o armazenamento colunar, a menos que já existam em `data_dir`"""
+    from ingest import build_store
+
+    store_dir = Path(data_dir) / 'store'
+    if not (store_dir / STORE_MANIFEST).exists():
+        generate(data_dir, scale=scale, seed=seed, cv_words=cv_words)
+        build_store(data_dir, store_dir)
+    with open(store_dir / STORE_MANIFEST, 'r', encoding='utf-8') as f:
+        sources = json.load(f)['sources']
+    return {name: source['rows'] for name, source in sources.items()}
+
+
+def print_cases(section, cases):
+    for name, metrics in cases.items():
+        if 'p50_ms' in metrics:
+            print(f"{section:<9} {name:<26} p50 {metrics['p50_ms']:9.3f} ms  p95 {metrics['p95_ms']:9.3f} ms  "
+                  f"p99 {metrics['p99_ms']:9.3f} ms  {metrics['throughput_rps']:9.1f} req/s"
+                  + (f"  {metrics['errors']} erro(s)" if metrics.get('errors') else ''))
+        else:
+            print(f"{section:<9} {name:<26} " + '  '.join(f'{key} {value:.1f}' for key, value in metrics.items()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Suíte de benchmarks com dados sintéticos')
+    parser.add_argument('--sections', nargs='+', default=SECTIONS, choices=SECTIONS)
+    parser.add_argument('--data-dir', help='Dataset sintético (reaproveitado se já tiver store/; padrão: temporário)')
+    parser.add_argument('--models-dir', default=os.environ.get('MODELS_DIR', str(APP_DIR / 'models')))
+    parser.add_argument('--scale', type=float, default=0.05, help='Fração do tamanho do dataset do datathon')
+    parser.add_argument('--cv-words', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--samples', type=int, default=500, help='Chamadas de uma linha por microbenchmark')
+    parser.add_argument('--batch-rows', type=int, default=2000, help='Linhas dos microbenchmarks em lote')
+    parser.add_argument('--repeat', type=int, default=10, help='Repetições dos microbenchmarks em lote')
+    parser.add_argument('--requests', type=int, default=1000, help='Requisições do cenário predict')
+    parser.add_argument('--batch-size', type=int, default=50, help='Pares por requisição de predict_batch')
+    parser.add_argument('--concurrency', type=int, default=4, help='Clientes simultâneos')
+    parser.add_argument('--workers', type=int, default=2, help='Workers do gunicorn')
+    parser.add_argument('--timeout', type=float, default=300, help='Tempo limite de inicialização do gunicorn (s)')
+    parser.add_argument('--output', help='Arquivo JSON com o relatório')
+    parser.add_argument('--compare', help='Relatório anterior para comparar')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Piora relativa tolerada na comparação')
+    parser.add_argument('--child', choices=SECTIONS, help=argparse.SUPPRESS)
+    parser.add_argument('--config', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        config = json.loads(args.config)
+        if args.child == 'micro':
+            cases = run_micro(config)
+        elif args.child == 'http':
+            cases = run_http(config)
+        else:
+            with tempfile.TemporaryDirectory(prefix='suite-gunicorn-') as work_dir:
+                cases = run_gunicorn(config, work_dir)
+        print(json.dumps(cases))
+        return 0
+
+    temporary = args.data_dir is None
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix='suite-data-')
+    try:
+        rows = prepare_data(data_dir, args.scale, args.seed, args.cv_words)
+        config = {
+            'data_dir': str(Path(data_dir).resolve()), 'models_dir': str(Path(args.models_dir).resolve()),
+            'vagas': rows['vagas'], 'applicants': rows['applicants'], 'seed': args.seed,
+            'samples': args.samples, 'batch_rows': args.batch_rows, 'repeat': args.repeat,
+            'requests': args.requests, 'batch_size': args.batch_size, 'concurrency': args.concurrency,
+            'workers': args.workers, 'timeout': args.timeout
+        }
+        results = {}
+        for section in args.sections:
+            print(f"⏱️ Seção {section}...")
+            results[section] = run_section(section, config)
+            print_cases(section, results[section])
+    finally:
+        if temporary:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    report = {
+        'benchmark': 'suite',
+        'commit': git_commit(),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count(),
+                        'inference_engine': os.environ.get('INFERENCE_ENGINE', 'compiled')},
+        'config': {key: value for key, value in config.items() if key not in ('data_dir', 'models_dir')},
+        'dataset': {'scale': args.scale, 'cv_words': args.cv_words, 'rows': rows},
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        comparison, regressions = compare(baseline, report, args.threshold)
+        print(f"\nComparação com {args.compare} (commit {baseline.get('commit')}):")
+        for key, before, after, change in comparison:
+            flag = '  ⚠️' if key in regressions else ''
+            print(f"{key:<52} {before:12.3f} -> {after:12.3f}  {change:+7.1%}{flag}")
+        if regressions:
+            print(f"❌ {len(regressions)} métrica(s) piorou(aram) mais de {args.threshold:.0%}")
+            return 1
+        print("✅ Nenhuma regressão acima do limite")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
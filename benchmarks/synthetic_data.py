@@ -0,0 +1,181 @@
+"""Gerador de dados sintéticos no esquema aninhado de vagas/applicants/prospects.
+
+Os dados reais ficam no Git LFS; este gerador grava vagas.json,
+applicants.json e prospects.json com a mesma estrutura (campos usados por
+data_store.normalize_*, mais texto livre como cv_pt para o custo de parse ser
+realista) em qualquer escala. `--scale 1` corresponde à ordem de grandeza do
+dataset do datathon (~14 mil vagas, ~42 mil candidatos). A saída depende só
+de `--seed` e das quantidades, então execuções em commits diferentes medem
+os mesmos dados.
+
+Uso:
+    python benchmarks/synthetic_data.py --scale 0.1 --output-dir data/synthetic --build-store
+"""
+import sys
+import json
+import random
+import argparse
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent / 'app'
+sys.path.insert(0, str(APP_DIR))
+
+from data_store import normalize_vaga, normalize_applicant
+from bench_features import TECHS, ACADEMICO, INGLES, AREAS
+
+# Quantidades com --scale 1
+FULL_SCALE = {'vagas': 14000, 'applicants': 42000}
+MAX_PROSPECTS_PER_VAGA = 8
+
+NIVEIS_PROFISSIONAIS = ['Júnior', 'Pleno', 'Sênior', 'Especialista', 'Analista', '']
+CONTRATACOES = ['CLT Full', 'PJ/Autônomo', 'Cooperado', 'CLT Full, PJ/Autônomo', '']
+CLIENTES = ['Morris, Moran and Dodson', 'Gonzalez and Sons', 'Miller-Curry', 'Barnes-Woods', 'Nelson-Page']
+SITUACOES = ['Contratado pela Decision', 'Contratado como Hunting', 'Não Aprovado pelo Cliente',
+             'Não Aprovado pelo RH', 'Encaminhado ao Requisitante', 'Prospect', 'Desistiu']
+SOFT_SKILLS = ['comunicação', 'trabalho em equipe', 'proatividade', 'liderança', 'inglês técnico',
+               'metodologias ágeis', 'resolução de problemas', 'organização']
+WORDS = ['experiência', 'projetos', 'desenvolvimento', 'sistemas', 'clientes', 'equipe', 'análise',
+         'implantação', 'suporte', 'requisitos', 'integração', 'banco', 'dados', 'processos', 'gestão']
+
+
+def _text(rnd, n_words, vocabulary=WORDS):
+    return ' '.join(rnd.choice(vocabulary) for _ in range(n_words))
+
+
+def make_vaga(rnd, index):
+    tech = rnd.choice(TECHS)
+    return {
+        'informacoes_basicas': {
+            'titulo_vaga': f"{rnd.choice(['Desenvolvedor', 'Analista', 'Consultor', 'Arquiteto'])} {tech.title()}",
+            'cliente': rnd.choice(CLIENTES),
+            'tipo_contratacao': rnd.choice(CONTRATACOES),
+            'vaga_sap': rnd.choice(['Sim', 'Não'])
+        },
+        'perfil_vaga': {
+            'competencia_tecnicas_e_comportamentais': ', '.join(
+                [tech] + rnd.sample(TECHS, rnd.randint(2, 7)) + rnd.sample(SOFT_SKILLS, rnd.randint(0, 3))),
+            'nivel_academico': rnd.choice(ACADEMICO),
+            'nivel_ingles': rnd.choice(INGLES),
+            'nivel_profissional': rnd.choice(NIVEIS_PROFISSIONAIS),
+            'areas_atuacao': rnd.choice(AREAS),
+            'principais_atividades': _text(rnd, rnd.randint(20, 80))
+        }
+    }
+
+
+def make_applicant(rnd, index, cv_words, cv_rnd):
+    return {
+        'infos_basicas': {
+            'nome': f'Candidato {index}',
+            'codigo_profissional': str(index),
+            'email': f'candidato{index}@example.com'
+        },
+        'informacoes_profissionais': {
+            'titulo_profissional': f'{rnd.choice(NIVEIS_PROFISSIONAIS)} {rnd.choice(TECHS)}'.strip(),
+            'area_atuacao': rnd.choice(AREAS),
+            'conhecimentos_tecnicos': ', '.join(rnd.sample(TECHS, rnd.randint(0, 10))),
+            'nivel_profissional': rnd.choice(NIVEIS_PROFISSIONAIS)
+        },
+        'formacao_e_idiomas': {
+            'nivel_academico': rnd.choice(ACADEMICO),
+            'nivel_ingles': rnd.choice(INGLES)
+        },
+        'cv_pt': _text(cv_rnd, cv_rnd.randint(cv_words // 2, cv_words * 3 // 2), WORDS + TECHS) if cv_words else ''
+    }
+
+
+def make_prospects(rnd, titulo, n_applicants):
+    return {
+        'titulo': titulo,
+        'modalidade': '',
+        'prospects': [
+            {
+                'nome': f'Candidato {codigo}',
+                'codigo': str(codigo),
+                'situacao_candidado': rnd.choice(SITUACOES)
+            }
+            for codigo in rnd.sample(range(n_applicants), min(n_applicants, rnd.randint(0, MAX_PROSPECTS_PER_VAGA)))
+        ]
+    }
+
+
+def iter_vagas(n_vagas, seed=0):
+    rnd = random.Random(f'vagas-{seed}')
+    for index in range(n_vagas):
+        yield str(index), make_vaga(rnd, index)
+
+
+def iter_applicants(n_applicants, seed=0, cv_words=300):
+    # O texto do CV tem gerador próprio: os campos das features não dependem de cv_words
+    rnd, cv_rnd = random.Random(f'applicants-{seed}'), random.Random(f'cv-{seed}')
+    for index in range(n_applicants):
+        yield str(index), make_applicant(rnd, index, cv_words, cv_rnd)
+
+
+def iter_prospects(n_vagas, n_applicants, seed=0):
+    rnd = random.Random(f'prospects-{seed}')
+    for codigo, vaga in iter_vagas(n_vagas, seed):
+        yield codigo, make_prospects(rnd, vaga['informacoes_basicas']['titulo_vaga'], n_applicants)
+
+
+def write_json_object(path, items):
+    """Grava {código: registro} em streaming, com a indentação dos dumps originais"""
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{')
+        for codigo, record in items:
+            body = json.dumps(record, ensure_ascii=False, indent=4).replace('\n', '\n    ')
+            f.write(f"{',' if count else ''}\n    {json.dumps(codigo)}: {body}")
+            count += 1
+        f.write('\n}' if count else '}')
+    return count
+
+
+def sizes_for_scale(scale, n_vagas=None, n_applicants=None):
+    return (n_vagas if n_vagas is not None else max(1, round(FULL_SCALE['vagas'] * scale)),
+            n_applicants if n_applicants is not None else max(1, round(FULL_SCALE['applicants'] * scale)))
+
+
+def generate(output_dir, scale=0.1, n_vagas=None, n_applicants=None, seed=0, cv_words=300):
+    """Grava os três arquivos em `output_dir` e devolve as linhas de cada um"""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    n_vagas, n_applicants = sizes_for_scale(scale, n_vagas, n_applicants)
+    return {
+        'vagas': write_json_object(output_dir / 'vagas.json', iter_vagas(n_vagas, seed)),
+        'applicants': write_json_object(output_dir / 'applicants.json',
+                                        iter_applicants(n_applicants, seed, cv_words)),
+        'prospects': write_json_object(output_dir / 'prospects.json', iter_prospects(n_vagas, n_applicants, seed))
+    }
+
+
+def make_api_pairs(n_pairs, n_vagas, n_applicants, seed=0):
+    """Pares vaga/candidato no formato de /api/predict, sorteados dos mesmos registros sintéticos"""
+    rnd = random.Random(f'pairs-{seed}')
+    vagas = [normalize_vaga(vaga) for _, vaga in iter_vagas(n_vagas, seed)]
+    applicants = [normalize_applicant(applicant) for _, applicant in iter_applicants(n_applicants, seed, cv_words=0)]
+    return [(rnd.choice(vagas), rnd.choice(applicants)) for _ in range(n_pairs)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Gera vagas/applicants/prospects sintéticos')
+    parser.add_argument('--output-dir', default='data/synthetic')
+    parser.add_argument('--scale', type=float, default=0.1, help='Fração do tamanho do dataset do datathon')
+    parser.add_argument('--vagas', type=int, help='Número de vagas (sobrepõe --scale)')
+    parser.add_argument('--applicants', type=int, help='Número de candidatos (sobrepõe --scale)')
+    parser.add_argument('--cv-words', type=int, default=300, help='Palavras médias do cv_pt de cada candidato')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--build-store', action='store_true', help='Gera também o armazenamento colunar')
+    args = parser.parse_args(argv)
+
+    print(f"🧪 Gerando dados sintéticos em {args.output_dir}...")
+    rows = generate(args.output_dir, args.scale, args.vagas, args.applicants, args.seed, args.cv_words)
+    print("✅ " + ', '.join(f"{name}: {count:,}" for name, count in rows.items()))
+    if args.build_store:
+        from ingest import build_store
+        build_store(args.output_dir, Path(args.output_dir) / 'store')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
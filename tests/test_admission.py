@@ -0,0 +1,96 @@
+import pytest
+import sys
+import os
+
+# Adicionar o diretório da aplicação ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from admission import AdmissionController, queue_seconds
+
+class TestQueueSeconds:
+    """Espera na fila a partir do cabeçalho X-Request-Start."""
+
+    @pytest.mark.parametrize("header", ['t=1700000000.250', '1700000000.250', 't=1700000000250', 't=1700000000250000'])
+    def test_units(self, header):
+        """Segundos (nginx ${msec}), milissegundos e microssegundos."""
+        assert queue_seconds(header, now=1700000001.0) == pytest.approx(0.75)
+
+    @pytest.mark.parametrize("header", [None, '', 't=abc', 't=1700000002.0'])
+    def test_missing_invalid_or_future(self, header):
+        """Ausente, inválido ou no futuro (relógios fora de sincronia) conta como sem espera."""
+        assert queue_seconds(header, now=1700000001.0) == 0.0
+
+class TestAdmissionController:
+    """Decisão de admissão por worker."""
+
+    def test_sheds_when_estimate_exceeds_budget(self):
+        """Requisições em andamento e espera na fila entram na estimativa."""
+        controller = AdmissionController(latency_budget=0.1)
+        controller.service_time = 0.03
+        assert controller.admit() is None
+        assert controller.admit() is None
+        assert controller.admit() is None
+        assert controller.in_flight == 3
+        # 4 x 30 ms > 100 ms
+        assert controller.admit() == ('latency_budget', 1)
+        assert controller.in_flight == 3
+
+        controller.release(0.03)
+        controller.release(0.03)
+        controller.release(0.03)
+        assert controller.admit(queued=0.05) is None
+        controller.release(0.03)
+        assert controller.admit(queued=2.5) == ('latency_budget', 3)
+
+    def test_idle_worker_admits_within_budget(self):
+        """Um tempo de serviço acima do orçamento não bloqueia um worker ocioso."""
+        controller = AdmissionController(latency_budget=0.1)
+        controller.service_time = 0.5
+        assert controller.admit(queued=0.05) is None
+        controller.release(0.02)
+        assert controller.service_time == pytest.approx(0.5 + 0.2 * (0.02 - 0.5))
+        assert controller.admit(queued=0.2) is not None
+
+    def test_idle_sync_worker_sheds_on_queue_plus_service(self):
+        """Sem requisições em andamento (worker síncrono), espera na fila + tempo de serviço decidem."""
+        controller = AdmissionController(latency_budget=0.1)
+        controller.service_time = 0.03
+        assert controller.admit(queued=0.06) is None
+        controller.release(0.03)
+        assert controller.in_flight == 0
+        assert controller.admit(queued=0.08) == ('latency_budget', 1)
+
+    def test_batches_weighted_by_items(self):
+        """Lotes têm tempo de serviço próprio, por item, e pesam pelo número de itens."""
+        controller = AdmissionController(latency_budget=0.1, smoothing=1.0)
+        controller.service_time = 0.01
+        assert controller.admit(kind='batch', units=100) is None
+        controller.release(0.05, kind='batch', units=100)
+        assert controller.service_times['batch'] == pytest.approx(0.0005)
+        assert controller.service_time == 0.01
+        assert controller.admit(kind='batch', units=100) is None
+        assert controller.estimate() == pytest.approx(0.05 + 0.01)
+        # 100 itens em andamento (50 ms) + 150 itens (75 ms) > 100 ms
+        assert controller.admit(kind='batch', units=150) == ('latency_budget', 1)
+        assert controller.admit() is None
+        assert controller.in_flight == 2 and controller.in_flight_units == {'batch': 100, 'predict': 1}
+
+    def test_service_time_moving_average(self):
+        """A primeira medida inicializa a média; as seguintes são suavizadas."""
+        controller = AdmissionController(latency_budget=1.0, smoothing=0.5)
+        controller.admit()
+        controller.release(0.02)
+        assert controller.service_time == 0.02
+        controller.admit()
+        controller.release(0.04)
+        assert controller.service_time == pytest.approx(0.03)
+
+    def test_max_in_flight(self):
+        """O limite de simultâneas vale mesmo com orçamento sobrando."""
+        controller = AdmissionController(latency_budget=10.0, max_in_flight=2)
+        assert controller.admit() is None
+        assert controller.admit() is None
+        assert controller.admit() == ('max_in_flight', 1)
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -84,6 +84,18 @@ class TestFlaskRoutes:
         data = response.get_json()
         assert data['status'] == 'healthy'
         assert data['model_loaded'] is True
+        assert data['inference_engine'] in ('compiled', 'sklearn')
+        assert data['topology']['inference_threads'] >= 1
+        assert data['topology']['cpus'] >= 1
+
+    def test_startup_phases_exported(self, client):
+        """As fases da inicialização aparecem em /metrics e o aquecimento pode ser repetido por worker."""
+        import app as app_module
+        elapsed = app_module.warm_up()
+        assert elapsed is None or elapsed >= 0
+        response = client.get('/metrics')
+        assert response.status_code == 200
+        assert b'hired_model_startup_phase_seconds{phase="import"}' in response.data
 
     def test_index_route(self, client):
         """Testa a rota principal."""
@@ -118,5 +130,474 @@ class TestFlaskRoutes:
         assert 'error' in data
         assert 'Campos obrigatórios' in data['error'] or 'Dados da vaga e candidato são obrigatórios' in data['error']
 
+class TestBatchPrediction:
+    """Testes para o endpoint de predição em lote."""
+
+    def test_batch_preserves_order_and_item_errors(self, client, sample_vaga, sample_candidate):
+        """Itens inválidos retornam erro individual sem afetar os demais."""
+        payload = {"items": [
+            {"vaga": sample_vaga, "candidato": sample_candidate},
+            {"vaga": {}, "candidato": sample_candidate},
+            {"vaga": sample_vaga, "candidato": sample_candidate},
+        ]}
+        response = client.post('/api/predict/batch', json=payload)
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['count'] == 3
+        assert data['errors'] == 1
+        assert [r['index'] for r in data['results']] == [0, 1, 2]
+        assert 'error' in data['results'][1]
+        assert data['results'][0]['quality_score'] == data['results'][2]['quality_score']
+
+    def test_batch_malformed_items_fail_individually(self, client, sample_vaga, sample_candidate):
+        """Vaga/candidato que não são objetos e features diretas sem as colunas do modelo viram erros por item."""
+        import app as app_module
+        pair = {"vaga": sample_vaga, "candidato": sample_candidate}
+        direct_legacy = {field: 1 for field in app_module.DIRECT_REQUIRED_FIELDS}
+        payload = {"items": [
+            pair,
+            {"vaga": "x", "candidato": sample_candidate},
+            {"vaga": sample_vaga, "candidato": ["python"]},
+            direct_legacy,
+        ]}
+        response = client.post('/api/predict/batch', json=payload)
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['errors'] == 3
+        assert 'quality_score' in data['results'][0]
+        assert 'objetos JSON' in data['results'][1]['error'] and 'objetos JSON' in data['results'][2]['error']
+        assert 'tech_success_score' in data['results'][3]['error']
+
+        single = client.post('/api/predict', json=direct_legacy)
+        assert single.status_code == 400 and 'tech_success_score' in single.get_json()['error']
+        assert client.post('/api/predict', json={"vaga": "x", "candidato": sample_candidate}).status_code == 400
+
+    def test_batch_failing_item_isolated(self, client, sample_vaga, sample_candidate, monkeypatch):
+        """Item que faz a passada do lote falhar recebe o erro; os demais são pontuados."""
+        import app as app_module
+        original = app_module.prepare_hired_candidates_features_batch
+
+        def prepare(pairs):
+            if any(candidato.get('conhecimentos_tecnicos') == 'quebra' for _, candidato in pairs):
+                raise ValueError('candidato inválido')
+            return original(pairs)
+
+        monkeypatch.setattr(app_module, 'prediction_cache', None)
+        monkeypatch.setattr(app_module, 'prepare_hired_candidates_features_batch', prepare)
+        bad = dict(sample_candidate, conhecimentos_tecnicos='quebra')
+        items = [{"vaga": sample_vaga, "candidato": sample_candidate}, {"vaga": sample_vaga, "candidato": bad}]
+        data = client.post('/api/predict/batch', json={"items": items}).get_json()
+        assert data['errors'] == 1
+        assert 'quality_score' in data['results'][0]
+        assert data['results'][1]['error'] == 'candidato inválido'
+
+    def test_batch_matches_single_prediction(self, client, sample_vaga, sample_candidate):
+        """O resultado em lote é igual ao do endpoint individual."""
+        pair = {"vaga": sample_vaga, "candidato": sample_candidate}
+        single = client.post('/api/predict', json=pair).get_json()
+        batch = client.post('/api/predict/batch', json={"items": [pair]}).get_json()
+        item = batch['results'][0]
+        assert item['prediction'] == single['prediction']
+        assert item['probability'] == single['probability']
+
+    def test_parallel_batch_matches_single_thread(self, client, sample_vaga, sample_candidate, monkeypatch):
+        """Lotes acima de parallel_min_rows usam as threads de inferência com o mesmo resultado."""
+        import app as app_module
+        from topology import Topology
+        from prometheus_client import REGISTRY
+        monkeypatch.setattr(app_module, 'prediction_cache', None)
+        items = [{"vaga": sample_vaga, "candidato": dict(sample_candidate, conhecimentos_tecnicos=tech)}
+                 for tech in ("python", "java spring", "sql", "excel", "", "python django sql docker")]
+        expected = client.post('/api/predict/batch', json={"items": items}).get_json()['results']
+        monkeypatch.setattr(app_module, 'topology', Topology(4, workers=1, parallel_min_rows=2))
+        before = REGISTRY.get_sample_value('hired_model_inference_calls_total', {'mode': 'parallel'}) or 0.0
+        assert client.post('/api/predict/batch', json={"items": items}).get_json()['results'] == expected
+        assert REGISTRY.get_sample_value('hired_model_inference_calls_total', {'mode': 'parallel'}) == before + 1
+        client.post('/api/predict', json={"vaga": sample_vaga, "candidato": sample_candidate})
+        assert REGISTRY.get_sample_value('hired_model_inference_calls_total', {'mode': 'parallel'}) == before + 1
+
+    def test_batch_size_limit(self, client, sample_vaga, sample_candidate, monkeypatch):
+        """Lotes acima do limite configurado são rejeitados."""
+        import app as app_module
+        monkeypatch.setattr(app_module, 'MAX_BATCH_SIZE', 2)
+        pair = {"vaga": sample_vaga, "candidato": sample_candidate}
+        response = client.post('/api/predict/batch', json={"items": [pair] * 3})
+        assert response.status_code == 413
+
+    def test_batch_requires_items(self, client):
+        """Payload sem itens retorna 400."""
+        response = client.post('/api/predict/batch', json={"items": []})
+        assert response.status_code == 400
+
+def encoding_count(endpoint, schema, encoding):
+    from prometheus_client import REGISTRY
+    labels = {'endpoint': endpoint, 'schema': schema, 'encoding': encoding}
+    return REGISTRY.get_sample_value('hired_model_response_bytes_per_row_count', labels) or 0.0
+
+class TestResponseEncoding:
+    """Esquema compacto, respostas NDJSON e métricas de codificação."""
+
+    def test_compact_schema_has_only_numbers(self, client, sample_vaga, sample_candidate):
+        """?schema=compact traz os mesmos valores da resposta completa, sem textos formatados."""
+        payload = {"vaga": sample_vaga, "candidato": sample_candidate}
+        full = client.post('/api/predict', json=payload).get_json()
+        count = encoding_count('predict', 'compact', 'json')
+        compact = client.post('/api/predict?schema=compact', json=payload).get_json()
+        assert set(compact) == {'prediction', 'probability', 'tech_success_score', 'academic_success_score',
+                                'english_success_score'}
+        assert all(isinstance(value, (int, float)) for value in compact.values())
+        assert compact['prediction'] == full['prediction']
+        assert compact['probability'] == full['probability']['high_quality']
+        assert encoding_count('predict', 'compact', 'json') == count + 1
+
+    def test_invalid_schema(self, client, sample_vaga, sample_candidate):
+        """Esquema desconhecido retorna 400."""
+        response = client.post('/api/predict?schema=xml', json={"vaga": sample_vaga, "candidato": sample_candidate})
+        assert response.status_code == 400
+
+    def test_ndjson_batch_matches_json(self, client, sample_vaga, sample_candidate, monkeypatch):
+        """Em NDJSON cada item vira uma linha, em ordem e com os mesmos resultados do JSON."""
+        import app as app_module
+        monkeypatch.setattr(app_module, 'STREAM_CHUNK_SIZE', 2)
+        other_candidate = {**sample_candidate, "conhecimentos_tecnicos": "Excel"}
+        payload = {"items": [
+            {"vaga": sample_vaga, "candidato": sample_candidate},
+            {"vaga": {}, "candidato": sample_candidate},
+            {"vaga": sample_vaga, "candidato": other_candidate},
+            {"vaga": sample_vaga, "candidato": sample_candidate},
+            {"vaga": sample_vaga, "candidato": other_candidate}
+        ]}
+        expected = client.post('/api/predict/batch?schema=compact', json=payload).get_json()['results']
+        count = encoding_count('batch', 'compact', 'ndjson')
+        response = client.post('/api/predict/batch?schema=compact', json=payload,
+                               headers={'Accept': 'application/x-ndjson'})
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        lines = response.get_data(as_text=True).splitlines()
+        assert [json.loads(line) for line in lines] == expected
+        assert 'error' in expected[1]
+        # Um bloco de STREAM_CHUNK_SIZE itens por vez
+        assert encoding_count('batch', 'compact', 'ndjson') == count + 3
+
+    def test_ndjson_batch_is_streamed(self, client, sample_vaga, sample_candidate, monkeypatch):
+        """As primeiras linhas saem antes de o lote inteiro ser pontuado."""
+        import app as app_module
+        monkeypatch.setattr(app_module, 'STREAM_CHUNK_SIZE', 1)
+        payload = {"items": [{"vaga": sample_vaga, "candidato": sample_candidate}] * 3}
+        response = client.post('/api/predict/batch', json=payload, headers={'Accept': 'application/x-ndjson'},
+                               buffered=False)
+        chunks = response.response
+        first = next(iter(chunks))
+        assert json.loads(first)['index'] == 0
+        assert json.loads(first)['prediction_text']
+        response.close()
+
+@pytest.fixture
+def isolated_cache(tmp_path, monkeypatch):
+    """Fixture que troca o cache compartilhado por um arquivo temporário"""
+    import app as app_module
+    from prediction_cache import PredictionCache
+    cache = PredictionCache(tmp_path / "cache.sqlite3", on_evict=app_module.count_cache_evictions)
+    monkeypatch.setattr(app_module, 'prediction_cache', cache)
+    return cache
+
+def cache_counter(name):
+    from prometheus_client import REGISTRY
+    return REGISTRY.get_sample_value(f'hired_model_prediction_cache_{name}_total') or 0.0
+
+class TestPredictionCacheIntegration:
+    """Testes do cache de predições nos endpoints."""
+
+    def test_repeated_pair_is_served_from_cache(self, client, isolated_cache, sample_vaga, sample_candidate):
+        """A segunda chamada com o mesmo par é um hit e retorna a mesma resposta."""
+        payload = {"vaga": sample_vaga, "candidato": sample_candidate}
+        hits, misses = cache_counter('hits'), cache_counter('misses')
+        first = client.post('/api/predict', json=payload).get_json()
+        second = client.post('/api/predict', json=payload).get_json()
+        assert first == second
+        assert cache_counter('misses') == misses + 1
+        assert cache_counter('hits') == hits + 1
+        assert isolated_cache.stats()['entries'] == 1
+
+    def test_batch_uses_entries_from_single_calls(self, client, isolated_cache, sample_vaga, sample_candidate):
+        """Pares já pontuados não são recalculados no lote e a resposta não muda."""
+        single = client.post('/api/predict', json={"vaga": sample_vaga, "candidato": sample_candidate}).get_json()
+        other_candidate = {**sample_candidate, "conhecimentos_tecnicos": "Excel"}
+        hits = cache_counter('hits')
+        response = client.post('/api/predict/batch', json={"items": [
+            {"vaga": sample_vaga, "candidato": sample_candidate},
+            {"vaga": sample_vaga, "candidato": other_candidate}
+        ]})
+        results = response.get_json()['results']
+        assert cache_counter('hits') == hits + 1
+        assert {k: v for k, v in results[0].items() if k != 'index'} == single
+        assert isolated_cache.stats()['entries'] == 2
+
+    def test_model_version_invalidates(self, client, isolated_cache, sample_vaga, sample_candidate, monkeypatch):
+        """Outra versão de modelo não reaproveita entradas antigas."""
+        import app as app_module
+        payload = {"vaga": sample_vaga, "candidato": sample_candidate}
+        client.post('/api/predict', json=payload)
+        monkeypatch.setattr(app_module.model_registry.active, 'fingerprint', 'outra-versao')
+        misses = cache_counter('misses')
+        client.post('/api/predict', json=payload)
+        assert cache_counter('misses') == misses + 1
+
+class TestMicroBatchingIntegration:
+    """Micro-batching no contrato existente de /api/predict."""
+
+    def test_batched_predict_matches_direct(self, client, isolated_cache, sample_vaga, sample_candidate, monkeypatch):
+        """Com o micro-batching ligado, a resposta é a mesma e as métricas de fila são registradas."""
+        import app as app_module
+        from micro_batcher import MicroBatcher
+        from prometheus_client import REGISTRY
+        payload = {"vaga": sample_vaga, "candidato": sample_candidate}
+        direct = client.post('/api/predict', json=payload).get_json()
+        isolated_cache.clear()
+        monkeypatch.setattr(app_module, 'micro_batcher',
+                            MicroBatcher(8, 0.001, on_batch=app_module.record_micro_batch))
+        batches = REGISTRY.get_sample_value('hired_model_microbatch_size_count') or 0.0
+        response = client.post('/api/predict', json=payload)
+        assert response.status_code == 200
+        assert response.get_json() == direct
+        assert REGISTRY.get_sample_value('hired_model_microbatch_size_count') == batches + 1
+
+class TestAdmissionControl:
+    """Controle de admissão de /api/predict."""
+
+    def test_overloaded_worker_sheds_with_retry_after(self, client, sample_vaga, sample_candidate, monkeypatch):
+        """Requisição que espera na fila além do orçamento recebe 429; /health continua respondendo."""
+        import time
+        import app as app_module
+        from admission import AdmissionController
+        from prometheus_client import REGISTRY
+        controller = AdmissionController(latency_budget=0.5)
+        monkeypatch.setattr(app_module, 'admission', controller)
+        payload = {"vaga": sample_vaga, "candidato": sample_candidate}
+
+        response = client.post('/api/predict', json=payload, headers={'X-Request-Start': f't={time.time():.3f}'})
+        assert response.status_code == 200
+        assert controller.in_flight == 0 and controller.service_time > 0
+
+        shed = REGISTRY.get_sample_value('hired_model_admission_shed_total', {'reason': 'latency_budget'}) or 0.0
+        late = f't={time.time() - 2.7:.3f}'
+        response = client.post('/api/predict', json=payload, headers={'X-Request-Start': late})
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == '3'
+        assert response.get_json()['retry_after'] == 3
+        assert REGISTRY.get_sample_value('hired_model_admission_shed_total', {'reason': 'latency_budget'}) == shed + 1
+        assert controller.in_flight == 0
+
+        health = client.get('/health', headers={'X-Request-Start': late})
+        assert health.status_code == 200
+        assert health.get_json()['admission']['latency_budget_ms'] == 500
+
+    def test_max_in_flight(self, client, sample_vaga, sample_candidate, monkeypatch):
+        """Com o limite de requisições simultâneas atingido, a predição é recusada."""
+        import app as app_module
+        from admission import AdmissionController
+        controller = AdmissionController(latency_budget=10, max_in_flight=1)
+        controller.in_flight = 1
+        monkeypatch.setattr(app_module, 'admission', controller)
+        response = client.post('/api/predict', json={"vaga": sample_vaga, "candidato": sample_candidate})
+        assert response.status_code == 429
+        assert int(response.headers['Retry-After']) >= 1
+
+    def test_batch_is_admission_controlled(self, client, sample_vaga, sample_candidate, monkeypatch):
+        """O lote passa pelo controle de admissão, pesado pelo número de itens, também em NDJSON."""
+        import time
+        import app as app_module
+        from admission import AdmissionController
+        controller = AdmissionController(latency_budget=0.5)
+        monkeypatch.setattr(app_module, 'admission', controller)
+        payload = {"items": [{"vaga": sample_vaga, "candidato": sample_candidate}] * 4}
+
+        assert client.post('/api/predict/batch', json=payload).status_code == 200
+        assert controller.in_flight == 0 and controller.service_times['batch'] > 0
+        response = client.post('/api/predict/batch', json=payload, headers={'Accept': 'application/x-ndjson'})
+        assert len(response.get_data(as_text=True).splitlines()) == 4
+        response.close()
+        assert controller.in_flight == 0 and controller.in_flight_units['batch'] == 0
+
+        # 200 ms na fila + 4 x 100 ms > 500 ms; com um item, 300 ms
+        controller.service_times['batch'] = 0.1
+        queued = {'X-Request-Start': f't={time.time() - 0.2:.3f}'}
+        assert client.post('/api/predict/batch', json=payload, headers=queued).status_code == 429
+        single = {"items": payload["items"][:1]}
+        assert client.post('/api/predict/batch', json=single, headers=queued).status_code == 200
+
+def ranking_data():
+    """Vagas e candidatos do ranking no formato dos arquivos JSON"""
+    vagas = {
+        "100": {
+            "informacoes_basicas": {"titulo_vaga": "Desenvolvedor Python", "tipo_contratacao": "CLT Full"},
+            "perfil_vaga": {
+                "competencia_tecnicas_e_comportamentais": "python django sql docker",
+                "nivel_academico": "Ensino Superior Completo",
+                "nivel_ingles": "Intermediário",
+                "nivel_profissional": "Sênior",
+                "areas_atuacao": "TI - Desenvolvimento/Programação"
+            }
+        }
+    }
+    applicants = {}
+    conhecimentos = ["python django sql docker", "excel", "java spring", "python flask", "sap abap"]
+    for i in range(25):
+        applicants[str(i)] = {
+            "infos_basicas": {"nome": f"Candidato {i}"},
+            "informacoes_profissionais": {
+                "area_atuacao": "TI - Desenvolvimento" if i % 2 == 0 else "Administrativa",
+                "conhecimentos_tecnicos": conhecimentos[i % len(conhecimentos)]
+            },
+            "formacao_e_idiomas": {
+                "nivel_academico": "Ensino Superior Completo",
+                "nivel_ingles": "Avançado" if i % 3 == 0 else "Básico"
+            }
+        }
+    return vagas, applicants
+
+@pytest.fixture
+def ranking_store(monkeypatch):
+    """Fixture com um DataStore pequeno no formato dos arquivos JSON"""
+    import app as app_module
+    from data_store import DataStore
+    store = DataStore.from_raw(*ranking_data())
+    monkeypatch.setattr(app_module, 'data_store', store)
+    monkeypatch.setattr(app_module, 'RANK_CHUNK_SIZE', 7)
+    app_module.rank_cache_discard()
+    yield store
+    app_module.rank_cache_discard()
+
+class TestRanking:
+    """Testes para o ranking de candidatos por vaga."""
+
+    def test_rank_returns_top_k_sorted(self, client, ranking_store):
+        """O ranking retorna K candidatos ordenados pelo score."""
+        response = client.get('/api/vagas/100/rank?k=5')
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['candidates_scored'] == 25
+        scores = [r['quality_score'] for r in data['results']]
+        assert len(scores) == 5
+        assert scores == sorted(scores, reverse=True)
+
+    def test_rank_matches_full_sort(self, client, ranking_store):
+        """O heap limitado com chunks produz o mesmo top-K de uma ordenação completa."""
+        import app as app_module
+        vaga = ranking_store.get_vaga("100")
+        records = ranking_store.applicant_records(range(ranking_store.n_applicants))
+        features = app_module.prepare_hired_candidates_features_batch((vaga, r) for r in records)
+        scores = app_module.model_registry.active.pipeline.predict_proba(features)[:, 1]
+        expected = sorted(scores, reverse=True)[:8]
+        data = client.get('/api/vagas/100/rank?k=8').get_json()
+        assert [r['probability'] for r in data['results']] == pytest.approx(expected)
+
+    def test_rank_filters_before_scoring(self, client, ranking_store):
+        """Filtros reduzem o conjunto de candidatos avaliados."""
+        data = client.get('/api/vagas/100/rank?k=3&area=desenvolvimento&nivel_ingles=avançado').get_json()
+        assert data['candidates_scored'] == 5
+        assert data['filters'] == {'area': 'desenvolvimento', 'nivel_ingles': 'avançado'}
+
+    def test_rank_reuses_cached_scores(self, client, ranking_store):
+        """Uma varredura completa fica em cache e atende consultas filtradas seguintes."""
+        first = client.get('/api/vagas/100/rank?k=5').get_json()
+        second = client.get('/api/vagas/100/rank?k=5').get_json()
+        filtered = client.get('/api/vagas/100/rank?k=3&area=desenvolvimento').get_json()
+        assert first['cached'] is False
+        assert second['cached'] is True
+        assert second['results'] == first['results']
+        assert filtered['cached'] is True
+        assert filtered['candidates_scored'] == 13
+
+    def test_rank_with_text_vectors_matches(self, client, ranking_store, tmp_path, monkeypatch):
+        """Com o TF-IDF decomposto (contagens por vaga e candidato) o ranking é o mesmo."""
+        import app as app_module
+        model = app_module.model_registry.active
+        expected = client.get('/api/vagas/100/rank?k=25').get_json()['results']
+        app_module.rank_cache_discard()
+        monkeypatch.setattr(app_module, 'COMPILED_ARRAYS_DIR', str(tmp_path))
+        monkeypatch.setattr(model, 'text_vectors',
+                            app_module.load_text_vectors(model.pipeline, model.engine, model.fingerprint))
+        assert model.text_vectors is not None
+        assert client.get('/api/vagas/100/rank?k=25').get_json()['results'] == expected
+
+    def test_rank_picks_up_deltas(self, client, ranking_store, tmp_path, monkeypatch):
+        """Deltas aplicados ao store entram no ranking sem reinício, estendendo a varredura em cache."""
+        import app as app_module
+        from data_store import DataStore
+        from ingest import build_store, apply_delta
+        vagas, applicants = ranking_data()
+        for name, content in {'vagas': vagas, 'applicants': applicants, 'prospects': {}}.items():
+            (tmp_path / f'{name}.json').write_text(json.dumps(content), encoding='utf-8')
+        build_store(tmp_path, tmp_path / 'store')
+        monkeypatch.setattr(app_module, 'data_store', DataStore.load(store_dir=tmp_path / 'store'))
+        before = client.get('/api/vagas/100/rank?k=25').get_json()
+        
+        novo = dict(applicants['0'], infos_basicas={'nome': 'Candidato 25'})
+        delta = {'applicants': {'25': novo, '3': applicants['0']}}
+        (tmp_path / 'delta.json').write_text(json.dumps(delta), encoding='utf-8')
+        apply_delta(tmp_path / 'store', tmp_path / 'delta.json')
+        assert app_module.refresh_data() == {'incremental': True, 'vagas': [], 'applicants': ['25', '3']}
+        assert app_module.refresh_data() is None
+        
+        after = client.get('/api/vagas/100/rank?k=26').get_json()
+        assert after['cached'] is True
+        assert after['candidates_scored'] == 26
+        probabilities = {r['codigo']: r['probability'] for r in after['results']}
+        expected = {r['codigo']: r['probability'] for r in before['results']}
+        expected.update({'25': expected['0'], '3': expected['0']})
+        assert probabilities == pytest.approx(expected)
+        app_module.rank_cache_discard()
+        assert client.get('/api/vagas/100/rank?k=26').get_json()['results'] == after['results']
+
+    def test_rank_cache_concurrent_access(self, ranking_store, monkeypatch):
+        """Leituras, inserções e descartes do cache do ranking em threads diferentes não falham."""
+        import threading
+        import app as app_module
+        monkeypatch.setattr(app_module, 'RANK_CACHE_SIZE', 1)
+        model = app_module.model_registry.active
+        vaga = ranking_store.get_vaga("100")
+        positions = ranking_store.filter_applicants({})
+        expected = app_module.rank_applicants(model, "100", vaga, positions, 5)
+        errors, done = [], threading.Event()
+
+        def rank():
+            try:
+                for _ in range(30):
+                    assert app_module.rank_applicants(model, "100", vaga, positions, 5) == expected
+            except Exception as e:
+                errors.append(e)
+
+        def discard():
+            while not done.is_set():
+                app_module.rank_cache_discard()
+                app_module.rank_cache_put((model.fingerprint, "outra"), expected, ranking_store)
+
+        threads = [threading.Thread(target=rank) for _ in range(4)]
+        cleaner = threading.Thread(target=discard)
+        cleaner.start()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        done.set()
+        cleaner.join()
+        assert errors == []
+
+    def test_rank_scan_of_replaced_store_not_cached(self, ranking_store):
+        """Varredura concluída depois da troca dos dados (refresh_data) não entra no cache."""
+        import app as app_module
+        from data_store import DataStore
+        model = app_module.model_registry.active
+        app_module.data_store = DataStore.from_raw(*ranking_data())
+        app_module.rank_applicants(model, "100", ranking_store.get_vaga("100"),
+                                   ranking_store.filter_applicants({}), 5, store=ranking_store)
+        assert not app_module.rank_cache_contains((model.fingerprint, "100"))
+
+    def test_rank_unknown_vaga(self, client, ranking_store):
+        """Vaga inexistente retorna 404."""
+        response = client.get('/api/vagas/999/rank')
+        assert response.status_code == 404
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
@@ -0,0 +1,114 @@
+import pytest
+import random
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório da aplicação ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from features import (
+    FEATURE_COLUMNS, VAGA_INPUTS, CANDIDATO_INPUTS,
+    build_features_for_pairs, build_training_features, compute_feature_row
+)
+
+# Valores que exercitam os casos de borda da implementação linha a linha
+EDGE_VALUES = [
+    '', ' ', None, float('nan'), 'nan', 'NaN', 0, 1, 3.5, True, False,
+    'Python Java  SQL', 'python, django, postgresql', 'JavaScript React\tAngular',
+    'Ensino Superior Completo', 'Pós Graduação', 'Ensino Médio', 'Mestrado', 'Doutorado',
+    'Básico', 'Intermediário', 'Avançado', 'Fluente', 'Técnico',
+    'CLT Full', 'PJ/Autônomo', 'clt cotas', 'TI - Desenvolvimento', 'Tecnologia', 'Administrativa',
+    'Sênior', 'ÁREA DE TI', 'docker kubernetes aws spring flask', ['lista'], {'a': 1}
+]
+
+
+def random_pairs(n, seed):
+    rnd = random.Random(seed)
+    words = ['python', 'java', 'javascript', 'sql', 'docker', 'sap', 'excel', 'gestão', 'ti', 'Python,', 'AWS']
+    pairs = []
+    for _ in range(n):
+        def value():
+            roll = rnd.random()
+            if roll < 0.4:
+                return rnd.choice(EDGE_VALUES)
+            return ' '.join(rnd.choice(words) for _ in range(rnd.randint(0, 6)))
+        vaga = {field: value() for field in VAGA_INPUTS if rnd.random() > 0.1}
+        candidato = {field: value() for field in CANDIDATO_INPUTS if rnd.random() > 0.1}
+        pairs.append((vaga, candidato))
+    return pairs
+
+
+def reference_frame(pairs):
+    return pd.DataFrame([compute_feature_row(v, c) for v, c in pairs], columns=FEATURE_COLUMNS)
+
+
+class TestVectorizedFeatures:
+    """Equivalência entre o motor vetorizado e a implementação linha a linha."""
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_matches_reference(self, seed):
+        """Pares aleatórios com valores de borda produzem exatamente as mesmas features."""
+        pairs = random_pairs(400, seed)
+        pd.testing.assert_frame_equal(build_features_for_pairs(pairs), reference_frame(pairs))
+
+    def test_single_pair_and_empty_inputs(self):
+        """Um único par vazio segue os valores padrão da referência."""
+        pairs = [({}, {})]
+        result = build_features_for_pairs(pairs)
+        pd.testing.assert_frame_equal(result, reference_frame(pairs))
+        assert result.iloc[0]['combined_text'] == 'não_informado'
+
+    def test_training_frame_matches_serving(self):
+        """O caminho de treinamento (colunas do notebook) gera as mesmas features do serviço."""
+        pairs = random_pairs(200, 42)
+        df = pd.DataFrame({
+            'titulo_vaga': [v.get('titulo_vaga', '') for v, _ in pairs],
+            'competencias_tecnicas': [v.get('competencias_tecnicas_requeridas', '') for v, _ in pairs],
+            'nivel_academico_vaga': [v.get('nivel_academico', '') for v, _ in pairs],
+            'nivel_ingles_vaga': [v.get('nivel_ingles', '') for v, _ in pairs],
+            'nivel_profissional': [v.get('nivel_profissional', '') for v, _ in pairs],
+            'tipo_contratacao': [v.get('tipo_contratacao', '') for v, _ in pairs],
+            'areas_atuacao': [v.get('areas_atuacao', '') for v, _ in pairs],
+            'conhecimentos_tecnicos': [c.get('conhecimentos_tecnicos', '') for _, c in pairs],
+            'nivel_academico_candidato': [c.get('nivel_academico', '') for _, c in pairs],
+            'nivel_ingles_candidato': [c.get('nivel_ingles', '') for _, c in pairs],
+            'area_atuacao_candidato': [c.get('area_de_atuacao', '') for _, c in pairs],
+        }, dtype=object)
+        pd.testing.assert_frame_equal(build_training_features(df), build_features_for_pairs(pairs))
+
+    def test_scalar_vaga_broadcast(self):
+        """Uma vaga escalar aplicada a vários candidatos equivale a repetir a vaga."""
+        from features import compute_features
+        vaga = {'competencias_tecnicas_requeridas': 'python sql', 'tipo_contratacao': 'CLT', 'nivel_ingles': 'Avançado'}
+        candidatos = [{'conhecimentos_tecnicos': 'python'}, {'conhecimentos_tecnicos': 'java sql'}, {}]
+        columns = {field: [c.get(field, '') for c in candidatos] for field in CANDIDATO_INPUTS}
+        result = compute_features(vaga, columns, len(candidatos))
+        pd.testing.assert_frame_equal(result, reference_frame([(vaga, c) for c in candidatos]))
+        assert list(result['tech_success_score']) == pytest.approx([0.6, 0.6, 0.5])
+
+    @pytest.mark.parametrize('seed', [0, 1, 2])
+    def test_applicant_profile_matches_compute_features(self, seed):
+        """O perfil pré-calculado dos candidatos dá as mesmas features dos pares, vaga a vaga."""
+        from features import ApplicantProfile
+        pairs = random_pairs(120, seed)
+        columns = {field: [c.get(field, '') for _, c in pairs] for field in CANDIDATO_INPUTS}
+        profile = ApplicantProfile(columns, len(pairs))
+        # Perfil estendido em duas partes (deltas) equivale ao construído de uma vez
+        half = len(pairs) // 2
+        extended = ApplicantProfile({field: values[:half] for field, values in columns.items()}, half).extend(
+            {field: values[half:] for field, values in columns.items()}, len(pairs) - half)
+        positions = np.array([5, 0, 119, 5, 60, 33])
+        for vaga, _ in pairs[:20]:
+            expected = build_features_for_pairs([(vaga, pairs[i][1]) for i in positions])
+            pd.testing.assert_frame_equal(profile.features(vaga, positions), expected)
+            pd.testing.assert_frame_equal(extended.features(vaga, positions), expected)
+            without_text = profile.features(vaga, positions, combined_text=False)
+            assert without_text['combined_text'].isna().all()
+            pd.testing.assert_frame_equal(without_text.drop(columns='combined_text'),
+                                          expected.drop(columns='combined_text'))
+        assert len(profile.features(pairs[0][0], np.array([], dtype=np.int64))) == 0
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
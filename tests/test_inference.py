@@ -0,0 +1,192 @@
+import pytest
+import random
+import sys
+import os
+import numpy as np
+
+# Adicionar o diretório da aplicação ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import MinMaxScaler, OneHotEncoder, StandardScaler
+
+from features import NUMERIC_FEATURES, CATEGORICAL_FEATURES, BINARY_FEATURES, build_features_for_pairs
+from inference import CompiledPipeline, NotCompilableError, SklearnEngine, check_parity, inference_pool, load_engine
+
+TECHS = ['python', 'java', 'javascript', 'sql', 'docker', 'sap', 'excel', 'aws', 'react', 'spring']
+AREAS = ['TI - Desenvolvimento/Programação', 'TI - SAP', 'Administrativa', '']
+
+
+def make_features(n, seed):
+    """Features de pares sintéticos no formato da API"""
+    rnd = random.Random(seed)
+    pairs = []
+    for _ in range(n):
+        vaga = {
+            'titulo_vaga': f'Desenvolvedor {rnd.choice(TECHS)}',
+            'competencias_tecnicas_requeridas': ' '.join(rnd.sample(TECHS, 4)),
+            'nivel_academico': rnd.choice(['Ensino Superior Completo', 'Mestrado', 'Ensino Médio', '']),
+            'nivel_ingles': rnd.choice(['Básico', 'Avançado', 'Fluente', '']),
+            'nivel_profissional': rnd.choice(['Júnior', 'Pleno', 'Sênior', '']),
+            'tipo_contratacao': rnd.choice(['CLT Full', 'PJ/Autônomo', '']),
+            'areas_atuacao': rnd.choice(AREAS)
+        }
+        candidato = {
+            'conhecimentos_tecnicos': ' '.join(rnd.sample(TECHS, rnd.randint(0, 6))),
+            'nivel_academico': rnd.choice(['Ensino Superior Completo', 'Pós Graduação', '']),
+            'nivel_ingles': rnd.choice(['Básico', 'Intermediário', 'Avançado']),
+            'area_de_atuacao': rnd.choice(AREAS)
+        }
+        pairs.append((vaga, candidato))
+    return build_features_for_pairs(pairs)
+
+
+def fit_pipeline(features, numeric_scaler=None, **tfidf_params):
+    """Pipeline com a mesma estrutura do notebook de treinamento, em tamanho reduzido"""
+    target = (features['tech_success_score'] >= features['tech_success_score'].median()).astype(int)
+    preprocessor = ColumnTransformer([
+        ('num', numeric_scaler or StandardScaler(), NUMERIC_FEATURES),
+        ('cat', OneHotEncoder(handle_unknown='ignore', sparse_output=False), CATEGORICAL_FEATURES + BINARY_FEATURES),
+        ('text', TfidfVectorizer(max_features=50, ngram_range=(1, 2), **tfidf_params), 'combined_text')
+    ])
+    pipeline = Pipeline([
+        ('preprocessor', preprocessor),
+        ('classifier', RandomForestClassifier(n_estimators=15, max_depth=6, random_state=0))
+    ])
+    return pipeline.fit(features, target)
+
+@pytest.fixture(scope="module")
+def training_features():
+    return make_features(300, seed=0)
+
+@pytest.fixture(scope="module")
+def holdout_features():
+    return make_features(200, seed=1)
+
+class TestCompiledPipeline:
+    """Paridade do motor compilado com o Pipeline sklearn."""
+
+    @pytest.mark.parametrize("tfidf_params", [
+        {},
+        {'sublinear_tf': True},
+        {'norm': 'l1', 'use_idf': False},
+        {'binary': True, 'norm': None}
+    ])
+    def test_parity_on_holdout(self, training_features, holdout_features, tfidf_params):
+        """Probabilidades idênticas às do sklearn em linhas não vistas no treino."""
+        pipeline = fit_pipeline(training_features, **tfidf_params)
+        compiled = CompiledPipeline(pipeline)
+        np.testing.assert_array_equal(compiled.predict_proba(holdout_features), pipeline.predict_proba(holdout_features))
+        np.testing.assert_array_equal(compiled.predict(holdout_features), pipeline.predict(holdout_features))
+
+    def test_unknown_categories_are_ignored(self, training_features):
+        """Categorias não vistas no treino zeram o one-hot, como handle_unknown='ignore'."""
+        pipeline = fit_pipeline(training_features)
+        row = training_features.iloc[:1].copy()
+        row['nivel_profissional'] = 'Categoria nunca vista'
+        row['combined_text'] = 'termos fora do vocabulário'
+        np.testing.assert_array_equal(CompiledPipeline(pipeline).predict_proba(row), pipeline.predict_proba(row))
+
+    def test_single_row(self, training_features, holdout_features):
+        """Uma linha isolada produz a mesma probabilidade que no lote."""
+        compiled = CompiledPipeline(fit_pipeline(training_features))
+        np.testing.assert_array_equal(compiled.predict_proba(holdout_features.iloc[[5]])[0],
+                                      compiled.predict_proba(holdout_features)[5])
+
+class TestSharedArrays:
+    """Floresta compilada exportada e mapeada em memória."""
+
+    def test_memory_mapped_forest_matches(self, training_features, holdout_features, tmp_path):
+        """Exportar e mapear os arrays não muda as probabilidades; a segunda carga reaproveita o export."""
+        pipeline = fit_pipeline(training_features)
+        arrays_dir = tmp_path / 'modelo'
+        first = CompiledPipeline(pipeline, arrays_dir)
+        assert (arrays_dir / 'forest.json').exists()
+        second = CompiledPipeline(pipeline, arrays_dir)
+        assert not second.forest.value.flags.writeable
+        expected = CompiledPipeline(pipeline).predict_proba(holdout_features)
+        np.testing.assert_array_equal(first.predict_proba(holdout_features), expected)
+        np.testing.assert_array_equal(second.predict_proba(holdout_features), expected)
+
+    def test_arrays_from_other_model_are_rejected(self, training_features, tmp_path):
+        """Arrays exportados de outro modelo no mesmo diretório não são usados."""
+        CompiledPipeline(fit_pipeline(training_features), tmp_path / 'modelo')
+        other = fit_pipeline(make_features(100, seed=2))
+        with pytest.raises(NotCompilableError):
+            CompiledPipeline(other, tmp_path / 'modelo')
+
+    def test_unwritable_directory_keeps_private_copy(self, training_features, holdout_features, tmp_path):
+        """Sem permissão de escrita, o motor continua funcionando com arrays em memória."""
+        pipeline = fit_pipeline(training_features)
+        blocker = tmp_path / 'arquivo'
+        blocker.write_text('')
+        compiled = CompiledPipeline(pipeline, blocker / 'modelo')
+        np.testing.assert_array_equal(compiled.predict_proba(holdout_features), pipeline.predict_proba(holdout_features))
+
+class TestParallelInference:
+    """Linhas de um lote divididas entre threads de inferência."""
+
+    @pytest.mark.parametrize("n_threads", [2, 3, 500])
+    def test_compiled_threads_match(self, training_features, holdout_features, n_threads):
+        """Dividir as linhas da floresta entre threads não muda as probabilidades nem a ordem."""
+        compiled = CompiledPipeline(fit_pipeline(training_features))
+        X = compiled.transform(holdout_features)
+        np.testing.assert_array_equal(compiled.predict_proba_transformed(X, n_threads),
+                                      compiled.predict_proba_transformed(X))
+
+    def test_sklearn_ignores_training_n_jobs(self, training_features, holdout_features):
+        """O n_jobs do treino é descartado no motor (sem alterar o pipeline carregado); as threads vêm de n_threads.
+
+        Com threads, o sklearn soma as árvores em ordem variável (diferença de arredondamento).
+        """
+        pipeline = fit_pipeline(training_features)
+        pipeline[-1].n_jobs = -1
+        engine = SklearnEngine(pipeline)
+        assert pipeline[-1].n_jobs == -1
+        assert engine.pipeline[-1].n_jobs is None and engine.pipeline[-1].estimators_ is pipeline[-1].estimators_
+        np.testing.assert_array_equal(engine.predict_proba(holdout_features), pipeline.predict_proba(holdout_features))
+        X = engine.transform(holdout_features)
+        np.testing.assert_allclose(engine.predict_proba_transformed(X, 2), pipeline.predict_proba(holdout_features),
+                                   rtol=0, atol=1e-12)
+
+    def test_pool_replaced_on_growth(self, monkeypatch):
+        """Um pool maior substitui o anterior, que é encerrado em vez de ficar com threads ociosas."""
+        import inference
+        monkeypatch.setattr(inference, '_thread_pool', {'pid': None, 'size': 0, 'executor': None})
+        small = inference_pool(1)
+        large = inference_pool(4)
+        assert large is not small and small._shutdown
+        assert inference_pool(2) is large
+        large.shutdown()
+
+class TestEngineSelection:
+    """Seleção do motor na inicialização."""
+
+    def test_compiled_engine_reports_parity(self, training_features, holdout_features):
+        """O motor compilado é usado quando a paridade passa."""
+        pipeline = fit_pipeline(training_features)
+        engine, report = load_engine(pipeline, 'compiled', holdout_features)
+        assert engine.name == 'compiled'
+        assert report['parity'] == check_parity(engine, pipeline, holdout_features)
+        assert report['parity']['passed']
+        assert report['parity']['max_abs_diff'] == 0.0
+
+    def test_fallback_when_not_compilable(self, training_features, holdout_features):
+        """Componentes não suportados mantêm o sklearn e registram o motivo."""
+        pipeline = fit_pipeline(training_features, numeric_scaler=MinMaxScaler())
+        with pytest.raises(NotCompilableError):
+            CompiledPipeline(pipeline)
+        engine, report = load_engine(pipeline, 'compiled', holdout_features)
+        assert engine.name == 'sklearn'
+        assert 'MinMaxScaler' in report['fallback_reason']
+
+    def test_unknown_engine(self, training_features):
+        """Nome de motor inválido é rejeitado."""
+        with pytest.raises(ValueError):
+            load_engine(fit_pipeline(training_features), 'gpu')
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
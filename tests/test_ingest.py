@@ -0,0 +1,300 @@
+import pytest
+import json
+import sys
+import os
+import pandas as pd
+
+# Adicionar o diretório da aplicação ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from data_store import DataStore, KEY_INDEX, iter_json_object_items, open_store, read_store_manifest, store_base_dir
+from features import compute_features
+from ingest import build_store, apply_delta, compact_store, write_store_manifest
+
+@pytest.fixture
+def raw_data():
+    """Fixture com dados no formato dos arquivos JSON originais"""
+    vagas = {
+        "10": {
+            "informacoes_basicas": {"titulo_vaga": "Desenvolvedor \"Java\" {Sênior}", "tipo_contratacao": "CLT Full"},
+            "perfil_vaga": {
+                "competencia_tecnicas_e_comportamentais": "java, spring\nsql 😀",
+                "nivel_academico": "Ensino Superior Completo",
+                "nivel_ingles": "Avançado",
+                "nivel_profissional": "Sênior",
+                "areas_atuacao": "TI - Desenvolvimento/Programação"
+            }
+        },
+        "11": {"informacoes_basicas": {}, "perfil_vaga": {}}
+    }
+    applicants = {
+        str(i): {
+            "infos_basicas": {"nome": f"Candidato {i}"},
+            "informacoes_profissionais": {"area_atuacao": "TI", "conhecimentos_tecnicos": "java " * i},
+            "formacao_e_idiomas": {"nivel_academico": None, "nivel_ingles": "Básico"}
+        }
+        for i in range(5)
+    }
+    prospects = {
+        "10": {"titulo": "Dev", "prospects": [
+            {"codigo": "1", "nome": "Candidato 1", "situacao_candidado": "Contratado pela Decision"},
+            {"codigo": "2", "nome": "Candidato 2", "situacao_candidado": "Não Aprovado pelo Cliente"}
+        ]},
+        "11": {"titulo": "Vazia", "prospects": []}
+    }
+    return {"vagas": vagas, "applicants": applicants, "prospects": prospects}
+
+@pytest.fixture
+def data_dir(tmp_path, raw_data):
+    """Fixture que grava os dados de exemplo em arquivos JSON"""
+    for name, content in raw_data.items():
+        with open(tmp_path / f"{name}.json", "w", encoding="utf-8") as f:
+            json.dump(content, f, ensure_ascii=False, indent=4)
+    return tmp_path
+
+@pytest.fixture
+def store_dir(data_dir):
+    """Fixture com o store colunar gerado a partir dos dados de exemplo"""
+    build_store(data_dir, data_dir / "store")
+    return data_dir / "store"
+
+def write_ndjson(path, entries):
+    with open(path, "w", encoding="utf-8") as f:
+        for table, codigo, data in entries:
+            f.write(json.dumps({"table": table, "codigo": codigo, "data": data}, ensure_ascii=False) + "\n")
+    return path
+
+def applicant(nome, conhecimentos):
+    return {"infos_basicas": {"nome": nome}, "informacoes_profissionais": {"conhecimentos_tecnicos": conhecimentos}}
+
+class TestStreamingParser:
+    """Testes para o parser incremental de JSON."""
+
+    @pytest.mark.parametrize("read_size", [1, 7, 64, 1 << 20])
+    def test_matches_json_load(self, data_dir, raw_data, read_size):
+        """O parser incremental produz os mesmos itens que json.load em qualquer tamanho de bloco."""
+        items = dict(iter_json_object_items(data_dir / "vagas.json", read_size=read_size))
+        assert items == raw_data["vagas"]
+
+    def test_empty_object(self, tmp_path):
+        """Objeto vazio não gera itens."""
+        path = tmp_path / "vazio.json"
+        path.write_text(" { } ", encoding="utf-8")
+        assert list(iter_json_object_items(path)) == []
+
+    def test_truncated_file_raises(self, tmp_path):
+        """Arquivo truncado gera erro em vez de dados parciais silenciosos."""
+        path = tmp_path / "truncado.json"
+        path.write_text('{"a": {"b": 1}, "c": {"d": ', encoding="utf-8")
+        with pytest.raises(ValueError):
+            list(iter_json_object_items(path, read_size=4))
+
+class TestColumnarStore:
+    """Testes para o armazenamento colunar."""
+
+    def test_build_and_open(self, data_dir):
+        """O store gerado preserva códigos, campos e prospecções achatadas."""
+        manifest = build_store(data_dir, data_dir / "store")
+        assert manifest["sources"]["applicants"]["rows"] == 5
+        tables = open_store(data_dir / "store")
+        vaga = tables["vagas"].records([tables["vagas"].position_of("10")])[0]
+        assert vaga["titulo_vaga"] == 'Desenvolvedor "Java" {Sênior}'
+        assert vaga["competencias_tecnicas_requeridas"] == "java, spring\nsql 😀"
+        assert tables["applicants"].column("nivel_academico")[0] == ""
+        prospects = tables["prospects"].to_frame()
+        assert list(prospects["codigo_candidato"]) == ["1", "2"]
+
+    def test_open_missing_store(self, tmp_path):
+        """Sem manifesto, open_store retorna None."""
+        assert open_store(tmp_path / "inexistente") is None
+
+    def test_data_store_same_from_json_and_store(self, data_dir):
+        """DataStore carregado do store colunar equivale ao carregado dos JSONs."""
+        from_json = DataStore.load(data_dir, store_dir=data_dir / "sem_store")
+        build_store(data_dir, data_dir / "store")
+        from_store = DataStore.load(data_dir, store_dir=data_dir / "store")
+        assert from_store.n_applicants == from_json.n_applicants == 5
+        assert from_store.get_vaga("10") == from_json.get_vaga("10")
+        positions = range(5)
+        assert from_store.applicant_records(positions) == from_json.applicant_records(positions)
+        assert list(from_store.filter_applicants({"nivel_ingles": "básico"})) == [0, 1, 2, 3, 4]
+
+class TestDeltas:
+    """Testes para os deltas de upserts e a compactação do store."""
+
+    def test_ndjson_upsert_and_insert(self, store_dir, tmp_path):
+        """Upsert substitui a linha antiga do código; códigos novos entram no fim da tabela."""
+        path = write_ndjson(tmp_path / "delta.ndjson", [
+            ("applicants", "2", applicant("Candidato 2", "python")),
+            ("applicants", "7", applicant("Candidato 7", "sql"))
+        ])
+        delta = apply_delta(store_dir, path)
+        assert delta["tables"]["applicants"] == {"rows": 2, "replaces": [2]}
+        applicants = open_store(store_dir)["applicants"]
+        assert applicants.n_rows == 7 and applicants.n_live == 6
+        assert applicants.position_of("2") == 5
+        assert applicants.records([applicants.position_of("2")])[0]["conhecimentos_tecnicos"] == "python"
+        assert list(applicants.to_frame()["codigo"]) == ["0", "1", "3", "4", "2", "7"]
+
+    def test_json_delta_and_repeated_upsert(self, store_dir, tmp_path):
+        """Delta em JSON no formato dos dumps; um segundo upsert substitui só a versão vigente."""
+        for conhecimentos in ("go", "rust"):
+            path = tmp_path / f"{conhecimentos}.json"
+            path.write_text(json.dumps({"applicants": {"1": applicant("Candidato 1", conhecimentos)}}),
+                            encoding="utf-8")
+            apply_delta(store_dir, path)
+        deltas = read_store_manifest(store_dir)["deltas"]
+        assert [delta["tables"]["applicants"]["replaces"] for delta in deltas] == [[1], [5]]
+        store = DataStore.load(store_dir=store_dir)
+        assert store.n_live_applicants == 5
+        assert list(store.filter_applicants()) == [0, 2, 3, 4, 6]
+        assert list(store.filter_applicants({"area": "ti"})) == [0, 2, 3, 4]
+        assert store.applicant_records([store.applicants.position_of("1")])[0]["conhecimentos_tecnicos"] == "rust"
+
+    def test_prospects_replace_whole_vaga(self, store_dir, tmp_path):
+        """Prospecções de uma vaga no delta substituem a lista inteira dela."""
+        path = write_ndjson(tmp_path / "delta.ndjson", [
+            ("prospects", "10", {"titulo": "Dev", "prospects": [
+                {"codigo": "3", "nome": "Candidato 3", "situacao_candidado": "Contratado pela Decision"}]})
+        ])
+        apply_delta(store_dir, path)
+        prospects = open_store(store_dir)["prospects"].to_frame()
+        assert list(prospects["codigo_candidato"]) == ["3"]
+
+    def test_refresh_is_incremental(self, store_dir, tmp_path):
+        """O DataStore já carregado recebe só os segmentos novos e informa os códigos alterados."""
+        store = DataStore.load(store_dir=store_dir)
+        store.filter_applicants({"area": "ti"})
+        store.applicant_profile()
+        assert store.refresh() == (store, None)
+        apply_delta(store_dir, write_ndjson(tmp_path / "delta.ndjson", [
+            ("vagas", "12", {"informacoes_basicas": {"titulo_vaga": "Analista"}, "perfil_vaga": {}}),
+            ("applicants", "8", applicant("Candidato 8", "java"))
+        ]))
+        refreshed, changes = store.refresh()
+        assert changes == {"incremental": True, "vagas": ["12"], "applicants": ["8"]}
+        assert refreshed.get_vaga("12")["titulo_vaga"] == "Analista"
+        assert list(refreshed.filter_applicants({"area": "ti"})) == [0, 1, 2, 3, 4]
+        # Perfil do ranking estendido só com o candidato novo
+        assert refreshed._applicant_profile is not None and refreshed.applicant_profile().n_rows == 6
+        vaga = refreshed.get_vaga("12")
+        pd.testing.assert_frame_equal(refreshed.applicant_profile().features(vaga, [5, 0]),
+                                      compute_features(vaga, refreshed.applicant_columns([5, 0]), 2))
+
+        compact_store(store_dir)
+        reloaded, changes = refreshed.refresh()
+        assert changes == {"incremental": False}
+        assert reloaded.n_applicants == reloaded.n_live_applicants == 6
+
+    def test_json_fallback_adopts_store_when_built(self, data_dir):
+        """Carregado dos JSON (sem manifesto), o DataStore passa ao store colunar quando ele é gerado."""
+        from data_store import StoreWatcher
+        store = DataStore.load(data_dir=data_dir, store_dir=data_dir / "store")
+        assert store.store_dir is None and store.refresh() == (store, None)
+        changes = []
+        watcher = StoreWatcher(store.pending_store_dir, lambda: changes.append(store.refresh()), interval=60)
+        assert watcher.check() is False
+        build_store(data_dir, data_dir / "store")
+        assert watcher.check() is True
+        reloaded, change = changes[0]
+        assert change == {"incremental": False}
+        assert reloaded.store_dir == data_dir / "store" and reloaded.n_applicants == store.n_applicants
+
+    def test_extend_indexes_only_new_segments(self, store_dir, tmp_path):
+        """Aplicar deltas reaproveita o índice da base e indexa só as linhas dos segmentos novos."""
+        store = DataStore.load(store_dir=store_dir)
+        assert store.applicants.position_of("1") == 1
+        base_positions = store.applicants._base_positions
+        for i, conhecimentos in enumerate(["rust", "go"]):
+            apply_delta(store_dir, write_ndjson(tmp_path / f"{i}.ndjson", [
+                ("applicants", "1", applicant("Candidato 1", conhecimentos)),
+                ("applicants", f"{8 + i}", applicant(f"Candidato {8 + i}", "java"))
+            ]))
+            store, _ = store.refresh()
+        applicants = store.applicants
+        assert applicants._base_positions is base_positions
+        assert [len(positions) for positions in applicants._segment_positions] == [2, 2]
+        assert applicants.records([applicants.position_of("1")])[0]["conhecimentos_tecnicos"] == "go"
+        assert applicants.position_of("8") == 6 and applicants.position_of("0") == 0
+        assert applicants.position_of("inexistente") is None
+        live = applicants.live_positions()
+        assert list(live) == [0, 2, 3, 4, 6, 7, 8] and applicants.live_positions() is live
+
+    def test_compaction_keeps_live_rows(self, store_dir, tmp_path):
+        """A compactação reescreve só as linhas vigentes, com o mesmo conteúdo."""
+        apply_delta(store_dir, write_ndjson(tmp_path / "delta.ndjson", [
+            ("applicants", "0", applicant("Candidato 0", "python")),
+            ("applicants", "9", applicant("Candidato 9", "sql"))
+        ]))
+        before = {name: table.to_frame() for name, table in open_store(store_dir).items()}
+        base_id = read_store_manifest(store_dir)["base_id"]
+        manifest = compact_store(store_dir)
+        assert manifest["deltas"] == [] and manifest["base_id"] != base_id
+        assert manifest["compacted_deltas"] == 1
+        tables = open_store(store_dir)
+        for name, frame in before.items():
+            assert tables[name].to_frame().equals(frame)
+        assert len(tables["applicants"].superseded) == 0
+
+    def test_auto_compaction(self, store_dir, tmp_path):
+        """Acima de max_deltas segmentos, o apply compacta o store."""
+        for i in range(3):
+            apply_delta(store_dir, write_ndjson(tmp_path / f"{i}.ndjson", [
+                ("applicants", "4", applicant("Candidato 4", f"versão {i}"))
+            ]), max_deltas=2)
+        manifest = read_store_manifest(store_dir)
+        assert manifest["deltas"] == [] and manifest["compacted_deltas"] == 3
+        applicants = open_store(store_dir)["applicants"]
+        assert applicants.n_rows == 5
+        assert applicants.records([applicants.position_of("4")])[0]["conhecimentos_tecnicos"] == "versão 2"
+
+    def test_store_without_key_index(self, store_dir, tmp_path):
+        """Store gerado antes dos deltas (sem índice por código) ganha o índice no primeiro apply."""
+        table_dir = store_base_dir(store_dir, read_store_manifest(store_dir)) / "applicants"
+        (table_dir / KEY_INDEX).unlink()
+        delta = apply_delta(store_dir, write_ndjson(tmp_path / "delta.ndjson", [
+            ("applicants", "3", applicant("Candidato 3", "python"))
+        ]))
+        assert delta["tables"]["applicants"]["replaces"] == [3]
+        assert (table_dir / KEY_INDEX).exists()
+
+    def test_compaction_publishes_new_base(self, store_dir, tmp_path):
+        """Compactar grava uma base nova ao lado e troca só o manifesto; a base anterior fica
+        para quem leu o manifesto antigo e as mais antigas são removidas."""
+        first = read_store_manifest(store_dir)["base"]
+        tables = open_store(store_dir)
+        second = compact_store(store_dir)["base"]
+        assert (store_dir / first).exists() and (store_dir / second).exists()
+        assert tables["applicants"].n_rows == 5
+        third = compact_store(store_dir)["base"]
+        assert sorted(path.name for path in store_dir.glob("base-*")) == sorted([second, third])
+        assert open_store(store_dir)["applicants"].n_rows == 5
+
+    def test_legacy_layout_upgraded(self, store_dir, tmp_path):
+        """Store com as tabelas na raiz (sem `base` no manifesto) continua legível e é migrado no compact."""
+        manifest = read_store_manifest(store_dir)
+        base_dir = store_dir / manifest.pop("base")
+        for table_dir in base_dir.iterdir():
+            table_dir.rename(store_dir / table_dir.name)
+        base_dir.rmdir()
+        write_store_manifest(store_dir, manifest)
+        apply_delta(store_dir, write_ndjson(tmp_path / "delta.ndjson", [
+            ("applicants", "4", applicant("Candidato 4", "rust"))
+        ]))
+        assert (store_dir / "applicants" / "delta-000001").exists()
+        compact_store(store_dir)
+        applicants = open_store(store_dir)["applicants"]
+        assert applicants.records([applicants.position_of("4")])[0]["conhecimentos_tecnicos"] == "rust"
+        compact_store(store_dir)
+        assert not (store_dir / "applicants").exists()
+
+    def test_invalid_delta_rejected(self, store_dir, tmp_path):
+        """Linha fora do formato é rejeitada sem alterar o store."""
+        path = tmp_path / "delta.ndjson"
+        path.write_text('{"table": "candidatos", "codigo": "1", "data": {}}\n', encoding="utf-8")
+        with pytest.raises(ValueError):
+            apply_delta(store_dir, path)
+        assert read_store_manifest(store_dir)["deltas"] == []
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,72 @@
+import pytest
+import json
+import sys
+import os
+import numpy as np
+
+# Adicionar o diretório da aplicação ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+import json_codec
+from json_codec import JsonCodec
+
+PAYLOAD = {
+    'prediction': np.int64(1),
+    'probability': np.float64(0.8125),
+    'scores': np.array([0.5, 1.0]),
+    'flag': np.bool_(True),
+    'texto': 'Programação',
+    'vazio': None
+}
+EXPECTED = {'prediction': 1, 'probability': 0.8125, 'scores': [0.5, 1.0], 'flag': True, 'texto': 'Programação',
+            'vazio': None}
+
+class TestJsonCodec:
+    """Testes do codec JSON da API."""
+
+    @pytest.mark.parametrize("backend", ['json', 'auto'])
+    def test_numpy_roundtrip(self, backend):
+        """Tipos NumPy viram os valores Python equivalentes em qualquer backend."""
+        codec = JsonCodec(backend)
+        encoded = codec.dumps(PAYLOAD)
+        assert isinstance(encoded, bytes)
+        assert codec.loads(encoded) == json.loads(encoded) == EXPECTED
+
+    @pytest.mark.parametrize("backend", ['json', 'auto'])
+    def test_sort_keys(self, backend):
+        """sort_keys do codec e do provider do Flask (app.json.sort_keys) ordena as chaves."""
+        from flask import Flask
+        from json_codec import CodecJSONProvider
+        codec = JsonCodec(backend)
+        assert codec.dumps({'b': 1, 'a': np.int64(2)}) == b'{"b":1,"a":2}'
+        assert codec.dumps({'b': 1, 'a': np.int64(2)}, sort_keys=True) == b'{"a":2,"b":1}'
+        app = Flask(__name__)
+        app.json = CodecJSONProvider(app, codec)
+        assert app.json.dumps({'b': 1, 'a': 2}) == '{"b":1,"a":2}'
+        assert app.json.dumps({'b': 1, 'a': 2}, sort_keys=True) == '{"a":2,"b":1}'
+        app.json.sort_keys = True
+        assert app.json.dumps({'b': 1, 'a': 2}) == '{"a":2,"b":1}'
+        with app.app_context():
+            assert app.json.response({'b': 1, 'a': 2}).get_data() == b'{"a":2,"b":1}'
+
+    def test_dumps_lines(self):
+        """NDJSON: um objeto por linha, cada linha terminada em \\n."""
+        codec = JsonCodec('json')
+        encoded = codec.dumps_lines([{'index': 0}, PAYLOAD])
+        assert encoded.endswith(b'\n')
+        assert [json.loads(line) for line in encoded.splitlines()] == [{'index': 0}, EXPECTED]
+
+    def test_fallback_without_orjson(self, monkeypatch):
+        """Sem o orjson, 'auto' usa o json da biblioteca padrão e 'orjson' falha."""
+        monkeypatch.setattr(json_codec, 'orjson', None)
+        assert JsonCodec('auto').name == 'json'
+        with pytest.raises(RuntimeError):
+            JsonCodec('orjson')
+
+    def test_unknown_backend(self):
+        """Backend desconhecido é rejeitado."""
+        with pytest.raises(ValueError):
+            JsonCodec('ujson')
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
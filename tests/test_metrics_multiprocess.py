@@ -0,0 +1,93 @@
+import pytest
+import glob
+import json
+import runpy
+import subprocess
+import sys
+import os
+
+APP_DIR = os.path.join(os.path.dirname(__file__), '..', 'app')
+
+# Processo com PROMETHEUS_MULTIPROC_DIR: uma predição aqui e outra em um fork,
+# como dois workers do gunicorn, e o /metrics agregado antes e depois de
+# marcar o fork como encerrado
+WORKERS_SCRIPT = """
+import os, sys, json
+sys.path.insert(0, {app_dir!r})
+import app as app_module
+from prometheus_client import multiprocess
+
+def predict():
+    vaga, candidato = app_module.WARMUP_PAIR
+    with app_module.app.test_client() as client:
+        assert client.post('/api/predict', json={{'vaga': vaga, 'candidato': candidato}}).status_code == 200
+
+def scrape():
+    with app_module.app.test_client() as client:
+        lines = client.get('/metrics').get_data(as_text=True).splitlines()
+    return {{line.rsplit(' ', 1)[0]: float(line.rsplit(' ', 1)[1]) for line in lines if not line.startswith('#')}}
+
+app_module.publish_active_model_metrics()
+predict()
+pid = os.fork()
+if pid == 0:
+    app_module.publish_active_model_metrics()
+    predict()
+    os._exit(0)
+os.waitpid(pid, 0)
+before = scrape()
+multiprocess.mark_process_dead(pid)
+print(json.dumps({{'before': before, 'after': scrape()}}))
+"""
+
+@pytest.fixture
+def metrics_dir(tmp_path):
+    """Diretório vazio para os arquivos mmap das métricas"""
+    path = tmp_path / 'metricas'
+    path.mkdir()
+    return path
+
+@pytest.fixture
+def gunicorn_conf(tmp_path, monkeypatch):
+    """Carrega app/gunicorn.conf.py com o diretório de métricas informado e arquivos antigos nele"""
+    path = tmp_path / 'gunicorn-metricas'
+    path.mkdir()
+    (path / 'counter_1.db').write_bytes(b'')
+    monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(path))
+    monkeypatch.setenv('OTIMIZADOR_METRICS_MASTER', '')
+    return path, runpy.run_path(os.path.join(APP_DIR, 'gunicorn.conf.py'))
+
+def sample(samples, name):
+    return next(value for key, value in samples.items() if key.startswith(name))
+
+class TestMultiprocessMetrics:
+    """Métricas agregadas entre processos no modo multiprocesso."""
+
+    def test_metrics_aggregate_across_processes(self, metrics_dir):
+        """/metrics soma os dois processos e, com o fork encerrado, tira só os gauges 'live'."""
+        env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(metrics_dir))
+        output = subprocess.run([sys.executable, '-c', WORKERS_SCRIPT.format(app_dir=os.path.abspath(APP_DIR))],
+                                check=True, capture_output=True, text=True, env=env).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        before, after = result['before'], result['after']
+
+        assert sample(before, 'flask_http_request_total{method="POST"') == 2
+        assert sample(before, 'hired_model_version_active{') == 2
+        assert sample(after, 'hired_model_version_active{') == 1
+        assert sample(after, 'flask_http_request_total{method="POST"') == 2
+        assert 'hired_model_prediction_cache_entries' in after
+        assert sample(after, 'hired_model_startup_phase_seconds{phase="import"}') > 0
+
+    def test_gunicorn_conf_prepares_dir_and_cleans_workers(self, gunicorn_conf):
+        """O config apaga arquivos antigos e child_exit remove os gauges 'live' do worker."""
+        path, conf = gunicorn_conf
+        assert os.environ['PROMETHEUS_MULTIPROC_DIR'] == str(path)
+        assert list(path.iterdir()) == []
+
+        (path / 'gauge_livesum_4242.db').write_bytes(b'')
+        (path / 'counter_4242.db').write_bytes(b'')
+        conf['child_exit'](None, type('Worker', (), {'pid': 4242}))
+        assert sorted(os.path.basename(name) for name in glob.glob(str(path / '*.db'))) == ['counter_4242.db']
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,150 @@
+import pytest
+import threading
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório da aplicação ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from micro_batcher import MicroBatcher
+
+
+class RecordingEngine:
+    """Motor determinístico que registra o tamanho de cada chamada"""
+
+    def __init__(self, fail=False, input_columns=None):
+        self.calls = []
+        self.fail = fail
+        self.input_columns = input_columns
+
+    def predict_proba(self, frame):
+        self.calls.append(len(frame))
+        if self.fail or (frame['x'] < 0).any():
+            raise RuntimeError('falha na inferência')
+        values = frame['x'].to_numpy(dtype=float)
+        return np.column_stack([1 - values, values])
+
+
+class Model:
+    def __init__(self, engine):
+        self.engine = engine
+
+
+def submit_concurrently(batcher, model, values):
+    """Dispara uma requisição por valor em threads simultâneas e devolve os resultados na ordem"""
+    results = [None] * len(values)
+    barrier = threading.Barrier(len(values))
+
+    def request(index):
+        barrier.wait()
+        results[index] = batcher.predict_proba(model, pd.DataFrame({'x': [values[index]]}))
+
+    threads = [threading.Thread(target=request, args=(index,)) for index in range(len(values))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    return results
+
+class TestMicroBatcher:
+    """Testes do agrupamento de predições simultâneas."""
+
+    def test_results_fan_out_to_each_request(self):
+        """Requisições simultâneas viram poucas inferências e cada uma recebe a própria linha."""
+        engine = RecordingEngine()
+        batches = []
+        batcher = MicroBatcher(max_batch_size=64, max_wait=0.05,
+                               on_batch=lambda depth, rows, waits: batches.append((depth, rows, len(waits))))
+        values = [i / 20 for i in range(20)]
+        results = submit_concurrently(batcher, Model(engine), values)
+        for value, result in zip(values, results):
+            np.testing.assert_array_equal(result, [[1 - value, value]])
+        assert sum(engine.calls) == 20
+        assert len(engine.calls) < 20
+        assert sum(rows for _, rows, _ in batches) == 20
+
+    def test_max_batch_size(self):
+        """Nenhuma inferência passa do tamanho máximo de lote."""
+        engine = RecordingEngine()
+        batcher = MicroBatcher(max_batch_size=4, max_wait=0.05)
+        submit_concurrently(batcher, Model(engine), [0.5] * 12)
+        assert max(engine.calls) <= 4
+        assert sum(engine.calls) == 12
+
+    def test_single_request_flushes_after_wait(self):
+        """Uma requisição sozinha é atendida ao fim da espera máxima."""
+        engine = RecordingEngine()
+        waits = []
+        batcher = MicroBatcher(max_batch_size=32, max_wait=0.002, on_batch=lambda depth, rows, w: waits.extend(w))
+        result = batcher.predict_proba(Model(engine), pd.DataFrame({'x': [0.25]}))
+        np.testing.assert_array_equal(result, [[0.75, 0.25]])
+        assert engine.calls == [1]
+        assert len(waits) == 1 and 0 < waits[0] < 1
+
+    def test_errors_reach_every_request_of_the_batch(self):
+        """Uma falha na inferência é levantada em todas as requisições do lote, e a fila continua."""
+        batcher = MicroBatcher(max_batch_size=8, max_wait=0.01)
+        with pytest.raises(RuntimeError):
+            batcher.predict_proba(Model(RecordingEngine(fail=True)), pd.DataFrame({'x': [0.1]}))
+        result = batcher.predict_proba(Model(RecordingEngine()), pd.DataFrame({'x': [0.1]}))
+        np.testing.assert_array_equal(result, [[0.9, 0.1]])
+
+    def test_failing_item_does_not_fail_the_batch(self):
+        """Com a inferência do lote falhando, cada item é refeito sozinho e só o inválido recebe o erro."""
+        engine = RecordingEngine()
+        batcher = MicroBatcher(max_batch_size=64, max_wait=0.05)
+        model = Model(engine)
+        results = [None] * 6
+        barrier = threading.Barrier(6)
+
+        def request(index):
+            barrier.wait()
+            try:
+                results[index] = batcher.predict_proba(model, pd.DataFrame({'x': [-1.0 if index == 3 else 0.5]}))
+            except RuntimeError as e:
+                results[index] = e
+
+        threads = [threading.Thread(target=request, args=(index,)) for index in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+        assert isinstance(results[3], RuntimeError)
+        for index in (0, 1, 2, 4, 5):
+            np.testing.assert_array_equal(results[index], [[0.5, 0.5]])
+
+    def test_frames_checked_against_input_columns(self):
+        """Frame sem uma coluna do motor falha sozinho; colunas extras são descartadas antes de juntar."""
+        engine = RecordingEngine(input_columns=['x'])
+        batcher = MicroBatcher(max_batch_size=8, max_wait=0.001)
+        with pytest.raises(KeyError, match='x'):
+            batcher.predict_proba(Model(engine), pd.DataFrame({'y': [0.5]}))
+        assert engine.calls == []
+        result = batcher.predict_proba(Model(engine), pd.DataFrame({'x': [0.2], 'extra': ['texto']}))
+        np.testing.assert_array_equal(result, [[0.8, 0.2]])
+
+    def test_models_are_not_mixed(self):
+        """Requisições de versões diferentes do modelo são inferidas separadamente."""
+        first, second = RecordingEngine(), RecordingEngine()
+        batcher = MicroBatcher(max_batch_size=64, max_wait=0.05)
+        models = [Model(first), Model(second)]
+        results = [None] * 10
+        barrier = threading.Barrier(10)
+
+        def request(index):
+            barrier.wait()
+            results[index] = batcher.predict_proba(models[index % 2], pd.DataFrame({'x': [index / 10]}))
+
+        threads = [threading.Thread(target=request, args=(index,)) for index in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+        assert sum(first.calls) == 5 and sum(second.calls) == 5
+        for index, result in enumerate(results):
+            np.testing.assert_array_equal(result, [[1 - index / 10, index / 10]])
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
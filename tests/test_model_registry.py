@@ -0,0 +1,231 @@
+import pytest
+import json
+import random
+import time
+import sys
+import os
+import joblib
+
+# Adicionar o diretório da aplicação ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from prometheus_client import REGISTRY
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from features import NUMERIC_FEATURES, CATEGORICAL_FEATURES, BINARY_FEATURES, build_features_for_pairs
+from inference import SklearnEngine
+from prediction_cache import PredictionCache
+from model_registry import (ModelRegistry, ModelValidationError, ModelWatcher, LEGACY_VERSION,
+                            publish, validate_predictions)
+
+TECHS = ['python', 'java', 'sql', 'docker', 'sap', 'excel', 'aws', 'react']
+AREAS = ['TI - Desenvolvimento/Programação', 'TI - SAP', 'Administrativa']
+
+
+def train_pipeline(seed, labels=(0, 1)):
+    """Pipeline pequeno com a mesma estrutura do modelo servido"""
+    rnd = random.Random(seed)
+    pairs = [
+        ({'competencias_tecnicas_requeridas': ' '.join(rnd.sample(TECHS, 3)), 'areas_atuacao': rnd.choice(AREAS),
+          'nivel_profissional': rnd.choice(['Júnior', 'Pleno', 'Sênior'])},
+         {'conhecimentos_tecnicos': ' '.join(rnd.sample(TECHS, 3)), 'area_de_atuacao': rnd.choice(AREAS)})
+        for _ in range(120)
+    ]
+    features = build_features_for_pairs(pairs)
+    target = [labels[int(score >= 0.5)] for score in features['tech_success_score']]
+    preprocessor = ColumnTransformer([
+        ('num', StandardScaler(), NUMERIC_FEATURES),
+        ('cat', OneHotEncoder(handle_unknown='ignore', sparse_output=False), CATEGORICAL_FEATURES + BINARY_FEATURES),
+        ('text', TfidfVectorizer(max_features=30), 'combined_text')
+    ])
+    pipeline = Pipeline([
+        ('preprocessor', preprocessor),
+        ('classifier', RandomForestClassifier(n_estimators=5, max_depth=4, random_state=seed))
+    ])
+    return pipeline.fit(features, target)
+
+
+def write_model(path, seed, accuracy):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(train_pipeline(seed), path)
+    (path.parent / 'metadata.json').write_text(json.dumps({'accuracy': accuracy, 'trained_date': f'seed-{seed}'}))
+
+@pytest.fixture(scope="module")
+def model_files(tmp_path_factory):
+    """Dois .joblib treinados com seeds diferentes e seus metadados"""
+    root = tmp_path_factory.mktemp("treinados")
+    write_model(root / 'v1' / 'modelo.joblib', seed=1, accuracy=0.81)
+    write_model(root / 'v2' / 'modelo.joblib', seed=2, accuracy=0.92)
+    return root
+
+@pytest.fixture
+def models_dir(tmp_path, model_files):
+    """Diretório de modelos com as versões v1 e v2 publicadas, CURRENT -> v1"""
+    for version in ('v1', 'v2'):
+        publish(tmp_path, model_files / version / 'modelo.joblib', model_files / version / 'metadata.json', version)
+    ModelRegistry(tmp_path).set_pointer('v1')
+    return tmp_path
+
+@pytest.fixture
+def hot_swap_app(models_dir, tmp_path_factory, monkeypatch):
+    """Aplicação servindo o diretório de versões temporário, com token administrativo"""
+    import app as app_module
+    monkeypatch.setattr(app_module, 'model_registry', ModelRegistry(models_dir))
+    monkeypatch.setattr(app_module, 'COMPILED_ARRAYS_DIR', str(tmp_path_factory.mktemp("compilados")))
+    monkeypatch.setattr(app_module, 'ADMIN_TOKEN', 'segredo')
+    monkeypatch.setattr(app_module, 'prediction_cache', PredictionCache(models_dir / 'cache.sqlite3'))
+    app_module.reload_model()
+    app_module.app.config['TESTING'] = True
+    with app_module.app.test_client() as client:
+        yield app_module, client
+
+ADMIN_HEADERS = {'Authorization': 'Bearer segredo'}
+
+def swap_count(action):
+    return REGISTRY.get_sample_value('hired_model_swaps_total', {'action': action}) or 0.0
+
+class TestModelRegistry:
+    """Testes do diretório de versões e do ponteiro CURRENT."""
+
+    def test_versions_and_pointer(self, models_dir):
+        """Versões publicadas são listadas e CURRENT define a versão a servir."""
+        registry = ModelRegistry(models_dir)
+        assert registry.versions() == ['v1', 'v2']
+        assert registry.pointer() == 'v1'
+        registry.set_pointer('v2')
+        assert registry.pointer() == 'v2'
+        with pytest.raises(KeyError):
+            registry.set_pointer('v9')
+
+    def test_legacy_single_file(self, tmp_path, model_files):
+        """Sem versions/, o arquivo único continua sendo servido como versão 'legacy'."""
+        registry = ModelRegistry(tmp_path)
+        assert registry.pointer() is None
+        (tmp_path / 'pipeline_candidatos_contratados.joblib').write_bytes(
+            (model_files / 'v1' / 'modelo.joblib').read_bytes())
+        assert registry.versions() == [LEGACY_VERSION]
+        assert registry.pointer() == LEGACY_VERSION
+        assert registry.set_pointer(LEGACY_VERSION) is False
+
+    def test_publish_refuses_existing_version(self, models_dir, model_files):
+        """Uma versão publicada nunca é sobrescrita."""
+        with pytest.raises(FileExistsError):
+            publish(models_dir, model_files / 'v1' / 'modelo.joblib', version='v1')
+
+    def test_activate_and_rollback(self, models_dir):
+        """A versão ativa vira a anterior na troca e volta no rollback."""
+        registry = ModelRegistry(models_dir)
+        assert registry.rollback() is None
+        registry.activate('modelo-a')
+        registry.activate('modelo-b')
+        assert (registry.active, registry.previous) == ('modelo-b', 'modelo-a')
+        assert registry.rollback() == 'modelo-a'
+        assert registry.previous == 'modelo-b'
+
+    def test_watcher_reports_pointer_changes(self, models_dir):
+        """O watcher chama on_change quando CURRENT muda, uma vez por mudança."""
+        registry = ModelRegistry(models_dir)
+        changes = []
+        watcher = ModelWatcher(registry, changes.append, interval=60)
+        assert watcher.check() is True
+        assert watcher.check() is False
+        registry.set_pointer('v2')
+        assert watcher.check() is True
+        assert changes == ['v1', 'v2']
+
+    def test_validation_rejects_unexpected_classes(self):
+        """Um modelo com outras classes não passa no lote de validação."""
+        pipeline = train_pipeline(3, labels=('nao', 'sim'))
+        with pytest.raises(ModelValidationError):
+            validate_predictions(SklearnEngine(pipeline), build_features_for_pairs([({}, {})]))
+
+class TestHotSwap:
+    """Troca da versão do modelo sem reiniciar a aplicação."""
+
+    def test_reload_swaps_and_reports_version(self, hot_swap_app):
+        """A troca ativa a nova versão, atualiza CURRENT e /model/info mostra a versão real."""
+        app_module, client = hot_swap_app
+        old_model = app_module.model_registry.active
+        swaps = swap_count('reload')
+        response = client.post('/admin/model/reload', json={'version': 'v2', 'wait': True}, headers=ADMIN_HEADERS)
+        assert response.status_code == 200
+        assert response.get_json()['active']['version'] == 'v2'
+        assert swap_count('reload') == swaps + 1
+        assert app_module.model_registry.pointer() == 'v2'
+
+        info = client.get('/model/info').get_json()
+        assert info['model_version'] == 'v2'
+        assert info['previous_version'] == 'v1'
+        assert info['metadata'] == {'accuracy': 0.92, 'trained_date': 'seed-2'}
+        assert REGISTRY.get_sample_value('hired_model_version_active',
+                                         {'version': 'v2', 'fingerprint': info['fingerprint']}) == 1.0
+        assert REGISTRY.get_sample_value('hired_model_version_active',
+                                         {'version': 'v1', 'fingerprint': old_model.fingerprint}) == 0.0
+
+        # Requisições que obtiveram a versão anterior terminam com ela
+        features = build_features_for_pairs([app_module.WARMUP_PAIR])
+        assert app_module.predict_frame(old_model, features)[1].shape == (1, 2)
+
+    def test_rollback_is_immediate(self, hot_swap_app):
+        """O rollback reaproveita a versão anterior em memória e devolve CURRENT a ela."""
+        app_module, client = hot_swap_app
+        first = app_module.model_registry.active
+        client.post('/admin/model/reload', json={'version': 'v2', 'wait': True}, headers=ADMIN_HEADERS)
+        response = client.post('/admin/model/rollback', headers=ADMIN_HEADERS)
+        assert response.status_code == 200
+        assert app_module.model_registry.active is first
+        assert app_module.model_registry.pointer() == 'v1'
+        assert client.get('/health').get_json()['model_version'] == 'v1'
+
+    def test_invalid_version_keeps_active(self, hot_swap_app, models_dir):
+        """Uma versão corrompida é rejeitada e a versão ativa continua servindo."""
+        app_module, client = hot_swap_app
+        broken = models_dir / 'versions' / 'v3'
+        broken.mkdir()
+        (broken / 'pipeline_candidatos_contratados.joblib').write_bytes(b'nao e um pickle')
+        failures = REGISTRY.get_sample_value('hired_model_reload_failures_total') or 0.0
+        response = client.post('/admin/model/reload', json={'version': 'v3', 'wait': True}, headers=ADMIN_HEADERS)
+        assert response.status_code == 422
+        assert response.get_json()['last_reload']['status'] == 'failed'
+        assert REGISTRY.get_sample_value('hired_model_reload_failures_total') == failures + 1
+        assert app_module.model_registry.active.version == 'v1'
+        assert app_module.model_registry.pointer() == 'v1'
+        assert client.post('/api/predict', json={'vaga': {'titulo_vaga': 'Dev'},
+                                                 'candidato': {'conhecimentos_tecnicos': 'python'}}).status_code == 200
+
+    def test_background_reload(self, hot_swap_app):
+        """Sem 'wait', a carga roda em segundo plano e a resposta é 202."""
+        app_module, client = hot_swap_app
+        response = client.post('/admin/model/reload', json={'version': 'v2'}, headers=ADMIN_HEADERS)
+        assert response.status_code == 202
+        for _ in range(100):
+            if app_module.last_reload.get('status') == 'ok':
+                break
+            time.sleep(0.05)
+        assert app_module.model_registry.active.version == 'v2'
+
+    def test_watcher_follows_pointer(self, hot_swap_app):
+        """Outro worker que altera CURRENT faz este worker trocar de versão."""
+        app_module, _ = hot_swap_app
+        watcher = ModelWatcher(app_module.model_registry, app_module.reload_model, interval=60)
+        watcher.check()
+        assert app_module.model_registry.active.version == 'v1'
+        app_module.model_registry.set_pointer('v2')
+        watcher.check()
+        assert app_module.model_registry.active.version == 'v2'
+
+    def test_admin_requires_token(self, hot_swap_app, monkeypatch):
+        """Endpoints administrativos exigem o token e somem sem ADMIN_TOKEN."""
+        app_module, client = hot_swap_app
+        assert client.post('/admin/model/rollback').status_code == 401
+        assert client.get('/admin/model', headers={'Authorization': 'Bearer errado'}).status_code == 401
+        assert client.get('/admin/model', headers=ADMIN_HEADERS).status_code == 200
+        monkeypatch.setattr(app_module, 'ADMIN_TOKEN', None)
+        assert client.get('/admin/model', headers=ADMIN_HEADERS).status_code == 404
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,96 @@
+import pytest
+import multiprocessing
+import sys
+import os
+
+# Adicionar o diretório da aplicação ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from features import build_features_for_pairs
+from prediction_cache import PredictionCache, prediction_key, prediction_keys
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return tmp_path / "cache.sqlite3"
+
+def write_entry(path, key, value):
+    PredictionCache(path).set(key, value)
+
+class TestPredictionKey:
+    """Testes para a chave canônica do cache."""
+
+    def test_normalized_inputs_share_key(self):
+        """Ordem das chaves, campos extras, ausentes vs '' e caixa que não muda as features dão a mesma chave."""
+        vaga = {"titulo_vaga": "Dev", "nivel_ingles": "Avançado"}
+        reordered = {"nivel_ingles": "AVANÇADO", "titulo_vaga": "DEV", "campo_extra": 1, "areas_atuacao": ""}
+        keys = prediction_keys(build_features_for_pairs([(vaga, {}), (reordered, {"outro": "x"})]), "v1")
+        assert keys[0] == keys[1]
+
+    def test_model_version_and_features_change_key(self):
+        """Outra versão de modelo ou outra linha de features gera outra chave."""
+        vaga = {"titulo_vaga": "Dev", "nivel_ingles": "Fluente"}
+        features = build_features_for_pairs([(vaga, {"nivel_ingles": "Básico"}), (vaga, {"nivel_ingles": "Fluente"}),
+                                              ({"titulo_vaga": "Dev", "areas_atuacao": "TI"}, {})])
+        keys = prediction_keys(features, "v1")
+        assert len(set(keys)) == 3
+        assert keys[0] == prediction_key(features.iloc[0].to_dict(), "v1")
+        assert keys[0] != prediction_keys(features, "v2")[0]
+
+class TestPredictionCache:
+    """Testes para o cache SQLite compartilhado."""
+
+    def test_roundtrip_and_stats(self, cache_path):
+        """Valores voltam iguais e os totais acompanham inserções e atualizações."""
+        cache = PredictionCache(cache_path)
+        cache.set_many([("a", {"prediction": 1, "probability": [0.25, 0.75]}), ("b", {"x": "ç"})])
+        cache.set("a", {"prediction": 0, "probability": [0.9, 0.1]})
+        assert cache.get_many(["a", "b", "c"]) == {
+            "a": {"prediction": 0, "probability": [0.9, 0.1]},
+            "b": {"x": "ç"}
+        }
+        stats = cache.stats()
+        assert stats["entries"] == 2
+        assert stats["bytes"] > 0
+        cache.clear()
+        assert cache.stats() == {"entries": 0, "bytes": 0}
+
+    def test_ttl_expiration(self, cache_path):
+        """Entradas expiradas viram miss e são contadas como remoção por TTL."""
+        evictions = []
+        cache = PredictionCache(cache_path, ttl_seconds=-1, on_evict=lambda reason, n: evictions.append((reason, n)))
+        cache.set("a", {"v": 1})
+        assert cache.get("a") is None
+        assert evictions == [("ttl", 1)]
+        assert cache.stats()["entries"] == 0
+
+    def test_lru_eviction_respects_budget(self, cache_path):
+        """Ao estourar o orçamento, as entradas menos usadas recentemente saem primeiro."""
+        evictions = []
+        cache = PredictionCache(cache_path, max_bytes=10_000, on_evict=lambda reason, n: evictions.append(reason))
+        cache.set_many([(f"k{i}", {"payload": "x" * 100}) for i in range(60)])
+        cache.get("k0")  # k0 passa a ser a mais recente
+        cache.set_many([(f"n{i}", {"payload": "x" * 100}) for i in range(40)])
+        assert cache.stats()["bytes"] <= 10_000
+        assert "lru" in evictions
+        assert cache.get("k0") is not None
+        assert cache.get("k1") is None
+
+    def test_shared_between_processes(self, cache_path):
+        """Uma entrada gravada por outro processo (worker) é lida por este."""
+        cache = PredictionCache(cache_path)
+        cache.stats()  # conexão aberta antes do fork, como no preload do gunicorn
+        process = multiprocessing.get_context("fork").Process(
+            target=write_entry, args=(cache_path, "chave", {"prediction": 1}))
+        process.start()
+        process.join(10)
+        assert process.exitcode == 0
+        assert cache.get("chave") == {"prediction": 1}
+
+    def test_unavailable_cache_is_a_miss(self, tmp_path):
+        """Falha ao abrir o arquivo não impede a operação: leitura vazia, escrita ignorada."""
+        cache = PredictionCache(tmp_path / "inexistente" / "cache.sqlite3")
+        cache.set("a", {"v": 1})
+        assert cache.get("a") is None
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
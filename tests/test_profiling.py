@@ -0,0 +1,148 @@
+import pytest
+import threading
+import time
+import sys
+import os
+
+# Adicionar o diretório da aplicação ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from prometheus_client import REGISTRY, CollectorRegistry, Histogram
+
+from profiling import StageTimer, StackSampler, collapsed_stacks
+
+@pytest.fixture
+def stage_registry():
+    """Registry isolado para o histograma de etapas"""
+    return CollectorRegistry()
+
+@pytest.fixture
+def busy_thread():
+    """Thread registrada como 'requisição' que fica em laço até o fim do teste"""
+    sampler_ready = threading.Event()
+    stop = threading.Event()
+    holder = {}
+
+    def busy_request_loop():
+        holder['sampler'].track()
+        sampler_ready.set()
+        while not stop.is_set():
+            sum(range(1000))
+        holder['sampler'].untrack()
+
+    def start(sampler):
+        holder['sampler'] = sampler
+        thread = threading.Thread(target=busy_request_loop)
+        thread.start()
+        sampler_ready.wait(5)
+        return thread
+
+    yield start
+    stop.set()
+
+@pytest.fixture
+def profiling_app(tmp_path, monkeypatch):
+    """Aplicação com token administrativo, cache vazio e perfis gravados no diretório temporário"""
+    import app as app_module
+    from prediction_cache import PredictionCache
+    monkeypatch.setattr(app_module, 'ADMIN_TOKEN', 'segredo')
+    monkeypatch.setattr(app_module, 'prediction_cache', PredictionCache(tmp_path / 'cache.sqlite3'))
+    monkeypatch.setattr(app_module, 'stack_sampler', StackSampler(tmp_path / 'perfis'))
+    app_module.app.config['TESTING'] = True
+    with app_module.app.test_client() as client:
+        yield app_module, client
+
+ADMIN_HEADERS = {'Authorization': 'Bearer segredo'}
+
+def stage_count(path, stage):
+    return REGISTRY.get_sample_value('hired_model_stage_duration_seconds_count', {'path': path, 'stage': stage}) or 0.0
+
+class TestStageTimer:
+    """Testes do temporizador de etapas."""
+
+    def test_accumulates_and_observes_once_per_stage(self, stage_registry):
+        """Etapas repetidas somam na mesma observação; observe() zera o acumulado."""
+        histogram = Histogram('etapas_seconds', 'Etapas', ['path', 'stage'], registry=stage_registry)
+        timer = StageTimer(histogram, 'rank')
+        for _ in range(3):
+            with timer.stage('features'):
+                time.sleep(0.001)
+        with timer.stage('forest'):
+            pass
+        timer.observe()
+        labels = {'path': 'rank', 'stage': 'features'}
+        assert stage_registry.get_sample_value('etapas_seconds_count', labels) == 1
+        assert stage_registry.get_sample_value('etapas_seconds_sum', labels) >= 0.003
+        assert stage_registry.get_sample_value('etapas_seconds_count', {'path': 'rank', 'stage': 'forest'}) == 1
+        assert timer.durations == {}
+
+    def test_without_histogram_only_measures(self):
+        """Sem histograma, o temporizador mede e observe() não faz nada."""
+        timer = StageTimer()
+        with timer.stage('parse'):
+            pass
+        timer.observe()
+        assert list(timer.durations) == ['parse']
+
+class TestStackSampler:
+    """Testes do profiling por amostragem."""
+
+    def test_samples_request_threads(self, tmp_path, busy_thread):
+        """Só as threads registradas aparecem, e o perfil fica gravado para outros workers."""
+        sampler = StackSampler(tmp_path, keep=2)
+        busy_thread(sampler)
+        profile = sampler.run(0.2, interval=0.002)
+        assert profile['samples'] > 0
+        assert any(f['function'].startswith('busy_request_loop') for f in profile['functions'])
+        assert all('busy_request_loop' in stack for stack in profile['stacks'])
+        assert sampler.saved() == [profile['id']]
+        assert sampler.load(profile['id'])['samples'] == profile['samples']
+        assert collapsed_stacks(profile).splitlines()[0].rsplit(' ', 1)[1].isdigit()
+
+    def test_one_profile_at_a_time(self, tmp_path):
+        """Um segundo profiling no mesmo processo é recusado enquanto o primeiro roda."""
+        sampler = StackSampler(tmp_path)
+        thread = threading.Thread(target=sampler.run, args=(0.3,))
+        thread.start()
+        time.sleep(0.05)
+        with pytest.raises(RuntimeError):
+            sampler.run(0.1)
+        thread.join()
+
+class TestStageMetricsEndpoints:
+    """Histogramas de etapas nos endpoints e o endpoint de profiling."""
+
+    def test_unified_and_direct_paths_observe_stages(self, profiling_app):
+        """Cada caminho de /api/predict registra as suas etapas."""
+        app_module, client = profiling_app
+        vaga, candidato = app_module.WARMUP_PAIR
+        before = {stage: stage_count('unified', stage) for stage in ('parse', 'cache', 'features', 'transform',
+                                                                    'forest', 'response')}
+        assert client.post('/api/predict', json={'vaga': vaga, 'candidato': candidato}).status_code == 200
+        for stage, count in before.items():
+            assert stage_count('unified', stage) == count + 1, stage
+
+        direct = app_module.prepare_hired_candidates_features(vaga, candidato).iloc[0].to_dict()
+        direct.update({'tech_match_score': 0.5, 'area_de_atuacao': 'TI', 'academic_match': 1, 'english_match': 1})
+        forest = stage_count('direct', 'forest')
+        assert client.post('/api/predict', json=direct).status_code == 200
+        assert stage_count('direct', 'forest') == forest + 1
+
+    def test_profile_endpoint(self, profiling_app):
+        """O endpoint exige token, valida a duração e devolve/guarda o perfil agregado."""
+        app_module, client = profiling_app
+        assert client.post('/admin/profile', json={'seconds': 0.1}).status_code == 401
+        assert client.post('/admin/profile', json={'seconds': 0}, headers=ADMIN_HEADERS).status_code == 400
+        response = client.post('/admin/profile', json={'seconds': 0.1, 'wait': True}, headers=ADMIN_HEADERS)
+        assert response.status_code == 200
+        profile = response.get_json()
+        assert {'samples', 'functions', 'stacks'} <= profile.keys()
+
+        listing = client.get('/admin/profile', headers=ADMIN_HEADERS).get_json()
+        assert listing['profiles'] == [profile['id']]
+        collapsed = client.get(f"/admin/profile/{profile['id']}?format=collapsed", headers=ADMIN_HEADERS)
+        assert collapsed.mimetype == 'text/plain'
+        assert client.get('/admin/profile/inexistente', headers=ADMIN_HEADERS).status_code == 404
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,127 @@
+import pytest
+import json
+import sys
+import os
+import pandas as pd
+
+# Adicionar os diretórios da aplicação e dos benchmarks ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+import score as score_module
+from data_store import open_store
+from ingest import apply_delta
+from train import train
+from synthetic_data import generate
+
+@pytest.fixture(scope='module')
+def scoring_setup(tmp_path_factory):
+    """Dataset sintético pequeno e um modelo treinado sobre ele"""
+    data_dir = tmp_path_factory.mktemp('dados')
+    generate(data_dir, n_vagas=40, n_applicants=90, seed=7, cv_words=10)
+    models_dir = data_dir / 'modelos'
+    train(data_dir, models_dir, n_jobs=1, n_estimators=5)
+    return data_dir, models_dir
+
+def read_parts(output_dir):
+    parts = sorted(output_dir.glob('part-*.csv'))
+    return pd.concat([pd.read_csv(part, dtype={'codigo_vaga': str, 'codigo_candidato': str}) for part in parts],
+                     ignore_index=True)
+
+def score(scoring_setup, output_dir, **kwargs):
+    data_dir, models_dir = scoring_setup
+    options = {'n_jobs': 1, 'chunk_rows': 50, 'engine_name': 'sklearn'}
+    options.update(kwargs)
+    return score_module.score_all(data_dir, output_dir, models_dir, **options)
+
+class TestScore:
+    """Testes da pontuação em massa."""
+
+    def test_pool_matches_single_process(self, scoring_setup, tmp_path):
+        """O pool grava as mesmas linhas, em blocos na ordem do prospects.json, que um processo só."""
+        single = score(scoring_setup, tmp_path / 'um')
+        pooled = score(scoring_setup, tmp_path / 'pool', n_jobs=2)
+        assert single['rows'] == pooled['rows'] > 0
+        assert len(single['completed']) > 1
+
+        expected, result = read_parts(tmp_path / 'um'), read_parts(tmp_path / 'pool')
+        assert len(expected) == single['rows']
+        pd.testing.assert_frame_equal(result, expected)
+        assert set(expected['prediction']) <= {0, 1}
+        assert expected['probability_high_quality'].between(0, 1).all()
+
+    def test_compiled_text_vectors_match_sklearn(self, scoring_setup, tmp_path, monkeypatch):
+        """O motor compilado com o TF-IDF decomposto grava as mesmas probabilidades que o sklearn."""
+        monkeypatch.setattr(score_module, 'shared_memory_dir', lambda: str(tmp_path / 'shm'))
+        score(scoring_setup, tmp_path / 'sklearn')
+        score(scoring_setup, tmp_path / 'compilado', engine_name='compiled', n_jobs=2)
+        assert list((tmp_path / 'shm').rglob('text.json'))
+        pd.testing.assert_frame_equal(read_parts(tmp_path / 'compilado'), read_parts(tmp_path / 'sklearn'))
+
+    def test_resume_skips_completed_chunks(self, scoring_setup, tmp_path, monkeypatch):
+        """Uma execução interrompida continua do primeiro bloco não concluído."""
+        output_dir = tmp_path / 'scores'
+        original = score_module.score_chunk
+        scored = []
+
+        def interrupted(index, *args):
+            if index == 2:
+                raise KeyboardInterrupt
+            scored.append(index)
+            return original(index, *args)
+
+        monkeypatch.setattr(score_module, 'score_chunk', interrupted)
+        with pytest.raises(KeyboardInterrupt):
+            score(scoring_setup, output_dir)
+        assert scored == [0, 1]
+        progress = json.loads((output_dir / score_module.PROGRESS_FILE).read_text(encoding='utf-8'))
+        assert sorted(progress['completed']) == ['0', '1']
+
+        def resumed(index, *args):
+            scored.append(index)
+            return original(index, *args)
+
+        monkeypatch.setattr(score_module, 'score_chunk', resumed)
+        progress = score(scoring_setup, output_dir)
+        assert 0 not in scored[2:] and 1 not in scored[2:]
+        assert progress['rows'] == len(read_parts(output_dir)) == score(scoring_setup, tmp_path / 'completo')['rows']
+
+    def test_changed_parameters_require_restart(self, scoring_setup, tmp_path):
+        """Retomar com outro tamanho de bloco é recusado; --restart recomeça do zero."""
+        output_dir = tmp_path / 'scores'
+        score(scoring_setup, output_dir)
+        with pytest.raises(ValueError, match='--restart'):
+            score(scoring_setup, output_dir, chunk_rows=70)
+        progress = score(scoring_setup, output_dir, chunk_rows=70, restart=True)
+        assert progress['chunk_rows'] == 70
+        assert len(list(output_dir.glob('part-*.csv'))) == len(progress['completed'])
+
+    def test_prospect_deltas_scored(self, tmp_path):
+        """Prospecções de um delta são pontuadas e mudam a versão do store: a retomada exige --restart."""
+        data_dir = tmp_path / 'dados'
+        generate(data_dir, n_vagas=20, n_applicants=40, seed=3, cv_words=10)
+        models_dir = data_dir / 'modelos'
+        train(data_dir, models_dir, n_jobs=1, n_estimators=5)
+        before = score((data_dir, models_dir), tmp_path / 'antes')
+
+        tables = open_store(data_dir / 'store')
+        codigo_vaga = tables['vagas'].codes([0])[0]
+        candidates = tables['applicants'].codes([0, 1, 2])
+        prospects = [{'codigo': codigo, 'situacao_candidado': 'Encaminhado ao Requisitante'} for codigo in candidates]
+        delta = tmp_path / 'delta.ndjson'
+        delta.write_text(json.dumps({'table': 'prospects', 'codigo': codigo_vaga,
+                                     'data': {'prospects': prospects}}) + '\n', encoding='utf-8')
+        apply_delta(data_dir / 'store', delta)
+
+        with pytest.raises(ValueError, match='inputs'):
+            score((data_dir, models_dir), tmp_path / 'antes')
+        after = score((data_dir, models_dir), tmp_path / 'depois', n_jobs=2)
+        result = read_parts(tmp_path / 'depois')
+        rows = result[result['codigo_vaga'] == codigo_vaga]
+        assert rows['codigo_candidato'].tolist() == candidates
+        assert (rows['situacao_candidado'] == 'Encaminhado ao Requisitante').all()
+        previous = read_parts(tmp_path / 'antes')
+        assert after['rows'] == len(result) == before['rows'] - (previous['codigo_vaga'] == codigo_vaga).sum() + 3
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,61 @@
+import pytest
+import json
+import sys
+import os
+
+# Adicionar os diretórios da aplicação e dos benchmarks ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+from data_store import DataStore
+from ingest import build_store
+from synthetic_data import generate, make_api_pairs
+from run_suite import compare
+
+@pytest.fixture
+def synthetic_dir(tmp_path):
+    """Dataset sintético pequeno gravado no diretório temporário"""
+    generate(tmp_path, n_vagas=12, n_applicants=30, seed=3, cv_words=20)
+    return tmp_path
+
+def report(**metrics):
+    return {'results': {'http': {'predict': metrics}}}
+
+class TestSyntheticData:
+    """Testes do gerador de dados sintéticos e da comparação de relatórios."""
+
+    def test_deterministic_nested_schema(self, synthetic_dir, tmp_path_factory):
+        """A mesma seed gera os mesmos arquivos, no formato lido por json.load."""
+        other = tmp_path_factory.mktemp("outra")
+        generate(other, n_vagas=12, n_applicants=30, seed=3, cv_words=20)
+        for name in ('vagas', 'applicants', 'prospects'):
+            assert (synthetic_dir / f'{name}.json').read_bytes() == (other / f'{name}.json').read_bytes()
+
+        vagas = json.loads((synthetic_dir / 'vagas.json').read_text(encoding='utf-8'))
+        prospects = json.loads((synthetic_dir / 'prospects.json').read_text(encoding='utf-8'))
+        assert list(vagas) == [str(i) for i in range(12)]
+        assert vagas['0']['perfil_vaga']['competencia_tecnicas_e_comportamentais']
+        assert all(0 <= int(p['codigo']) < 30 for vaga in prospects.values() for p in vaga['prospects'])
+
+    def test_ingest_and_api_pairs(self, synthetic_dir):
+        """Os arquivos passam pela ingestão e os pares da API vêm dos mesmos registros."""
+        manifest = build_store(synthetic_dir, synthetic_dir / 'store')
+        assert manifest['sources']['vagas']['rows'] == 12
+        assert manifest['sources']['applicants']['rows'] == 30
+
+        store = DataStore.load(store_dir=synthetic_dir / 'store')
+        applicants = {record['nome']: record for record in store.applicant_records(range(store.n_applicants))}
+        for vaga, candidato in make_api_pairs(5, 12, 30, seed=3):
+            assert vaga in store.vagas.records(range(store.vagas.n_rows))
+            assert applicants[candidato['nome']] == candidato
+
+    def test_compare_flags_regressions(self):
+        """Latência maior ou vazão menor além do limite contam como regressão; melhoras não."""
+        baseline = report(p50_ms=10.0, p99_ms=20.0, throughput_rps=100.0, errors=0)
+        rows, regressions = compare(baseline, report(p50_ms=13.0, p99_ms=15.0, throughput_rps=79.0, errors=5), 0.2)
+        assert regressions == ['http.predict.p50_ms', 'http.predict.throughput_rps']
+        assert [key for key, *_ in rows] == ['http.predict.p50_ms', 'http.predict.p99_ms',
+                                             'http.predict.throughput_rps']
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,156 @@
+import pytest
+import sys
+import os
+import numpy as np
+
+# Adicionar o diretório da aplicação ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from data_store import VAGA_FIELDS, APPLICANT_FIELDS, ColumnarTable, StringColumn
+from features import VAGA_INPUTS, compute_features
+from inference import CompiledPipeline, NotCompilableError
+from text_vectors import PairTextVectors, find_text_vectorizer
+from test_inference import fit_pipeline, make_features
+
+# Partes com os casos de fronteira do texto combinado: vazias, só espaços, 'nan',
+# maiúsculas, pontuação e bigramas que só existem cruzando vaga e candidato
+TITULOS = ['Desenvolvedor Python', '', 'nan', '  ', 'Analista SAP', 'DADOS']
+COMPETENCIAS = ['python django sql', '', 'java spring', 'sap abap, excel', 'NAN', 'sql docker']
+CONHECIMENTOS = ['python flask', '', 'nan', ' ', 'docker aws python', 'excel sap', 'Spring Java', 'sql']
+AREAS = ['TI - Desenvolvimento/Programação', '', 'nan', 'Administrativa', 'ti sap']
+
+
+def grid_tables():
+    """Vagas e candidatos com todas as combinações das partes de texto"""
+    vagas = [
+        {'titulo_vaga': titulo, 'competencias_tecnicas_requeridas': competencias, 'areas_atuacao': area}
+        for titulo in TITULOS for competencias in COMPETENCIAS for area in AREAS
+    ]
+    applicants = [{'conhecimentos_tecnicos': conhecimentos} for conhecimentos in CONHECIMENTOS]
+    return (ColumnarTable.from_records([str(i) for i in range(len(vagas))], vagas, VAGA_FIELDS),
+            ColumnarTable.from_records([str(i) for i in range(len(applicants))], applicants, APPLICANT_FIELDS))
+
+
+def all_pairs(vagas, applicants):
+    """Posições de todos os pares e o combined_text de cada um (features.py)"""
+    vaga_positions = np.repeat(np.arange(vagas.n_rows), applicants.n_rows)
+    applicant_positions = np.tile(np.arange(applicants.n_rows), vagas.n_rows)
+    vaga_columns = {field: vagas.column(field).take(vaga_positions) for field in VAGA_INPUTS}
+    applicant_columns = {field: applicants.column(field).take(applicant_positions) for field in applicants.fields}
+    texts = compute_features(vaga_columns, applicant_columns, len(vaga_positions))['combined_text'].tolist()
+    return vaga_positions, applicant_positions, texts
+
+@pytest.fixture(scope="module")
+def tables():
+    return grid_tables()
+
+@pytest.fixture(scope="module")
+def pairs(tables):
+    return all_pairs(*tables)
+
+class TestDecomposedTfidf:
+    """TF-IDF de pares a partir das contagens de vagas e candidatos."""
+
+    @pytest.mark.parametrize("params", [
+        {},
+        {'sublinear_tf': True},
+        {'norm': 'l1', 'use_idf': False},
+        {'binary': True, 'norm': None},
+        {'ngram_range': (1, 1)},
+        {'ngram_range': (2, 2)},
+        {'stop_words': ['sql', 'ti']}
+    ])
+    def test_matches_vectorizer(self, tables, pairs, params):
+        """Matriz idêntica à do vetorizador sobre o texto combinado, inclusive nos casos NOT_INFORMED."""
+        vaga_positions, applicant_positions, texts = pairs
+        vectorizer = TfidfVectorizer(**{'ngram_range': (1, 2), **params}).fit(texts)
+        vectors = PairTextVectors.build(vectorizer, *tables)
+        actual = vectors.transform(vaga_positions, applicant_positions)
+        np.testing.assert_array_equal(actual.toarray(), vectorizer.transform(texts).toarray())
+
+    def test_unfitted_terms_and_max_features(self, tables, pairs):
+        """Vocabulário reduzido (max_features) e ajustado em outros textos: termos fora dele não contam."""
+        vaga_positions, applicant_positions, texts = pairs
+        vectorizer = TfidfVectorizer(ngram_range=(1, 2), max_features=12).fit(texts[::7])
+        vectors = PairTextVectors.build(vectorizer, *tables)
+        np.testing.assert_array_equal(vectors.transform(vaga_positions, applicant_positions).toarray(),
+                                      vectorizer.transform(texts).toarray())
+
+    def test_not_decomposable(self, pairs):
+        """Analyzers cujos tokens atravessam as partes são rejeitados."""
+        texts = pairs[2]
+        for vectorizer in (TfidfVectorizer(analyzer='char').fit(texts),
+                           TfidfVectorizer(ngram_range=(1, 3)).fit(texts)):
+            with pytest.raises(NotCompilableError):
+                PairTextVectors.build(vectorizer, *grid_tables())
+
+class TestCompiledText:
+    """Motor compilado com a matriz de texto pronta."""
+
+    def test_transform_with_text_matches(self):
+        """transform com a matriz decomposta é igual ao transform sobre o combined_text."""
+        pipeline = fit_pipeline(make_features(300, seed=0))
+        vagas, applicants = grid_tables()
+        vaga_positions, applicant_positions, _ = all_pairs(vagas, applicants)
+        vaga_columns = {field: vagas.column(field).take(vaga_positions) for field in VAGA_INPUTS}
+        applicant_columns = {field: applicants.column(field).take(applicant_positions) for field in applicants.fields}
+        features = compute_features(vaga_columns, applicant_columns, len(vaga_positions))
+        without_text = compute_features(vaga_columns, applicant_columns, len(vaga_positions), combined_text=False)
+        assert without_text['combined_text'].isna().all()
+
+        compiled = CompiledPipeline(pipeline)
+        vectors = PairTextVectors.build(find_text_vectorizer(pipeline), vagas, applicants)
+        text = vectors.transform(vaga_positions, applicant_positions)
+        np.testing.assert_array_equal(compiled.transform(without_text, text), compiled.transform(features))
+        np.testing.assert_array_equal(compiled.predict_proba(without_text, text), pipeline.predict_proba(features))
+
+class TestSharedCounts:
+    """Contagens exportadas e mapeadas em memória."""
+
+    def test_memory_mapped_counts_match(self, tables, pairs, tmp_path):
+        """A segunda abertura mapeia o export; outro conteúdo do store usa outro diretório."""
+        vaga_positions, applicant_positions, texts = pairs
+        vectorizer = TfidfVectorizer(ngram_range=(1, 2)).fit(texts)
+        first = PairTextVectors.shared(vectorizer, *tables, tmp_path / 'texto')
+        second = PairTextVectors.shared(vectorizer, *tables, tmp_path / 'texto')
+        assert not second.parts['middle'].counts.data.flags.writeable
+        assert second.covers(*tables) and not second.covers(*grid_tables())
+        expected = vectorizer.transform(texts).toarray()
+        np.testing.assert_array_equal(first.transform(vaga_positions, applicant_positions).toarray(), expected)
+        np.testing.assert_array_equal(second.transform(vaga_positions, applicant_positions).toarray(), expected)
+
+        vagas, _ = tables
+        other = ColumnarTable.from_records(['1'], [{'conhecimentos_tecnicos': 'cobol'}], APPLICANT_FIELDS)
+        PairTextVectors.shared(vectorizer, vagas, other, tmp_path / 'texto')
+        assert len(list((tmp_path / 'texto').iterdir())) == 2
+
+    def test_unwritable_directory_keeps_private_copy(self, tables, pairs, tmp_path):
+        """Sem permissão de escrita, as contagens ficam em memória."""
+        vaga_positions, applicant_positions, texts = pairs
+        vectorizer = TfidfVectorizer(ngram_range=(1, 2)).fit(texts)
+        blocker = tmp_path / 'arquivo'
+        blocker.write_text('')
+        vectors = PairTextVectors.shared(vectorizer, *tables, blocker / 'texto')
+        np.testing.assert_array_equal(vectors.transform(vaga_positions, applicant_positions).toarray(),
+                                      vectorizer.transform(texts).toarray())
+
+class TestExtendedCounts:
+    """Contagens estendidas às linhas acrescentadas por deltas."""
+
+    def test_extend_matches_build(self, tables, pairs):
+        """Estender as contagens com as linhas novas equivale a recontar as tabelas inteiras."""
+        vaga_positions, applicant_positions, texts = pairs
+        vagas, applicants = tables
+        vectorizer = TfidfVectorizer(ngram_range=(1, 2)).fit(texts)
+        head = [ColumnarTable({name: StringColumn.from_strings(table.column(name).take(range(rows)))
+                               for name in table.columns}) for table, rows in ((vagas, 40), (applicants, 5))]
+        extended = PairTextVectors.build(vectorizer, *head).extend(vagas, applicants)
+        assert extended.covers(vagas, applicants)
+        assert (extended.n_vagas, extended.n_applicants) == (vagas.n_rows, applicants.n_rows)
+        np.testing.assert_array_equal(extended.transform(vaga_positions, applicant_positions).toarray(),
+                                      vectorizer.transform(texts).toarray())
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,91 @@
+import pytest
+import sys
+import os
+
+# Adicionar o diretório da aplicação ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+import topology
+from topology import Topology, cgroup_cpu_limit, detect_cpus
+
+@pytest.fixture
+def cgroup_files(tmp_path):
+    """Fixture que grava arquivos de cota no formato do cgroup v1/v2"""
+    def write(cpu_max=None, quota=None, period=None):
+        paths = {}
+        for name, content in (('cpu_max', cpu_max), ('quota', quota), ('period', period)):
+            paths[name] = tmp_path / name
+            if content is not None:
+                paths[name].write_text(f"{content}\n")
+        return paths
+    return write
+
+class TestCpuDetection:
+    """Testes para a detecção de CPUs disponíveis."""
+
+    @pytest.mark.parametrize("files, expected", [
+        ({'cpu_max': '200000 100000'}, 2),
+        ({'cpu_max': '150000 100000'}, 2),
+        ({'cpu_max': '50000 100000'}, 1),
+        ({'cpu_max': 'max 100000'}, None),
+        ({'quota': '300000', 'period': '100000'}, 3),
+        ({'quota': '-1', 'period': '100000'}, None),
+        ({'cpu_max': '200000  100000  extra'}, 2),
+        ({'cpu_max': 'abc 100000'}, None),
+        ({'cpu_max': '200000 0'}, None),
+        ({'cpu_max': ''}, None),
+        ({'quota': '', 'period': '100000'}, None),
+        ({'quota': '300000'}, None),
+        ({}, None)
+    ])
+    def test_cgroup_quota(self, cgroup_files, files, expected):
+        """A cota do cgroup v2 (cpu.max) ou v1 (cfs_quota/cfs_period) vira CPUs, arredondando para cima."""
+        assert cgroup_cpu_limit(**cgroup_files(**files)) == expected
+
+    def test_malformed_cgroup_falls_back(self, monkeypatch, cgroup_files):
+        """Arquivo de cota ilegível não derruba a detecção: valem as CPUs visíveis."""
+        paths = cgroup_files(cpu_max='200000.5 100000')
+        monkeypatch.setattr(os, 'sched_getaffinity', lambda pid: set(range(6)))
+        monkeypatch.setattr(topology, 'cgroup_cpu_limit', lambda: cgroup_cpu_limit(**paths))
+        assert detect_cpus() == (6, 'affinity')
+
+    def test_quota_below_affinity_wins(self, monkeypatch):
+        """No container, a cota menor que as CPUs visíveis define o total."""
+        monkeypatch.setattr(os, 'sched_getaffinity', lambda pid: set(range(16)))
+        monkeypatch.setattr(topology, 'cgroup_cpu_limit', lambda: 4)
+        assert detect_cpus() == (4, 'cgroup')
+        monkeypatch.setattr(topology, 'cgroup_cpu_limit', lambda: None)
+        assert detect_cpus() == (16, 'affinity')
+
+class TestTopology:
+    """Testes para a divisão das CPUs entre workers e threads de inferência."""
+
+    @pytest.mark.parametrize("cpus, workers, inference_threads", [(8, 4, 2), (2, 1, 2), (3, 1, 3), (1, 1, 1)])
+    def test_defaults(self, cpus, workers, inference_threads):
+        """Sem configuração: um worker a cada 2 CPUs, com as CPUs dele como threads de inferência."""
+        plan = Topology(cpus)
+        assert (plan.workers, plan.inference_threads, plan.native_threads) == (workers, inference_threads, 1)
+        assert plan.workers * plan.inference_threads <= cpus
+
+    @pytest.mark.parametrize("workers, worker_threads, expected", [(2, 1, 4), (2, 2, 2), (3, 1, 2), (16, 1, 1)])
+    def test_threads_split_between_workers(self, workers, worker_threads, expected):
+        """As CPUs que sobram por requisição simultânea viram threads de inferência."""
+        assert Topology(8, workers=workers, worker_threads=worker_threads).inference_threads == expected
+
+    def test_single_row_stays_single_threaded(self):
+        """Só lotes com pelo menos parallel_min_rows linhas usam as threads de inferência."""
+        plan = Topology(8, workers=2, parallel_min_rows=100)
+        assert plan.threads_for(1) == plan.threads_for(99) == 1
+        assert plan.threads_for(100) == 4
+
+    def test_from_env(self, monkeypatch):
+        """Variáveis explícitas têm precedência sobre as derivadas das CPUs."""
+        monkeypatch.setattr(topology, 'detect_cpus', lambda: (8, 'cgroup'))
+        plan = Topology.from_env({'GUNICORN_WORKERS': '2', 'INFERENCE_THREADS': '3', 'PARALLEL_MIN_ROWS': '64'})
+        assert plan.to_dict() == {'cpus': 8, 'cpu_source': 'cgroup', 'workers': 2, 'worker_threads': 1,
+                                  'inference_threads': 3, 'native_threads': 1, 'parallel_min_rows': 64}
+        assert Topology.from_env({}, default_workers=1).inference_threads == 8
+        assert Topology.from_env({'NATIVE_THREADS': '2'}).native_env()['OMP_NUM_THREADS'] == '2'
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,125 @@
+import pytest
+import json
+import sys
+import os
+import joblib
+import pandas as pd
+
+# Adicionar os diretórios da aplicação e dos benchmarks ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+import train as train_module
+from data_store import open_store
+from features import FEATURE_COLUMNS, build_training_features
+from ingest import build_store, apply_delta, compact_store
+from synthetic_data import generate
+
+@pytest.fixture
+def training_data(tmp_path):
+    """Dataset sintético pequeno com o armazenamento colunar já gerado"""
+    generate(tmp_path, n_vagas=40, n_applicants=90, seed=5, cv_words=10)
+    build_store(tmp_path, tmp_path / 'store')
+    return tmp_path
+
+def notebook_training_table(store_dir):
+    """Join e features como no notebook (merges pandas sobre o store e build_training_features)"""
+    tables = open_store(store_dir)
+    prospects = tables['prospects'].to_frame()
+    hired = prospects[prospects['situacao_candidado'].str.lower().str.contains('contrat|aprovado|aceito|hunting')]
+    vagas = tables['vagas'].to_frame().rename(columns={
+        'codigo': 'codigo_vaga', 'competencias_tecnicas_requeridas': 'competencias_tecnicas',
+        'nivel_academico': 'nivel_academico_vaga', 'nivel_ingles': 'nivel_ingles_vaga'})
+    candidates = tables['applicants'].to_frame().rename(columns={
+        'codigo': 'codigo_candidato', 'area_de_atuacao': 'area_atuacao_candidato',
+        'nivel_academico': 'nivel_academico_candidato', 'nivel_ingles': 'nivel_ingles_candidato'})
+    df = hired.merge(vagas, on='codigo_vaga', how='inner').merge(candidates, on='codigo_candidato', how='inner')
+    return build_training_features(df.reset_index(drop=True))
+
+class TestTrain:
+    """Testes do treinamento offline."""
+
+    def test_parallel_table_matches_notebook(self, training_data):
+        """Os blocos processados no pool geram a mesma tabela do join do notebook."""
+        table = train_module.build_training_table(training_data / 'store', n_jobs=2, chunk_vagas=3)
+        expected = notebook_training_table(training_data / 'store')
+        assert len(table) == len(expected) > 0
+        pd.testing.assert_frame_equal(table[FEATURE_COLUMNS], expected[FEATURE_COLUMNS], check_dtype=False)
+
+    def test_train_writes_model_and_reuses_cache(self, training_data, tmp_path, monkeypatch):
+        """O treino grava modelo e metadados; com as mesmas entradas a extração é pulada."""
+        models_dir = tmp_path / 'modelos'
+        metadata = train_module.train(training_data, models_dir, n_jobs=1, n_estimators=5)
+        assert metadata['feature_cache'] == 'miss'
+        assert set(metadata['timings']) == {'store', 'hash', 'features', 'fit', 'evaluate', 'save'}
+        saved = json.loads((models_dir / 'metadata_candidatos_contratados.json').read_text(encoding='utf-8'))
+        assert saved['n_samples'] == metadata['n_samples']
+        pipeline = joblib.load(models_dir / 'pipeline_candidatos_contratados.joblib')
+        assert pipeline.named_steps['classifier'].n_estimators == 5
+
+        def fail(*args, **kwargs):
+            raise AssertionError('a tabela deveria vir do cache')
+
+        monkeypatch.setattr(train_module, 'build_training_table', fail)
+        assert train_module.train(training_data, models_dir, n_jobs=1, n_estimators=5)['feature_cache'] == 'hit'
+
+        monkeypatch.undo()
+        with open(training_data / 'prospects.json', 'a', encoding='utf-8') as f:
+            f.write('\n')
+        assert train_module.train(training_data, models_dir, n_jobs=1, n_estimators=5)['feature_cache'] == 'miss'
+
+    def test_deltas_change_cache_key_and_table(self, training_data, tmp_path):
+        """Um delta aplicado ao store invalida o cache e entra na tabela de treino."""
+        models_dir = tmp_path / 'modelos'
+        store_dir = training_data / 'store'
+        first = train_module.train(training_data, models_dir, n_jobs=1, n_estimators=5)
+        applicants = open_store(store_dir)['applicants']
+        codes = applicants.codes(applicants.live_positions())
+        delta = tmp_path / 'delta.ndjson'
+        with open(delta, 'w', encoding='utf-8') as f:
+            for codigo in codes:
+                data = {'informacoes_profissionais': {'conhecimentos_tecnicos': 'cobol, fortran'}}
+                f.write(json.dumps({'table': 'applicants', 'codigo': codigo, 'data': data}) + '\n')
+        apply_delta(store_dir, delta)
+
+        second = train_module.train(training_data, models_dir, n_jobs=1, n_estimators=5)
+        assert second['feature_cache'] == 'miss' and second['input_hash'] != first['input_hash']
+        table = train_module.build_training_table(store_dir, n_jobs=2, chunk_vagas=3)
+        assert table['combined_text'].str.contains('cobol, fortran').all() and (table['tech_success_score'] == 0).all()
+        assert train_module.train(training_data, models_dir, n_jobs=1, n_estimators=5)['feature_cache'] == 'hit'
+
+        compact_store(store_dir)
+        assert train_module.train(training_data, models_dir, n_jobs=1, n_estimators=5)['feature_cache'] == 'miss'
+
+    def test_prospect_deltas_in_table(self, training_data, tmp_path):
+        """Prospecções de um delta (lista de uma vaga substituída) entram na tabela de treino."""
+        store_dir = training_data / 'store'
+        tables = open_store(store_dir)
+        codigo_vaga = tables['vagas'].codes([0])[0]
+        candidates = tables['applicants'].codes([0, 1, 2])
+        delta = tmp_path / 'delta.ndjson'
+        prospects = [{'codigo': codigo, 'situacao_candidado': 'Contratado pela Decision'} for codigo in candidates]
+        delta.write_text(json.dumps({'table': 'prospects', 'codigo': codigo_vaga,
+                                     'data': {'prospects': prospects}}) + '\n', encoding='utf-8')
+        apply_delta(store_dir, delta)
+
+        table = train_module.build_training_table(store_dir, n_jobs=1, chunk_vagas=3)
+        rows = table[table['id_vaga'] == codigo_vaga]
+        assert rows['codigo_candidato'].tolist() == candidates
+        pd.testing.assert_frame_equal(table[FEATURE_COLUMNS], notebook_training_table(store_dir)[FEATURE_COLUMNS],
+                                      check_dtype=False)
+
+    def test_store_with_deltas_not_rebuilt(self, training_data, tmp_path):
+        """JSONs novos não regeram (descartando os deltas) um store com deltas aplicados."""
+        delta = tmp_path / 'delta.ndjson'
+        delta.write_text(json.dumps({'table': 'applicants', 'codigo': '999999', 'data': {}}) + '\n', encoding='utf-8')
+        apply_delta(training_data / 'store', delta)
+        with open(training_data / 'prospects.json', 'a', encoding='utf-8') as f:
+            f.write('\n')
+        with pytest.raises(RuntimeError, match='ingest.py build'):
+            train_module.train(training_data, tmp_path / 'modelos', n_jobs=1, n_estimators=5)
+        assert len(open_store(training_data / 'store')['applicants'].superseded) == 0
+        assert open_store(training_data / 'store')['applicants'].position_of('999999') is not None
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])